@@ -3,9 +3,9 @@
 # Built with Google Agent Development Kit (ADK)
 
 import os
+import sys
 from pathlib import Path
 from typing import Dict, Any, List
-from PIL import Image
 import PyPDF2
 import google.generativeai as genai
 from dotenv import load_dotenv
@@ -13,6 +13,15 @@ from dotenv import load_dotenv
 # Load environment variables from .env file (in parent directory)
 load_dotenv(Path(__file__).parent.parent / '.env')
 
+# Shared helpers live in the main package
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents.image_agent import encode_image
+from backends import blob_part, create_backend
+from utils.circuit_breaker import ModelFallbackChain
+from utils.file_types import detect
+from utils.inputs import describe_source, is_path, open_source
+
 # ADK imports - will be added after installation verification
 try:
     from google.adk.agents.llm_agent import Agent
@@ -26,6 +35,24 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 if GOOGLE_API_KEY:
     genai.configure(api_key=GOOGLE_API_KEY)
 
+# Model backend: gemini (default) or stub, optionally recorded to / replayed
+# from a cassette file (MODEL_BACKEND, CASSETTE_PATH, CASSETTE_MODE)
+MODEL_BACKEND = create_backend(
+    os.getenv("MODEL_BACKEND", "gemini"),
+    cassette_path=os.getenv("CASSETTE_PATH"),
+    cassette_mode=os.getenv("CASSETTE_MODE", "replay")
+)
+
+# Vision model chain: primary first, then FALLBACK_MODELS (comma-separated).
+# Each model has a circuit breaker, so a failing primary is skipped at once.
+IMAGE_MODEL_CHAIN = ModelFallbackChain(
+    ["gemini-1.5-flash"] + [
+        m.strip() for m in os.getenv("FALLBACK_MODELS", "gemini-2.0-flash-exp").split(",")
+        if m.strip()
+    ],
+    model_factory=MODEL_BACKEND.bind
+)
+
 
 # ============================================================================
 # TOOL 1: Image Description Tool (for ADK)
@@ -39,27 +66,25 @@ def generate_image_description_tool(image_path: str, detail_level: str = "concis
     by generating descriptive alt-text suitable for screen readers.
 
     Args:
-        image_path: Path to the image file
+        image_path: Path to the image file (bytes, memoryview or a binary
+            file-like object also work when called directly)
         detail_level: Level of detail - "concise" (2-3 sentences) or "detailed" (comprehensive)
 
     Returns:
         Dictionary with success status, alt-text, and metadata
     """
+    source = image_path
+    if not is_path(image_path):
+        image_path = describe_source(image_path)
     try:
         # Validate file exists
-        if not os.path.exists(image_path):
+        if is_path(source) and not os.path.exists(source):
             return {
                 "success": False,
                 "error": f"File not found: {image_path}",
                 "image_path": image_path
             }
 
-        # Load image
-        image = Image.open(image_path)
-
-        # Configure Gemini model with vision capabilities
-        model = genai.GenerativeModel('gemini-1.5-flash')
-
         # Craft prompt based on detail level
         if detail_level == "detailed":
             prompt = """Analyze this image and provide a comprehensive, detailed description suitable
@@ -79,8 +104,11 @@ def generate_image_description_tool(image_path: str, detail_level: str = "concis
 
             Format: 2-3 sentences, clear and concise."""
 
-        # Generate description
-        response = model.generate_content([prompt, image])
+        # Generate description (fails over through the model chain)
+        # Original bytes when already compliant, else scaled and re-encoded
+        mime_type, data, _ = encode_image(source)
+        image_part = blob_part(mime_type, data)
+        response, model_used = IMAGE_MODEL_CHAIN.generate_content([prompt, image_part])
         alt_text = response.text.strip()
 
         return {
@@ -88,7 +116,8 @@ def generate_image_description_tool(image_path: str, detail_level: str = "concis
             "image_path": image_path,
             "alt_text": alt_text,
             "detail_level": detail_level,
-            "character_count": len(alt_text)
+            "character_count": len(alt_text),
+            "model_used": model_used
         }
 
     except FileNotFoundError:
@@ -98,24 +127,11 @@ def generate_image_description_tool(image_path: str, detail_level: str = "concis
             "image_path": image_path
         }
     except Exception as e:
-        error_msg = str(e)
-        # If API issue (quota, model not found, etc.), return demo mode response
-        if any(keyword in error_msg.lower() for keyword in ["429", "quota", "404", "not found", "rate limit"]):
-            return {
-                "success": True,
-                "image_path": image_path,
-                "alt_text": f"A sample image showing typical visual content. In production with active Gemini Vision API access, this would contain intelligent AI-generated alt-text describing the actual image content, colors, objects, people, text, and accessibility-critical details.",
-                "detail_level": detail_level,
-                "character_count": 210,
-                "mode": "DEMO_MODE",
-                "note": "API temporarily unavailable. Code is correct - requires active Gemini API quota."
-            }
-        else:
-            return {
-                "success": False,
-                "error": f"Failed to process image: {error_msg}",
-                "image_path": image_path
-            }
+        return {
+            "success": False,
+            "error": f"Failed to process image: {str(e)}",
+            "image_path": image_path
+        }
 
 
 # ============================================================================
@@ -130,15 +146,19 @@ def extract_pdf_text_tool(pdf_path: str, max_pages: int = 100) -> Dict[str, Any]
     extracting text with page structure preservation.
 
     Args:
-        pdf_path: Path to the PDF file
+        pdf_path: Path to the PDF file (bytes, memoryview or a binary
+            file-like object also work when called directly)
         max_pages: Maximum number of pages to process (safety limit)
 
     Returns:
         Dictionary with success status, extracted text, and statistics
     """
+    source = pdf_path
+    if not is_path(pdf_path):
+        pdf_path = describe_source(pdf_path)
     try:
         # Validate file exists
-        if not os.path.exists(pdf_path):
+        if is_path(source) and not os.path.exists(source):
             return {
                 "success": False,
                 "error": f"File not found: {pdf_path}",
@@ -146,7 +166,7 @@ def extract_pdf_text_tool(pdf_path: str, max_pages: int = 100) -> Dict[str, Any]
             }
 
         # Open PDF
-        with open(pdf_path, 'rb') as file:
+        with open_source(source) as file:
             pdf_reader = PyPDF2.PdfReader(file)
             page_count = len(pdf_reader.pages)
 
@@ -193,36 +213,31 @@ def extract_pdf_text_tool(pdf_path: str, max_pages: int = 100) -> Dict[str, Any]
 
 def detect_file_type_tool(file_path: str) -> Dict[str, Any]:
     """
-    Detect file type based on extension.
+    Detect file type from the file's content (magic bytes), not its name.
 
     Args:
-        file_path: Path to the file
+        file_path: Path to the file (in-memory content also works when
+            called directly)
 
     Returns:
         Dictionary with file type and metadata
     """
     try:
-        if not os.path.exists(file_path):
+        if is_path(file_path) and not os.path.exists(file_path):
             return {
                 "success": False,
                 "error": f"File not found: {file_path}"
             }
 
-        extension = Path(file_path).suffix.lower()
-
-        # Determine file type
-        if extension in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp']:
-            file_type = "image"
-        elif extension == '.pdf':
-            file_type = "pdf"
-        else:
-            file_type = "unknown"
+        detected = detect(file_path)
 
         return {
             "success": True,
-            "file_path": file_path,
-            "file_type": file_type,
-            "extension": extension
+            "file_path": file_path if is_path(file_path) else describe_source(file_path),
+            "file_type": detected["file_type"] if detected else "unknown",
+            "format": detected["format"] if detected else None,
+            "mime_type": detected["mime_type"] if detected else None,
+            "extension": Path(file_path).suffix.lower() if is_path(file_path) else None
         }
 
     except Exception as e:
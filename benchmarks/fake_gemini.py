@@ -0,0 +1,113 @@
+"""
+Deterministic local stand-in for the Gemini API, used by the benchmarks.
+
+FakeGemini is a ModelBackend whose latency, server errors (503) and rate
+limiting (429) are drawn from a seeded RNG, so two runs with the same
+settings see the same sequence of delays and failures.
+"""
+import random
+import threading
+import time
+
+from google.api_core import exceptions as api_exceptions
+
+from backends import ModelBackend, GenerationResponse
+
+
+class FakeGemini(ModelBackend):
+    """
+    Configurable fake Gemini backend.
+
+    Args:
+        latency: Latency distribution: "fixed", "uniform" or "lognormal"
+        latency_median: Median call latency in seconds
+        latency_spread: Uniform: +/- fraction of the median;
+            lognormal: sigma of the underlying normal
+        error_rate: Fraction of calls failing with a 503
+        rate_limit_rate: Fraction of calls failing with a 429
+        seed: RNG seed (same seed, same sequence)
+        time_scale: Multiplier on every sleep (0 disables sleeping)
+        failing_models: Model names that always fail (to exercise failover)
+    """
+
+    name = "fake-gemini"
+
+    def __init__(self, latency: str = "lognormal", latency_median: float = 0.8,
+                 latency_spread: float = 0.35, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, seed: int = 1234,
+                 time_scale: float = 1.0, failing_models=()):
+        if latency not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {latency}")
+        self.latency = latency
+        self.latency_median = latency_median
+        self.latency_spread = latency_spread
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.time_scale = time_scale
+        self.failing_models = set(failing_models)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.bytes_received = 0
+
+    def _draw(self):
+        """Draw (latency, outcome) for one call under the lock."""
+        with self._lock:
+            self.calls += 1
+            if self.latency == "fixed":
+                delay = self.latency_median
+            elif self.latency == "uniform":
+                spread = self.latency_median * self.latency_spread
+                delay = self._rng.uniform(self.latency_median - spread,
+                                          self.latency_median + spread)
+            else:
+                delay = self._rng.lognormvariate(0.0, self.latency_spread) * self.latency_median
+            roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            outcome = "rate_limited"
+        elif roll < self.rate_limit_rate + self.error_rate:
+            outcome = "error"
+        else:
+            outcome = "ok"
+        return max(delay, 0.0), outcome
+
+    def generate(self, model_name: str, contents, **options) -> GenerationResponse:
+        """Simulate one generate_content call."""
+        delay, outcome = self._draw()
+        if model_name in self.failing_models:
+            outcome = "error"
+
+        payload_bytes = sum(len(part["data"]) for part in contents if isinstance(part, dict))
+        with self._lock:
+            self.bytes_received += payload_bytes
+
+        if self.time_scale:
+            # Failures come back faster than full generations
+            time.sleep(delay * self.time_scale * (0.2 if outcome != "ok" else 1.0))
+
+        if outcome == "rate_limited":
+            with self._lock:
+                self.rate_limited += 1
+            raise api_exceptions.ResourceExhausted("429 Resource has been exhausted (fake)")
+        if outcome == "error":
+            with self._lock:
+                self.errors += 1
+            raise api_exceptions.ServiceUnavailable(f"503 {model_name} unavailable (fake)")
+
+        return GenerationResponse(
+            f"A fake description from {model_name} of a {payload_bytes}-byte image. "
+            "It shows the main subject in the centre with a plain background.",
+            model_name
+        )
+
+    def stats(self) -> dict:
+        """Call counters for the report."""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "rate_limited": self.rate_limited,
+                "bytes_received": self.bytes_received,
+            }
@@ -0,0 +1,315 @@
+"""
+Benchmark suite for AccessibleAI.
+
+Runs the pipeline against the local fake Gemini (fake_gemini.py) so no API
+key or network is needed, and writes a machine-readable JSON report:
+
+    - batch: process_batch throughput and per-file latency percentiles at
+      several worker counts, including 503/429 injection
+    - pdf: pages/sec extracting examples/sample_pdfs
+    - image_preprocess: cost and size of the upload payload (original
+      bytes, or scaled down and re-encoded)
+    - memory: tracemalloc peak for a full batch
+
+Usage:
+    python benchmarks/run_benchmarks.py --output report.json
+    python benchmarks/run_benchmarks.py --quick --compare baseline.json
+
+With --compare, metrics that got worse than the baseline by more than
+--tolerance are listed and the exit code is 1.
+"""
+import argparse
+import io
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from PIL import Image
+
+from agents.coordinator import CoordinatorAgent
+from agents.image_agent import encode_image
+from agents.pdf_agent import PDFProcessingAgent
+from fake_gemini import FakeGemini
+from utils.circuit_breaker import reset_breakers
+
+REPORT_VERSION = 1
+SAMPLE_IMAGES = sorted((ROOT / "examples/sample_images").glob("*.jpg"))
+SAMPLE_PDFS = sorted((ROOT / "examples/sample_pdfs").glob("*.pdf"))
+
+# Metric name suffixes where a larger value is better; everything else
+# (latencies, milliseconds, bytes) is better when smaller
+HIGHER_IS_BETTER = ("_per_sec", "success_rate")
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def latency_summary(seconds) -> dict:
+    """p50/p90/p99/max/mean in milliseconds."""
+    ms = [s * 1000 for s in seconds]
+    return {
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p90_ms": round(percentile(ms, 90), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "max_ms": round(max(ms), 3) if ms else 0.0,
+        "mean_ms": round(statistics.fmean(ms), 3) if ms else 0.0,
+    }
+
+
+def make_coordinator(fake: FakeGemini) -> CoordinatorAgent:
+    """Coordinator wired to the fake backend with one fallback model."""
+    reset_breakers()
+    return CoordinatorAgent(
+        model_name="gemini-2.0-flash-exp",
+        fallback_models=["gemini-1.5-flash"],
+        backend=fake,
+    )
+
+
+def bench_batch(files, workers: int, fake: FakeGemini) -> dict:
+    """Throughput and per-file latency of process_batch."""
+    coordinator = make_coordinator(fake)
+    durations = []
+    process_file = coordinator.process_file
+
+    def timed_process_file(file_path, detailed=False, **kwargs):
+        start = time.perf_counter()
+        try:
+            return process_file(file_path, detailed, **kwargs)
+        finally:
+            durations.append(time.perf_counter() - start)
+
+    # process_batch looks process_file up on the instance
+    coordinator.process_file = timed_process_file
+
+    start = time.perf_counter()
+    batch = coordinator.process_batch(files, max_workers=workers)
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "files": len(files),
+        "workers": workers,
+        "wall_seconds": round(elapsed, 4),
+        "throughput_files_per_sec": round(len(files) / elapsed, 3),
+        "success_rate": round(batch["successful"] / len(files), 4),
+        "latency": latency_summary(durations),
+        "fake_backend": fake.stats(),
+    }
+    return result
+
+
+def bench_pdf(pdf_files, repeats: int) -> dict:
+    """Pages per second for local PDF text extraction."""
+    agent = PDFProcessingAgent()
+    pages = 0
+    per_file = []
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for pdf_path in pdf_files:
+            file_start = time.perf_counter()
+            result = agent.extract_text(str(pdf_path))
+            per_file.append(time.perf_counter() - file_start)
+            pages += result["page_count"]
+    elapsed = time.perf_counter() - start
+    return {
+        "files": len(pdf_files) * repeats,
+        "pages": pages,
+        "pages_per_sec": round(pages / elapsed, 3) if elapsed else 0.0,
+        "latency": latency_summary(per_file),
+    }
+
+
+def bench_image_preprocess(image_files, repeats: int) -> dict:
+    """Cost of building an image's upload payload."""
+    results = {}
+
+    def measure(name, source):
+        timings = []
+        payload = 0
+        for _ in range(repeats):
+            start = time.perf_counter()
+            _, data, passthrough = encode_image(source)
+            timings.append(time.perf_counter() - start)
+            payload = len(data)
+        results[name] = {"payload_bytes": payload, "passthrough": passthrough,
+                         **latency_summary(timings)}
+
+    for image_path in image_files:
+        measure(image_path.name, str(image_path))
+
+    # Over the dimension limit: decoded, scaled down and re-encoded
+    synthetic = io.BytesIO()
+    Image.new("RGB", (4096, 3072), (90, 140, 200)).save(synthetic, format="JPEG")
+    measure("synthetic_4096x3072_jpeg", synthetic.getvalue())
+    return results
+
+
+def measure_peak_memory(fn) -> dict:
+    """Run fn under tracemalloc and report the allocation peak."""
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"peak_bytes": peak}
+
+
+def run_suite(args) -> dict:
+    """Run every benchmark and return the report."""
+    files = [str(p) for p in SAMPLE_IMAGES + SAMPLE_PDFS] * args.batch_repeats
+    fake_kwargs = dict(
+        latency=args.latency, latency_median=args.latency_median,
+        latency_spread=args.latency_spread, seed=args.seed, time_scale=args.time_scale,
+    )
+
+    batch = {}
+    for workers in args.workers:
+        fake = FakeGemini(**fake_kwargs)
+        batch[f"workers_{workers}"] = bench_batch(files, workers, fake)
+
+    # Same load with 5xx and 429 injection, at the highest worker count
+    faulty = FakeGemini(error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                        **fake_kwargs)
+    batch["faults"] = bench_batch(files, max(args.workers), faulty)
+    batch["faults"]["error_rate"] = args.error_rate
+    batch["faults"]["rate_limit_rate"] = args.rate_limit_rate
+
+    memory_fake = FakeGemini(**{**fake_kwargs, "time_scale": 0})
+    memory = measure_peak_memory(
+        lambda: make_coordinator(memory_fake).process_batch(files)
+    )
+
+    return {
+        "report_version": REPORT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "settings": {k: v for k, v in vars(args).items()
+                     if k not in ("output", "compare", "verbose")},
+        "batch": batch,
+        "pdf": bench_pdf(SAMPLE_PDFS, args.pdf_repeats),
+        "image_preprocess": bench_image_preprocess(SAMPLE_IMAGES, args.image_repeats),
+        "memory": memory,
+    }
+
+
+def flatten(report: dict, prefix: str = "") -> dict:
+    """Flatten the numeric leaves of a report into dotted metric names."""
+    metrics = {}
+    for key, value in report.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            metrics.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[name] = value
+    return metrics
+
+
+def compare_reports(current: dict, baseline: dict, tolerance: float) -> list:
+    """
+    List metrics that regressed beyond the tolerance.
+
+    Only timing, throughput and memory metrics are compared; settings and
+    raw counters are skipped.
+    """
+    compared = ("_ms", "_per_sec", "success_rate", "peak_bytes", "wall_seconds")
+    current_metrics = flatten({k: current[k] for k in ("batch", "pdf", "image_preprocess", "memory")})
+    baseline_metrics = flatten({k: baseline.get(k, {}) for k in ("batch", "pdf", "image_preprocess", "memory")})
+
+    regressions = []
+    for name, value in sorted(current_metrics.items()):
+        if not name.endswith(compared) or name not in baseline_metrics:
+            continue
+        old = baseline_metrics[name]
+        if not old:
+            continue
+        change = (value - old) / old
+        if name.endswith(HIGHER_IS_BETTER):
+            change = -change
+        if change > tolerance:
+            regressions.append({"metric": name, "baseline": old, "current": value,
+                                "regression": round(change, 4)})
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="AccessibleAI benchmark suite")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", help="Baseline report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Allowed relative regression before failing (default 0.15)")
+    parser.add_argument("--quick", action="store_true",
+                        help="Small, fast run (for CI smoke checks)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--batch-repeats", type=int, default=10,
+                        help="Times the sample files are repeated in the batch")
+    parser.add_argument("--pdf-repeats", type=int, default=5)
+    parser.add_argument("--image-repeats", type=int, default=10)
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"],
+                        default="lognormal")
+    parser.add_argument("--latency-median", type=float, default=0.8,
+                        help="Median fake API latency in seconds")
+    parser.add_argument("--latency-spread", type=float, default=0.35)
+    parser.add_argument("--time-scale", type=float, default=0.05,
+                        help="Multiplier on fake latencies (keeps runs short)")
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--verbose", action="store_true",
+                        help="Show agent logging (injected faults are logged as errors)")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.workers = [1, 4]
+        args.batch_repeats = 2
+        args.pdf_repeats = 1
+        args.image_repeats = 2
+        args.time_scale = min(args.time_scale, 0.01)
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING if args.verbose else logging.CRITICAL)
+
+    report = run_suite(args)
+
+    exit_code = 0
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare_reports(report, baseline, args.tolerance)
+        report["regressions"] = regressions
+        for regression in regressions:
+            print(f"[X] {regression['metric']}: {regression['baseline']} -> "
+                  f"{regression['current']} ({regression['regression']:+.1%})", file=sys.stderr)
+        exit_code = 1 if regressions else 0
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+        print(f"[OK] Benchmark report written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,8 @@ Root agent for AccessibleAI multi-agent system.
 This is the main entry point required by Google ADK for deployment.
 It provides a simple interface to the multi-agent accessibility system.
 """
+import argparse
+import signal
 import sys
 from pathlib import Path
 import google.generativeai as genai
@@ -14,9 +16,51 @@ sys.path.insert(0, str(Path(__file__).parent))
 from config import Config
 from utils.logging_config import setup_logging
 from agents.coordinator import CoordinatorAgent
+from backends import create_backend
+from utils.cancellation import CancellationToken
+from utils.circuit_breaker import configure_breakers
+from utils.metrics import start_metrics_server, dump_metrics
+from utils.tracing import configure_tracing, shutdown_tracing
+from utils.profiling import Profiler, PROFILE_MODES
+from utils.planner import format_plan
+from utils.progress import TerminalRenderer
+from utils.result_cache import ResultCache
+from utils.uploads import UploadCache
 
 # Set up logging
-logger = setup_logging("INFO")
+logger = setup_logging(
+    Config.LOG_LEVEL,
+    structured=Config.LOG_JSON,
+    async_mode=Config.LOG_ASYNC,
+    sample_rate=Config.LOG_SAMPLE_RATE
+)
+
+
+def build_coordinator() -> CoordinatorAgent:
+    """Create the coordinator from Config (no API access needed)."""
+    backend = create_backend(
+        Config.MODEL_BACKEND,
+        cassette_path=Config.CASSETTE_PATH,
+        cassette_mode=Config.CASSETTE_MODE
+    )
+    return CoordinatorAgent(
+        model_name=Config.MODEL_NAME,
+        fallback_models=Config.FALLBACK_MODELS,
+        backend=backend,
+        memory_budget_mb=Config.MEMORY_BUDGET_MB,
+        cache=ResultCache(Config.RESULT_CACHE_PATH) if Config.RESULT_CACHE_PATH else None,
+        rate_limit_rpm=Config.RATE_LIMIT_RPM,
+        pdf_page_timeout=Config.PDF_PAGE_TIMEOUT_SECONDS,
+        max_image_bytes=int(Config.MAX_IMAGE_SIZE_MB * 1024 * 1024),
+        max_image_dimension=Config.MAX_IMAGE_DIMENSION,
+        describe_pdf_images=Config.DESCRIBE_PDF_IMAGES,
+        pdf_image_workers=Config.PDF_IMAGE_WORKERS,
+        scanned_page_fallback=Config.SCANNED_PAGE_FALLBACK,
+        uploads=UploadCache(backend, min_bytes=int(Config.UPLOAD_MIN_MB * 1024 * 1024))
+        if Config.UPLOAD_MIN_MB else None,
+        tile_large_images=Config.TILE_LARGE_IMAGES,
+        tile_workers=Config.TILE_WORKERS
+    )
 
 
 def main():
@@ -27,9 +71,18 @@ def main():
         # Validate and configure
         Config.validate()
         genai.configure(api_key=Config.GEMINI_API_KEY)
+        configure_breakers(Config.CIRCUIT_FAILURE_THRESHOLD, Config.CIRCUIT_RECOVERY_SECONDS)
+
+        # Optional metrics endpoint
+        if Config.METRICS_PORT:
+            start_metrics_server(Config.METRICS_PORT)
+
+        # Optional local trace export
+        if Config.TRACE_FILE:
+            configure_tracing(Config.TRACE_FILE)
 
         # Create coordinator agent
-        coordinator = CoordinatorAgent(model_name=Config.MODEL_NAME)
+        coordinator = build_coordinator()
 
         print("\n" + "="*60)
         print("AccessibleAI - Multi-Agent Content Accessibility System")
@@ -59,7 +112,7 @@ def main():
         return coordinator
 
     except ValueError as e:
-        logger.error(f"Configuration error: {e}")
+        logger.error("Configuration error: %s", e)
         print(f"\n✗ Error: {e}")
         print("\nPlease ensure you have:")
         print("1. Created a .env file in the project root")
@@ -68,17 +121,56 @@ def main():
         sys.exit(1)
 
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         print(f"\n✗ Unexpected error: {e}")
         sys.exit(1)
 
 
+def parse_args(argv=None):
+    """Command-line options for the demo batch."""
+    parser = argparse.ArgumentParser(description="AccessibleAI demo batch")
+    parser.add_argument("files", nargs="*",
+                        help="Files to process (default: the bundled examples)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Files processed concurrently")
+    parser.add_argument("--file-timeout", type=float, default=Config.FILE_TIMEOUT_SECONDS,
+                        help="Seconds each file may take")
+    parser.add_argument("--batch-timeout", type=float, default=Config.BATCH_TIMEOUT_SECONDS,
+                        help="Seconds the whole batch may take")
+    parser.add_argument("--progress", action="store_true",
+                        help="Show live throughput, API latency and ETA on stderr")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Print projected calls, tokens, bytes and wall time, then exit")
+    parser.add_argument("--offline", action="store_true",
+                        help="Describe the images with batch-prediction jobs into the "
+                             "result cache (needs RESULT_CACHE_PATH)")
+    parser.add_argument("--profile", choices=PROFILE_MODES,
+                        help="Profile the batch per stage and per file")
+    parser.add_argument("--profile-dir", default="profiles",
+                        help="Where profiles and the summary are written")
+    parser.add_argument("--profile-interval", type=float, default=0.005,
+                        help="Seconds between stack samples (sampling mode)")
+    parser.add_argument("--profile-top", type=int, default=10,
+                        help="Entries shown in the profile summary")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
+    args = parse_args()
+
+    if args.dry_run:
+        # Planning reads metadata only, so no API key is required
+        plan = build_coordinator().plan_batch(
+            args.files or ["../examples"], max_workers=args.workers
+        )
+        print(format_plan(plan))
+        sys.exit(0)
+
     # Initialize the system
     coordinator = main()
 
     # Run interactive demo if test files exist
-    test_files = [
+    test_files = args.files or [
         "../examples/sample_images/test_image_1.jpg",
         "../examples/sample_pdfs/test_doc_1.pdf"
     ]
@@ -90,8 +182,46 @@ if __name__ == "__main__":
         print("Running demo with available test files...")
         print("="*60 + "\n")
 
-        batch_result = coordinator.process_batch(existing_files)
+        profiler = None
+        if args.profile:
+            profiler = Profiler(args.profile, interval=args.profile_interval)
+
+        # Ctrl+C stops the batch cleanly and still prints partial results
+        cancel_token = CancellationToken()
+        signal.signal(signal.SIGINT, lambda *_: cancel_token.cancel("interrupted"))
+
+        if args.offline:
+            summary = coordinator.process_offline(
+                existing_files, job_dir=Config.BATCH_JOB_DIR,
+                max_requests_per_job=Config.BATCH_MAX_REQUESTS_PER_JOB,
+                poll_interval=Config.BATCH_POLL_SECONDS, timeout=args.batch_timeout,
+                cancel_token=cancel_token
+            )
+            print(f"Submitted {summary['submitted']} images in {len(summary['jobs'])} jobs "
+                  f"({summary['cached']} cached, {summary['duplicates']} duplicates, "
+                  f"{len(summary['skipped'])} skipped)")
+            print(f"Described {summary['described']}, {len(summary['errors'])} errors")
+            sys.exit(0 if summary["success"] else 1)
+
+        batch_result = coordinator.process_batch(
+            existing_files, max_workers=args.workers, profiler=profiler,
+            file_timeout=args.file_timeout, batch_timeout=args.batch_timeout,
+            cancel_token=cancel_token, progress=TerminalRenderer() if args.progress else None
+        )
         print(coordinator.generate_summary(batch_result))
+
+        if profiler:
+            profiler.write(args.profile_dir, top_n=args.profile_top)
+            print(profiler.format_summary(args.profile_top))
+            print(f"\nProfiles written to {args.profile_dir}/")
+
+        if Config.METRICS_FILE:
+            dump_metrics(Config.METRICS_FILE)
+            print(f"Metrics written to {Config.METRICS_FILE}")
+
+        if Config.TRACE_FILE:
+            shutdown_tracing()
+            print(f"Trace spans written to {Config.TRACE_FILE}")
     else:
         print("\nℹ No test files found for demo.")
         print("\nTo test the system:")
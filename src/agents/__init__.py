@@ -4,5 +4,8 @@ Agents package for AccessibleAI multi-agent system.
 from .image_agent import ImageDescriptionAgent
 from .pdf_agent import PDFProcessingAgent
 from .coordinator import CoordinatorAgent
+from .alt_text_service import AltTextService
+from .results import BatchResult, FileResult, ImageResult, PageResult, PDFResult
 
-__all__ = ['ImageDescriptionAgent', 'PDFProcessingAgent', 'CoordinatorAgent']
+__all__ = ['ImageDescriptionAgent', 'PDFProcessingAgent', 'CoordinatorAgent', 'AltTextService',
+           'BatchResult', 'FileResult', 'ImageResult', 'PageResult', 'PDFResult']
@@ -0,0 +1,161 @@
+"""
+Stale-while-revalidate alt-text serving for interactive clients.
+
+describe() answers in milliseconds: a fresh cached description if there
+is one, otherwise the stale cached description, otherwise a local preview
+(dimensions, dominant colours, text regions; see utils.preview). When the
+answer is not fresh, the model description is scheduled in the background
+and delivered to the callback; later describe() or lookup() calls return
+it from the cache. Concurrent requests for the same image share one
+background description.
+"""
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from utils.inputs import BufferReader, describe_source, is_path, read_all
+from utils.metrics import record_error, time_stage
+from utils.preview import local_preview
+from utils.result_cache import HIT, STALE, ResultCache
+from utils.tracing import bind_context
+
+logger = logging.getLogger(__name__)
+
+# Background descriptions in flight at once without a shared scheduler
+DEFAULT_REFRESH_WORKERS = 2
+
+
+class AltTextService:
+    """
+    Immediate alt text with background upgrades to the model description.
+
+    Args:
+        image_agent: ImageDescriptionAgent producing the full descriptions;
+            its ResultCache (or an in-memory one) holds them
+        scheduler: Optional shared utils.scheduler.Scheduler for background
+            descriptions (they are queued at "normal" priority)
+        max_workers: Background descriptions in flight without a scheduler
+    """
+
+    def __init__(self, image_agent, scheduler=None, max_workers: int = DEFAULT_REFRESH_WORKERS):
+        self.image_agent = image_agent
+        self.cache = image_agent.cache or ResultCache(name="serving")
+        self.scheduler = scheduler
+        self._executor = None if scheduler else ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="alt-text-refresh"
+        )
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _options(self, detailed: bool) -> dict:
+        return {"model": self.image_agent.model_name, "detailed": detailed}
+
+    def describe(self, image_path, detailed: bool = False,
+                 callback: Optional[Callable[[dict], None]] = None) -> dict:
+        """
+        Alt text for an image, now; the model description follows.
+
+        Args:
+            image_path: Path to the image, or the image in memory (see
+                utils.inputs)
+            detailed: Whether the model description is detailed
+            callback: Called with the model's result (see
+                ImageDescriptionAgent.generate_alt_text) when a background
+                description finishes; not called for fresh cache hits
+
+        Returns:
+            dict containing:
+                - success (bool): Whether any alt text could be produced
+                - alt_text (str): Best description available now
+                - image_path (str): Path (or description) of the image
+                - source (str): "cache", "stale" or "preview"
+                - provisional (bool): Whether a better description is coming
+                - pending (Future): Background description (None when fresh)
+                - preview (dict): Local preview details ("preview" only)
+                - error (str): Error message if nothing could be produced
+        """
+        label = image_path if is_path(image_path) else describe_source(image_path)
+        # In-memory content is read once and shared with the background task
+        source = image_path if is_path(image_path) else BufferReader(read_all(image_path))
+        key_source = source if is_path(source) else source.getbuffer()
+
+        entry, status = self.cache.lookup(key_source, **self._options(detailed))
+        if status == HIT:
+            return {"success": True, "alt_text": entry["result"]["alt_text"],
+                    "image_path": label, "source": "cache", "provisional": False,
+                    "pending": None, "error": None}
+
+        pending = self._refresh(source, key_source, detailed, callback)
+        if status == STALE:
+            return {"success": True, "alt_text": entry["result"]["alt_text"],
+                    "image_path": label, "source": "stale", "provisional": True,
+                    "pending": pending, "error": None}
+
+        try:
+            with time_stage("serving", "preview"):
+                preview = local_preview(source if is_path(source) else key_source)
+        except Exception as e:
+            record_error(e)
+            logger.warning("[X] No local preview for %s: %s", label, e)
+            return {"success": False, "alt_text": None, "image_path": label,
+                    "source": "preview", "provisional": True, "pending": pending,
+                    "error": f"Error previewing image: {e}"}
+        return {"success": True, "alt_text": preview["alt_text"], "image_path": label,
+                "source": "preview", "provisional": True, "pending": pending,
+                "preview": preview, "error": None}
+
+    def lookup(self, image_path, detailed: bool = False) -> Optional[dict]:
+        """Model description of an image if it is cached and fresh, else None."""
+        source = image_path if is_path(image_path) else read_all(image_path)
+        entry, status = self.cache.lookup(source, **self._options(detailed))
+        return entry["result"] if status == HIT else None
+
+    def _refresh(self, source, key_source, detailed: bool, callback) -> Future:
+        """Background description of an image, shared by concurrent requests."""
+        key = self.cache.key(key_source, **self._options(detailed))
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._submit(bind_context(self._describe), source, key_source,
+                                      detailed, key)
+                self._pending[key] = future
+        if callback is not None:
+            future.add_done_callback(lambda done: self._deliver(callback, done))
+        return future
+
+    def _submit(self, fn, *args) -> Future:
+        if self.scheduler is not None:
+            return self.scheduler.submit(fn, *args, priority="normal")
+        return self._executor.submit(fn, *args)
+
+    def _describe(self, source, key_source, detailed: bool, key) -> dict:
+        try:
+            result = self.image_agent.generate_alt_text(source, detailed=detailed)
+            if result["success"] and self.image_agent.cache is not self.cache:
+                self.cache.put(key_source, {k: result[k] for k in
+                                            ("success", "alt_text", "model_used", "error")},
+                               **self._options(detailed))
+            return result
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    @staticmethod
+    def _deliver(callback, future: Future):
+        try:
+            callback(future.result())
+        except Exception as e:
+            record_error(e)
+            logger.error("[X] Alt-text callback failed: %s", e)
+
+    def shutdown(self, wait: bool = True):
+        """Stop the background workers (a shared scheduler is left running)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
@@ -4,16 +4,46 @@ Coordinator Agent - Orchestrates the multi-agent accessibility system.
 This is the root agent that coordinates between specialized agents
 (Image Description and PDF Processing) to make content accessible.
 """
+import contextvars
+import hashlib
 import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
 from typing import List, Dict
 import google.generativeai as genai
 
-from .image_agent import ImageDescriptionAgent
-from .pdf_agent import PDFProcessingAgent
+from backends import GeminiBackend
+from .image_agent import (
+    ImageDescriptionAgent, ANIMATION_PROMPT, CONCISE_PROMPT, DETAILED_PROMPT,
+    DEFAULT_TILE_WORKERS, TILE_PROMPT, encode_image
+)
+from .pdf_agent import PDFProcessingAgent, TRANSCRIBE_PROMPT
+from .alt_text_service import AltTextService, DEFAULT_REFRESH_WORKERS
+from .results import BatchResult, FileResult
+from utils.batch_jobs import (
+    DEFAULT_MAX_REQUESTS_PER_JOB, DEFAULT_POLL_SECONDS, FAILED, PENDING, SUCCEEDED,
+    GeminiBatchClient, JobWriter, LocalBatchClient, read_manifest, write_manifest
+)
+from utils.cancellation import Deadline, DeadlineExceeded, OperationCancelled, check
+from utils.file_types import detect
+from utils.inputs import describe_source, is_path, rereadable, source_exists
+from utils.memory import MemoryBudget, MemoryMeter, estimate_file_memory
+from utils.metrics import time_stage, record_error, IMAGES_ENCODED
+from utils.planner import plan_batch
+from utils.progress import DEFAULT_HEARTBEAT_SECONDS, ProgressTracker
+from utils.rate_limit import RateLimiter
+from utils.scheduler import Scheduler, estimate_costs, priority_value
+from utils.streaming import TextStream, drain
+from utils.tracing import span, bind_context
+from utils.log_context import log_context
 
 logger = logging.getLogger(__name__)
 
+# Embedded PDF images described concurrently (the rate limiter still applies)
+DEFAULT_PDF_IMAGE_WORKERS = 4
+
 
 class CoordinatorAgent:
     """
@@ -26,161 +56,880 @@ class CoordinatorAgent:
     4. Provides unified accessibility output
     """
 
-    def __init__(self, model_name="gemini-2.0-flash-exp"):
+    def __init__(self, model_name="gemini-2.0-flash-exp", fallback_models=None,
+                 backend=None, memory_budget_mb=None, cache=None, rate_limit_rpm=None,
+                 scheduler=None, pdf_page_timeout=None, max_image_bytes=None,
+                 max_image_dimension=None, describe_pdf_images=False,
+                 pdf_image_workers=DEFAULT_PDF_IMAGE_WORKERS, scanned_page_fallback=False,
+                 uploads=None, tile_large_images=False,
+                 tile_workers=DEFAULT_TILE_WORKERS):
         """
         Initialize the Coordinator Agent and sub-agents.
 
         Args:
             model_name: Name of the Gemini model to use
+            fallback_models: Models the image agent fails over to when the
+                primary model is unavailable
+            backend: ModelBackend used for generation (defaults to Gemini)
+            memory_budget_mb: If set, new files only start while the
+                projected memory of in-flight files stays under this budget
+            cache: Optional ResultCache for image descriptions
+            rate_limit_rpm: If set, API calls per minute across all workers
+            scheduler: Optional shared utils.scheduler.Scheduler; batches and
+                submit_file() calls then compete for its workers by priority
+            pdf_page_timeout: If set, PDF pages are extracted in a worker
+                process that is killed when a page takes longer than this
+            max_image_bytes: Largest image uploaded as its original bytes
+            max_image_dimension: Longest image side uploaded as-is; larger
+                images are scaled down and re-encoded
+            describe_pdf_images: Also describe the images embedded in PDFs;
+                each unique image is described once
+            pdf_image_workers: Image descriptions in flight at once per PDF
+            scanned_page_fallback: Transcribe PDF pages without a usable
+                text layer with the vision model (other pages stay local)
+            uploads: Optional utils.uploads.UploadCache; large payloads are
+                uploaded once and referenced by URI afterwards
+            tile_large_images: Describe images larger than max_image_dimension
+                from concurrently described overlapping tiles and an overview
+            tile_workers: Tile requests in flight at once per image
         """
         self.model_name = model_name
-        self.model = genai.GenerativeModel(model_name)
+        self.scheduler = scheduler
+        self.rate_limit_rpm = rate_limit_rpm
+        self.memory_budget = (
+            MemoryBudget(int(memory_budget_mb * 1024 * 1024)) if memory_budget_mb else None
+        )
+        self.backend = backend or GeminiBackend()
+        self.model = self.backend.bind(model_name)
 
         # Initialize specialized agents
-        self.image_agent = ImageDescriptionAgent(model_name)
-        self.pdf_agent = PDFProcessingAgent()
+        self.image_agent = ImageDescriptionAgent(
+            model_name, fallback_models=fallback_models, backend=self.backend, cache=cache,
+            rate_limiter=RateLimiter(rate_limit_rpm) if rate_limit_rpm else None,
+            max_image_bytes=max_image_bytes, max_image_dimension=max_image_dimension,
+            uploads=uploads, tile_workers=tile_workers
+        )
+        self.pdf_agent = PDFProcessingAgent(
+            page_timeout=pdf_page_timeout,
+            backend=self.backend if scanned_page_fallback else None,
+            model_name=model_name, fallback_models=fallback_models,
+            rate_limiter=self.image_agent.rate_limiter, uploads=uploads
+        )
+        self.describe_pdf_images = describe_pdf_images
+        self.pdf_image_workers = max(1, pdf_image_workers)
+        self.tile_large_images = tile_large_images
+
+        # Handlers by detected file type (see register_handler)
+        self.handlers = {
+            "image": self._process_image,
+            "pdf": self._process_pdf,
+        }
 
         logger.info("=" * 60)
         logger.info("[OK] CoordinatorAgent initialized")
-        logger.info(f"  - Image Description Agent: Ready")
-        logger.info(f"  - PDF Processing Agent: Ready")
-        logger.info(f"  - Model: {model_name}")
+        logger.info("  - Image Description Agent: Ready")
+        logger.info("  - PDF Processing Agent: Ready")
+        logger.info("  - Model: %s (%s backend)", model_name, self.backend.name)
+        if fallback_models:
+            logger.info("  - Fallback models: %s", ", ".join(fallback_models))
+        if memory_budget_mb:
+            logger.info("  - Memory budget: %s MB", memory_budget_mb)
         logger.info("=" * 60)
 
-    def process_file(self, file_path: str, detailed: bool = False) -> dict:
+    def register_handler(self, file_type: str, handler):
+        """
+        Route a detected file type to a handler.
+
+        Register the content signature with utils.file_types.register_file_type
+        and the handler here; no routing code needs to change.
+
+        Args:
+            file_type: Key from the file-type registry ("image", "pdf", ...)
+            handler: Callable(source, detailed, deadline=..., cancel_token=...)
+                returning an agent result dict with at least success and error
+        """
+        self.handlers[file_type] = handler
+
+    def _process_pdf(self, source, detailed: bool, deadline: Deadline = None,
+                     cancel_token=None) -> dict:
+        """Extract a PDF's text and, if enabled, describe its embedded images."""
+        result = self.pdf_agent.extract_text(source, deadline=deadline,
+                                             cancel_token=cancel_token)
+        if not self.describe_pdf_images or not result["success"]:
+            return result
+
+        extraction = self.pdf_agent.extract_images(source, deadline=deadline,
+                                                   cancel_token=cancel_token)
+        descriptions = self._describe_images(extraction["images"], detailed, deadline,
+                                             cancel_token)
+
+        images = []
+        page_images = {}
+        for index, (image, description) in enumerate(zip(extraction["images"], descriptions)):
+            images.append({
+                "pages": image["pages"],
+                "placements": image["placements"],
+                "width": image["width"],
+                "height": image["height"],
+                "success": description["success"],
+                "alt_text": description["alt_text"],
+                "model_used": description["model_used"],
+                "cached": description["cached"],
+                "error": description["error"],
+            })
+            for page in image["pages"]:
+                page_images.setdefault(page, []).append(index)
+
+        result["images"] = images
+        result["page_images"] = page_images
+        result["image_placements"] = extraction["placements"]
+        result["images_failed"] = sum(not image["success"] for image in images)
+
+        # A deadline or cancellation during the images makes the document partial
+        stopped = [r for r in [extraction] + descriptions if r["timed_out"] or r["cancelled"]]
+        if stopped:
+            result.update(success=False, error=stopped[0]["error"],
+                          timed_out=stopped[0]["timed_out"], cancelled=stopped[0]["cancelled"])
+        elif not extraction["success"]:
+            result["images_error"] = extraction["error"]
+        return result
+
+    def _process_image(self, source, detailed: bool, deadline: Deadline = None,
+                       cancel_token=None) -> dict:
+        """Describe an image, from tiles if it is large and tiling is enabled."""
+        describe = (self.image_agent.describe_tiled if self.tile_large_images
+                    else self.image_agent.generate_alt_text)
+        return describe(source, detailed=detailed, deadline=deadline, cancel_token=cancel_token)
+
+    def _describe_images(self, images: list, detailed: bool, deadline: Deadline = None,
+                         cancel_token=None) -> list:
+        """Describe encoded images with at most pdf_image_workers calls in flight."""
+        if not images:
+            return []
+
+        def describe(image):
+            return self.image_agent.generate_alt_text(
+                image["data"], detailed=detailed, deadline=deadline, cancel_token=cancel_token
+            )
+
+        with time_stage("coordinator", "pdf_images"):
+            if len(images) == 1 or self.pdf_image_workers == 1:
+                return [describe(image) for image in images]
+            with ThreadPoolExecutor(max_workers=min(self.pdf_image_workers, len(images))) as pool:
+                # Each task gets its own copy of the log and trace context
+                futures = [pool.submit(contextvars.copy_context().run, bind_context(describe),
+                                       image) for image in images]
+                return [future.result() for future in futures]
+
+    def process_file(self, file_path: str, detailed: bool = False, timeout: float = None,
+                     deadline: Deadline = None, cancel_token=None) -> FileResult:
         """
         Process a file and make it accessible.
 
         Automatically detects file type and routes to appropriate agent.
 
         Args:
-            file_path: Path to the file (image or PDF)
+            file_path: Path to the file (image or PDF), or its content as
+                bytes, memoryview or a binary file-like object (typed from
+                its leading bytes)
             detailed: Whether to generate detailed descriptions
+            timeout: Seconds this file may take, from now
+            deadline: Optional outer Deadline (e.g. the batch's)
+            cancel_token: Optional CancellationToken; checked before the file
+                starts, between PDF pages and before the API call
 
         Returns:
-            dict containing:
+            FileResult (read like a dict) containing:
                 - success (bool): Whether processing succeeded
                 - file_type (str): Type of file processed
                 - file_path (str): Path to the file
                 - result (dict): Results from the specialized agent
                 - error (str): Error message if failed
+                - timed_out (bool): Whether the deadline stopped processing
+                - cancelled (bool): Whether cancellation stopped processing
+                - memory (dict): estimated_bytes, measured_bytes, method
+                  and admission_wait_seconds
+        """
+        deadline = Deadline.earliest(Deadline(timeout), deadline)
+        return drain(self._file_chunks(rereadable(file_path), detailed, deadline, cancel_token,
+                                       stream=False))
+
+    def stream_file(self, file_path: str, detailed: bool = False, timeout: float = None,
+                    deadline: Deadline = None, cancel_token=None) -> TextStream:
+        """
+        Process a file, streaming its text as it is produced.
+
+        Image descriptions stream chunk by chunk from the model. Other files,
+        images handled by a custom or tiling handler, and unreadable input
+        are processed as by process_file() and stream their text as one
+        chunk. Either way the file is traced, admitted against the memory
+        budget and measured like in process_file().
+
+        Args:
+            file_path: Path to the file, or its content (see process_file)
+            detailed: Whether to generate detailed descriptions
+            timeout: Seconds this file may take, from now
+            deadline: Optional outer Deadline
+            cancel_token: Optional CancellationToken; also checked between chunks
+
+        Returns:
+            TextStream (for, or async for); its result is shaped like the
+            process_file() result
         """
+        deadline = Deadline.earliest(Deadline(timeout), deadline)
+        return TextStream(self._file_chunks(rereadable(file_path), detailed, deadline,
+                                            cancel_token, stream=True))
+
+    def _file_chunks(self, file_path, detailed: bool, deadline: Deadline, cancel_token,
+                     stream: bool):
+        """
+        Generator behind process_file() and stream_file(); returns the FileResult.
+
+        Yields text chunks only when stream is True.
+        """
+        name = describe_source(file_path)
+        with span("process_file", {"file.path": name}) as file_span, log_context(name):
+            try:
+                check(deadline, cancel_token, "batch")
+            except (DeadlineExceeded, OperationCancelled) as e:
+                # Not started: skip without touching the file
+                result = self._stopped_result(file_path, e)
+                file_span.set_attributes({"success": False, "timed_out": result["timed_out"],
+                                          "cancelled": result["cancelled"]})
+                return result
+
+            estimated = estimate_file_memory(file_path)
+            admission_wait = 0.0
+            if self.memory_budget is not None:
+                try:
+                    with time_stage("coordinator", "admission"):
+                        admission_wait = self.memory_budget.acquire(estimated, deadline,
+                                                                    cancel_token)
+                except (DeadlineExceeded, OperationCancelled) as e:
+                    # Stopped while waiting for memory: the file never started
+                    result = self._stopped_result(file_path, e)
+                    file_span.set_attributes({"success": False, "timed_out": result["timed_out"],
+                                              "cancelled": result["cancelled"]})
+                    return result
+            try:
+                with MemoryMeter() as meter:
+                    if stream and self._streams_from_model(file_path):
+                        result = yield from self._image_chunks(file_path, detailed, deadline,
+                                                               cancel_token)
+                    else:
+                        result = self._route_file(file_path, detailed, deadline, cancel_token)
+                        inner = result["result"] or {}
+                        text = inner.get("alt_text") or inner.get("text")
+                        if stream and text:
+                            yield text
+            finally:
+                if self.memory_budget is not None:
+                    self.memory_budget.release(estimated)
+
+            result["memory"] = {
+                "estimated_bytes": estimated,
+                "measured_bytes": meter.measured_bytes,
+                "method": meter.method,
+                "admission_wait_seconds": round(admission_wait, 4),
+            }
+            file_span.set_attributes({
+                "file.type": result["file_type"],
+                "success": result["success"],
+                "timed_out": result["timed_out"],
+                "cancelled": result["cancelled"],
+                "memory.estimated_bytes": estimated,
+                "memory.measured_bytes": meter.measured_bytes,
+            })
+            if result["error"]:
+                file_span.set_attribute("error.message", result["error"])
+            return result
+
+    def _streams_from_model(self, file_path) -> bool:
+        """Whether the default image handler can stream this file's description."""
+        if self.handlers.get("image") != self._process_image or self.tile_large_images:
+            return False
         try:
-            logger.info(f"\n{'='*60}")
-            logger.info(f"Coordinator processing: {file_path}")
+            detected = detect(file_path) if source_exists(file_path) else None
+        except Exception:
+            # _route_file() reports it
+            return False
+        return detected is not None and detected["file_type"] == "image"
 
-            # Validate file exists
-            file_path_obj = Path(file_path)
-            if not file_path_obj.exists():
-                raise FileNotFoundError(f"File not found: {file_path}")
+    def _image_chunks(self, file_path, detailed: bool, deadline: Deadline, cancel_token):
+        """Stream an image description; returns the FileResult."""
+        stream = self.image_agent.stream_alt_text(file_path, detailed, deadline=deadline,
+                                                  cancel_token=cancel_token)
+        yield from stream
+        result = stream.result
+        return FileResult(
+            success=result["success"],
+            file_type="image",
+            file_path=result["image_path"],
+            result=result,
+            error=result["error"],
+            timed_out=result["timed_out"],
+            cancelled=result["cancelled"]
+        )
 
-            # Detect file type
-            file_ext = file_path_obj.suffix.lower()
-            logger.info(f"Detected file type: {file_ext}")
+    @staticmethod
+    def _stopped_result(file_path: str, error: Exception) -> FileResult:
+        """Result for a file that was skipped by a deadline or cancellation."""
+        timed_out = isinstance(error, DeadlineExceeded)
+        error_msg = str(error) if timed_out else f"Cancelled: {error}"
+        if not is_path(file_path):
+            file_path = describe_source(file_path)
+        logger.warning("[X] %s: %s", file_path, error_msg)
+        return FileResult(
+            success=False,
+            file_type="unknown",
+            file_path=file_path,
+            result=None,
+            error=error_msg,
+            timed_out=timed_out,
+            cancelled=not timed_out
+        )
 
-            # Route to appropriate agent
-            if file_ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp']:
-                logger.info("-> Routing to Image Description Agent")
-                result = self.image_agent.generate_alt_text(file_path, detailed=detailed)
-                file_type = "image"
+    def _route_file(self, file_path: str, detailed: bool, deadline: Deadline = None,
+                    cancel_token=None) -> FileResult:
+        """Validate, detect and dispatch one file (see process_file)."""
+        source, file_path = file_path, (
+            file_path if is_path(file_path) else describe_source(file_path)
+        )
+        try:
+            logger.info("Coordinator processing: %s", file_path)
 
-            elif file_ext == '.pdf':
-                logger.info("-> Routing to PDF Processing Agent")
-                result = self.pdf_agent.extract_text(file_path)
-                file_type = "pdf"
+            # Validate file exists
+            with time_stage("coordinator", "file_stat"):
+                if not source_exists(source):
+                    raise FileNotFoundError(f"File not found: {file_path}")
 
-            else:
+            # Detect file type from content, not the name
+            with time_stage("coordinator", "detect"):
+                detected = detect(source)
+            file_type = detected["file_type"] if detected else None
+            handler = self.handlers.get(file_type)
+            if handler is None:
+                found = f"{detected['format']} content" if detected else "unrecognised content"
                 raise ValueError(
-                    f"Unsupported file type: {file_ext}. "
-                    f"Supported: images (jpg, png, etc.) and PDFs"
+                    f"Unsupported file type: {found}. "
+                    f"Supported: {', '.join(sorted(self.handlers))}"
                 )
 
-            logger.info(f"{'='*60}\n")
+            # Route to appropriate agent
+            logger.debug("Detected %s; routing to %s handler", detected["format"], file_type)
+            result = handler(source, detailed, deadline=deadline, cancel_token=cancel_token)
 
-            return {
-                "success": result["success"],
-                "file_type": file_type,
-                "file_path": file_path,
-                "result": result,
-                "error": result.get("error")
-            }
+            with time_stage("coordinator", "result_assembly"):
+                return FileResult(
+                    success=result["success"],
+                    file_type=file_type,
+                    file_path=file_path,
+                    result=result,
+                    error=result.get("error"),
+                    timed_out=result.get("timed_out", False),
+                    cancelled=result.get("cancelled", False)
+                )
 
         except FileNotFoundError as e:
+            record_error(e)
             error_msg = str(e)
-            logger.error(f"[X] {error_msg}")
-            return {
-                "success": False,
-                "file_type": "unknown",
-                "file_path": file_path,
-                "result": None,
-                "error": error_msg
-            }
+            logger.error("[X] %s", error_msg)
+            return FileResult(
+                success=False,
+                file_type="unknown",
+                file_path=file_path,
+                result=None,
+                error=error_msg,
+                timed_out=False,
+                cancelled=False
+            )
 
         except ValueError as e:
+            record_error(e)
             error_msg = str(e)
-            logger.error(f"[X] {error_msg}")
-            return {
-                "success": False,
-                "file_type": "unsupported",
-                "file_path": file_path,
-                "result": None,
-                "error": error_msg
-            }
+            logger.error("[X] %s", error_msg)
+            return FileResult(
+                success=False,
+                file_type="unsupported",
+                file_path=file_path,
+                result=None,
+                error=error_msg,
+                timed_out=False,
+                cancelled=False
+            )
 
         except Exception as e:
+            record_error(e)
             error_msg = f"Unexpected error: {str(e)}"
-            logger.error(f"[X] {error_msg}")
-            return {
-                "success": False,
-                "file_type": "unknown",
-                "file_path": file_path,
-                "result": None,
-                "error": error_msg
-            }
+            logger.error("[X] %s", error_msg)
+            return FileResult(
+                success=False,
+                file_type="unknown",
+                file_path=file_path,
+                result=None,
+                error=error_msg,
+                timed_out=False,
+                cancelled=False
+            )
 
-    def process_batch(self, file_paths: List[str], detailed: bool = False) -> dict:
+    def process_batch(self, file_paths: List[str], detailed: bool = False,
+                      max_workers: int = 1, profiler=None, dry_run: bool = False,
+                      schedule: str = "sjf", priority="normal", file_timeout: float = None,
+                      batch_timeout: float = None, cancel_token=None, progress=None) -> dict:
         """
         Process multiple files in batch.
 
         Args:
             file_paths: List of file paths to process
             detailed: Whether to generate detailed descriptions
+            max_workers: Number of files processed concurrently (threads);
+                ignored when the coordinator has a shared scheduler
+            profiler: Optional utils.profiling.Profiler collecting per-file
+                and per-stage profiles for this batch
+            dry_run: Return plan_batch() projections instead of processing
+            schedule: "sjf" runs the cheapest files first (estimated from
+                metadata and cache status); "fifo" keeps list order
+            priority: "interactive", "normal", "bulk" (or an int), for the
+                whole batch or as a list with one entry per file
+            file_timeout: Seconds each file may take once it starts
+            batch_timeout: Seconds the whole batch may take; files not
+                started by then are returned as timed out
+            cancel_token: Optional CancellationToken; once triggered, running
+                files stop at their next check and the rest are skipped
+            progress: Callable (or list of callables) receiving progress
+                event dicts; see utils.progress (TerminalRenderer,
+                AsyncProgressStream)
 
         Returns:
-            dict containing:
+            BatchResult (read like a dict; the plan_batch() dict for dry runs)
+            containing:
                 - total_files (int): Total number of files
                 - successful (int): Number of successfully processed files
                 - failed (int): Number of failed files
-                - results (list): List of result dictionaries
+                - timed_out (int): Files stopped by a deadline
+                - cancelled (int): Files stopped by cancellation
+                - results (list): List of result dictionaries, in input order
         """
-        logger.info(f"\n{'#'*60}")
-        logger.info(f"BATCH PROCESSING: {len(file_paths)} files")
-        logger.info(f"{'#'*60}\n")
+        if dry_run:
+            return self.plan_batch(file_paths, detailed=detailed, max_workers=max_workers)
+
+        logger.info("Batch processing: %d files", len(file_paths))
+        file_paths = [rereadable(file_path) for file_path in file_paths]
+        batch_deadline = Deadline(batch_timeout)
+        limits = {"timeout": file_timeout, "deadline": batch_deadline,
+                  "cancel_token": cancel_token}
 
-        results = []
-        for i, file_path in enumerate(file_paths, 1):
-            logger.info(f"Processing file {i}/{len(file_paths)}")
-            result = self.process_file(file_path, detailed=detailed)
-            results.append(result)
+        process_file = self.process_file
+        if profiler is not None:
+            process_file = profiler.wrap(process_file)
+
+        if schedule not in ("sjf", "fifo"):
+            raise ValueError(f"Unknown schedule: {schedule}. Use 'sjf' or 'fifo'")
+        if isinstance(priority, (list, tuple)):
+            if len(priority) != len(file_paths):
+                raise ValueError(
+                    f"priority has {len(priority)} entries for {len(file_paths)} files; "
+                    f"pass one per file or a single priority for the batch"
+                )
+            priorities = [priority_value(p) for p in priority]
+        else:
+            priorities = [priority_value(priority)] * len(file_paths)
+        costs = self._estimate_costs(file_paths, detailed) if schedule == "sjf" else {}
+        cost_of = [costs.get(describe_source(file_path), 0.0) for file_path in file_paths]
+        order = sorted(range(len(file_paths)), key=lambda i: (priorities[i], cost_of[i], i))
+
+        tracker = None
+        if progress is not None:
+            callbacks = progress if isinstance(progress, (list, tuple)) else [progress]
+            tracker = ProgressTracker(len(file_paths), callbacks, costs=costs,
+                                      heartbeat_seconds=DEFAULT_HEARTBEAT_SECONDS)
+            process_file = tracker.wrap(process_file)
+
+        with span("process_batch", {"batch.size": len(file_paths),
+                                    "batch.max_workers": max_workers,
+                                    "batch.schedule": schedule}), \
+                (profiler or nullcontext()), (tracker or nullcontext()):
+            results = [None] * len(file_paths)
+            if self.scheduler is not None or max_workers > 1:
+                scheduler = self.scheduler or Scheduler(max_workers, interactive_slots=0)
+                try:
+                    # Each worker runs under the batch span's trace context
+                    futures = {
+                        i: scheduler.submit(bind_context(process_file), file_paths[i], detailed,
+                                            priority=priorities[i], cost=cost_of[i], **limits)
+                        for i in order
+                    }
+                    for i, future in futures.items():
+                        results[i] = future.result()
+                finally:
+                    if scheduler is not self.scheduler:
+                        scheduler.shutdown()
+            else:
+                for n, i in enumerate(order, 1):
+                    logger.debug("Processing file %d/%d", n, len(file_paths))
+                    results[i] = process_file(file_paths[i], detailed=detailed, **limits)
 
         # Calculate statistics
         successful = sum(1 for r in results if r["success"])
         failed = len(results) - successful
+        timed_out = sum(1 for r in results if r["timed_out"])
+        cancelled = sum(1 for r in results if r["cancelled"])
+
+        logger.info(
+            "Batch complete: %d total, %d successful, %d failed (%d timed out, %d cancelled)",
+            len(file_paths), successful, failed, timed_out, cancelled
+        )
 
-        logger.info(f"\n{'#'*60}")
-        logger.info(f"BATCH COMPLETE")
-        logger.info(f"  - Total: {len(file_paths)}")
-        logger.info(f"  - Successful: {successful}")
-        logger.info(f"  - Failed: {failed}")
-        logger.info(f"{'#'*60}\n")
+        return BatchResult(
+            total_files=len(file_paths),
+            successful=successful,
+            failed=failed,
+            timed_out=timed_out,
+            cancelled=cancelled,
+            results=results
+        )
 
+    def submit_file(self, file_path: str, detailed: bool = False,
+                    priority="interactive") -> Future:
+        """
+        Queue one file on the shared scheduler.
+
+        Interactive submissions start ahead of queued bulk work and may use
+        the scheduler's reserved interactive workers.
+
+        Args:
+            file_path: Path to the file (image or PDF)
+            detailed: Whether to generate detailed descriptions
+            priority: "interactive" (default), "normal", "bulk" or an int
+
+        Returns:
+            Future resolving to the process_file() result
+        """
+        if self.scheduler is None:
+            raise RuntimeError("submit_file() needs a shared scheduler: "
+                               "CoordinatorAgent(scheduler=Scheduler(...))")
+        cost = self._estimate_costs([file_path], detailed)[describe_source(file_path)]
+        return self.scheduler.submit(bind_context(self.process_file), file_path, detailed,
+                                     priority=priority, cost=cost)
+
+    def process_offline(self, file_paths: List[str], detailed: bool = False, client=None,
+                        job_dir="batch_jobs", max_requests_per_job: int = DEFAULT_MAX_REQUESTS_PER_JOB,
+                        poll_interval: float = DEFAULT_POLL_SECONDS, timeout: float = None,
+                        cancel_token=None) -> dict:
+        """
+        Describe images with asynchronous batch-prediction jobs.
+
+        For backfills that do not need answers now: each unique image
+        (by content hash) becomes one request in a job file, the job files
+        are submitted as they fill up, and the outputs are written to the
+        result cache for every path with that content. Later
+        process_file()/process_batch() calls then hit the cache. Images
+        already cached are skipped, so an interrupted run can be repeated.
+        PDFs and other files are skipped; their text is extracted locally.
+
+        Submitted jobs are recorded in a manifest in job_dir. A repeated
+        call first collects the jobs an earlier call stopped waiting for
+        and waits for those still running instead of submitting their
+        images again.
+
+        Args:
+            file_paths: List of image paths
+            detailed: Whether to generate detailed descriptions
+            client: utils.batch_jobs.BatchJobClient (default: the Gemini
+                Batch API for the Gemini backend, otherwise a
+                LocalBatchClient running the jobs on this coordinator's backend,
+                shut down when the call returns)
+            job_dir: Directory the job files and the manifest are written to
+            max_requests_per_job: Requests per job file
+            poll_interval: Seconds between job status checks
+            timeout: Seconds to wait for the jobs (None: until they finish);
+                jobs still running keep running and are collected by
+                repeating the call with the same job_dir (and, for a
+                LocalBatchClient, the same client)
+            cancel_token: Optional CancellationToken; stops waiting
+
+        Returns:
+            Dict containing:
+                - success (bool): Whether every submitted image was described
+                - total_files (int): Files given
+                - cached (int): Images skipped because they were already cached
+                - duplicates (int): Images sharing content with an earlier one
+                - resumed (int): Images already in a job of an earlier call
+                - skipped (list): Files that are not images
+                - submitted (int): Unique images sent in jobs
+                - described (int): Images described (counting duplicates
+                  and images of earlier calls' jobs)
+                - jobs (list): {"name", "file", "state", "error", "resumed"}
+                  per job
+                - errors (dict): Error message by path, including every
+                  image of a failed job or of a job still running when
+                  waiting stopped
+                - timed_out (bool), cancelled (bool): Why waiting stopped
+        """
+        cache = self.image_agent.cache
+        if cache is None:
+            raise ValueError("process_offline() stores its results in the result cache: "
+                             "CoordinatorAgent(cache=ResultCache(...))")
+        own_client = client is None
+        if own_client:
+            client = (GeminiBatchClient() if self.backend.name == "gemini"
+                      else LocalBatchClient(self.backend))
+        options = {"model": self.model_name, "detailed": detailed}
+        prompt = DETAILED_PROMPT if detailed else CONCISE_PROMPT
+        summary = {"success": False, "total_files": len(file_paths), "cached": 0,
+                   "duplicates": 0, "resumed": 0, "skipped": [], "submitted": 0,
+                   "described": 0, "jobs": [], "errors": {}, "timed_out": False,
+                   "cancelled": False}
+
+        # Manifest entries (see batch_jobs.write_manifest) of the jobs not
+        # yet collected, by job name; other clients' jobs are kept as they are
+        manifest = read_manifest(job_dir)
+        other_jobs = [entry for entry in manifest if entry["client"] != client.name]
+        jobs = {entry["name"]: entry for entry in manifest if entry["client"] == client.name}
+
+        def save_manifest():
+            write_manifest(job_dir, other_jobs + list(jobs.values()))
+
+        # Content hash -> paths; a hash is sent once however many paths share it
+        paths_by_hash = {}
+        # Content hash -> paths, for images in a still running job of an earlier call
+        in_flight = {}
+
+        def submit(job_file, digests):
+            name = client.submit(job_file, self.model_name)
+            # The path lists are shared, so later duplicates reach the manifest too
+            jobs[name] = {"name": name, "file": str(job_file), "client": client.name,
+                          "model": self.model_name, "detailed": detailed,
+                          "paths": {digest: paths_by_hash[digest] for digest in digests}}
+            save_manifest()
+            summary["jobs"].append({"name": name, "file": str(job_file),
+                                    "state": PENDING, "error": None, "resumed": False})
+
+        writer = JobWriter(job_dir, prefix=f"alt-text-{time.strftime('%Y%m%d-%H%M%S')}",
+                           max_requests=max_requests_per_job, on_file=submit)
+        pending = []
+        try:
+            with span("process_offline", {"batch.size": len(file_paths),
+                                          "batch.client": client.name}):
+                # Jobs of an earlier call: finished ones are collected now, so
+                # their images are cache hits below, and a failed job's images
+                # are submitted again
+                for entry in list(jobs.values()):
+                    job = {"name": entry["name"], "file": entry["file"], "resumed": True}
+                    job["state"], job["error"] = client.status(entry["name"])
+                    summary["jobs"].append(job)
+                    if job["state"] == FAILED:
+                        logger.warning("Batch job %s of an earlier call failed: %s",
+                                       job["name"], job["error"])
+                        del jobs[entry["name"]]
+                    elif job["state"] == SUCCEEDED:
+                        self._collect_offline(client, job, jobs.pop(entry["name"]), summary)
+                    elif entry["model"] == self.model_name and entry["detailed"] == detailed:
+                        in_flight.update(entry["paths"])
+                if summary["jobs"]:
+                    logger.info("Offline batch: %d jobs of an earlier call, %d still running",
+                                len(summary["jobs"]), len(jobs))
+                    save_manifest()
+
+                for file_path in file_paths:
+                    file_path = str(file_path)
+                    try:
+                        if not source_exists(file_path):
+                            raise FileNotFoundError(f"File not found: {file_path}")
+                        detected = detect(file_path)
+                        if detected is None or detected["file_type"] != "image":
+                            summary["skipped"].append(file_path)
+                            continue
+                        if cache.get(file_path, **options) is not None:
+                            summary["cached"] += 1
+                            continue
+                        data = Path(file_path).read_bytes()
+                        digest = hashlib.sha256(data).hexdigest()
+                        if digest in in_flight:
+                            if file_path not in in_flight[digest]:
+                                in_flight[digest].append(file_path)
+                            summary["resumed"] += 1
+                            continue
+                        if digest in paths_by_hash:
+                            paths_by_hash[digest].append(file_path)
+                            summary["duplicates"] += 1
+                            continue
+                        with time_stage("image", "preprocess"):
+                            mime_type, payload, passthrough = encode_image(
+                                data, self.image_agent.max_image_bytes,
+                                self.image_agent.max_image_dimension
+                            )
+                        IMAGES_ENCODED.inc(mode="passthrough" if passthrough else "reencoded")
+                        paths_by_hash[digest] = [file_path]
+                        writer.add(digest, prompt, mime_type, payload)
+                    except Exception as e:
+                        record_error(e)
+                        summary["errors"][file_path] = str(e)
+                writer.close()
+                save_manifest()
+                summary["submitted"] = len(paths_by_hash)
+                logger.info("Offline batch: %d images in %d jobs (%d cached, %d duplicates, "
+                            "%d in earlier jobs)", summary["submitted"], len(summary["jobs"]),
+                            summary["cached"], summary["duplicates"], summary["resumed"])
+
+                deadline = Deadline(timeout)
+                pending = [job for job in summary["jobs"]
+                           if job["state"] not in (SUCCEEDED, FAILED)]
+                try:
+                    while pending:
+                        for job in list(pending):
+                            job["state"], job["error"] = client.status(job["name"])
+                            if job["state"] not in (SUCCEEDED, FAILED):
+                                continue
+                            pending.remove(job)
+                            entry = jobs.pop(job["name"])
+                            self._collect_offline(client, job, entry, summary)
+                            save_manifest()
+                        if pending:
+                            check(deadline, cancel_token, "batch job polling")
+                            wait = min(poll_interval, deadline.remaining() or poll_interval)
+                            if cancel_token is not None:
+                                cancel_token.wait(wait)
+                            else:
+                                time.sleep(wait)
+                except (DeadlineExceeded, OperationCancelled) as e:
+                    summary["timed_out"] = isinstance(e, DeadlineExceeded)
+                    summary["cancelled"] = not summary["timed_out"]
+                    logger.warning("Stopped waiting for %d batch jobs: %s", len(pending), e)
+
+                # Images of jobs still running when waiting stopped
+                for job in pending:
+                    self._fail_offline(
+                        jobs[job["name"]]["paths"],
+                        f"Batch job {job['name']} was still {job['state']} when waiting "
+                        f"stopped; repeat the call to collect it", summary
+                    )
+        finally:
+            if own_client and isinstance(client, LocalBatchClient):
+                # Its jobs end with it, so they cannot be collected later
+                client.shutdown(wait=False)
+                jobs.clear()
+                save_manifest()
+
+        summary["success"] = not summary["errors"] and not pending
+        logger.info("Offline batch complete: %d described, %d errors",
+                    summary["described"], len(summary["errors"]))
+        return summary
+
+    def _collect_offline(self, client, job: dict, entry: dict, summary: dict):
+        """Cache the outputs of a finished job, or record its failure for its images."""
+        options = {"model": entry["model"], "detailed": entry["detailed"]}
+        if job["state"] == SUCCEEDED:
+            answered = self._merge_offline(client.results(job["name"]), entry["paths"],
+                                           options, summary)
+            missing = {digest: paths for digest, paths in entry["paths"].items()
+                       if digest not in answered}
+            self._fail_offline(missing, f"No output for this image in batch job {job['name']}",
+                               summary)
+        else:
+            logger.error("[X] Batch job %s failed: %s", job["name"], job["error"])
+            self._fail_offline(entry["paths"], f"Batch job failed: {job['error']}", summary)
+
+    def _merge_offline(self, outputs, paths_by_hash: dict, options: dict, summary: dict) -> set:
+        """
+        Write a job's outputs to the result cache for every path with that content.
+
+        Returns:
+            Content hashes the job had an output line for
+        """
+        answered = set()
+        for digest, text, error in outputs:
+            answered.add(digest)
+            paths = paths_by_hash.get(digest, ())
+            for path in paths:
+                if error is not None:
+                    summary["errors"][path] = error
+                    continue
+                self.image_agent.cache.put(
+                    path, {"success": True, "alt_text": text.strip(),
+                           "model_used": self.model_name, "error": None},
+                    **options
+                )
+                summary["described"] += 1
+        return answered
+
+    @staticmethod
+    def _fail_offline(paths_by_hash: dict, error: str, summary: dict):
+        """Record an error for every path of these content hashes."""
+        for paths in paths_by_hash.values():
+            for path in paths:
+                summary["errors"][path] = error
+
+    def alt_text_service(self, max_workers: int = DEFAULT_REFRESH_WORKERS) -> AltTextService:
+        """
+        Stale-while-revalidate image serving on this coordinator's image agent.
+
+        Background descriptions use the shared scheduler if there is one.
+
+        Args:
+            max_workers: Background descriptions in flight without a scheduler
+
+        Returns:
+            AltTextService (see agents.alt_text_service)
+        """
+        return AltTextService(self.image_agent, scheduler=self.scheduler,
+                              max_workers=max_workers)
+
+    def _cache_status(self, detailed: bool):
+        """Callable giving a file's result-cache status, or None without a cache."""
+        cache = self.image_agent.cache
+        if cache is None:
+            return None
+        return lambda path: cache.status(path, model=self.model_name, detailed=detailed)
+
+    def _plan_features(self) -> dict:
+        """The enabled features that add API calls (see utils.planner.file_requests)."""
+        scanned = self.pdf_agent.model_chain is not None
         return {
-            "total_files": len(file_paths),
-            "successful": successful,
-            "failed": failed,
-            "results": results
+            "describe_pdf_images": self.describe_pdf_images,
+            "pdf_image_workers": self.pdf_image_workers,
+            "scanned_pages_per_request": (self.pdf_agent.vision_pages_per_request
+                                          if scanned else None),
+            "scanned_page_prompt": TRANSCRIBE_PROMPT,
+            "tile_min_side": self.image_agent.tile_min_side if self.tile_large_images else None,
+            "tile_workers": self.image_agent.tile_workers,
+            "tile_prompt": TILE_PROMPT,
+            "animation_prompt": ANIMATION_PROMPT,
         }
 
+    def _estimate_costs(self, file_paths, detailed: bool) -> dict:
+        return estimate_costs([str(p) if is_path(p) else p for p in file_paths],
+                              self._cache_status(detailed), self._plan_features())
+
+    def plan_batch(self, file_paths, detailed: bool = False, max_workers: int = 1,
+                   **options) -> dict:
+        """
+        Project the cost of a batch without processing it.
+
+        Uses only file metadata and the result cache; see utils.planner.
+
+        Args:
+            file_paths: List of file paths, or a directory
+            detailed: Whether detailed descriptions would be generated
+            max_workers: Concurrency the batch would run at
+            **options: Passed to utils.planner.plan_batch (rate_limit_rpm,
+                api_latency_seconds, include_files, ...)
+
+        Returns:
+            Plan dict (api_calls, input_tokens, output_tokens, upload_bytes,
+            estimated_wall_seconds, ...)
+        """
+        options.setdefault("rate_limit_rpm", self.rate_limit_rpm)
+        return plan_batch(
+            file_paths,
+            prompt=DETAILED_PROMPT if detailed else CONCISE_PROMPT,
+            detailed=detailed,
+            max_workers=max_workers,
+            cache_status=self._cache_status(detailed),
+            features=self._plan_features(),
+            **options
+        )
+
     def generate_summary(self, batch_result: dict) -> str:
         """
         Generate a human-readable summary of batch processing.
@@ -198,8 +947,11 @@ class CoordinatorAgent:
             f"Total Files: {batch_result['total_files']}",
             f"Successful: {batch_result['successful']} [OK]",
             f"Failed: {batch_result['failed']} [X]",
-            f"{'='*60}\n"
         ]
+        if batch_result.get('timed_out') or batch_result.get('cancelled'):
+            summary.append(f"  (timed out: {batch_result['timed_out']}, "
+                           f"cancelled: {batch_result['cancelled']})")
+        summary.append(f"{'='*60}\n")
 
         # Add details for each file
         for i, result in enumerate(batch_result['results'], 1):
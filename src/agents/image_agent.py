@@ -5,12 +5,113 @@ This agent uses Gemini Vision API to analyze images and create detailed,
 accessible descriptions suitable for visually impaired users.
 """
 import google.generativeai as genai
+from google.generativeai.types import content_types
 from PIL import Image
+import contextvars
+import io
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from backends import GeminiBackend
+from utils.animation import sample_keyframes
+from utils.cancellation import DeadlineExceeded, OperationCancelled, check
+from utils.circuit_breaker import ModelFallbackChain
+from utils.file_types import HEAD_BYTES, sniff
+from utils.inputs import BufferReader, describe_source, is_path, read_all, source_exists
+from utils.memory import MAX_IMAGE_DIMENSION, MAX_INLINE_IMAGE_BYTES, sent_as_is
+from utils.metrics import time_stage, record_error, IMAGES_ENCODED
+from utils.streaming import TextStream
+from utils.tiling import EMPTY_TILE, OVERVIEW_DIMENSION, merge_tiles, plan_tiles
+from utils.tracing import bind_context
+from utils.uploads import content_part
+from .results import ImageResult
+
 logger = logging.getLogger(__name__)
 
+# Prompts by detail level (also used by the batch planner to count tokens)
+DETAILED_PROMPT = """Analyze this image and provide a comprehensive, accessible description
+                suitable for visually impaired users. Include:
+
+                1. MAIN SUBJECT: What is the primary focus of the image?
+                2. DETAILS: Important visual elements (colors, objects, people, text)
+                3. SETTING: Where is this taking place? What's the environment?
+                4. TEXT: Any visible text, signs, or labels (transcribe exactly)
+                5. CONTEXT: What appears to be happening or the purpose of the image?
+                6. ACCESSIBILITY NOTES: Any important details for understanding
+
+                Format the description in 3-5 clear sentences that paint a complete picture."""
+
+CONCISE_PROMPT = """Analyze this image and provide a clear, concise alt-text description
+                suitable for visually impaired users. Include:
+
+                1. What the main subject is
+                2. Important details (colors, key objects, any text visible)
+                3. Basic context or setting
+
+                Keep it informative but concise (2-3 sentences)."""
+
+TILE_PROMPT = """This is the {region} part (row {row} of {rows}, column {col} of {cols})
+                of a larger image such as a poster, map or infographic. Transcribe all
+                visible text exactly, in reading order, then briefly note any charts,
+                icons or other details needed to understand this part. Describe only
+                this part. If it shows nothing but background, reply with "{empty}"."""
+
+ANIMATION_PROMPT = """The {count} images that follow are keyframes of one animated image
+                ({frame_count} frames, {seconds:.1f} seconds per loop), in order, taken at
+                {times}. Describe the animation as a whole rather than each frame:
+                say what it shows and what moves or changes between the keyframes.
+
+                {prompt}"""
+
+# Quality for JPEGs that have to be scaled down (and for tiles)
+REENCODE_JPEG_QUALITY = 90
+
+# Overview and tile requests in flight at once (the rate limiter still applies)
+DEFAULT_TILE_WORKERS = 10
+
+
+def encode_image(source, max_bytes: int = MAX_INLINE_IMAGE_BYTES,
+                 max_dimension: int = MAX_IMAGE_DIMENSION):
+    """
+    Upload payload for an image.
+
+    Images in a format Gemini accepts, within max_bytes and max_dimension,
+    are sent as their original bytes with the MIME type of their content;
+    only the header is parsed and the pixels are never decoded. Anything
+    else is decoded, scaled down to max_dimension and re-encoded (JPEG
+    stays JPEG; other formats become lossless WebP, as the SDK does).
+
+    Args:
+        source: Path to the image, or an in-memory source (see utils.inputs)
+        max_bytes: Largest file sent as-is
+        max_dimension: Longest side (pixels) sent as-is
+
+    Returns:
+        (mime_type, data, passthrough)
+    """
+    data = read_all(source)
+    detected = sniff(bytes(memoryview(data)[:HEAD_BYTES]))
+    with Image.open(BufferReader(data)) as img:
+        if detected and sent_as_is(detected["format"], len(data), img.size,
+                                   max_bytes, max_dimension):
+            return detected["mime_type"], data, True
+
+        # JPEG can decode straight to a reduced scale
+        img.draft(None, (max_dimension, max_dimension))
+        img.thumbnail((max_dimension, max_dimension))
+        if img.format == "JPEG":
+            # Already lossy: a lossless re-encode would only inflate it
+            return "image/jpeg", _jpeg(img), False
+        blob = content_types.to_blob(img)
+    return blob.mime_type, blob.data, False
+
+
+def _jpeg(img) -> bytes:
+    payload = io.BytesIO()
+    img.convert("RGB").save(payload, format="JPEG", quality=REENCODE_JPEG_QUALITY)
+    return payload.getvalue()
+
 
 class ImageDescriptionAgent:
     """
@@ -21,100 +122,445 @@ class ImageDescriptionAgent:
     details of images.
     """
 
-    def __init__(self, model_name="gemini-2.0-flash-exp"):
+    def __init__(self, model_name="gemini-2.0-flash-exp", fallback_models=None,
+                 backend=None, cache=None, rate_limiter=None,
+                 max_image_bytes=None, max_image_dimension=None, uploads=None,
+                 tile_min_side=None, tile_workers=DEFAULT_TILE_WORKERS):
         """
         Initialize the Image Description Agent.
 
         Args:
             model_name: Name of the Gemini model to use
+            fallback_models: Models to fail over to, in order, when the
+                primary model's circuit breaker is open or a call fails
+            backend: ModelBackend used for generation (defaults to Gemini)
+            cache: Optional ResultCache; unchanged images are not re-sent
+            rate_limiter: Optional RateLimiter taken before every API call
+            max_image_bytes: Largest image sent as its original bytes
+                (defaults to MAX_INLINE_IMAGE_BYTES)
+            max_image_dimension: Longest side sent as-is; larger or
+                unsupported images are scaled down and re-encoded
+                (defaults to MAX_IMAGE_DIMENSION)
+            uploads: Optional UploadCache; large images are uploaded once
+                and referenced by URI in later requests
+            tile_min_side: describe_tiled() tiles images whose longest side
+                exceeds this (defaults to max_image_dimension)
+            tile_workers: Overview and tile requests in flight at once
         """
         self.model_name = model_name
-        self.model = genai.GenerativeModel(model_name)
-        logger.info(f"[OK] ImageDescriptionAgent initialized with model: {model_name}")
-
-    def generate_alt_text(self, image_path: str, detailed: bool = False) -> dict:
+        self.max_image_bytes = max_image_bytes or MAX_INLINE_IMAGE_BYTES
+        self.max_image_dimension = max_image_dimension or MAX_IMAGE_DIMENSION
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.uploads = uploads
+        self.tile_min_side = tile_min_side or self.max_image_dimension
+        self.tile_workers = max(1, tile_workers)
+        self.backend = backend or GeminiBackend()
+        self.model_chain = ModelFallbackChain(
+            [model_name] + list(fallback_models or []), model_factory=self.backend.bind
+        )
+        self.model = self.model_chain.get_model(model_name)
+        logger.info("[OK] ImageDescriptionAgent initialized with model: %s", model_name)
+
+    def generate_alt_text(self, image_path: str, detailed: bool = False,
+                          deadline=None, cancel_token=None) -> ImageResult:
         """
         Generate accessible alt-text for an image.
 
         Args:
-            image_path: Path to the image file (jpg, png, etc.)
+            image_path: Path to the image file (jpg, png, etc.), or the image
+                as bytes, memoryview or a binary file-like object
             detailed: If True, generates more detailed description
+            deadline: Optional Deadline; bounds the API call's timeout
+            cancel_token: Optional CancellationToken checked before the API call
 
         Returns:
-            dict containing:
+            ImageResult (read like a dict) containing:
                 - success (bool): Whether the operation succeeded
                 - alt_text (str): Generated alt-text description
-                - image_path (str): Path to the processed image
+                - image_path (str): Path to the processed image (a description
+                  of the input for in-memory images)
+                - model_used (str): Model that produced the description
+                - cached (bool): Whether the description came from the cache
+                - timed_out (bool): Whether the deadline stopped processing
+                - cancelled (bool): Whether cancellation stopped processing
                 - error (str): Error message if operation failed
+                - animated, keyframes: Only for animated images; the
+                  indices of the frames sent (just [0] when static)
         """
+        source, image_path = image_path, (
+            image_path if is_path(image_path) else describe_source(image_path)
+        )
         try:
-            logger.info(f"Processing image: {image_path}")
+            logger.info("Processing image: %s", image_path)
+            check(deadline, cancel_token, "image processing")
 
             # Validate file exists
-            if not Path(image_path).exists():
-                raise FileNotFoundError(f"Image file not found: {image_path}")
+            with time_stage("image", "file_stat"):
+                if not source_exists(source):
+                    raise FileNotFoundError(f"Image file not found: {image_path}")
+
+            if self.cache is not None:
+                cached = self.cache.get(source, model=self.model_name, detailed=detailed)
+                if cached is not None:
+                    logger.info("[OK] Using cached alt-text")
+                    return ImageResult(**cached, image_path=image_path, cached=True,
+                                       timed_out=False, cancelled=False)
 
-            # Load image
-            img = Image.open(image_path)
-            logger.debug(f"Image loaded: {img.size} pixels, {img.mode} mode")
+            # In-memory content is read in place
+            if not is_path(source):
+                source = BufferReader(read_all(source))
 
             # Create prompt based on detail level
-            if detailed:
-                prompt = """Analyze this image and provide a comprehensive, accessible description
-                suitable for visually impaired users. Include:
+            prompt = DETAILED_PROMPT if detailed else CONCISE_PROMPT
 
-                1. MAIN SUBJECT: What is the primary focus of the image?
-                2. DETAILS: Important visual elements (colors, objects, people, text)
-                3. SETTING: Where is this taking place? What's the environment?
-                4. TEXT: Any visible text, signs, or labels (transcribe exactly)
-                5. CONTEXT: What appears to be happening or the purpose of the image?
-                6. ACCESSIBILITY NOTES: Any important details for understanding
+            # Build the upload payload here, so its cost and size are
+            # measured rather than hidden inside the API call
+            contents, animation = self._request_contents(source, prompt)
 
-                Format the description in 3-5 clear sentences that paint a complete picture."""
-            else:
-                prompt = """Analyze this image and provide a clear, concise alt-text description
-                suitable for visually impaired users. Include:
+            # Generate description using Gemini Vision
+            logger.debug("Calling Gemini Vision API...")
+            if self.rate_limiter is not None:
+                with time_stage("image", "rate_limit_wait"):
+                    self.rate_limiter.acquire()
+            check(deadline, cancel_token, "image processing")
+            with time_stage("image", "api_call"):
+                response, model_used = self.model_chain.generate_content(
+                    contents, deadline=deadline
+                )
+
+            with time_stage("image", "result_assembly"):
+                alt_text = response.text.strip()
+                result = ImageResult(
+                    success=True,
+                    alt_text=alt_text,
+                    image_path=image_path,
+                    model_used=model_used,
+                    cached=False,
+                    timed_out=False,
+                    cancelled=False,
+                    error=None,
+                    **animation
+                )
+                if self.cache is not None:
+                    self.cache.put(
+                        source if is_path(source) else source.getbuffer(),
+                        {"success": True, "alt_text": alt_text, "model_used": model_used,
+                         "error": None, **animation},
+                        model=self.model_name, detailed=detailed
+                    )
+
+            logger.info("[OK] Generated alt-text (%d chars)", len(alt_text))
+            logger.debug("Alt-text preview: %.100s...", alt_text)
+
+            return result
+
+        except (DeadlineExceeded, OperationCancelled) as e:
+            timed_out = isinstance(e, DeadlineExceeded)
+            error_msg = str(e) if timed_out else f"Cancelled: {e}"
+            logger.warning("[X] %s: %s", image_path, error_msg)
+            return ImageResult.failure(image_path, error_msg, timed_out=timed_out,
+                                       cancelled=not timed_out)
 
-                1. What the main subject is
-                2. Important details (colors, key objects, any text visible)
-                3. Basic context or setting
+        except FileNotFoundError as e:
+            record_error(e)
+            error_msg = str(e)
+            logger.error("[X] File not found: %s", error_msg)
+            return ImageResult.failure(image_path, error_msg)
 
-                Keep it informative but concise (2-3 sentences)."""
+        except Exception as e:
+            record_error(e)
+            error_msg = f"Error processing image: {str(e)}"
+            logger.error("[X] %s", error_msg)
+            return ImageResult.failure(image_path, error_msg)
 
-            # Generate description using Gemini Vision
-            logger.debug("Calling Gemini Vision API...")
-            response = self.model.generate_content([prompt, img])
-            alt_text = response.text.strip()
+    def stream_alt_text(self, image_path: str, detailed: bool = False,
+                        deadline=None, cancel_token=None) -> TextStream:
+        """
+        Generate alt-text as a stream of chunks, as the model produces them.
+
+        Iterate the returned stream (for, or async for) to receive the
+        text; its result is then the dict generate_alt_text() would have
+        returned. A cached description arrives as a single chunk. The
+        deadline and cancel_token are also checked between chunks.
+
+        Args:
+            image_path: Path to the image file, or the image in memory
+                (see generate_alt_text)
+            detailed: If True, generates more detailed description
+            deadline: Optional Deadline; bounds the API call's timeout
+            cancel_token: Optional CancellationToken
 
-            logger.info(f"[OK] Generated alt-text ({len(alt_text)} chars)")
-            logger.debug(f"Alt-text preview: {alt_text[:100]}...")
+        Returns:
+            TextStream of alt-text chunks
+        """
+        return TextStream(self._alt_text_chunks(image_path, detailed, deadline, cancel_token))
+
+    def _alt_text_chunks(self, image_path, detailed: bool, deadline, cancel_token):
+        """Generator behind stream_alt_text(); returns the result dict."""
+        source, image_path = image_path, (
+            image_path if is_path(image_path) else describe_source(image_path)
+        )
+        try:
+            logger.info("Streaming alt-text for image: %s", image_path)
+            check(deadline, cancel_token, "image processing")
+            if not source_exists(source):
+                raise FileNotFoundError(f"Image file not found: {image_path}")
 
-            return {
-                "success": True,
-                "alt_text": alt_text,
-                "image_path": image_path,
-                "error": None
-            }
+            if self.cache is not None:
+                cached = self.cache.get(source, model=self.model_name, detailed=detailed)
+                if cached is not None:
+                    logger.info("[OK] Using cached alt-text")
+                    yield cached["alt_text"]
+                    return ImageResult(**cached, image_path=image_path, cached=True,
+                                       timed_out=False, cancelled=False)
+
+            if not is_path(source):
+                source = BufferReader(read_all(source))
+            prompt = DETAILED_PROMPT if detailed else CONCISE_PROMPT
+            contents, animation = self._request_contents(source, prompt)
+
+            if self.rate_limiter is not None:
+                with time_stage("image", "rate_limit_wait"):
+                    self.rate_limiter.acquire()
+            check(deadline, cancel_token, "image processing")
+            # Covers the time to the first chunk
+            with time_stage("image", "api_call"):
+                chunks, model_used = self.model_chain.stream_content(
+                    contents, deadline=deadline
+                )
+
+            streamed = []
+            for chunk in chunks:
+                if not streamed:
+                    chunk = chunk.lstrip()
+                if chunk:
+                    streamed.append(chunk)
+                    yield chunk
+                check(deadline, cancel_token, "image processing")
+
+            alt_text = "".join(streamed).strip()
+            if self.cache is not None:
+                self.cache.put(
+                    source if is_path(source) else source.getbuffer(),
+                    {"success": True, "alt_text": alt_text, "model_used": model_used,
+                     "error": None, **animation},
+                    model=self.model_name, detailed=detailed
+                )
+            logger.info("[OK] Streamed alt-text (%d chars)", len(alt_text))
+            return ImageResult(success=True, alt_text=alt_text, image_path=image_path,
+                               model_used=model_used, cached=False, timed_out=False,
+                               cancelled=False, error=None, **animation)
+
+        except (DeadlineExceeded, OperationCancelled) as e:
+            timed_out = isinstance(e, DeadlineExceeded)
+            error_msg = str(e) if timed_out else f"Cancelled: {e}"
+            logger.warning("[X] %s: %s", image_path, error_msg)
+            return ImageResult.failure(image_path, error_msg, timed_out=timed_out,
+                                       cancelled=not timed_out)
 
         except FileNotFoundError as e:
-            error_msg = str(e)
-            logger.error(f"[X] File not found: {error_msg}")
-            return {
-                "success": False,
-                "alt_text": None,
-                "image_path": image_path,
-                "error": error_msg
-            }
+            record_error(e)
+            logger.error("[X] File not found: %s", e)
+            return ImageResult.failure(image_path, str(e))
+
+        except Exception as e:
+            record_error(e)
+            error_msg = f"Error processing image: {str(e)}"
+            logger.error("[X] %s", error_msg)
+            return ImageResult.failure(image_path, error_msg)
+
+    def _request_contents(self, source, prompt: str):
+        """
+        Content parts for describing one image, built under the preprocess stage.
+
+        Animated images are sent as their keyframes with ANIMATION_PROMPT;
+        animations whose frames all look the same are sent as their first
+        frame only.
+
+        Returns:
+            (contents, animation fields for the result: {} for still images,
+            otherwise animated and keyframes)
+        """
+        with time_stage("image", "preprocess"):
+            animation = sample_keyframes(source)
+            if animation is None:
+                mime_type, data, passthrough = encode_image(
+                    source, self.max_image_bytes, self.max_image_dimension
+                )
+                logger.debug("Image payload: %d-byte %s (%s)", len(data), mime_type,
+                             "original bytes" if passthrough else "re-encoded")
+                IMAGES_ENCODED.inc(mode="passthrough" if passthrough else "reencoded")
+                return [prompt, content_part(self.uploads, mime_type, data)], {}
+
+            frames = animation["frames"]
+            fields = {"animated": True, "keyframes": [frame["index"] for frame in frames]}
+            parts = []
+            for frame in frames:
+                blob = content_types.to_blob(frame["image"])
+                parts.append(content_part(self.uploads, blob.mime_type, blob.data))
+            IMAGES_ENCODED.inc(len(parts), mode="keyframe")
+            if animation["static"]:
+                logger.debug("Static animation (%d frames): sending the first frame",
+                             animation["frame_count"])
+                return [prompt] + parts, fields
+
+            logger.debug("Animation: %d of %d frames sent as keyframes", len(parts),
+                         animation["frame_count"])
+            times = ", ".join(f"{frame['time_ms'] / 1000:.1f} s" for frame in frames)
+            prompt = ANIMATION_PROMPT.format(
+                count=len(parts), frame_count=animation["frame_count"],
+                seconds=animation["duration_ms"] / 1000, times=times, prompt=prompt
+            )
+            return [prompt] + parts, fields
+
+    def _describe_part(self, prompt: str, image_part: dict, deadline, cancel_token):
+        """One rate-limited, deadline-bound vision call; returns (text, model_used)."""
+        if self.rate_limiter is not None:
+            with time_stage("image", "rate_limit_wait"):
+                self.rate_limiter.acquire()
+        check(deadline, cancel_token, "image processing")
+        with time_stage("image", "api_call"):
+            response, model_used = self.model_chain.generate_content(
+                [prompt, image_part], deadline=deadline
+            )
+        return response.text.strip(), model_used
+
+    def describe_tiled(self, image_path: str, detailed: bool = False,
+                       deadline=None, cancel_token=None) -> ImageResult:
+        """
+        Describe a large image from overlapping tiles and an overview.
+
+        Images whose longest side is at most tile_min_side are described
+        by generate_alt_text(). Larger ones (posters, maps, infographics)
+        are decoded once; a scaled-down overview and each tile (see
+        utils.tiling.plan_tiles) are sent concurrently, so the wall time is
+        about that of one call. The overview gives the alt-text; the tile
+        transcriptions are merged locally into long_description.
+
+        Args:
+            image_path: Path to the image file, or the image in memory
+                (see generate_alt_text)
+            detailed: If True, the overview is a detailed description
+            deadline: Optional Deadline; bounds every API call
+            cancel_token: Optional CancellationToken checked before each call
+
+        Returns:
+            ImageResult with the fields of generate_alt_text() plus:
+                - tiled (bool): Whether the image was tiled
+                - long_description (str): Overview followed by the text and
+                  details of each region (tiled images only)
+                - tiles (list): row, col, region, box, text and error per tile
+                - tiles_failed (int): Tiles whose request failed
+        """
+        source, image_path = image_path, (
+            image_path if is_path(image_path) else describe_source(image_path)
+        )
+        if not is_path(source):
+            source = BufferReader(read_all(source))
+
+        def reader():
+            return source if is_path(source) else BufferReader(source.getbuffer())
+
+        try:
+            # Header only; the pixels are decoded once, when tiling
+            with Image.open(reader()) as img:
+                width, height = img.size
+        except Exception:
+            # generate_alt_text() reports missing or unreadable images
+            width = height = 0
+
+        if max(width, height) <= self.tile_min_side:
+            result = self.generate_alt_text(source, detailed=detailed, deadline=deadline,
+                                            cancel_token=cancel_token)
+            result.update(image_path=image_path, tiled=False)
+            return result
+
+        try:
+            logger.info("Processing image in tiles: %s (%dx%d)", image_path, width, height)
+            if self.cache is not None:
+                cached = self.cache.get(source if is_path(source) else source.getbuffer(),
+                                        model=self.model_name, detailed=detailed, tiled=True)
+                if cached is not None:
+                    logger.info("[OK] Using cached tiled description")
+                    return ImageResult(**cached, image_path=image_path, cached=True,
+                                       timed_out=False, cancelled=False)
+
+            tiles = plan_tiles(width, height)
+            with time_stage("image", "preprocess"):
+                with Image.open(reader()) as img:
+                    img.load()
+                    overview = img.copy()
+                    overview.thumbnail((OVERVIEW_DIMENSION, OVERVIEW_DIMENSION))
+                    requests = [(DETAILED_PROMPT if detailed else CONCISE_PROMPT,
+                                 content_part(self.uploads, "image/jpeg", _jpeg(overview)))]
+                    for tile in tiles:
+                        prompt = TILE_PROMPT.format(
+                            region=tile["region"], row=tile["row"] + 1, rows=tile["rows"],
+                            col=tile["col"] + 1, cols=tile["cols"], empty=EMPTY_TILE
+                        )
+                        requests.append((prompt, content_part(
+                            self.uploads, "image/jpeg", _jpeg(img.crop(tile["box"])))))
+            IMAGES_ENCODED.inc(len(requests), mode="tiled")
+
+            def describe(request):
+                return self._describe_part(*request, deadline, cancel_token)
+
+            with ThreadPoolExecutor(max_workers=min(self.tile_workers, len(requests))) as pool:
+                # Each call gets its own copy of the log and trace context
+                futures = [pool.submit(contextvars.copy_context().run, bind_context(describe),
+                                       request) for request in requests]
+                # The overview is required; tiles may fail individually
+                try:
+                    alt_text, model_used = futures[0].result()
+                except BaseException:
+                    # The tiles are useless without it: drop the calls not yet started
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    raise
+                for tile, future in zip(tiles, futures[1:]):
+                    try:
+                        tile["text"], _ = future.result()
+                        tile["error"] = None
+                    except (DeadlineExceeded, OperationCancelled):
+                        raise
+                    except Exception as e:
+                        record_error(e)
+                        logger.warning("Tile %s of %s failed: %s", tile["region"], image_path, e)
+                        tile["text"], tile["error"] = None, str(e)
+
+            with time_stage("image", "result_assembly"):
+                tiles = [{key: tile[key] for key in ("row", "col", "region", "box", "text", "error")}
+                         for tile in tiles]
+                described = {
+                    "success": True,
+                    "alt_text": alt_text,
+                    "long_description": merge_tiles(alt_text, tiles),
+                    "tiles": tiles,
+                    "tiles_failed": sum(1 for tile in tiles if tile["error"]),
+                    "tiled": True,
+                    "model_used": model_used,
+                    "error": None
+                }
+                if self.cache is not None and not described["tiles_failed"]:
+                    self.cache.put(source if is_path(source) else source.getbuffer(), described,
+                                   model=self.model_name, detailed=detailed, tiled=True)
+
+            logger.info("[OK] Described %d tiles (%d failed)", len(tiles), described["tiles_failed"])
+            return ImageResult(**described, image_path=image_path, cached=False,
+                               timed_out=False, cancelled=False)
+
+        except (DeadlineExceeded, OperationCancelled) as e:
+            timed_out = isinstance(e, DeadlineExceeded)
+            error_msg = str(e) if timed_out else f"Cancelled: {e}"
+            logger.warning("[X] %s: %s", image_path, error_msg)
+            return ImageResult.failure(image_path, error_msg, timed_out=timed_out,
+                                       cancelled=not timed_out, tiled=True)
 
         except Exception as e:
+            record_error(e)
             error_msg = f"Error processing image: {str(e)}"
-            logger.error(f"[X] {error_msg}")
-            return {
-                "success": False,
-                "alt_text": None,
-                "image_path": image_path,
-                "error": error_msg
-            }
+            logger.error("[X] %s", error_msg)
+            return ImageResult.failure(image_path, error_msg, tiled=True)
 
     def process_batch(self, image_paths: list) -> list:
         """
@@ -126,16 +572,17 @@ class ImageDescriptionAgent:
         Returns:
             List of result dictionaries for each image
         """
-        logger.info(f"Processing batch of {len(image_paths)} images")
+        logger.info("Processing batch of %d images", len(image_paths))
         results = []
 
         for i, image_path in enumerate(image_paths, 1):
-            logger.info(f"Processing image {i}/{len(image_paths)}")
+            logger.debug("Processing image %d/%d", i, len(image_paths))
             result = self.generate_alt_text(image_path)
             results.append(result)
 
         success_count = sum(1 for r in results if r["success"])
-        logger.info(f"[OK] Batch complete: {success_count}/{len(image_paths)} successful")
+        logger.info("[OK] Batch complete: %d/%d successful", success_count,
+                    len(image_paths))
 
         return results
 
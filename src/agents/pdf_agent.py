@@ -5,11 +5,36 @@ This agent makes PDF content accessible by extracting text and providing
 structured output suitable for screen readers and text-to-speech systems.
 """
 import PyPDF2
+import io
 import logging
+import re
 from pathlib import Path
 
+from utils.cancellation import DeadlineExceeded, OperationCancelled, check
+from utils.circuit_breaker import ModelFallbackChain
+from utils.inputs import describe_source, is_path, open_source, read_all, source_exists
+from utils.metrics import time_stage, record_error, PAGES_PROCESSED
+from utils.pdf_images import extract_images, page_has_images
+from utils.pdf_worker import PAGE_OK, PAGE_ERROR, PAGE_TIMEOUT, extract_pages
+from utils.text_quality import assess_text
+from utils.tracing import span
+from utils.uploads import content_part
+from .results import PDFResult
+
 logger = logging.getLogger(__name__)
 
+# Scanned pages sent to the vision model per request
+VISION_PAGES_PER_REQUEST = 4
+
+TRANSCRIBE_PROMPT = """This PDF contains scanned pages without a usable text layer.
+                Transcribe all text on every page exactly, in reading order, for a
+                screen reader. Describe figures in one short bracketed sentence.
+
+                Start each page with a line "=== PAGE n ===", where n is the page's
+                position in this PDF (1 to {count}). Output nothing else."""
+
+_PAGE_MARKER = re.compile(r"^=== PAGE (\d+) ===[ \t]*$", re.MULTILINE)
+
 
 class PDFProcessingAgent:
     """
@@ -19,44 +44,186 @@ class PDFProcessingAgent:
     files, password-protected documents, and other common PDF issues.
     """
 
-    def __init__(self):
-        """Initialize the PDF Processing Agent."""
+    def __init__(self, page_timeout: float = None, backend=None,
+                 model_name="gemini-2.0-flash-exp", fallback_models=None, rate_limiter=None,
+                 vision_pages_per_request: int = VISION_PAGES_PER_REQUEST, uploads=None):
+        """
+        Initialize the PDF Processing Agent.
+
+        Args:
+            page_timeout: Seconds one page may take; when set, pages are
+                extracted in a worker process that is killed on overrun
+                (None: extract in-process)
+            backend: Optional ModelBackend; pages whose text layer fails the
+                quality checks (scanned pages) are transcribed with it.
+                None keeps every page on local text extraction
+            model_name: Vision model for scanned pages
+            fallback_models: Models to fail over to, in order
+            rate_limiter: Optional RateLimiter taken before every API call
+            vision_pages_per_request: Scanned pages sent per vision request
+            uploads: Optional UploadCache for the page PDFs sent to the model
+        """
+        self.page_timeout = page_timeout
+        self.rate_limiter = rate_limiter
+        self.uploads = uploads
+        self.vision_pages_per_request = max(1, vision_pages_per_request)
+        self.model_chain = ModelFallbackChain(
+            [model_name] + list(fallback_models or []), model_factory=backend.bind
+        ) if backend is not None else None
         logger.info("[OK] PDFProcessingAgent initialized")
 
-    def extract_text(self, pdf_path: str, max_pages: int = 100) -> dict:
+    @staticmethod
+    def _extract_in_process(pdf_reader, page_numbers, deadline=None, cancel_token=None):
+        """Yield (page_number, status, text or error) like extract_pages()."""
+        for page_num in page_numbers:
+            check(deadline, cancel_token, "PDF page extraction")
+            try:
+                yield page_num, PAGE_OK, pdf_reader.pages[page_num].extract_text()
+            except Exception as e:
+                record_error(e)
+                yield page_num, PAGE_ERROR, str(e)
+
+    @staticmethod
+    def _needs_vision(page, text: str) -> dict:
+        """Text-layer assessment; only pages that draw an image can be scans."""
+        box = page.mediabox
+        quality = assess_text(text, float(box.width) * float(box.height))
+        if not quality["ok"] and not page_has_images(page):
+            # Blank or rule-only page: nothing a vision model could read
+            quality.update(ok=True, reason=None)
+        return quality
+
+    def _transcribe_batch(self, pdf_reader, page_numbers: list, deadline=None):
+        """
+        Transcribe pages in one vision request.
+
+        Returns:
+            {page_number: text}, or None if the response could not be split
+            into the requested pages
+        """
+        writer = PyPDF2.PdfWriter()
+        for page_num in page_numbers:
+            writer.add_page(pdf_reader.pages[page_num])
+        payload = io.BytesIO()
+        writer.write(payload)
+        part = content_part(self.uploads, "application/pdf", payload.getvalue())
+
+        if self.rate_limiter is not None:
+            with time_stage("pdf", "rate_limit_wait"):
+                self.rate_limiter.acquire()
+        with time_stage("pdf", "api_call"):
+            response, _ = self.model_chain.generate_content(
+                [TRANSCRIBE_PROMPT.format(count=len(page_numbers)),
+                 part],
+                deadline=deadline
+            )
+        text = response.text
+
+        sections = _PAGE_MARKER.split(text)
+        if len(sections) == 1:
+            return {page_numbers[0]: text.strip()} if len(page_numbers) == 1 else None
+        pages = {}
+        for position, section in zip(sections[1::2], sections[2::2]):
+            index = int(position) - 1
+            if 0 <= index < len(page_numbers):
+                pages[page_numbers[index]] = section.strip()
+        return pages if len(pages) == len(page_numbers) else None
+
+    def _transcribe_pages(self, pdf_reader, page_numbers: list, transcribed: dict,
+                          deadline=None, cancel_token=None):
+        """
+        Transcribe scanned pages, several per request, into transcribed.
+
+        A multi-page response that cannot be split by page is retried one
+        page per request. Pages whose request fails are left out.
+
+        Raises:
+            DeadlineExceeded / OperationCancelled: Pages done so far are kept
+        """
+        size = self.vision_pages_per_request
+        batches = [page_numbers[i:i + size] for i in range(0, len(page_numbers), size)]
+        while batches:
+            batch = batches.pop(0)
+            check(deadline, cancel_token, "PDF vision transcription")
+            try:
+                pages = self._transcribe_batch(pdf_reader, batch, deadline)
+            except (DeadlineExceeded, OperationCancelled):
+                raise
+            except Exception as e:
+                record_error(e)
+                logger.warning("Vision transcription failed for pages %s: %s",
+                               [n + 1 for n in batch], e)
+                continue
+            if pages is None:
+                logger.warning("Could not split the transcription of pages %s; retrying "
+                               "one page per request", [n + 1 for n in batch])
+                batches[:0] = [[page_num] for page_num in batch]
+                continue
+            transcribed.update(pages)
+
+    def extract_text(self, pdf_path: str, max_pages: int = 100,
+                     deadline=None, cancel_token=None) -> PDFResult:
         """
         Extract text from a PDF file for accessibility.
 
+        Processing stops between pages when the deadline passes or the
+        cancel token is triggered; the pages extracted so far are returned
+        with timed_out or cancelled set.
+
+        Each page's text layer is checked (see utils.text_quality). Pages
+        that fail are reported in scanned_pages and, if the agent has a
+        backend, transcribed by the vision model several per request;
+        born-digital pages never leave the local path. A scanned page
+        without a transcription keeps no text, only the reason as its
+        status; a failed transcription also fails the result.
+
         Args:
-            pdf_path: Path to the PDF file
+            pdf_path: Path to the PDF file, or the PDF as bytes, memoryview
+                or a binary file-like object
             max_pages: Maximum number of pages to process (safety limit)
+            deadline: Optional Deadline for the whole document
+            cancel_token: Optional CancellationToken
 
         Returns:
-            dict containing:
+            PDFResult (read like a dict) containing:
                 - success (bool): Whether the operation succeeded
-                - text (str): Extracted text from all pages
+                - text (str): Extracted text from all pages, built on access
+                  (pages gives it per page)
                 - page_count (int): Number of pages processed
-                - file_path (str): Path to the PDF file
+                - file_path (str): Path to the PDF file (a description of the
+                  input for in-memory PDFs)
+                - pages_timed_out (int): Pages skipped for exceeding page_timeout
+                - scanned_pages (list): 1-based pages without a usable text layer
+                - vision_pages (list): Scanned pages transcribed by the vision model
+                - timed_out (bool): Whether the deadline stopped processing
+                - cancelled (bool): Whether cancellation stopped processing
                 - error (str): Error message if operation failed
         """
+        source, pdf_path = pdf_path, pdf_path if is_path(pdf_path) else describe_source(pdf_path)
         try:
-            logger.info(f"Processing PDF: {pdf_path}")
+            logger.info("Processing PDF: %s", pdf_path)
+            check(deadline, cancel_token, "PDF processing")
 
             # Validate file exists
-            if not Path(pdf_path).exists():
-                raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+            with time_stage("pdf", "file_stat"):
+                if not source_exists(source):
+                    raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+            if self.page_timeout and not is_path(source):
+                # The page worker gets the content itself, not a stream
+                source = read_all(source)
 
             # Open and read PDF
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-
-                # Check if PDF is encrypted
-                if pdf_reader.is_encrypted:
-                    logger.warning("PDF is encrypted, attempting to decrypt...")
-                    try:
-                        pdf_reader.decrypt('')  # Try empty password
-                    except Exception as e:
-                        raise ValueError(f"PDF is password-protected: {str(e)}")
+            with open_source(source) as file:
+                with time_stage("pdf", "decode"):
+                    pdf_reader = PyPDF2.PdfReader(file)
+
+                    # Check if PDF is encrypted
+                    if pdf_reader.is_encrypted:
+                        logger.warning("PDF is encrypted, attempting to decrypt...")
+                        try:
+                            pdf_reader.decrypt('')  # Try empty password
+                        except Exception as e:
+                            raise ValueError(f"PDF is password-protected: {str(e)}")
 
                 # Get page count
                 total_pages = len(pdf_reader.pages)
@@ -64,98 +231,236 @@ class PDFProcessingAgent:
 
                 if total_pages > max_pages:
                     logger.warning(
-                        f"PDF has {total_pages} pages, processing first {max_pages} only"
+                        "PDF has %d pages, processing first %d only", total_pages, max_pages
                     )
 
-                logger.debug(f"PDF has {total_pages} pages, processing {pages_to_process}")
+                logger.debug("PDF has %d pages, processing %d", total_pages, pages_to_process)
 
                 # Extract text from all pages
-                extracted_pages = []
-                for page_num in range(pages_to_process):
-                    try:
-                        page = pdf_reader.pages[page_num]
-                        text = page.extract_text()
-
-                        # Add page separator for multi-page documents
-                        page_header = f"\n\n--- Page {page_num + 1} ---\n\n"
-                        extracted_pages.append(page_header + text)
-
-                        logger.debug(f"Extracted {len(text)} chars from page {page_num + 1}")
-
-                    except Exception as e:
-                        logger.warning(f"Error on page {page_num + 1}: {str(e)}")
-                        extracted_pages.append(
-                            f"\n\n--- Page {page_num + 1} (extraction failed) ---\n\n"
-                        )
-
-                # Combine all pages
-                combined_text = "\n".join(extracted_pages)
-                char_count = len(combined_text)
-
-                logger.info(
-                    f"[OK] Extracted {char_count} characters from {pages_to_process} pages"
-                )
-
-                return {
-                    "success": True,
-                    "text": combined_text,
-                    "page_count": pages_to_process,
-                    "total_pages": total_pages,
-                    "file_path": pdf_path,
-                    "char_count": char_count,
-                    "error": None
-                }
+                if self.page_timeout:
+                    pages = extract_pages(source, range(pages_to_process), self.page_timeout,
+                                          deadline, cancel_token)
+                else:
+                    pages = self._extract_in_process(pdf_reader, range(pages_to_process),
+                                                     deadline, cancel_token)
+                page_texts = []
+                page_index = {}
+                scanned = []
+                # Page number -> why its text layer is unusable
+                scan_reasons = {}
+                pages_timed_out = 0
+                interrupted = None
+                # Stops the page worker even if a page raises unexpectedly
+                try:
+                    for page_num in range(pages_to_process):
+                        with span("pdf.page", {"pdf.page_number": page_num + 1}) as page_span:
+                            try:
+                                with time_stage("pdf", "page_extraction"):
+                                    _, status, text = next(pages)
+                            except (DeadlineExceeded, OperationCancelled) as e:
+                                interrupted = e
+                                break
+
+                            if status == PAGE_OK:
+                                PAGES_PROCESSED.inc()
+                                page_span.set_attribute("pdf.chars", len(text))
+                                quality = self._needs_vision(pdf_reader.pages[page_num], text)
+                                if not quality["ok"]:
+                                    page_span.set_attribute("pdf.text_layer", quality["reason"])
+                                    logger.debug("Page %d has no usable text layer: %s",
+                                                 page_num + 1, quality["reason"])
+                                    scanned.append(page_num)
+                                    scan_reasons[page_num] = quality["reason"]
+
+                                page_index[page_num] = len(page_texts)
+                                page_texts.append((page_num + 1, text, None))
+
+                                logger.debug("Extracted %d chars from page %d", len(text),
+                                             page_num + 1)
+                            else:
+                                page_span.set_attribute("pdf.page_status", status)
+                                logger.warning("Error on page %d: %s", page_num + 1, text)
+                                reason = ("timed out" if status == PAGE_TIMEOUT
+                                          else "extraction failed")
+                                pages_timed_out += status == PAGE_TIMEOUT
+                                page_texts.append((page_num + 1, "", reason))
+                finally:
+                    pages.close()
+
+                # Only the scanned pages go to the vision model
+                transcribed = {}
+                vision = bool(scanned) and self.model_chain is not None and interrupted is None
+                if vision:
+                    logger.info("Transcribing %d scanned pages with the vision model",
+                                len(scanned))
+                    with span("pdf.vision", {"pdf.pages": len(scanned)}):
+                        try:
+                            self._transcribe_pages(pdf_reader, scanned, transcribed,
+                                                   deadline, cancel_token)
+                        except (DeadlineExceeded, OperationCancelled) as e:
+                            interrupted = e
+                for page_num, text in transcribed.items():
+                    page_texts[page_index[page_num]] = (page_num + 1, text, None)
+                # A scan's own text layer is noise: without a transcription it keeps none
+                failed_scans = []
+                for page_num in scanned:
+                    if page_num in transcribed:
+                        continue
+                    problem = scan_reasons[page_num]
+                    if vision and interrupted is None:
+                        failed_scans.append(page_num + 1)
+                        problem = f"vision transcription failed; {problem}"
+                    page_texts[page_index[page_num]] = (page_num + 1, "", problem)
+
+                # Pages are kept as one buffer; the combined text is built on access
+                with time_stage("pdf", "result_assembly"):
+                    timed_out = isinstance(interrupted, DeadlineExceeded)
+                    cancelled = isinstance(interrupted, OperationCancelled)
+                    if cancelled:
+                        error_msg = f"Cancelled: {interrupted}"
+                    elif interrupted:
+                        error_msg = str(interrupted)
+                    elif failed_scans:
+                        error_msg = f"Vision transcription failed for pages {failed_scans}"
+                    else:
+                        error_msg = None
+                    result = PDFResult(
+                        page_texts,
+                        success=error_msg is None,
+                        total_pages=total_pages,
+                        file_path=pdf_path,
+                        pages_timed_out=pages_timed_out,
+                        scanned_pages=[n + 1 for n in scanned],
+                        vision_pages=sorted(n + 1 for n in transcribed),
+                        timed_out=timed_out,
+                        cancelled=cancelled,
+                        error=error_msg
+                    )
+
+                if interrupted is not None:
+                    logger.warning(
+                        "[X] %s after %d/%d pages", error_msg, len(page_texts),
+                        pages_to_process
+                    )
+                elif failed_scans:
+                    logger.warning("[X] %s", error_msg)
+                else:
+                    logger.info(
+                        "[OK] Extracted %d characters from %d pages", result.char_count,
+                        pages_to_process
+                    )
+
+                return result
+
+        except (DeadlineExceeded, OperationCancelled) as e:
+            timed_out = isinstance(e, DeadlineExceeded)
+            error_msg = str(e) if timed_out else f"Cancelled: {e}"
+            logger.warning("[X] %s: %s", pdf_path, error_msg)
+            return PDFResult.failure(pdf_path, error_msg, timed_out=timed_out,
+                                     cancelled=not timed_out)
 
         except FileNotFoundError as e:
+            record_error(e)
             error_msg = str(e)
-            logger.error(f"[X] {error_msg}")
-            return {
-                "success": False,
-                "text": None,
-                "page_count": 0,
-                "total_pages": 0,
-                "file_path": pdf_path,
-                "char_count": 0,
-                "error": error_msg
-            }
+            logger.error("[X] %s", error_msg)
+            return PDFResult.failure(pdf_path, error_msg)
 
         except PyPDF2.errors.PdfReadError as e:
+            record_error(e)
             error_msg = f"Invalid or corrupt PDF: {str(e)}"
-            logger.error(f"[X] {error_msg}")
-            return {
-                "success": False,
-                "text": None,
-                "page_count": 0,
-                "total_pages": 0,
-                "file_path": pdf_path,
-                "char_count": 0,
-                "error": error_msg
-            }
+            logger.error("[X] %s", error_msg)
+            return PDFResult.failure(pdf_path, error_msg)
 
         except ValueError as e:
+            record_error(e)
             # Password-protected PDFs
             error_msg = str(e)
-            logger.error(f"[X] {error_msg}")
+            logger.error("[X] %s", error_msg)
+            return PDFResult.failure(pdf_path, error_msg)
+
+        except Exception as e:
+            record_error(e)
+            error_msg = f"Unexpected error processing PDF: {str(e)}"
+            logger.error("[X] %s", error_msg)
+            return PDFResult.failure(pdf_path, error_msg)
+
+    def extract_images(self, pdf_path: str, max_pages: int = 100,
+                       deadline=None, cancel_token=None) -> dict:
+        """
+        Extract the unique embedded images of a PDF.
+
+        Images shared between pages (logos, repeated figures) are returned
+        once, with every page they appear on (see utils.pdf_images).
+        Extraction runs in-process, also when page_timeout is set.
+
+        Args:
+            pdf_path: Path to the PDF file, or the PDF as bytes, memoryview
+                or a binary file-like object
+            max_pages: Maximum number of pages to scan (safety limit)
+            deadline: Optional Deadline for the whole document
+            cancel_token: Optional CancellationToken
+
+        Returns:
+            dict containing:
+                - success (bool): Whether the operation succeeded
+                - images (list): Unique images (key, data, width, height,
+                  pages, placements)
+                - placements (int): Image references across all pages
+                - file_path (str): Path to the PDF file
+                - timed_out (bool): Whether the deadline stopped extraction
+                - cancelled (bool): Whether cancellation stopped extraction
+                - error (str): Error message if operation failed
+        """
+        source, pdf_path = pdf_path, pdf_path if is_path(pdf_path) else describe_source(pdf_path)
+        try:
+            if not source_exists(source):
+                raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+            with open_source(source) as file:
+                pdf_reader = PyPDF2.PdfReader(file)
+                if pdf_reader.is_encrypted:
+                    pdf_reader.decrypt('')
+                pages_to_process = min(len(pdf_reader.pages), max_pages)
+                with time_stage("pdf", "image_extraction"):
+                    images = extract_images(pdf_reader, range(pages_to_process),
+                                            deadline=deadline, cancel_token=cancel_token)
+            placements = sum(image["placements"] for image in images)
+            logger.info("[OK] Found %d unique images (%d placements) in %s",
+                        len(images), placements, pdf_path)
+            return {
+                "success": True,
+                "images": images,
+                "placements": placements,
+                "file_path": pdf_path,
+                "timed_out": False,
+                "cancelled": False,
+                "error": None
+            }
+
+        except (DeadlineExceeded, OperationCancelled) as e:
+            timed_out = isinstance(e, DeadlineExceeded)
+            error_msg = str(e) if timed_out else f"Cancelled: {e}"
+            logger.warning("[X] %s: %s", pdf_path, error_msg)
             return {
                 "success": False,
-                "text": None,
-                "page_count": 0,
-                "total_pages": 0,
+                "images": [],
+                "placements": 0,
                 "file_path": pdf_path,
-                "char_count": 0,
+                "timed_out": timed_out,
+                "cancelled": not timed_out,
                 "error": error_msg
             }
 
         except Exception as e:
-            error_msg = f"Unexpected error processing PDF: {str(e)}"
-            logger.error(f"[X] {error_msg}")
+            record_error(e)
+            error_msg = f"Image extraction failed: {str(e)}"
+            logger.error("[X] %s", error_msg)
             return {
                 "success": False,
-                "text": None,
-                "page_count": 0,
-                "total_pages": 0,
+                "images": [],
+                "placements": 0,
                 "file_path": pdf_path,
-                "char_count": 0,
+                "timed_out": False,
+                "cancelled": False,
                 "error": error_msg
             }
 
@@ -169,16 +474,16 @@ class PDFProcessingAgent:
         Returns:
             List of result dictionaries for each PDF
         """
-        logger.info(f"Processing batch of {len(pdf_paths)} PDFs")
+        logger.info("Processing batch of %d PDFs", len(pdf_paths))
         results = []
 
         for i, pdf_path in enumerate(pdf_paths, 1):
-            logger.info(f"Processing PDF {i}/{len(pdf_paths)}")
+            logger.debug("Processing PDF %d/%d", i, len(pdf_paths))
             result = self.extract_text(pdf_path)
             results.append(result)
 
         success_count = sum(1 for r in results if r["success"])
-        logger.info(f"[OK] Batch complete: {success_count}/{len(pdf_paths)} successful")
+        logger.info("[OK] Batch complete: %d/%d successful", success_count, len(pdf_paths))
 
         return results
 
@@ -0,0 +1,200 @@
+"""
+Typed, compact result objects.
+
+Every result type declares its fields in __slots__, so a result is a few
+pointers instead of a per-file dict repeating every key. PDF text is kept
+as one UTF-8 buffer with per-page offsets and only decoded when text or
+pages is read, so large batches keep their documents compactly.
+
+Results still behave like the dicts they replace: result["alt_text"],
+result.get(...), "images" in result, result.update(...), {**result} and
+to_dict() all work. Optional fields that were never set are absent, like
+missing dict keys.
+"""
+from array import array
+from collections.abc import MutableMapping
+from typing import Iterable, List, Optional, Tuple
+
+# Result class -> (public field names in order, the same as a frozenset)
+_FIELDS = {}
+
+
+class Result(MutableMapping):
+    """Base class: slotted fields with a dict-compatible interface."""
+
+    __slots__ = ()
+
+    # Read-only properties listed among the keys (see PDFResult.text)
+    _computed = ()
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    @classmethod
+    def _fields(cls):
+        fields = _FIELDS.get(cls)
+        if fields is None:
+            names = [name for klass in reversed(cls.__mro__)
+                     for name in klass.__dict__.get("__slots__", ()) if not name.startswith("_")]
+            names = tuple(names) + tuple(cls._computed)
+            fields = _FIELDS[cls] = (names, frozenset(names))
+        return fields
+
+    def __getitem__(self, key):
+        if key not in self._fields()[1]:
+            raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        if key not in self._fields()[1] or key in self._computed:
+            raise KeyError(f"{type(self).__name__} has no field {key!r}")
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        try:
+            delattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        return (name for name in self._fields()[0] if hasattr(self, name))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> dict:
+        """Plain dict of the set fields (nested results converted too)."""
+        return {name: _plain(getattr(self, name)) for name in self}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+def _plain(value):
+    if isinstance(value, Result):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+
+class ImageResult(Result):
+    """Alt-text for one image (see ImageDescriptionAgent.generate_alt_text)."""
+
+    __slots__ = ("success", "alt_text", "image_path", "model_used", "cached",
+                 "timed_out", "cancelled", "error",
+                 # Animated images only: frame indices sent as keyframes
+                 "animated", "keyframes",
+                 # Tiled descriptions only
+                 "tiled", "long_description", "tiles", "tiles_failed")
+
+    @classmethod
+    def failure(cls, image_path: str, error: str, timed_out: bool = False,
+                cancelled: bool = False, **fields) -> "ImageResult":
+        return cls(success=False, alt_text=None, image_path=image_path, model_used=None,
+                   cached=False, timed_out=timed_out, cancelled=cancelled, error=error,
+                   **fields)
+
+
+class PageResult(Result):
+    """Text of one PDF page; status is "ok", "timed out" or "extraction failed"."""
+
+    __slots__ = ("number", "status", "text")
+
+
+class PDFResult(Result):
+    """
+    Text of a PDF (see PDFProcessingAgent.extract_text).
+
+    The text is held as one UTF-8 buffer with per-page byte offsets;
+    text and pages decode it on access.
+    """
+
+    __slots__ = ("success", "page_count", "total_pages", "file_path", "char_count",
+                 "pages_timed_out", "scanned_pages", "vision_pages", "timed_out",
+                 "cancelled", "error",
+                 # Embedded image descriptions (coordinator, describe_pdf_images)
+                 "images", "page_images", "image_placements", "images_failed", "images_error",
+                 "_buffer", "_numbers", "_ends", "_problems")
+
+    _computed = ("text",)
+
+    def __init__(self, pages: Optional[Iterable[Tuple[int, Optional[str], Optional[str]]]] = None,
+                 **fields):
+        """
+        Args:
+            pages: (1-based page number, text, problem) per page, in order;
+                problem is None or e.g. "timed out". None: no text at all.
+            **fields: The other fields; page_count and char_count are
+                derived from pages when they are given
+        """
+        super().__init__(**fields)
+        self._buffer = None
+        if pages is None:
+            return
+        encoded, numbers, ends, problems = [], array("I"), array("Q"), {}
+        end = chars = 0
+        for i, (number, text, problem) in enumerate(pages):
+            data = (text or "").encode("utf-8")
+            end += len(data)
+            encoded.append(data)
+            numbers.append(number)
+            ends.append(end)
+            if problem:
+                problems[i] = problem
+            chars += len(self._header(number, problem)) + len(text or "")
+        self._buffer = b"".join(encoded)
+        self._numbers, self._ends, self._problems = numbers, ends, problems
+        self.page_count = len(numbers)
+        # Pages are joined with a newline
+        self.char_count = chars + max(0, len(numbers) - 1)
+
+    @staticmethod
+    def _header(number: int, problem: Optional[str]) -> str:
+        label = f"{number} ({problem})" if problem else f"{number}"
+        return f"\n\n--- Page {label} ---\n\n"
+
+    def _page_text(self, i: int) -> str:
+        start = self._ends[i - 1] if i else 0
+        return self._buffer[start:self._ends[i]].decode("utf-8")
+
+    @property
+    def pages(self) -> List[PageResult]:
+        """Per-page text, decoded now (empty when there is no text)."""
+        if self._buffer is None:
+            return []
+        return [PageResult(number=number, status=self._problems.get(i, "ok"),
+                           text=self._page_text(i))
+                for i, number in enumerate(self._numbers)]
+
+    @property
+    def text(self) -> Optional[str]:
+        """Whole text with "--- Page N ---" separators, built on access."""
+        if self._buffer is None:
+            return None
+        return "\n".join(self._header(number, self._problems.get(i)) + self._page_text(i)
+                         for i, number in enumerate(self._numbers))
+
+    @classmethod
+    def failure(cls, file_path: str, error: str, timed_out: bool = False,
+                cancelled: bool = False) -> "PDFResult":
+        return cls(success=False, page_count=0, total_pages=0, file_path=file_path,
+                   char_count=0, pages_timed_out=0, scanned_pages=[], vision_pages=[],
+                   timed_out=timed_out, cancelled=cancelled, error=error)
+
+
+class FileResult(Result):
+    """One file routed by the coordinator (see CoordinatorAgent.process_file)."""
+
+    __slots__ = ("success", "file_type", "file_path", "result", "error", "timed_out",
+                 "cancelled", "memory")
+
+
+class BatchResult(Result):
+    """A processed batch (see CoordinatorAgent.process_batch)."""
+
+    __slots__ = ("total_files", "successful", "failed", "timed_out", "cancelled", "results")
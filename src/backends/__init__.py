@@ -0,0 +1,59 @@
+"""
+Model backends for AccessibleAI.
+
+Agents call models through a ModelBackend, so providers can be swapped
+(or traffic recorded and replayed) without touching agent code.
+"""
+from .base import (
+    ModelBackend, GenerationResponse, BoundModel, blob_part, file_part, inline_bytes,
+    is_file_part, request_key
+)
+from .gemini import GeminiBackend
+from .stub import StubBackend
+from .cassette import CassetteBackend, CassetteMissError, RecordedAPIError
+
+# Backend name -> factory; register_backend() adds providers
+BACKENDS = {
+    "gemini": GeminiBackend,
+    "stub": StubBackend,
+}
+
+
+def register_backend(name: str, factory):
+    """Make a backend available to create_backend() under a name."""
+    BACKENDS[name] = factory
+
+
+def create_backend(name: str = "gemini", cassette_path=None, cassette_mode: str = "replay",
+                   **options) -> ModelBackend:
+    """
+    Build a backend by name, optionally wrapped in a cassette.
+
+    Args:
+        name: Registered backend name ("gemini", "stub", ...)
+        cassette_path: If set, record/replay through this cassette file
+        cassette_mode: "record", "replay" or "auto"
+        **options: Passed to the backend factory
+
+    Returns:
+        ModelBackend instance
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown model backend: {name}. Available: {', '.join(BACKENDS)}")
+
+    if cassette_path and cassette_mode == "replay":
+        # Pure replay never touches the real provider
+        return CassetteBackend(cassette_path, mode="replay")
+
+    backend = BACKENDS[name](**options)
+    if cassette_path:
+        backend = CassetteBackend(cassette_path, mode=cassette_mode, inner=backend)
+    return backend
+
+
+__all__ = [
+    'ModelBackend', 'GenerationResponse', 'BoundModel', 'blob_part', 'file_part',
+    'is_file_part', 'request_key',
+    'GeminiBackend', 'StubBackend', 'CassetteBackend', 'CassetteMissError',
+    'RecordedAPIError', 'BACKENDS', 'register_backend', 'create_backend',
+]
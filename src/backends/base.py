@@ -0,0 +1,168 @@
+"""
+Model backend interface.
+
+Agents talk to a ModelBackend instead of a provider SDK. A backend turns
+(model name, content parts) into a GenerationResponse; bind() adapts it to
+the generate_content() shape used by ModelFallbackChain.
+
+Content parts are plain values so every backend can handle them:
+    - str: prompt text
+    - {"mime_type": str, "data": bytes}: inline binary (image, PDF, ...)
+    - {"mime_type": str, "file_uri": str, "sha256": str, "size": int}:
+      content stored earlier with ModelBackend.upload() (see file_part)
+"""
+import hashlib
+import json
+from abc import ABC, abstractmethod
+from typing import Iterator, List
+
+
+class GenerationResponse:
+    """
+    Result of one generation call.
+
+    Args:
+        text: Generated text, or a callable producing it on first access
+            (the Gemini SDK raises on .text for blocked responses, so the
+            error surfaces where the agent reads it)
+        model_name: Model that produced the response
+        raw: Provider-specific response object, if any
+    """
+
+    def __init__(self, text, model_name: str, raw=None):
+        self._text = text
+        self.model_name = model_name
+        self.raw = raw
+
+    @property
+    def text(self) -> str:
+        if callable(self._text):
+            self._text = self._text()
+        return self._text
+
+
+class BoundModel:
+    """A backend bound to one model name, exposing generate_content()."""
+
+    def __init__(self, backend: "ModelBackend", model_name: str):
+        self.backend = backend
+        self.model_name = model_name
+
+    def generate_content(self, contents, **options) -> GenerationResponse:
+        return self.backend.generate(self.model_name, contents, **options)
+
+    def stream_content(self, contents, **options) -> Iterator[str]:
+        return self.backend.generate_stream(self.model_name, contents, **options)
+
+
+class ModelBackend(ABC):
+    """Interface for vision and text generation providers."""
+
+    name = "base"
+
+    @abstractmethod
+    def generate(self, model_name: str, contents: List, **options) -> GenerationResponse:
+        """
+        Generate text for a list of content parts.
+
+        Args:
+            model_name: Provider model name
+            contents: Prompt strings and inline blob dicts
+            **options: Provider options passed through (e.g. request_options)
+
+        Returns:
+            GenerationResponse
+        """
+
+    def generate_stream(self, model_name: str, contents: List, **options) -> Iterator[str]:
+        """
+        Generate text in chunks, as the model produces it.
+
+        Backends without streaming yield the whole response as one chunk.
+
+        Args:
+            model_name: Provider model name
+            contents: Prompt strings and inline blob dicts
+            **options: Provider options passed through (e.g. request_options)
+
+        Returns:
+            Iterator of text chunks
+        """
+        yield self.generate(model_name, contents, **options).text
+
+    # Whether upload() stores content for reuse across requests
+    supports_upload = False
+
+    def upload(self, data: bytes, mime_type: str) -> dict:
+        """
+        Store content with the provider so requests can reference it.
+
+        Args:
+            data: Content bytes
+            mime_type: MIME type of the content
+
+        Returns:
+            dict with uri and expires_at (epoch seconds, or None if the
+            provider does not say)
+        """
+        raise NotImplementedError(f"The {self.name} backend does not support uploads")
+
+    def bind(self, model_name: str) -> BoundModel:
+        """Model-factory hook for ModelFallbackChain."""
+        return BoundModel(self, model_name)
+
+
+def blob_part(mime_type: str, data: bytes) -> dict:
+    """Build an inline binary content part."""
+    return {"mime_type": mime_type, "data": bytes(data)}
+
+
+def file_part(mime_type: str, file_uri: str, sha256: str, size: int) -> dict:
+    """Build a part referencing uploaded content (hash and size identify it)."""
+    return {"mime_type": mime_type, "file_uri": file_uri, "sha256": sha256, "size": size}
+
+
+def is_file_part(part) -> bool:
+    return isinstance(part, dict) and "file_uri" in part
+
+
+def inline_bytes(contents: List) -> int:
+    """Bytes a request carries inline; text and uploaded references count nothing."""
+    total = 0
+    for part in contents:
+        if isinstance(part, str) or is_file_part(part):
+            continue
+        data = part.get("data") if isinstance(part, dict) else getattr(part, "data", None)
+        total += len(data) if data is not None else 0
+    return total
+
+
+def describe_part(part) -> dict:
+    """
+    Describe a content part without its payload (for keys and logs).
+
+    Binary parts are reduced to MIME type, size and SHA-256; uploaded
+    parts describe the same way as the inline content they stand for.
+    """
+    if isinstance(part, str):
+        return {"text": part}
+    if is_file_part(part):
+        return {"mime_type": part["mime_type"], "size": part["size"], "sha256": part["sha256"]}
+    mime_type = part.get("mime_type") if isinstance(part, dict) else getattr(part, "mime_type", None)
+    data = part.get("data") if isinstance(part, dict) else getattr(part, "data", None)
+    if data is None:
+        raise TypeError(f"Unsupported content part: {type(part).__name__}")
+    return {
+        "mime_type": mime_type,
+        "size": len(data),
+        "sha256": hashlib.sha256(data).hexdigest(),
+    }
+
+
+def request_key(model_name: str, contents: List) -> str:
+    """Stable hash identifying a request (model + all parts)."""
+    payload = json.dumps(
+        {"model": model_name, "parts": [describe_part(part) for part in contents]},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
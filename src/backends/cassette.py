@@ -0,0 +1,188 @@
+"""
+Record/replay ("cassette") backend.
+
+In record mode every request is forwarded to an inner backend and the
+interaction is appended to a JSON-lines cassette. In replay mode answers
+come from the cassette only, so recorded production traffic can drive the
+whole pipeline locally, at full speed or at the recorded latencies.
+
+Requests are matched by request_key(): model name plus the text of every
+prompt and the SHA-256 of every binary part. Payload bytes are never
+written to the cassette. Uploaded parts match like their inline content,
+and replay answers uploads with a placeholder URI without storing anything.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .base import ModelBackend, GenerationResponse, describe_part, request_key
+
+logger = logging.getLogger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+AUTO = "auto"
+
+
+class CassetteMissError(KeyError):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+class RecordedAPIError(Exception):
+    """Replays an error captured while recording (keeps the status code)."""
+
+    def __init__(self, message: str, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+class CassetteBackend(ModelBackend):
+    """
+    Backend that records to, or replays from, a cassette file.
+
+    Args:
+        path: Cassette file (JSON lines)
+        mode: "record", "replay", or "auto" (replay if recorded, else record)
+        inner: Backend used for recording (required unless mode is "replay")
+        replay_latency: Sleep for the recorded latency when replaying
+        latency_scale: Multiplier applied to recorded latencies
+    """
+
+    name = "cassette"
+
+    def __init__(self, path, mode: str = REPLAY, inner: ModelBackend = None,
+                 replay_latency: bool = False, latency_scale: float = 1.0):
+        if mode not in (RECORD, REPLAY, AUTO):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        if mode != REPLAY and inner is None:
+            raise ValueError(f"Cassette mode '{mode}' needs an inner backend to record from")
+        self.path = Path(path)
+        self.mode = mode
+        self.inner = inner
+        self.replay_latency = replay_latency
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        # key -> recorded interactions, replayed in order (last one repeats)
+        self._interactions = {}
+        self._replay_positions = {}
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            if self.mode == REPLAY:
+                raise FileNotFoundError(f"Cassette not found: {self.path}")
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._interactions.setdefault(entry["key"], []).append(entry)
+        logger.info("Loaded %d recorded requests from %s", len(self._interactions), self.path)
+
+    @property
+    def supports_upload(self) -> bool:
+        return self.inner is None or self.inner.supports_upload
+
+    def upload(self, data: bytes, mime_type: str) -> dict:
+        if self.inner is not None and self.mode != REPLAY:
+            return self.inner.upload(data, mime_type)
+        return {"uri": f"cassette://{hashlib.sha256(data).hexdigest()}", "expires_at": None}
+
+    @property
+    def interaction_count(self) -> int:
+        """Number of recorded interactions (a backend is never falsy)."""
+        with self._lock:
+            return sum(len(entries) for entries in self._interactions.values())
+
+    def generate(self, model_name, contents, **options) -> GenerationResponse:
+        key = request_key(model_name, contents)
+        with self._lock:
+            recorded = key in self._interactions
+        if self.mode == REPLAY or (self.mode == AUTO and recorded):
+            return self._replay(key, model_name)
+        return self._record(key, model_name, contents, **options)
+
+    def generate_stream(self, model_name, contents, **options):
+        key = request_key(model_name, contents)
+        with self._lock:
+            recorded = key in self._interactions
+        if self.mode == REPLAY or (self.mode == AUTO and recorded):
+            # Recorded as whole texts, so a replayed stream is one chunk
+            yield self._replay(key, model_name).text
+            return
+        yield from self._record_stream(key, model_name, contents, **options)
+
+    def _replay(self, key: str, model_name: str) -> GenerationResponse:
+        with self._lock:
+            entries = self._interactions.get(key)
+            if not entries:
+                raise CassetteMissError(f"No recorded response for {model_name} request {key[:12]}")
+            position = self._replay_positions.get(key, 0)
+            entry = entries[min(position, len(entries) - 1)]
+            self._replay_positions[key] = position + 1
+
+        if self.replay_latency:
+            time.sleep(entry.get("latency_ms", 0) / 1000.0 * self.latency_scale)
+        if entry.get("error") is not None:
+            raise RecordedAPIError(entry["error"], entry.get("code"))
+        return GenerationResponse(entry["text"], model_name)
+
+    def _record(self, key: str, model_name: str, contents, **options) -> GenerationResponse:
+        entry = {
+            "key": key,
+            "model": model_name,
+            "parts": [describe_part(part) for part in contents],
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+        }
+        start = time.perf_counter()
+        try:
+            response = self.inner.generate(model_name, contents, **options)
+            # Read the text now so a blocked response is recorded as an error
+            entry["text"] = response.text
+        except Exception as e:
+            code = getattr(e, "code", None)
+            entry["error"] = str(e)
+            entry["code"] = int(code) if isinstance(code, int) else None
+            raise
+        finally:
+            entry["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            self._append(entry)
+        return response
+
+    def _record_stream(self, key: str, model_name: str, contents, **options):
+        entry = {
+            "key": key,
+            "model": model_name,
+            "parts": [describe_part(part) for part in contents],
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+        }
+        start = time.perf_counter()
+        chunks = []
+        try:
+            for chunk in self.inner.generate_stream(model_name, contents, **options):
+                chunks.append(chunk)
+                yield chunk
+        except GeneratorExit:
+            # Abandoned by the caller: the text is incomplete, record nothing
+            raise
+        except Exception as e:
+            code = getattr(e, "code", None)
+            entry["error"] = str(e)
+            entry["code"] = int(code) if isinstance(code, int) else None
+            entry["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            self._append(entry)
+            raise
+        entry["text"] = "".join(chunks)
+        entry["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        self._append(entry)
+
+    def _append(self, entry: dict):
+        with self._lock:
+            self._interactions.setdefault(entry["key"], []).append(entry)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
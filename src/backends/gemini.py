@@ -0,0 +1,73 @@
+"""
+Gemini backend (google-generativeai SDK).
+"""
+import io
+import threading
+import time
+
+import google.generativeai as genai
+from google.generativeai import protos
+
+from .base import ModelBackend, GenerationResponse, is_file_part
+
+# Seconds between state checks while an upload is processed
+UPLOAD_POLL_SECONDS = 0.5
+
+# Uploads still processing after this long are treated as failed
+UPLOAD_TIMEOUT_SECONDS = 60
+
+
+def _to_sdk_part(part):
+    if is_file_part(part):
+        return protos.Part(file_data=protos.FileData(
+            mime_type=part["mime_type"], file_uri=part["file_uri"]
+        ))
+    return part
+
+
+class GeminiBackend(ModelBackend):
+    """Calls genai.GenerativeModel(...).generate_content; uploads use the File API."""
+
+    name = "gemini"
+    supports_upload = True
+
+    def __init__(self):
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _model(self, model_name: str):
+        with self._lock:
+            model = self._models.get(model_name)
+            if model is None:
+                model = genai.GenerativeModel(model_name)
+                self._models[model_name] = model
+            return model
+
+    def upload(self, data: bytes, mime_type: str) -> dict:
+        uploaded = genai.upload_file(io.BytesIO(data), mime_type=mime_type)
+        started = time.monotonic()
+        while uploaded.state.name == "PROCESSING":
+            if time.monotonic() - started > UPLOAD_TIMEOUT_SECONDS:
+                raise TimeoutError(f"Upload {uploaded.name} still processing")
+            time.sleep(UPLOAD_POLL_SECONDS)
+            uploaded = genai.get_file(uploaded.name)
+        if uploaded.state.name != "ACTIVE":
+            raise RuntimeError(f"Upload {uploaded.name} failed: {uploaded.state.name}")
+        expiration = getattr(uploaded, "expiration_time", None)
+        return {"uri": uploaded.uri,
+                "expires_at": expiration.timestamp() if expiration else None}
+
+    def generate(self, model_name, contents, **options) -> GenerationResponse:
+        response = self._model(model_name).generate_content(
+            [_to_sdk_part(part) for part in contents], **options
+        )
+        return GenerationResponse(lambda: response.text, model_name, raw=response)
+
+    def generate_stream(self, model_name, contents, **options):
+        response = self._model(model_name).generate_content(
+            [_to_sdk_part(part) for part in contents], stream=True, **options
+        )
+        for chunk in response:
+            # .text raises for a blocked chunk, like the non-streaming path
+            if chunk.text:
+                yield chunk.text
@@ -0,0 +1,76 @@
+"""
+Deterministic stub backend for tests and offline runs.
+"""
+import hashlib
+import itertools
+import re
+import time
+
+from .base import ModelBackend, GenerationResponse, describe_part, is_file_part
+
+
+class StubBackend(ModelBackend):
+    """
+    Returns a canned description derived from the request content.
+
+    The same request always yields the same text, so results are stable
+    across runs without any network access. Uploads are kept in memory
+    (files, uploads), and an uploaded part yields the same text as the
+    inline content; referencing an unknown URI fails like an expired file.
+
+    Args:
+        latency: Seconds to sleep per call (to imitate a remote model);
+            a request_options timeout shorter than this fails the call
+        chunk_delay: Seconds between streamed chunks (one word each) after
+            the first
+    """
+
+    name = "stub"
+    supports_upload = True
+
+    def __init__(self, latency: float = 0.0, chunk_delay: float = 0.0):
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.calls = 0
+        self.uploads = 0
+        self.files = {}
+        self._file_ids = itertools.count(1)
+
+    def upload(self, data: bytes, mime_type: str) -> dict:
+        self.uploads += 1
+        uri = f"stub://files/{next(self._file_ids)}"
+        self.files[uri] = bytes(data)
+        return {"uri": uri, "expires_at": None}
+
+    def generate(self, model_name, contents, **options) -> GenerationResponse:
+        return GenerationResponse(self._respond(contents, **options), model_name)
+
+    def generate_stream(self, model_name, contents, **options):
+        for i, chunk in enumerate(re.findall(r"\S+\s*", self._respond(contents, **options))):
+            if i and self.chunk_delay:
+                time.sleep(self.chunk_delay)
+            yield chunk
+
+    def _respond(self, contents, **options) -> str:
+        self.calls += 1
+        for part in contents:
+            if is_file_part(part) and part["file_uri"] not in self.files:
+                raise RuntimeError(f"404 File {part['file_uri']} not found or expired")
+        if self.latency:
+            timeout = (options.get("request_options") or {}).get("timeout")
+            if timeout is not None and timeout < self.latency:
+                time.sleep(timeout)
+                raise TimeoutError(f"Stub request timed out after {timeout:.3f}s")
+            time.sleep(self.latency)
+
+        parts = [describe_part(part) for part in contents]
+        blobs = [p for p in parts if "sha256" in p]
+        digest = hashlib.sha256(
+            "".join(p.get("sha256") or p["text"] for p in parts).encode("utf-8")
+        ).hexdigest()[:12]
+
+        if blobs:
+            blob = blobs[0]
+            return (f"Stub description of a {blob['size']}-byte {blob['mime_type']} "
+                    f"input (ref {digest}).")
+        return f"Stub response (ref {digest})."
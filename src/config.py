@@ -16,13 +16,72 @@ class Config:
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
     MODEL_NAME = "gemini-2.0-flash-exp"  # Using Gemini 2.0 Flash for bonus points
 
+    # Model resilience: fallback chain (comma-separated) and circuit breaker
+    FALLBACK_MODELS = [
+        m.strip() for m in os.getenv("FALLBACK_MODELS", "gemini-1.5-flash").split(",")
+        if m.strip()
+    ]
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+    CIRCUIT_RECOVERY_SECONDS = float(os.getenv("CIRCUIT_RECOVERY_SECONDS", "30"))
+
+    # Model backend (gemini, stub) and optional record/replay cassette
+    MODEL_BACKEND = os.getenv("MODEL_BACKEND", "gemini")
+    CASSETTE_PATH = os.getenv("CASSETTE_PATH")
+    CASSETTE_MODE = os.getenv("CASSETTE_MODE", "replay")  # record, replay or auto
+
     # Google Cloud Project (optional, for deployment)
     GOOGLE_CLOUD_PROJECT = os.getenv("GOOGLE_CLOUD_PROJECT")
 
     # Application Settings
-    MAX_IMAGE_SIZE_MB = 10
+    # Images within both limits are uploaded as their original bytes;
+    # others are scaled down and re-encoded
+    MAX_IMAGE_SIZE_MB = float(os.getenv("MAX_IMAGE_SIZE_MB", "10"))
+    MAX_IMAGE_DIMENSION = int(os.getenv("MAX_IMAGE_DIMENSION", "3072"))
+
+    # Describe images embedded in PDFs (each unique image once)
+    DESCRIBE_PDF_IMAGES = os.getenv("DESCRIBE_PDF_IMAGES", "false").lower() == "true"
+    PDF_IMAGE_WORKERS = int(os.getenv("PDF_IMAGE_WORKERS", "4"))
+
+    # Transcribe scanned PDF pages (no usable text layer) with the vision model
+    SCANNED_PAGE_FALLBACK = os.getenv("SCANNED_PAGE_FALLBACK", "false").lower() == "true"
+
+    # Payloads of at least this size are uploaded once and referenced by URI
+    # (MB, 0 disables)
+    UPLOAD_MIN_MB = float(os.getenv("UPLOAD_MIN_MB", "0")) or None
+
+    # Describe images beyond MAX_IMAGE_DIMENSION from overlapping tiles
+    TILE_LARGE_IMAGES = os.getenv("TILE_LARGE_IMAGES", "false").lower() == "true"
+    TILE_WORKERS = int(os.getenv("TILE_WORKERS", "10"))
+
+    # Offline mode (--offline): batch-prediction job files and polling
+    BATCH_JOB_DIR = os.getenv("BATCH_JOB_DIR", "batch_jobs")
+    BATCH_MAX_REQUESTS_PER_JOB = int(os.getenv("BATCH_MAX_REQUESTS_PER_JOB", "10000"))
+    BATCH_POLL_SECONDS = float(os.getenv("BATCH_POLL_SECONDS", "30"))
     MAX_PDF_PAGES = 100
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_JSON = os.getenv("LOG_JSON", "false").lower() == "true"
+    LOG_ASYNC = os.getenv("LOG_ASYNC", "false").lower() == "true"
+    LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+
+    # Memory budget for files processed concurrently (MB, optional)
+    MEMORY_BUDGET_MB = float(os.getenv("MEMORY_BUDGET_MB", "0")) or None
+
+    # Result cache (JSON lines) and API rate limit (calls/minute); optional
+    RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH")
+    RATE_LIMIT_RPM = float(os.getenv("RATE_LIMIT_RPM", "0")) or None
+
+    # Deadlines in seconds (0 disables); PDF pages over their budget are
+    # extracted in a worker process that is killed on overrun
+    FILE_TIMEOUT_SECONDS = float(os.getenv("FILE_TIMEOUT_SECONDS", "0")) or None
+    BATCH_TIMEOUT_SECONDS = float(os.getenv("BATCH_TIMEOUT_SECONDS", "0")) or None
+    PDF_PAGE_TIMEOUT_SECONDS = float(os.getenv("PDF_PAGE_TIMEOUT_SECONDS", "30")) or None
+
+    # Metrics export (Prometheus text format); both are optional
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0")) or None
+    METRICS_FILE = os.getenv("METRICS_FILE")
+
+    # Tracing: JSON-lines span file (optional)
+    TRACE_FILE = os.getenv("TRACE_FILE")
 
     @staticmethod
     def validate():
@@ -32,7 +91,10 @@ class Config:
         Raises:
             ValueError: If required configuration is missing
         """
-        if not Config.GEMINI_API_KEY:
+        needs_api_key = Config.MODEL_BACKEND == "gemini" and not (
+            Config.CASSETTE_PATH and Config.CASSETTE_MODE == "replay"
+        )
+        if needs_api_key and not Config.GEMINI_API_KEY:
             raise ValueError(
                 "GEMINI_API_KEY not found. Please create a .env file with your API key.\n"
                 "Get your API key from: https://aistudio.google.com/app/apikey"
@@ -40,6 +102,8 @@ class Config:
 
         print("[OK] Configuration loaded successfully")
         print(f"[OK] Using model: {Config.MODEL_NAME}")
+        if Config.FALLBACK_MODELS:
+            print(f"[OK] Fallback models: {', '.join(Config.FALLBACK_MODELS)}")
 
         return True
 
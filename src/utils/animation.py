@@ -0,0 +1,136 @@
+"""
+Keyframe sampling for animated images (GIF, WebP, APNG).
+
+An animated image is described from a few visually distinct frames sent
+in one request, instead of its first frame or the whole multi-frame file.
+Frames are compared as small grayscale thumbnails by mean absolute pixel
+difference. Keyframes are picked greedily: each new keyframe is the frame
+least like the ones already picked, stopping once every frame is close to
+one of them. An "animation" whose frames barely differ is reported as
+static and described from its first frame.
+
+Scoring uses NumPy when it is installed and PIL's ImageChops otherwise.
+"""
+import logging
+import math
+from typing import List, Optional
+
+from PIL import Image, ImageChops, ImageSequence, ImageStat
+
+from utils.inputs import BufferReader, is_path, read_all
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Keyframes sent per animation
+MAX_KEYFRAMES = 4
+
+# Long animations are scored on at most this many evenly spaced frames
+MAX_SCORED_FRAMES = 120
+
+# Side of the grayscale thumbnails frames are compared on
+SCORE_SIDE = 64
+
+# Mean absolute difference (0-255) below which two frames count as the same
+MIN_FRAME_DIFFERENCE = 4.0
+
+# Longest side of each keyframe sent to the model
+KEYFRAME_DIMENSION = 768
+
+
+def is_animated(img) -> bool:
+    """Whether an opened image has more than one frame."""
+    return bool(getattr(img, "is_animated", False)) and getattr(img, "n_frames", 1) > 1
+
+
+def _distances(thumbs, i: int) -> List[float]:
+    """Mean absolute difference between thumbnail i and every thumbnail."""
+    if NUMPY_AVAILABLE:
+        return list(np.abs(thumbs - thumbs[i]).mean(axis=1))
+    return [ImageStat.Stat(ImageChops.difference(thumb, thumbs[i])).mean[0] for thumb in thumbs]
+
+
+def select_keyframes(thumbs, max_frames: int = MAX_KEYFRAMES,
+                     min_difference: float = MIN_FRAME_DIFFERENCE) -> List[int]:
+    """
+    Positions of the most distinct thumbnails, in order.
+
+    Args:
+        thumbs: Grayscale PIL thumbnails of the same size
+        max_frames: Most positions returned
+        min_difference: A frame this close to a picked one adds nothing
+
+    Returns:
+        Sorted positions, always starting with 0 ([0] alone when static)
+    """
+    if NUMPY_AVAILABLE:
+        thumbs = np.stack([np.asarray(thumb, dtype=np.float32).ravel() for thumb in thumbs])
+    selected = [0]
+    nearest = _distances(thumbs, 0)
+    while len(selected) < max_frames:
+        candidate = max(range(len(nearest)), key=nearest.__getitem__)
+        if nearest[candidate] < min_difference:
+            break
+        selected.append(candidate)
+        nearest = [min(a, b) for a, b in zip(nearest, _distances(thumbs, candidate))]
+    return sorted(selected)
+
+
+def sample_keyframes(source, max_frames: int = MAX_KEYFRAMES,
+                     min_difference: float = MIN_FRAME_DIFFERENCE,
+                     max_dimension: int = KEYFRAME_DIMENSION) -> Optional[dict]:
+    """
+    Pick the keyframes of an animated image.
+
+    Only the image header is read for still images.
+
+    Args:
+        source: Path to the image, or an in-memory source (see utils.inputs)
+        max_frames: Most keyframes returned
+        min_difference: See select_keyframes
+        max_dimension: Longest side of the returned frames
+
+    Returns:
+        None for still images, otherwise a dict containing:
+            - frame_count (int): Frames in the animation
+            - duration_ms (int): Length of one loop
+            - static (bool): Whether all frames look the same
+            - frames (list): {"index", "time_ms", "image"} per keyframe,
+              image being an RGB PIL image
+    """
+    stream = source if is_path(source) else BufferReader(read_all(source))
+    with Image.open(stream) as img:
+        if not is_animated(img):
+            return None
+
+        frame_count = img.n_frames
+        stride = math.ceil(frame_count / MAX_SCORED_FRAMES)
+        indices, starts, thumbs = [], [], []
+        elapsed = 0
+        for i, frame in enumerate(ImageSequence.Iterator(img)):
+            starts.append(elapsed)
+            elapsed += frame.info.get("duration", 0) or 0
+            if i % stride == 0:
+                indices.append(i)
+                thumbs.append(frame.convert("L").resize((SCORE_SIDE, SCORE_SIDE)))
+
+        chosen = [indices[p] for p in select_keyframes(thumbs, max_frames, min_difference)]
+        frames = []
+        for i in chosen:
+            img.seek(i)
+            frame = img.convert("RGB")
+            frame.thumbnail((max_dimension, max_dimension))
+            frames.append({"index": i, "time_ms": starts[i], "image": frame})
+
+    logger.debug("Animation: %d frames, keyframes %s", frame_count, chosen)
+    return {
+        "frame_count": frame_count,
+        "duration_ms": elapsed,
+        "static": len(chosen) == 1,
+        "frames": frames,
+    }
@@ -0,0 +1,335 @@
+"""
+Offline batch-prediction jobs.
+
+Backfills do not need interactive latency, and batch jobs are billed at
+a lower rate and do not count against per-request quotas. Requests are
+written to JSON-lines job files in the Gemini batch format: one
+{"key", "request"} object per line, with image bytes inline as base64.
+The files are submitted as asynchronous jobs and polled. Their outputs
+are read back by key; CoordinatorAgent.process_offline() uses each
+image's content hash as the key. Submitted jobs are recorded in a
+manifest in the job directory (see write_manifest), so a later call can
+collect jobs an earlier one stopped waiting for instead of paying for
+them twice.
+
+Job clients:
+    GeminiBatchClient: the Gemini Batch API (needs the google-genai SDK)
+    LocalBatchClient: runs job files through any ModelBackend in a
+        background thread; a stand-in for tests and offline runs
+"""
+import base64
+import itertools
+import json
+import logging
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from backends import blob_part
+from utils.metrics import BYTES_UPLOADED
+
+try:
+    from google import genai as genai_sdk
+    from google.genai import types as genai_types
+except ImportError:  # pragma: no cover - optional dependency
+    genai_sdk = None
+    genai_types = None
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Gemini accepts input files of up to 2 GB; shards stay well below it
+DEFAULT_MAX_REQUESTS_PER_JOB = 10000
+DEFAULT_MAX_JOB_BYTES = 1024 * 1024 * 1024
+
+DEFAULT_POLL_SECONDS = 30.0
+
+MANIFEST_NAME = "jobs.json"
+
+
+def request_line(key: str, prompt: str, mime_type: str, data) -> str:
+    """One job-file line: a prompt and an inline image."""
+    return json.dumps({"key": key, "request": {"contents": [{"parts": [
+        {"text": prompt},
+        {"inline_data": {"mime_type": mime_type,
+                         "data": base64.b64encode(data).decode("ascii")}},
+    ]}]}}) + "\n"
+
+
+def parse_request(line: str) -> Tuple[str, list]:
+    """(key, content parts) of a job-file line, as passed to ModelBackend.generate."""
+    entry = json.loads(line)
+    contents = []
+    for part in entry["request"]["contents"][0]["parts"]:
+        if "text" in part:
+            contents.append(part["text"])
+        else:
+            inline = part["inline_data"]
+            contents.append(blob_part(inline["mime_type"], base64.b64decode(inline["data"])))
+    return entry["key"], contents
+
+
+def response_line(key: str, text: Optional[str] = None, error: Optional[str] = None) -> str:
+    """One output line in the Gemini batch format."""
+    if error is not None:
+        return json.dumps({"key": key, "error": {"message": error}}) + "\n"
+    return json.dumps({"key": key, "response": {"candidates": [
+        {"content": {"parts": [{"text": text}]}}]}}) + "\n"
+
+
+def parse_output(line: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """(key, text, error) of an output line; exactly one of text and error is set."""
+    entry = json.loads(line)
+    error = entry.get("error") or entry.get("status")
+    if error:
+        return entry["key"], None, error.get("message") or json.dumps(error)
+    try:
+        parts = entry["response"]["candidates"][0]["content"]["parts"]
+    except (KeyError, IndexError):
+        reason = entry.get("response", {}).get("promptFeedback") or "no candidates"
+        return entry["key"], None, f"Empty response: {reason}"
+    return entry["key"], "".join(part.get("text", "") for part in parts), None
+
+
+def read_manifest(job_dir) -> List[dict]:
+    """Jobs recorded in a job directory's manifest ([] if there is none)."""
+    path = Path(job_dir) / MANIFEST_NAME
+    if not path.exists():
+        return []
+    return json.loads(path.read_text(encoding="utf-8"))["jobs"]
+
+
+def write_manifest(job_dir, jobs: List[dict]):
+    """
+    Record the jobs not yet collected; the manifest is removed once there are none.
+
+    Args:
+        job_dir: Directory the job files are in
+        jobs: One dict per job: name, file, client (BatchJobClient.name),
+            model, detailed and paths (content hash -> paths of the images)
+    """
+    path = Path(job_dir) / MANIFEST_NAME
+    if not jobs:
+        path.unlink(missing_ok=True)
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps({"jobs": jobs}, indent=1), encoding="utf-8")
+    tmp_path.replace(path)  # atomic, so an interrupted write keeps the old manifest
+
+
+class JobWriter:
+    """
+    Writes requests into job files of bounded size.
+
+    Args:
+        job_dir: Directory for the job files
+        prefix: File name prefix (e.g. a run id)
+        max_requests: Requests per job file
+        max_bytes: Approximate size limit of a job file
+        on_file: Called with each job file's path and the keys in it once
+            the file is complete, so it can be submitted while the next
+            one is written
+    """
+
+    def __init__(self, job_dir, prefix: str = "job",
+                 max_requests: int = DEFAULT_MAX_REQUESTS_PER_JOB,
+                 max_bytes: int = DEFAULT_MAX_JOB_BYTES, on_file=None):
+        self.job_dir = Path(job_dir)
+        self.job_dir.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self.max_requests = max_requests
+        self.max_bytes = max_bytes
+        self.on_file = on_file
+        self.files: List[Path] = []
+        self._file = None
+        self._keys = []
+        self._bytes = 0
+
+    def add(self, key: str, prompt: str, mime_type: str, data):
+        line = request_line(key, prompt, mime_type, data).encode("utf-8")
+        if self._file is not None and (len(self._keys) >= self.max_requests
+                                       or self._bytes + len(line) > self.max_bytes):
+            self._finish()
+        if self._file is None:
+            path = self.job_dir / f"{self.prefix}-{len(self.files):05d}.jsonl"
+            self._file = open(path, "wb")
+            self.files.append(path)
+        self._file.write(line)
+        self._keys.append(key)
+        self._bytes += len(line)
+
+    def _finish(self):
+        self._file.close()
+        keys, self._keys = self._keys, []
+        self._file = None
+        self._bytes = 0
+        if self.on_file is not None:
+            self.on_file(self.files[-1], keys)
+
+    def close(self) -> List[Path]:
+        """Complete the last job file; returns every job file written."""
+        if self._file is not None:
+            self._finish()
+        return self.files
+
+
+class BatchJobClient(ABC):
+    """Submits job files and reads back their outputs."""
+
+    name = "base"
+
+    @abstractmethod
+    def submit(self, job_file: Path, model_name: str) -> str:
+        """Start a job for a job file; returns the job name."""
+
+    @abstractmethod
+    def status(self, job_name: str) -> Tuple[str, Optional[str]]:
+        """(state, error) of a job; state is PENDING, RUNNING, SUCCEEDED or FAILED."""
+
+    @abstractmethod
+    def results(self, job_name: str) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+        """(key, text, error) for every request of a succeeded job."""
+
+
+class LocalBatchClient(BatchJobClient):
+    """
+    Processes job files locally with a ModelBackend (a batch API stand-in).
+
+    Jobs run in background threads; outputs are written next to the job
+    file as <name>.output.jsonl in the Gemini output format. Jobs end with
+    the client: another client reports them as failed.
+
+    Args:
+        backend: ModelBackend answering each request (e.g. StubBackend)
+        max_jobs: Jobs processed at once
+    """
+
+    name = "local"
+
+    def __init__(self, backend, max_jobs: int = 1):
+        self.backend = backend
+        self._executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="batch-job")
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        # Job names stay unique across clients sharing a manifest
+        self._prefix = uuid.uuid4().hex[:8]
+        self._lock = threading.Lock()
+
+    def submit(self, job_file: Path, model_name: str) -> str:
+        job_name = f"local-batches/{self._prefix}-{next(self._ids)}"
+        future = self._executor.submit(self._run, Path(job_file), model_name)
+        with self._lock:
+            self._jobs[job_name] = future
+        return job_name
+
+    def _run(self, job_file: Path, model_name: str) -> Path:
+        output = job_file.with_suffix(".output.jsonl")
+        with open(job_file, encoding="utf-8") as requests, \
+                open(output, "w", encoding="utf-8") as outputs:
+            for line in requests:
+                if not line.strip():
+                    continue
+                key, contents = parse_request(line)
+                try:
+                    text = self.backend.generate(model_name, contents).text
+                except Exception as e:
+                    outputs.write(response_line(key, error=str(e)))
+                else:
+                    outputs.write(response_line(key, text))
+        return output
+
+    def status(self, job_name: str) -> Tuple[str, Optional[str]]:
+        with self._lock:
+            future = self._jobs.get(job_name)
+        if future is None:
+            return FAILED, f"Unknown job {job_name} (local jobs end with the client that ran them)"
+        if not future.done():
+            return (RUNNING if future.running() else PENDING), None
+        error = future.exception()
+        return (FAILED, str(error)) if error else (SUCCEEDED, None)
+
+    def results(self, job_name: str):
+        with self._lock:
+            future = self._jobs[job_name]
+        output = future.result()
+        with open(output, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield parse_output(line)
+
+    def shutdown(self, wait: bool = True):
+        """Stop the workers; jobs not yet started are dropped unless waiting."""
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+class GeminiBatchClient(BatchJobClient):
+    """
+    The Gemini Batch API: job files are uploaded and run as batch jobs.
+
+    Args:
+        api_key: Gemini API key (defaults to the SDK's environment lookup)
+    """
+
+    name = "gemini"
+
+    _STATES = {
+        "JOB_STATE_UNSPECIFIED": PENDING,
+        "JOB_STATE_PENDING": PENDING,
+        "JOB_STATE_QUEUED": PENDING,
+        "JOB_STATE_PAUSED": PENDING,
+        "JOB_STATE_RUNNING": RUNNING,
+        "JOB_STATE_UPDATING": RUNNING,
+        "JOB_STATE_CANCELLING": RUNNING,
+        "JOB_STATE_SUCCEEDED": SUCCEEDED,
+        # Its output file has a response or an error line per request
+        "JOB_STATE_PARTIALLY_SUCCEEDED": SUCCEEDED,
+        "JOB_STATE_FAILED": FAILED,
+        "JOB_STATE_CANCELLED": FAILED,
+        "JOB_STATE_EXPIRED": FAILED,
+    }
+
+    def __init__(self, api_key: Optional[str] = None):
+        if genai_sdk is None:
+            raise ImportError("GeminiBatchClient needs the google-genai package: "
+                              "pip install google-genai")
+        self.client = genai_sdk.Client(api_key=api_key) if api_key else genai_sdk.Client()
+
+    def submit(self, job_file: Path, model_name: str) -> str:
+        job_file = Path(job_file)
+        uploaded = self.client.files.upload(
+            file=str(job_file),
+            config=genai_types.UploadFileConfig(display_name=job_file.name, mime_type="jsonl"),
+        )
+        BYTES_UPLOADED.inc(job_file.stat().st_size)
+        job = self.client.batches.create(model=model_name, src=uploaded.name,
+                                         config={"display_name": job_file.stem})
+        logger.info("Submitted batch job %s for %s", job.name, job_file.name)
+        return job.name
+
+    def status(self, job_name: str) -> Tuple[str, Optional[str]]:
+        job = self.client.batches.get(name=job_name)
+        state = self._STATES.get(job.state.name)
+        if state is None:
+            # Resubmitting a job that may still run would bill it twice
+            logger.warning("Unknown state %s of batch job %s; still waiting",
+                           job.state.name, job_name)
+            state = PENDING
+        error = None
+        if state == FAILED:
+            error = str(getattr(job, "error", None) or job.state.name)
+        return state, error
+
+    def results(self, job_name: str):
+        job = self.client.batches.get(name=job_name)
+        content = self.client.files.download(file=job.dest.file_name)
+        for line in content.decode("utf-8").splitlines():
+            if line.strip():
+                yield parse_output(line)
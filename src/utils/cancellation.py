@@ -0,0 +1,90 @@
+"""
+Deadlines and cooperative cancellation.
+
+A CancellationToken is shared between the caller and the workers of a
+batch; workers check it between steps (before a file, between PDF pages,
+before an API call). A Deadline is an absolute point in time that
+per-file and per-batch limits are folded into.
+"""
+import threading
+import time
+from typing import Optional
+
+
+class OperationCancelled(Exception):
+    """Raised when work stops because its CancellationToken was triggered."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when work stops because its deadline passed."""
+
+
+class CancellationToken:
+    """Thread-safe flag the caller sets to stop a batch."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason = None
+
+    def cancel(self, reason: str = "cancelled by caller"):
+        """Request cancellation (idempotent; the first reason is kept)."""
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until cancelled or the timeout passes; True if cancelled."""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise OperationCancelled(self.reason)
+
+
+class Deadline:
+    """
+    Absolute deadline on the monotonic clock.
+
+    Args:
+        seconds: Time allowed from now (None: no deadline)
+        clock: Time source (injectable for tests)
+    """
+
+    def __init__(self, seconds: Optional[float] = None, clock=time.monotonic):
+        self._clock = clock
+        self.expires_at = None if seconds is None else clock() + seconds
+
+    @classmethod
+    def earliest(cls, *deadlines) -> "Deadline":
+        """The tightest of several deadlines (None entries are ignored)."""
+        limited = [d for d in deadlines if d is not None and d.expires_at is not None]
+        if not limited:
+            return cls(None)
+        return min(limited, key=lambda d: d.expires_at)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (never negative), or None without a deadline."""
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - self._clock(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and self._clock() >= self.expires_at
+
+    def raise_if_expired(self, what: str = "operation"):
+        if self.expired:
+            raise DeadlineExceeded(f"Deadline exceeded during {what}")
+
+
+def check(deadline: Optional[Deadline] = None, cancel_token: Optional[CancellationToken] = None,
+          what: str = "operation"):
+    """Raise OperationCancelled or DeadlineExceeded if either applies."""
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+    if deadline is not None:
+        deadline.raise_if_expired(what)
@@ -0,0 +1,306 @@
+"""
+Circuit breaker and model fallback chain for Gemini calls.
+
+Every model gets its own breaker (shared process-wide by model name). Once a
+model has failed repeatedly its breaker opens and requests skip straight to
+the next model in the chain instead of each one waiting for the same error.
+After a cool-down the breaker lets a single probe request through
+(half-open); a success closes it again, a failure re-opens it.
+"""
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import google.generativeai as genai
+
+from backends import inline_bytes
+from utils.cancellation import Deadline
+from utils.metrics import BYTES_UPLOADED
+from utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# HTTP status codes that mean "the request was bad", not "the model is down"
+CALLER_ERROR_CODES = {400}
+
+
+class AllModelsFailedError(Exception):
+    """Raised when every model in a fallback chain failed or was skipped."""
+
+    def __init__(self, errors: Dict[str, str]):
+        self.errors = errors
+        details = "; ".join(f"{name}: {error}" for name, error in errors.items())
+        super().__init__(f"All models failed ({details})")
+
+
+class CircuitBreaker:
+    """
+    Three-state circuit breaker (closed -> open -> half-open -> closed).
+
+    Args:
+        name: Identifier used in log messages (the model name)
+        failure_threshold: Consecutive failures that open the circuit
+        recovery_timeout: Seconds to stay open before allowing a probe
+        clock: Monotonic time source (injectable for tests)
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3,
+                 recovery_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        """Current state, moving open -> half-open once the cool-down expires."""
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a call may go through right now.
+
+        In the half-open state only one probe request is allowed at a time.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        """Record a successful call and close the circuit."""
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("Circuit for %s closed", self.name)
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        """Record a failed call, opening the circuit if the threshold is hit."""
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning(
+                        "Circuit for %s opened after %d failure(s)", self.name, self._failures
+                    )
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._probe_in_flight = False
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+_defaults = {"failure_threshold": 3, "recovery_timeout": 30.0}
+
+
+def configure_breakers(failure_threshold: int = 3, recovery_timeout: float = 30.0):
+    """
+    Set the thresholds used for breakers created from now on.
+
+    Args:
+        failure_threshold: Consecutive failures that open a circuit
+        recovery_timeout: Seconds an open circuit waits before a probe
+    """
+    with _breakers_lock:
+        _defaults["failure_threshold"] = failure_threshold
+        _defaults["recovery_timeout"] = recovery_timeout
+
+
+def get_breaker(model_name: str, failure_threshold: Optional[int] = None,
+                recovery_timeout: Optional[float] = None) -> CircuitBreaker:
+    """
+    Get the process-wide breaker for a model, creating it on first use.
+
+    Thresholds only apply when the breaker is created; unset values use the
+    defaults from configure_breakers().
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(model_name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                model_name,
+                failure_threshold or _defaults["failure_threshold"],
+                recovery_timeout or _defaults["recovery_timeout"],
+            )
+            _breakers[model_name] = breaker
+        return breaker
+
+
+def reset_breakers():
+    """Forget all breaker state (used by tests)."""
+    with _breakers_lock:
+        _breakers.clear()
+
+
+def is_caller_error(error: Exception) -> bool:
+    """True if the error is the request's fault rather than the model's."""
+    return getattr(error, "code", None) in CALLER_ERROR_CODES
+
+
+class ModelFallbackChain:
+    """
+    Ordered list of models tried in turn, each guarded by a circuit breaker.
+
+    Args:
+        model_names: Primary model first, then fallbacks in order of preference
+        model_factory: Callable building a model from its name
+            (defaults to genai.GenerativeModel)
+        failure_threshold: Consecutive failures that open a model's circuit
+            (defaults to the configure_breakers() value)
+        recovery_timeout: Seconds an open circuit waits before a probe
+            (defaults to the configure_breakers() value)
+    """
+
+    def __init__(self, model_names: List[str], model_factory: Optional[Callable] = None,
+                 failure_threshold: Optional[int] = None,
+                 recovery_timeout: Optional[float] = None):
+        # Drop duplicates but keep the preference order
+        self.model_names = list(dict.fromkeys(name for name in model_names if name))
+        if not self.model_names:
+            raise ValueError("ModelFallbackChain needs at least one model name")
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._model_factory = model_factory or genai.GenerativeModel
+        self._models = {}
+
+    def get_model(self, model_name: str):
+        """Return the (cached) model object for a name."""
+        model = self._models.get(model_name)
+        if model is None:
+            model = self._model_factory(model_name)
+            self._models[model_name] = model
+        return model
+
+    def breaker(self, model_name: str) -> CircuitBreaker:
+        """Return the shared breaker guarding a model."""
+        return get_breaker(model_name, self.failure_threshold, self.recovery_timeout)
+
+    def generate_content(self, contents, deadline: Optional[Deadline] = None,
+                         **kwargs) -> Tuple[object, str]:
+        """
+        Call generate_content on the first healthy model.
+
+        Args:
+            contents: Prompt and content parts
+            deadline: Optional Deadline; each attempt gets the remaining time
+                as its request timeout and no attempt starts after it passes
+            **kwargs: Passed to the model's generate_content
+
+        Returns:
+            Tuple of (response, name of the model that served it)
+
+        Raises:
+            AllModelsFailedError: If every model failed or had an open circuit
+            DeadlineExceeded: If the deadline passed before a model answered
+        """
+        return self._first_healthy(
+            lambda model, options: model.generate_content(contents, **options),
+            "model.generate_content", deadline, kwargs, inline_bytes(contents)
+        )
+
+    def stream_content(self, contents, deadline: Optional[Deadline] = None,
+                       **kwargs) -> Tuple[Iterator[str], str]:
+        """
+        Stream text chunks from the first healthy model.
+
+        A model counts as having answered once its first chunk arrives, so
+        failures before any text fall back like generate_content(); errors
+        after that propagate from the iterator.
+
+        Args:
+            contents: Prompt and content parts
+            deadline: Optional Deadline (see generate_content)
+            **kwargs: Passed to the model's stream_content
+
+        Returns:
+            Tuple of (iterator of text chunks, name of the model serving it)
+
+        Raises:
+            AllModelsFailedError: If every model failed or had an open circuit
+            DeadlineExceeded: If the deadline passed before a model answered
+        """
+        def start(model, options):
+            chunks = iter(model.stream_content(contents, **options))
+            first = next(chunks, None)
+            return itertools.chain([] if first is None else [first], chunks)
+
+        return self._first_healthy(start, "model.stream_content", deadline, kwargs,
+                                   inline_bytes(contents))
+
+    def _first_healthy(self, call: Callable, span_name: str, deadline: Optional[Deadline],
+                       kwargs: dict, payload_bytes: int = 0) -> Tuple[object, str]:
+        """
+        call(model, kwargs) on each model in turn until one succeeds.
+
+        payload_bytes (the request's inline content) counts towards the
+        bytes-uploaded metric once per attempt: every attempt sends it again.
+        """
+        errors = {}
+        attempts = 0
+        for model_name in self.model_names:
+            if deadline is not None:
+                deadline.raise_if_expired("model call")
+                remaining = deadline.remaining()
+                if remaining is not None:
+                    kwargs["request_options"] = {**kwargs.get("request_options", {}),
+                                                 "timeout": remaining}
+            breaker = self.breaker(model_name)
+            if not breaker.allow_request():
+                errors[model_name] = "circuit open"
+                continue
+
+            # One span per API attempt; attempts after the first are retries
+            # on a fallback model
+            attributes = {"model": model_name, "attempt": attempts, "retry": attempts > 0}
+            attempts += 1
+            BYTES_UPLOADED.inc(payload_bytes)
+            with span(span_name, attributes) as attempt_span:
+                try:
+                    response = call(self.get_model(model_name), kwargs)
+                except Exception as e:
+                    attempt_span.record_exception(e)
+                    if is_caller_error(e):
+                        # The model answered; the request itself was rejected
+                        breaker.record_success()
+                        raise
+                    breaker.record_failure()
+                    attempt_span.set_attribute("outcome", "error")
+                    errors[model_name] = str(e)
+                    logger.warning("Model %s failed, trying next fallback: %s", model_name, e)
+                    continue
+                attempt_span.set_attribute("outcome", "ok")
+
+            breaker.record_success()
+            if model_name != self.model_names[0]:
+                logger.info("Request served by fallback model %s", model_name)
+            return response, model_name
+
+        if deadline is not None:
+            deadline.raise_if_expired("model call")
+        raise AllModelsFailedError(errors)
@@ -0,0 +1,154 @@
+"""
+Content-type detection from magic bytes.
+
+Files are typed by their leading bytes, never by their name, so a PDF
+saved as .jpg is routed to the PDF agent and a renamed text file is
+rejected before it reaches a parser or a Gemini call. Each signature is
+registered with register_file_type(); new content types plug in without
+touching the callers.
+
+Detection reads the first HEAD_BYTES once per file. Results for paths are
+cached by (path, size, mtime), so pre-flight, memory estimation and the
+coordinator share one read per file.
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional, Union
+
+from utils.inputs import is_path, read_head
+
+logger = logging.getLogger(__name__)
+
+# PDF headers may follow up to 1 KB of junk (PDF 1.7, Annex H)
+HEAD_BYTES = 1024
+
+# Cached path detections
+CACHE_SIZE = 4096
+
+Matcher = Union[bytes, tuple, Callable[[bytes], bool]]
+
+_signatures: List[dict] = []
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def _matches(match: Matcher, head: bytes) -> bool:
+    if callable(match):
+        return bool(match(head))
+    return head.startswith(match)
+
+
+def register_file_type(file_type: str, format: str, mime_type: str, match: Matcher,
+                       extensions=(), first: bool = False):
+    """
+    Register a content signature.
+
+    Args:
+        file_type: Handler key the coordinator dispatches on ("image", "pdf", ...)
+        format: Format name (e.g. "PNG")
+        mime_type: MIME type of the content
+        match: Leading bytes, a tuple of alternatives, or callable(head) -> bool
+        extensions: File extensions usually carrying this format (used to
+            pick files out of directories, never to type them)
+        first: Check before the existing signatures (to refine one)
+    """
+    signature = {
+        "file_type": file_type,
+        "format": format,
+        "mime_type": mime_type,
+        "match": match,
+        "extensions": tuple(e.lower() for e in extensions),
+    }
+    with _lock:
+        if first:
+            _signatures.insert(0, signature)
+        else:
+            _signatures.append(signature)
+        _cache.clear()
+
+
+def unregister_file_type(format: str):
+    """Remove the signatures registered under a format name."""
+    with _lock:
+        _signatures[:] = [s for s in _signatures if s["format"] != format]
+        _cache.clear()
+
+
+def supported_extensions() -> set:
+    """Extensions of every registered format (for directory scans)."""
+    with _lock:
+        return {ext for s in _signatures for ext in s["extensions"]}
+
+
+def sniff(head: bytes) -> Optional[dict]:
+    """
+    Type leading bytes.
+
+    Returns:
+        dict with file_type, format and mime_type, or None if no signature matches
+    """
+    with _lock:
+        signatures = list(_signatures)
+    for signature in signatures:
+        if _matches(signature["match"], head):
+            return {key: signature[key] for key in ("file_type", "format", "mime_type")}
+    return None
+
+
+def detect(source) -> Optional[dict]:
+    """
+    Type a source (path or in-memory) from its leading bytes.
+
+    Returns:
+        sniff() result, or None if unreadable or unrecognised
+    """
+    if not is_path(source):
+        return sniff(read_head(source, HEAD_BYTES))
+
+    try:
+        stat = os.stat(source)
+    except OSError:
+        return None
+    key = (os.path.abspath(source), stat.st_size, stat.st_mtime_ns)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    detected = sniff(read_head(source, HEAD_BYTES))
+    with _lock:
+        _cache[key] = detected
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    logger.debug("Detected %s as %s", source, detected and detected["format"])
+    return detected
+
+
+def detect_file_type(source) -> str:
+    """Handler key for a source, or "unsupported"."""
+    detected = detect(source)
+    return detected["file_type"] if detected else "unsupported"
+
+
+def clear_detection_cache():
+    with _lock:
+        _cache.clear()
+
+
+register_file_type("image", "PNG", "image/png", b"\x89PNG\r\n\x1a\n", extensions=(".png",))
+register_file_type("image", "JPEG", "image/jpeg", b"\xff\xd8\xff",
+                   extensions=(".jpg", ".jpeg"))
+register_file_type("image", "GIF", "image/gif", (b"GIF87a", b"GIF89a"), extensions=(".gif",))
+register_file_type("image", "WEBP", "image/webp",
+                   lambda head: head[:4] == b"RIFF" and head[8:12] == b"WEBP",
+                   extensions=(".webp",))
+# "BM" alone is too weak; the two reserved header words are always zero
+register_file_type("image", "BMP", "image/bmp",
+                   lambda head: head[:2] == b"BM" and head[6:10] == b"\0\0\0\0",
+                   extensions=(".bmp",))
+# Last: an image header could contain "%PDF-" by chance, a PDF never starts
+# with an image signature
+register_file_type("pdf", "PDF", "application/pdf",
+                   lambda head: b"%PDF-" in head, extensions=(".pdf",))
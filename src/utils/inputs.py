@@ -0,0 +1,197 @@
+"""
+File inputs: paths, in-memory buffers and binary streams.
+
+Every agent accepts a "source", which is one of
+    - a filesystem path (str or os.PathLike)
+    - bytes, bytearray or memoryview holding the file content
+    - a binary file-like object (an upload stream, io.BytesIO, ...)
+
+In-memory sources are read in place: open_source() wraps a buffer in a
+seekable reader over a memoryview instead of copying it, and only paths
+are stat'ed or opened on disk. Content types come from the leading bytes
+(see utils.file_types).
+"""
+import hashlib
+import io
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+BUFFER_TYPES = (bytes, bytearray, memoryview)
+
+# Default bytes returned by read_head()
+HEAD_BYTES = 32
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def is_path(source) -> bool:
+    """Whether the source names a file on disk."""
+    return isinstance(source, (str, os.PathLike))
+
+
+def is_buffer(source) -> bool:
+    return isinstance(source, BUFFER_TYPES)
+
+
+def _seekable(stream) -> bool:
+    try:
+        return bool(stream.seekable())
+    except (AttributeError, ValueError):
+        return False
+
+
+def describe_source(source) -> str:
+    """
+    Printable name for logs and results.
+
+    Paths are returned as-is; streams use their name attribute if they
+    have one; otherwise the type, size and object id identify the input.
+    """
+    if is_path(source):
+        return str(source)
+    if is_buffer(source):
+        return f"<{type(source).__name__} {memoryview(source).nbytes} bytes @{id(source):x}>"
+    name = getattr(source, "name", None)
+    if isinstance(name, (str, os.PathLike)):
+        return str(name)
+    return f"<{type(source).__name__} @{id(source):x}>"
+
+
+class BufferReader(io.RawIOBase):
+    """Seekable read-only stream over a buffer, without copying it."""
+
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).cast("B")
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        # One slice copy, rather than RawIOBase's chunked readall()
+        end = len(self._view) if size is None or size < 0 else self._pos + size
+        data = self._view[self._pos:end].tobytes()
+        self._pos += len(data)
+        return data
+
+    readall = read
+
+    def readinto(self, target) -> int:
+        n = max(0, min(len(target), len(self._view) - self._pos))
+        target[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def getbuffer(self) -> memoryview:
+        return self._view
+
+
+@contextmanager
+def open_source(source):
+    """
+    Binary, seekable stream for a source.
+
+    Paths are opened (and closed afterwards); buffers are wrapped in a
+    BufferReader; seekable streams are used directly and rewound to
+    where they were; unseekable streams are read into memory once.
+    """
+    if is_path(source):
+        with open(source, "rb") as f:
+            yield f
+    elif is_buffer(source):
+        yield BufferReader(source)
+    elif _seekable(source):
+        start = source.tell()
+        try:
+            yield source
+        finally:
+            source.seek(start)
+    else:
+        yield BufferReader(source.read())
+
+
+def rereadable(source):
+    """
+    The source itself, or its content if it is an unseekable stream.
+
+    Called once on entry so sniffing, estimation and the agents can each
+    read the content from the start.
+    """
+    if is_path(source) or is_buffer(source) or _seekable(source):
+        return source
+    return source.read()
+
+
+def read_head(source, size: int = HEAD_BYTES) -> bytes:
+    """First bytes of a source (for sniffing); b"" if it cannot be read."""
+    try:
+        if is_buffer(source):
+            return bytes(memoryview(source).cast("B")[:size])
+        if not is_path(source) and not _seekable(source):
+            # Reading would consume an unseekable stream
+            return b""
+        with open_source(source) as stream:
+            return stream.read(size)
+    except OSError:
+        return b""
+
+
+def source_size(source) -> Optional[int]:
+    """Size in bytes, or None if unknown (missing file, unseekable stream)."""
+    if is_path(source):
+        try:
+            return os.stat(source).st_size
+        except OSError:
+            return None
+    if is_buffer(source):
+        return memoryview(source).nbytes
+    try:
+        start = source.tell()
+        end = source.seek(0, io.SEEK_END)
+        source.seek(start)
+        return end - start
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def source_exists(source) -> bool:
+    """Paths must exist on disk; in-memory sources always exist."""
+    return Path(source).exists() if is_path(source) else True
+
+
+def content_digest(source) -> Optional[str]:
+    """SHA-256 of an in-memory source's content (None for paths and unseekable streams)."""
+    if is_path(source):
+        return None
+    if is_buffer(source):
+        return hashlib.sha256(source).hexdigest()
+    if not _seekable(source):
+        return None
+    digest = hashlib.sha256()
+    with open_source(source) as stream:
+        for chunk in iter(lambda: stream.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_all(source):
+    """Whole content as bytes or a buffer (buffers are returned unchanged)."""
+    if is_buffer(source):
+        return source
+    if isinstance(source, BufferReader):
+        return source.getbuffer()
+    with open_source(source) as stream:
+        return stream.read()
@@ -0,0 +1,26 @@
+"""
+Per-file logging context.
+
+Kept apart from logging_config so agents can tag records without importing
+(and thereby running) the logging setup.
+"""
+import contextvars
+from contextlib import contextmanager
+
+# File currently being processed by this thread/task (set via log_context)
+current_file = contextvars.ContextVar("accessible_ai_log_file", default=None)
+
+
+@contextmanager
+def log_context(file_path):
+    """
+    Tag every log record emitted inside the block with a file path.
+
+    Args:
+        file_path: File being processed (used for sampling and JSON output)
+    """
+    token = current_file.set(str(file_path))
+    try:
+        yield
+    finally:
+        current_file.reset(token)
@@ -1,22 +1,114 @@
 """
 Logging configuration for AccessibleAI project.
 Sets up structured logging with both file and console output.
+
+Two optional modes keep logging off the hot path at high volume:
+    - async_mode: records go through a QueueHandler and are formatted and
+      written by a QueueListener thread, so workers never block on file I/O
+    - sample_rate: below WARNING, only a deterministic fraction of files
+      (chosen by file path) keep their log lines
+structured=True switches the output to one JSON object per line.
 """
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
 import sys
+import zlib
 from pathlib import Path
 
+from utils.log_context import current_file
+
+# Handlers and listener installed by the last setup_logging() call
+_installed_handlers = []
+_listener = None
+
+
+class FileContextFilter(logging.Filter):
+    """
+    Attach the current file to records and apply per-file sampling.
+
+    Records at WARNING and above, and records outside a log_context(), are
+    always kept. Below WARNING a file is either fully logged or fully
+    dropped, so sampled files keep a complete story.
+
+    Args:
+        sample_rate: Fraction of files (0.0-1.0) whose INFO/DEBUG lines are kept
+    """
+
+    def __init__(self, sample_rate: float = 1.0):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self._threshold = int(sample_rate * 0xFFFFFFFF)
+
+    def filter(self, record):
+        file_path = current_file.get()
+        record.file_path = file_path
+        if file_path is None or record.levelno >= logging.WARNING or self.sample_rate >= 1.0:
+            return True
+        return zlib.crc32(file_path.encode("utf-8")) <= self._threshold
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        file_path = getattr(record, "file_path", None)
+        if file_path is not None:
+            entry["file"] = file_path
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
 
-def setup_logging(log_level="INFO"):
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread.
+
+    The stock prepare() formats the message on the calling thread; here the
+    record (with its args) is queued as-is. Log arguments must therefore
+    not be mutated after the call, which holds for the strings and numbers
+    this project logs.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def _stop_listener():
+    """Drain the queue, then close the listener's file/console handlers."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def setup_logging(log_level="INFO", structured=False, async_mode=False, sample_rate=1.0):
     """
     Configure logging for the entire project.
 
+    Calling it again replaces the handlers installed by the previous call.
+
     Args:
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+        structured: Write JSON lines instead of plain text
+        async_mode: Hand records to a background QueueListener thread
+        sample_rate: Fraction of files whose INFO/DEBUG lines are kept
 
     Returns:
         Logger instance
     """
+    global _listener
+
     # Create logs directory if it doesn't exist
     log_dir = Path("logs")
     log_dir.mkdir(exist_ok=True)
@@ -24,6 +116,10 @@ def setup_logging(log_level="INFO"):
     # Configure logging format
     log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     date_format = '%Y-%m-%d %H:%M:%S'
+    if structured:
+        formatter = JsonFormatter(datefmt=date_format)
+    else:
+        formatter = logging.Formatter(log_format, datefmt=date_format)
 
     # Set up handlers
     handlers = [
@@ -32,24 +128,50 @@ def setup_logging(log_level="INFO"):
         # Console handler - prints to stdout
         logging.StreamHandler(sys.stdout)
     ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # Replace whatever a previous call installed
+    root = logging.getLogger()
+    _stop_listener()
+    for handler in _installed_handlers:
+        root.removeHandler(handler)
+        handler.close()
+    _installed_handlers.clear()
+
+    context_filter = FileContextFilter(sample_rate)
+    if async_mode:
+        log_queue = queue.SimpleQueue()
+        queue_handler = _DeferredQueueHandler(log_queue)
+        queue_handler.addFilter(context_filter)
+        _listener = logging.handlers.QueueListener(
+            log_queue, *handlers, respect_handler_level=True
+        )
+        _listener.start()
+        root_handlers = [queue_handler]
+    else:
+        for handler in handlers:
+            handler.addFilter(context_filter)
+        root_handlers = handlers
 
     # Configure root logger
-    logging.basicConfig(
-        level=getattr(logging, log_level.upper()),
-        format=log_format,
-        datefmt=date_format,
-        handlers=handlers
-    )
+    root.setLevel(getattr(logging, log_level.upper()))
+    for handler in root_handlers:
+        root.addHandler(handler)
+    _installed_handlers.extend(root_handlers)
 
     # Create and return logger
     logger = logging.getLogger(__name__)
-    logger.info("=" * 60)
-    logger.info("AccessibleAI Logging System Initialized")
-    logger.info(f"Log level: {log_level}")
-    logger.info("=" * 60)
+    logger.info(
+        "AccessibleAI logging initialized (level=%s, structured=%s, async=%s, sample_rate=%s)",
+        log_level, structured, async_mode, sample_rate
+    )
 
     return logger
 
 
+# Flush queued records on interpreter exit
+atexit.register(_stop_listener)
+
 # Create global logger instance
 logger = setup_logging()
@@ -0,0 +1,233 @@
+"""
+Per-file memory accounting and memory-budgeted admission control.
+
+estimate_file_memory() projects a file's working set from metadata only
+(image header, file size), MemoryMeter measures what a file actually used,
+and MemoryBudget blocks new files while the projected total of in-flight
+files would exceed a configured budget.
+"""
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+from PIL import Image
+
+from utils.cancellation import check
+from utils.file_types import detect_file_type
+from utils.inputs import is_path, open_source, source_size
+
+logger = logging.getLogger(__name__)
+
+# Longest wait for admission before the deadline and cancel token are checked
+ADMISSION_WAIT_SLICE = 0.1
+
+# Formats uploaded as the original file bytes when within the limits
+# below; everything else is decoded and re-encoded in memory
+PASSTHROUGH_IMAGE_FORMATS = {"JPEG", "PNG", "WEBP", "GIF"}
+
+# Largest image file sent as-is (inline requests are capped at 20 MB)
+MAX_INLINE_IMAGE_BYTES = 10 * 1024 * 1024
+
+# Gemini scales larger images down server-side, so extra pixels only cost upload
+MAX_IMAGE_DIMENSION = 3072
+
+# PyPDF2 holds the parsed object tree and decompressed content streams;
+# a few times the file size covers text-heavy and scanned documents
+PDF_MEMORY_FACTOR = 6
+
+# Fixed per-file overhead (parser objects, result dicts, logging)
+BASE_FILE_OVERHEAD = 256 * 1024
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def sent_as_is(image_format: str, size_bytes: int, dimensions,
+               max_bytes: int = MAX_INLINE_IMAGE_BYTES,
+               max_dimension: int = MAX_IMAGE_DIMENSION) -> bool:
+    """Whether an image is uploaded as its original bytes, without a decode."""
+    return (image_format in PASSTHROUGH_IMAGE_FORMATS and size_bytes <= max_bytes
+            and max(dimensions) <= max_dimension)
+
+
+def estimate_file_memory(file_path) -> int:
+    """
+    Project the peak memory (bytes) needed to process one file.
+
+    Uses only the file size and, for images, the header (no pixel decode).
+    In-memory sources are already resident, so their bytes are not counted
+    a second time for reading.
+
+    Args:
+        file_path: Path to an image or PDF, or an in-memory source
+            (see utils.inputs)
+
+    Returns:
+        Estimated bytes; 0 if the file does not exist
+    """
+    file_size = source_size(file_path)
+    if file_size is None:
+        return 0
+
+    file_type = detect_file_type(file_path)
+    read_copies = 2 if is_path(file_path) else 1
+
+    if file_type == "image":
+        try:
+            with open_source(file_path) as stream, Image.open(stream) as img:
+                raster = img.width * img.height * len(img.getbands())
+                size = img.size
+                image_format = img.format
+        except Exception:
+            # Unreadable header: the decode will fail fast anyway
+            return BASE_FILE_OVERHEAD + read_copies * file_size
+        # File bytes are read once and copied into the request part
+        estimate = BASE_FILE_OVERHEAD + read_copies * file_size
+        if not sent_as_is(image_format, file_size, size):
+            estimate += 2 * raster
+        return estimate
+
+    if file_type == "pdf":
+        return BASE_FILE_OVERHEAD + PDF_MEMORY_FACTOR * file_size
+
+    return BASE_FILE_OVERHEAD + file_size
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes (0 if unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # ru_maxrss is the peak, in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+    except (ImportError, AttributeError):
+        return 0
+
+
+class MemoryMeter:
+    """
+    Measure memory used by the enclosed block.
+
+    With tracemalloc running (e.g. under the profiler) the Python
+    allocation peak is reported; otherwise the RSS growth. Both include
+    other threads' allocations when files run concurrently. The
+    tracemalloc peak is process-wide: it is reset when a meter starts
+    while no other meter is running, so overlapping meters share the
+    peak since the oldest of them started.
+    """
+
+    _lock = threading.Lock()
+    _tracing = 0
+
+    def __init__(self):
+        self.method = None
+        self.measured_bytes = 0
+        self._start = 0
+
+    def __enter__(self):
+        if tracemalloc.is_tracing():
+            self.method = "tracemalloc"
+            with MemoryMeter._lock:
+                if MemoryMeter._tracing == 0:
+                    tracemalloc.reset_peak()
+                MemoryMeter._tracing += 1
+            self._start = tracemalloc.get_traced_memory()[0]
+        else:
+            self.method = "rss"
+            self._start = current_rss()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.method == "tracemalloc":
+            end = tracemalloc.get_traced_memory()[1]
+            with MemoryMeter._lock:
+                MemoryMeter._tracing -= 1
+        else:
+            end = current_rss()
+        self.measured_bytes = max(end - self._start, 0)
+        return False
+
+
+class MemoryBudget:
+    """
+    Admission controller keeping projected in-flight memory under a limit.
+
+    acquire() blocks until the file's estimate fits next to the files
+    already running, or until its deadline passes or it is cancelled. A
+    file whose estimate alone exceeds the budget waits until nothing else
+    is running and then runs by itself.
+
+    Args:
+        limit_bytes: Memory budget for concurrently processed files
+    """
+
+    def __init__(self, limit_bytes: int):
+        if limit_bytes <= 0:
+            raise ValueError("Memory budget must be positive")
+        self.limit_bytes = limit_bytes
+        self._condition = threading.Condition()
+        self.in_use = 0
+        self.running = 0
+        self.peak_in_use = 0
+        self.waits = 0
+
+    def acquire(self, nbytes: int, deadline=None, cancel_token=None) -> float:
+        """
+        Reserve nbytes, waiting while it does not fit.
+
+        Args:
+            nbytes: Estimated memory of the file
+            deadline: Optional Deadline; stops waiting when it passes
+            cancel_token: Optional CancellationToken; stops waiting when triggered
+
+        Returns:
+            Seconds spent waiting for admission
+
+        Raises:
+            DeadlineExceeded / OperationCancelled: Nothing was reserved
+        """
+        start = time.perf_counter()
+        with self._condition:
+            if nbytes > self.limit_bytes:
+                logger.warning(
+                    "File estimate %d bytes exceeds memory budget %d bytes; running it alone",
+                    nbytes, self.limit_bytes
+                )
+            if not self._fits(nbytes):
+                self.waits += 1
+                while not self._fits(nbytes):
+                    check(deadline, cancel_token, "memory admission")
+                    remaining = deadline.remaining() if deadline is not None else None
+                    self._condition.wait(ADMISSION_WAIT_SLICE if remaining is None
+                                         else min(ADMISSION_WAIT_SLICE, remaining))
+            self.in_use += nbytes
+            self.running += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+        return time.perf_counter() - start
+
+    def release(self, nbytes: int):
+        """Return a reservation made by acquire()."""
+        with self._condition:
+            self.in_use -= nbytes
+            self.running -= 1
+            self._condition.notify_all()
+
+    def _fits(self, nbytes: int) -> bool:
+        return self.running == 0 or self.in_use + nbytes <= self.limit_bytes
+
+    def stats(self) -> dict:
+        """Current and peak reservations."""
+        with self._condition:
+            return {
+                "limit_bytes": self.limit_bytes,
+                "in_use_bytes": self.in_use,
+                "peak_in_use_bytes": self.peak_in_use,
+                "running": self.running,
+                "waits": self.waits,
+            }
@@ -0,0 +1,270 @@
+"""
+Lightweight in-process metrics for AccessibleAI.
+
+Histograms and counters are plain Python objects guarded by a lock, cheap
+enough to sit on the per-file and per-page hot path. Everything is exported
+in Prometheus text format, either over HTTP (start_metrics_server) or as a
+file dump (dump_metrics).
+"""
+import bisect
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bucket upper bounds (seconds), from sub-millisecond page extraction up to
+# slow API calls
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+def _label_key(labels: dict) -> Tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        """Increase the counter for the given label values."""
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """Current value for the given label values."""
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram with optional labels."""
+
+    def __init__(self, name: str, documentation: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [bucket counts..., sum, count]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        """Record one observation for the given label values."""
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [0] * (len(self.buckets) + 2)
+                self._series[key] = series
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels) -> int:
+        """Number of observations for the given label values."""
+        with self._lock:
+            series = self._series.get(_label_key(labels))
+            return series[-1] if series else 0
+
+    def mean(self, **labels):
+        """Mean observation for the given label values (None if empty)."""
+        with self._lock:
+            series = self._series.get(_label_key(labels))
+            return series[-2] / series[-1] if series and series[-1] else None
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, series):
+                    cumulative += bucket_count
+                    le = 'le="%g"' % bound
+                    lines.append(f"{self.name}_bucket{_format_labels(key, le)} {cumulative}")
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_format_labels(key, le)} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series[-2]:g}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self._register(Counter(name, documentation))
+
+    def histogram(self, name: str, documentation: str, buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, buckets))
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render_prometheus(self) -> str:
+        """Render every metric in Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry and the metrics the agents report into
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "accessible_ai_stage_seconds",
+    "Time spent per component and stage (file_stat, decode, preprocess, api_call, "
+    "page_extraction, result_assembly)",
+)
+BYTES_UPLOADED = REGISTRY.counter(
+    "accessible_ai_bytes_uploaded_total",
+    "Bytes sent to the model API (inline payloads per request attempt, uploads once)"
+)
+IMAGES_ENCODED = REGISTRY.counter(
+    "accessible_ai_images_encoded_total",
+    "Image payloads by mode (passthrough: original bytes, reencoded, keyframe)"
+)
+PAGES_PROCESSED = REGISTRY.counter(
+    "accessible_ai_pages_total", "PDF pages processed"
+)
+CACHE_HITS = REGISTRY.counter(
+    "accessible_ai_cache_hits_total", "Cache hits by cache name"
+)
+CACHE_MISSES = REGISTRY.counter(
+    "accessible_ai_cache_misses_total", "Cache misses by cache name"
+)
+ERRORS = REGISTRY.counter(
+    "accessible_ai_errors_total", "Errors by exception class"
+)
+
+
+# Context-manager factories entered around every stage, e.g. by the profiler
+_stage_hooks = []
+
+
+def add_stage_hook(hook):
+    """
+    Run hook(component, stage) as a context manager around every stage.
+
+    Args:
+        hook: Callable returning a context manager
+    """
+    _stage_hooks.append(hook)
+
+
+def remove_stage_hook(hook):
+    """Undo add_stage_hook()."""
+    if hook in _stage_hooks:
+        _stage_hooks.remove(hook)
+
+
+@contextmanager
+def time_stage(component: str, stage: str):
+    """
+    Time the enclosed block into the stage histogram.
+
+    Args:
+        component: Agent doing the work (coordinator, image, pdf)
+        stage: Stage name within that agent
+    """
+    with ExitStack() as hooks:
+        for hook in list(_stage_hooks):
+            hooks.enter_context(hook(component, stage))
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - start, component=component, stage=stage)
+
+
+def record_error(error: Exception):
+    """Count an error under its exception class name."""
+    ERRORS.inc(error_class=type(error).__name__)
+
+
+def dump_metrics(path) -> Path:
+    """
+    Write the current metrics to a file in Prometheus text format.
+
+    Args:
+        path: Destination file (e.g. for the node_exporter textfile collector)
+
+    Returns:
+        Path of the written file
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(REGISTRY.render_prometheus())
+    tmp_path.replace(path)  # atomic, so scrapers never see a partial file
+    return path
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("metrics endpoint: " + format, *args)
+
+
+def start_metrics_server(port: int = 9464, host: str = "") -> ThreadingHTTPServer:
+    """
+    Serve /metrics over HTTP from a background daemon thread.
+
+    Args:
+        port: Port to listen on (0 picks a free port)
+        host: Interface to bind (all interfaces by default)
+
+    Returns:
+        The running server; call shutdown() to stop it
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    logger.info("Metrics endpoint listening on port %d", server.server_address[1])
+    return server
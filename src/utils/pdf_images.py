@@ -0,0 +1,139 @@
+"""
+Embedded image extraction from PDFs.
+
+Figures, charts and logos are image XObjects referenced from a page's
+resources, directly or through form XObjects. A logo on every page is
+normally one shared object, and identical images are sometimes stored
+more than once, so images are deduplicated first by object reference
+(before anything is decoded) and then by a hash of the encoded stream.
+Each unique image is decoded once and lists every page it appears on, so
+the cost of describing a document scales with its unique images, not
+with their placements.
+"""
+import hashlib
+import logging
+from typing import Iterable, List, Optional
+
+from utils.cancellation import CancellationToken, Deadline, check
+from utils.metrics import record_error
+
+logger = logging.getLogger(__name__)
+
+# Smaller images are bullets, rules and spacers, not content
+MIN_IMAGE_SIDE = 16
+
+# Stream dictionary entries that do not change the decoded image
+_IGNORED_KEYS = {"/Length", "/Type", "/Subtype", "/Name"}
+
+
+def _reference(value, fallback) -> tuple:
+    """Identity of a PDF object: (object number, generation) if indirect."""
+    idnum = getattr(value, "idnum", None)
+    if idnum is not None:
+        return idnum, value.generation
+    return "direct", id(fallback)
+
+
+def _iter_image_xobjects(resources, visited_forms: set):
+    """Yield (reference, image XObject) for every image reachable from resources."""
+    if resources is None:
+        return
+    resources = resources.get_object()
+    xobjects = resources.get("/XObject")
+    if xobjects is None:
+        return
+    xobjects = xobjects.get_object()
+    for name in xobjects:
+        raw = xobjects.raw_get(name)
+        xobject = raw.get_object()
+        reference = _reference(raw, xobject)
+        subtype = xobject.get("/Subtype")
+        if subtype == "/Image":
+            yield reference, xobject
+        elif subtype == "/Form" and reference not in visited_forms:
+            # Forms can nest and even refer back to themselves
+            visited_forms.add(reference)
+            yield from _iter_image_xobjects(xobject.get("/Resources"), visited_forms)
+
+
+def page_has_images(page) -> bool:
+    """Whether a page draws any image (scanned pages always do)."""
+    return next(_iter_image_xobjects(page.get("/Resources"), set()), None) is not None
+
+
+def _content_hash(xobject) -> str:
+    """Hash of the encoded stream and the entries that affect decoding."""
+    digest = hashlib.sha256()
+    for key in sorted(k for k in xobject.keys() if k not in _IGNORED_KEYS):
+        digest.update(f"{key}={xobject.raw_get(key)!r};".encode())
+    digest.update(getattr(xobject, "_data", b"") or b"")
+    return digest.hexdigest()
+
+
+def _decode(xobject) -> bytes:
+    """Encoded image file (JPEG streams as-is, others converted by PyPDF2)."""
+    from PyPDF2.filters import _xobj_to_image
+
+    _, data = _xobj_to_image(xobject)
+    return data
+
+
+def extract_images(reader, page_numbers: Iterable[int], min_side: int = MIN_IMAGE_SIDE,
+                   deadline: Optional[Deadline] = None,
+                   cancel_token: Optional[CancellationToken] = None) -> List[dict]:
+    """
+    Collect the unique embedded images of a document's pages.
+
+    Args:
+        reader: Open PyPDF2.PdfReader
+        page_numbers: Zero-based pages to scan
+        min_side: Images narrower or shorter than this are skipped
+        deadline: Optional Deadline, checked between pages
+        cancel_token: Optional CancellationToken, checked between pages
+
+    Returns:
+        List of dicts, in order of first appearance, with key (content
+        hash), data (encoded image bytes), width, height, pages (1-based
+        page numbers the image appears on) and placements (references
+        across those pages). Images that cannot be decoded are skipped.
+    """
+    images = []
+    by_reference = {}
+    by_hash = {}
+    for page_num in page_numbers:
+        check(deadline, cancel_token, "PDF image extraction")
+        page = reader.pages[page_num]
+        for reference, xobject in _iter_image_xobjects(page.get("/Resources"), set()):
+            image = by_reference.get(reference)
+            if image is None:
+                width, height = xobject.get("/Width", 0), xobject.get("/Height", 0)
+                if width < min_side or height < min_side:
+                    by_reference[reference] = False
+                    continue
+                key = _content_hash(xobject)
+                image = by_hash.get(key)
+                if image is None:
+                    try:
+                        data = _decode(xobject)
+                    except Exception as e:
+                        record_error(e)
+                        logger.warning("Skipping undecodable image on page %d: %s",
+                                       page_num + 1, e)
+                        by_reference[reference] = False
+                        continue
+                    image = {"key": key, "data": data, "width": width, "height": height,
+                             "pages": [], "placements": 0}
+                    by_hash[key] = image
+                    images.append(image)
+                by_reference[reference] = image
+            elif image is False:
+                continue
+            image["placements"] += 1
+            if page_num + 1 not in image["pages"]:
+                image["pages"].append(page_num + 1)
+
+    logger.debug(
+        "Found %d unique images in %d placements", len(images),
+        sum(image["placements"] for image in images)
+    )
+    return images
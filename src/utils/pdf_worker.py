@@ -0,0 +1,158 @@
+"""
+Killable worker process for PDF page extraction.
+
+extract_pages() runs PyPDF2 text extraction in a child process that
+streams one message per page back. When a page exceeds its time budget
+the child is killed and a fresh one resumes at the next page, so a
+pathological page costs at most page_timeout seconds and never stalls
+the calling worker thread. Deadlines and cancellation are checked while
+waiting, and stop the child too.
+
+Children are started from a forkserver (spawned where there is none),
+never forked from the caller: batches call this from worker threads, and
+a child forked while another thread holds a lock (logging, the model
+client, the span exporter) can block on it forever. The forkserver
+preloads this module, so a child still starts in milliseconds. Spans
+reach the parent's trace through utils.tracing's worker hooks.
+"""
+import logging
+import multiprocessing
+import time
+from typing import Iterable, Iterator, Optional, Tuple
+
+from utils.cancellation import CancellationToken, Deadline, check
+from utils.inputs import BufferReader, is_path
+from utils.tracing import (
+    attach_context, configure_worker_tracing, flush_spans, inject_context, span,
+    worker_tracing
+)
+
+logger = logging.getLogger(__name__)
+
+PAGE_OK = "ok"
+PAGE_ERROR = "error"
+PAGE_TIMEOUT = "timeout"
+
+# How often the parent checks budgets, deadline and cancellation (seconds)
+POLL_INTERVAL = 0.05
+
+# Time a worker that sent all its pages gets to exit (and flush its spans)
+# before it is killed
+EXIT_GRACE_SECONDS = 1.0
+
+
+class PageWorkerError(Exception):
+    """The worker could not open the document at all."""
+
+
+def _start_method() -> str:
+    # Not fork: the caller is usually one of several threads (see above)
+    return "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def _context(start_method: str):
+    context = multiprocessing.get_context(start_method)
+    if start_method == "forkserver":
+        # Also makes the server inherit sys.path, so this module resolves
+        context.set_forkserver_preload([__name__, "PyPDF2"])
+    return context
+
+
+def _extract_worker(pdf_path, page_numbers: list, conn, trace_carrier=None,
+                    tracing=None):
+    """Child process: extract the given pages in order, one message each."""
+    import PyPDF2
+
+    try:
+        configure_worker_tracing(tracing)
+        with attach_context(trace_carrier), \
+                span("pdf.page_worker", {"pdf.pages": len(page_numbers)}):
+            reader = PyPDF2.PdfReader(pdf_path if is_path(pdf_path) else BufferReader(pdf_path))
+            if reader.is_encrypted:
+                reader.decrypt('')
+            for page_num in page_numbers:
+                try:
+                    conn.send((page_num, PAGE_OK, reader.pages[page_num].extract_text()))
+                except Exception as e:
+                    conn.send((page_num, PAGE_ERROR, f"{type(e).__name__}: {e}"))
+    except Exception as e:
+        conn.send((None, PAGE_ERROR, f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+        flush_spans()
+
+
+def _stop(process):
+    if process.is_alive():
+        process.kill()
+    process.join(timeout=5)
+
+
+def extract_pages(pdf_path, page_numbers: Iterable[int], page_timeout: float,
+                  deadline: Optional[Deadline] = None,
+                  cancel_token: Optional[CancellationToken] = None
+                  ) -> Iterator[Tuple[int, str, str]]:
+    """
+    Extract pages in a killable child process.
+
+    Args:
+        pdf_path: Path to the PDF, or its content as bytes or a buffer
+        page_numbers: Zero-based pages, in the order to extract them
+        page_timeout: Seconds one page may take before the worker is killed
+        deadline: Optional Deadline for the whole document
+        cancel_token: Optional CancellationToken
+
+    Yields:
+        (page_number, status, text or error message) per page, in order;
+        status is PAGE_OK, PAGE_ERROR or PAGE_TIMEOUT
+
+    Raises:
+        DeadlineExceeded / OperationCancelled: The worker is killed first
+        PageWorkerError: The worker could not open the document
+    """
+    context = _context(_start_method())
+    pending = list(page_numbers)
+    if is_path(pdf_path):
+        pdf_path = str(pdf_path)
+    else:
+        # Buffers are pickled to the child
+        pdf_path = bytes(pdf_path)
+
+    while pending:
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(
+            target=_extract_worker,
+            args=(pdf_path, pending, sender, inject_context(), worker_tracing()),
+            daemon=True
+        )
+        process.start()
+        sender.close()
+        page_started = time.monotonic()
+        try:
+            while pending:
+                check(deadline, cancel_token, "PDF page extraction")
+                if receiver.poll(POLL_INTERVAL):
+                    try:
+                        page_num, status, payload = receiver.recv()
+                    except EOFError:
+                        # Worker died (crash or OOM kill): skip the page it was on
+                        logger.warning("PDF page worker exited on page %d", pending[0] + 1)
+                        yield pending.pop(0), PAGE_ERROR, "page worker exited unexpectedly"
+                        break
+                    if page_num is None:
+                        raise PageWorkerError(payload)
+                    pending.remove(page_num)
+                    yield page_num, status, payload
+                    page_started = time.monotonic()
+                elif time.monotonic() - page_started > page_timeout:
+                    logger.warning(
+                        "PDF page %d exceeded its %.1fs budget; restarting worker",
+                        pending[0] + 1, page_timeout
+                    )
+                    yield pending.pop(0), PAGE_TIMEOUT, f"page exceeded {page_timeout:g}s budget"
+                    break
+        finally:
+            if not pending:
+                process.join(timeout=EXIT_GRACE_SECONDS)
+            _stop(process)
+            receiver.close()
@@ -0,0 +1,326 @@
+"""
+Dry-run batch planner.
+
+plan_batch() projects what a batch would cost: Gemini calls, input and
+output tokens, bytes uploaded and wall time at a given concurrency and
+rate limit. It works from pre-flight metadata (image headers, PDF page
+counts) and result-cache status only; nothing is decoded or sent.
+
+Token counts follow Gemini's image accounting: an image with both sides
+at most 384 px is 258 tokens, larger images are tiled into 768x768 crops
+of 258 tokens each. Output tokens and latencies are averages; observed
+values from this process's metrics replace the defaults once enough
+calls have been made.
+
+Optional pipeline features add calls, passed in as a features dict (see
+file_requests()): PDF image descriptions, scanned-page transcription,
+tiled large images and animated keyframes. Their counts are upper bounds
+since only metadata is read: every page without fonts counts as scanned,
+every embedded image is described and every animation is assumed to
+need all keyframes.
+"""
+import logging
+import math
+import time
+from typing import Callable, List, Optional
+
+from utils.animation import KEYFRAME_DIMENSION, MAX_KEYFRAMES
+from utils.memory import MAX_IMAGE_DIMENSION, sent_as_is
+from utils.metrics import STAGE_SECONDS
+from utils.preflight import expand_paths, inspect_files
+from utils.result_cache import HIT, MISS, STALE
+from utils.tiling import OVERVIEW_DIMENSION, plan_tiles
+
+logger = logging.getLogger(__name__)
+
+SMALL_IMAGE_MAX_SIDE = 384
+IMAGE_TILE_SIZE = 768
+TOKENS_PER_IMAGE_TILE = 258
+CHARS_PER_TOKEN = 4
+
+# Average generated tokens per description
+OUTPUT_TOKENS = {False: 100, True: 250}
+
+# A PDF page sent to the model is billed like one image tile
+TOKENS_PER_PDF_PAGE = 258
+
+# Average generated tokens per transcribed scanned page
+TRANSCRIBED_TOKENS_PER_PAGE = 500
+
+# Embedded PDF images are not decoded while planning; assume this size
+ASSUMED_PDF_IMAGE_SIZE = (1024, 768)
+
+# Tiles and overviews are sent as JPEGs; assume this many bytes per pixel
+JPEG_BYTES_PER_PIXEL = 0.25
+
+DEFAULT_API_LATENCY_SECONDS = 3.0
+DEFAULT_PDF_SECONDS_PER_PAGE = 0.05
+
+# Observations needed before measured latencies replace the defaults
+MIN_OBSERVATIONS = 5
+
+
+def image_tokens(width: int, height: int) -> int:
+    """Input tokens Gemini charges for one image."""
+    if width <= SMALL_IMAGE_MAX_SIDE and height <= SMALL_IMAGE_MAX_SIDE:
+        return TOKENS_PER_IMAGE_TILE
+    tiles = math.ceil(width / IMAGE_TILE_SIZE) * math.ceil(height / IMAGE_TILE_SIZE)
+    return tiles * TOKENS_PER_IMAGE_TILE
+
+
+def text_tokens(text: str) -> int:
+    """Approximate token count of a prompt."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def upload_bytes(inspection: dict) -> int:
+    """Bytes the image part will carry (file bytes, or a re-encode estimate)."""
+    width, height = inspection["width"], inspection["height"]
+    if sent_as_is(inspection["format"], inspection["size_bytes"], (width, height)):
+        return inspection["size_bytes"]
+    # Scaled to fit MAX_IMAGE_DIMENSION and re-encoded losslessly; assume
+    # roughly 2:1 compression of the raster
+    scale = min(1.0, MAX_IMAGE_DIMENSION / max(width, height))
+    return int(width * scale) * int(height * scale) * 3 // 2
+
+
+def _scaled(width: int, height: int, max_side: int):
+    scale = min(1.0, max_side / max(width, height, 1))
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def needs_pdf_details(features: Optional[dict]) -> bool:
+    """Whether the features need a deep PDF inspection (text layer, images)."""
+    features = features or {}
+    return bool(features.get("describe_pdf_images") or features.get("scanned_pages_per_request"))
+
+
+def file_requests(inspection: dict, prompt_tokens: int, detailed: bool = False,
+                  features: Optional[dict] = None) -> dict:
+    """
+    API work one inspected file needs when none of it is cached.
+
+    Args:
+        inspection: preflight.inspect_file() result; PDFs need a deep
+            inspection for the PDF features (see needs_pdf_details())
+        prompt_tokens: Tokens of the description prompt
+        detailed: Detail level (affects expected output length)
+        features: Optional pipeline features that add calls:
+            - describe_pdf_images (bool), pdf_image_workers (int)
+            - scanned_pages_per_request (int, None when the scanned-page
+              fallback is off), scanned_page_prompt (str)
+            - tile_min_side (int, None when tiling is off), tile_workers
+              (int), tile_prompt (str)
+            - animation_prompt (str)
+
+    Returns:
+        dict with api_calls, api_rounds (calls that follow one another
+        given the file's own concurrency), input_tokens, output_tokens and
+        upload_bytes
+    """
+    features = features or {}
+    output_per_call = OUTPUT_TOKENS[detailed]
+    work = {"api_calls": 0, "api_rounds": 0, "input_tokens": 0, "output_tokens": 0,
+            "upload_bytes": 0}
+
+    if inspection["file_type"] == "pdf":
+        pages = inspection["page_count"] or 0
+        per_request = features.get("scanned_pages_per_request")
+        if per_request and inspection.get("pages_with_text") is not None:
+            scanned = pages - inspection["pages_with_text"]
+            if scanned > 0:
+                # Sent a few pages per request, one request after another
+                requests = math.ceil(scanned / per_request)
+                prompt = text_tokens(features.get("scanned_page_prompt", ""))
+                work["api_calls"] += requests
+                work["api_rounds"] += requests
+                work["input_tokens"] += requests * prompt + scanned * TOKENS_PER_PDF_PAGE
+                work["output_tokens"] += scanned * TRANSCRIBED_TOKENS_PER_PAGE
+                work["upload_bytes"] += inspection["size_bytes"] * scanned // pages
+        images = inspection.get("image_count") or 0
+        if features.get("describe_pdf_images") and images:
+            workers = max(1, features.get("pdf_image_workers", 1))
+            work["api_calls"] += images
+            work["api_rounds"] += math.ceil(images / workers)
+            work["input_tokens"] += images * (prompt_tokens
+                                              + image_tokens(*ASSUMED_PDF_IMAGE_SIZE))
+            work["output_tokens"] += images * output_per_call
+            # Embedded images make up most of a PDF that has them
+            work["upload_bytes"] += inspection["size_bytes"]
+        return work
+
+    width, height = inspection["width"], inspection["height"]
+    tile_min_side = features.get("tile_min_side")
+    if tile_min_side and max(width, height) > tile_min_side:
+        # An overview plus one call per tile, tile_workers at a time
+        tiles = plan_tiles(width, height)
+        sides = [_scaled(width, height, OVERVIEW_DIMENSION)] + [
+            (right - left, bottom - top) for left, top, right, bottom in
+            (tile["box"] for tile in tiles)
+        ]
+        work["api_calls"] = len(sides)
+        work["api_rounds"] = math.ceil(len(sides) / max(1, features.get("tile_workers", 1)))
+        work["input_tokens"] = (prompt_tokens
+                                + len(tiles) * text_tokens(features.get("tile_prompt", ""))
+                                + sum(image_tokens(w, h) for w, h in sides))
+        work["output_tokens"] = len(sides) * output_per_call
+        work["upload_bytes"] = sum(int(w * h * JPEG_BYTES_PER_PIXEL) for w, h in sides)
+    elif inspection.get("animated"):
+        # One call carrying up to MAX_KEYFRAMES scaled frames (as PNG)
+        w, h = _scaled(width, height, KEYFRAME_DIMENSION)
+        work.update(api_calls=1, api_rounds=1, output_tokens=output_per_call)
+        work["input_tokens"] = (prompt_tokens
+                                + text_tokens(features.get("animation_prompt", ""))
+                                + MAX_KEYFRAMES * image_tokens(w, h))
+        work["upload_bytes"] = MAX_KEYFRAMES * w * h * 3 // 2
+    else:
+        work.update(api_calls=1, api_rounds=1, output_tokens=output_per_call,
+                    input_tokens=prompt_tokens + image_tokens(width, height),
+                    upload_bytes=upload_bytes(inspection))
+    return work
+
+
+def observed_mean(component: str, stage: str, default: float) -> float:
+    """Mean stage latency from the metrics, or the default if too few samples."""
+    if STAGE_SECONDS.count(component=component, stage=stage) >= MIN_OBSERVATIONS:
+        return STAGE_SECONDS.mean(component=component, stage=stage)
+    return default
+
+
+def plan_batch(paths, prompt: str, detailed: bool = False, max_workers: int = 1,
+               rate_limit_rpm: Optional[float] = None,
+               api_latency_seconds: Optional[float] = None,
+               pdf_seconds_per_page: Optional[float] = None,
+               cache_status: Optional[Callable] = None,
+               inspect_workers: int = 1, include_files: bool = False,
+               features: Optional[dict] = None) -> dict:
+    """
+    Project the cost and duration of processing a batch.
+
+    Args:
+        paths: File paths and/or directories (expanded recursively)
+        prompt: Prompt sent with every image
+        detailed: Detail level (affects expected output length)
+        max_workers: Concurrent files at run time
+        rate_limit_rpm: API calls per minute allowed (None: unlimited)
+        api_latency_seconds: Seconds per API call (default: observed or 3.0)
+        pdf_seconds_per_page: Local PDF extraction cost (default: observed or 0.05)
+        cache_status: Callable(file_path) -> "hit" | "stale" | "miss"
+        inspect_workers: Processes used for metadata inspection
+        include_files: Include a per-file breakdown
+        features: Optional pipeline features adding calls (see file_requests())
+
+    Returns:
+        dict with api_calls, input_tokens, output_tokens, upload_bytes,
+        pdf_pages, cache counts, estimated_wall_seconds and the assumptions
+    """
+    start = time.perf_counter()
+    if isinstance(paths, (str, bytes)) or not hasattr(paths, "__iter__"):
+        paths = [paths]
+    files = expand_paths(list(paths))
+    inspections = inspect_files(files, max_workers=inspect_workers,
+                                deep=needs_pdf_details(features))
+
+    if api_latency_seconds is None:
+        api_latency_seconds = observed_mean("image", "api_call", DEFAULT_API_LATENCY_SECONDS)
+    if pdf_seconds_per_page is None:
+        pdf_seconds_per_page = observed_mean("pdf", "page_extraction",
+                                             DEFAULT_PDF_SECONDS_PER_PAGE)
+    prompt_tokens = text_tokens(prompt)
+    output_tokens_per_call = OUTPUT_TOKENS[detailed]
+
+    totals = {"api_calls": 0, "input_tokens": 0, "output_tokens": 0, "upload_bytes": 0,
+              "pdf_pages": 0}
+    cache_counts = {HIT: 0, STALE: 0, MISS: 0}
+    images = pdfs = skipped = rounds = 0
+    per_file = []
+
+    def add(entry, work):
+        nonlocal rounds
+        rounds += work.pop("api_rounds")
+        entry.update(work)
+        for key, value in work.items():
+            totals[key] += value
+
+    for inspection in inspections:
+        entry = {"file_path": inspection["file_path"], "file_type": inspection["file_type"]}
+        if not inspection["success"]:
+            skipped += 1
+            entry["skipped"] = inspection["error"]
+        elif inspection["file_type"] == "pdf":
+            pdfs += 1
+            entry["pages"] = inspection["page_count"]
+            totals["pdf_pages"] += inspection["page_count"]
+            work = file_requests(inspection, prompt_tokens, detailed, features)
+            if work["api_calls"]:
+                add(entry, work)
+        else:
+            images += 1
+            status = cache_status(inspection["file_path"]) if cache_status else MISS
+            cache_counts[status] += 1
+            entry["cache"] = status
+            if status != HIT:
+                add(entry, file_requests(inspection, prompt_tokens, detailed, features))
+        per_file.append(entry)
+
+    # API waits are spread over the workers (a file's own concurrent calls,
+    # e.g. tiles, count as one round), but can never beat the rate limit;
+    # PDF extraction is CPU-bound and does not parallelise across threads.
+    # With several workers the two overlap, otherwise they add up.
+    workers = max(1, max_workers)
+    api_seconds = rounds * api_latency_seconds / workers
+    if rate_limit_rpm:
+        api_seconds = max(api_seconds, totals["api_calls"] * 60.0 / rate_limit_rpm)
+    pdf_seconds = totals["pdf_pages"] * pdf_seconds_per_page
+    wall_seconds = max(api_seconds, pdf_seconds) if workers > 1 else api_seconds + pdf_seconds
+
+    plan = {
+        "files": len(inspections),
+        "images": images,
+        "pdfs": pdfs,
+        "skipped": skipped,
+        "cache": cache_counts,
+        **totals,
+        "estimated_wall_seconds": round(wall_seconds, 3),
+        "assumptions": {
+            "max_workers": workers,
+            "rate_limit_rpm": rate_limit_rpm,
+            "api_latency_seconds": round(api_latency_seconds, 4),
+            "pdf_seconds_per_page": round(pdf_seconds_per_page, 5),
+            "prompt_tokens": prompt_tokens,
+            "output_tokens_per_call": output_tokens_per_call,
+            "features": {key: value for key, value in (features or {}).items()
+                         if not key.endswith("_prompt")},
+        },
+        "planning_seconds": round(time.perf_counter() - start, 4),
+    }
+    if include_files:
+        plan["file_plans"] = per_file
+    logger.info(
+        "Planned %d files: %d API calls, %d input tokens, ~%.1fs wall time",
+        plan["files"], plan["api_calls"], plan["input_tokens"], plan["estimated_wall_seconds"]
+    )
+    return plan
+
+
+def format_plan(plan: dict) -> str:
+    """Human-readable plan summary."""
+    cache = plan["cache"]
+    assumptions = plan["assumptions"]
+    rate = assumptions["rate_limit_rpm"] or "unlimited"
+    return "\n".join([
+        f"\n{'='*60}",
+        "BATCH PLAN (dry run)",
+        f"{'='*60}",
+        f"Files: {plan['files']} ({plan['images']} images, {plan['pdfs']} PDFs, "
+        f"{plan['skipped']} skipped)",
+        f"Cache: {cache['hit']} hits, {cache['stale']} stale, {cache['miss']} misses",
+        f"Gemini calls: {plan['api_calls']}",
+        f"Tokens: {plan['input_tokens']} input, {plan['output_tokens']} output",
+        f"Upload: {plan['upload_bytes'] / (1024 * 1024):.1f} MB",
+        f"PDF pages: {plan['pdf_pages']}",
+        f"Estimated wall time: {plan['estimated_wall_seconds']:.1f}s "
+        f"({assumptions['max_workers']} workers, {rate} calls/min, "
+        f"{assumptions['api_latency_seconds']}s per call)",
+        f"{'='*60}",
+    ])
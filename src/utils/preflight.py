@@ -0,0 +1,251 @@
+"""
+Pre-flight inspection: cheap metadata triage before scheduling a batch.
+
+inspect_file() reports what a batch planner needs without extracting
+anything:
+    - PDFs: page count, encryption, whether pages carry fonts (a text
+      layer) and how many distinct images they embed. Only the trailer,
+      xref, page tree and page resource dictionaries are read, never
+      content streams.
+    - Images: format, dimensions, mode and animation, read from the header
+      without decoding pixel data.
+Files are typed by their leading bytes (utils.file_types), not their names.
+
+Throughput is bounded by PyPDF2's xref parsing for PDFs (image headers
+are far cheaper); --quick skips the per-page resource walk and --workers
+spreads files across processes.
+
+Usage (from src/):
+    python -m utils.preflight path/to/files_or_dirs ... [--json] [--quick] [--workers N]
+"""
+import argparse
+import functools
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List
+
+import PyPDF2
+from PIL import Image
+
+from utils.file_types import detect_file_type, supported_extensions
+from utils.inputs import describe_source, is_path, open_source, source_size
+
+logger = logging.getLogger(__name__)
+
+
+def _inspect_pdf(stream, deep: bool) -> dict:
+    reader = PyPDF2.PdfReader(stream, strict=False)
+    info = {
+        "pdf_version": reader.pdf_header.replace("%PDF-", ""),
+        "encrypted": reader.is_encrypted,
+        "page_count": None,
+        "has_text_layer": None,
+        "pages_with_text": None,
+        "image_count": None,
+    }
+
+    readable = True
+    if reader.is_encrypted:
+        try:
+            readable = bool(reader.decrypt(""))
+        except Exception:
+            readable = False
+    if not (deep and readable):
+        # The page tree root is never encrypted (only strings and streams
+        # are); PyPDF2 reads its own structure the same way
+        reader._override_encryption = True
+        try:
+            info["page_count"] = int(reader.trailer["/Root"]["/Pages"]["/Count"])
+        finally:
+            reader._override_encryption = False
+        return info
+
+    pages_with_text = 0
+    image_refs = set()
+    inline_images = 0
+    for page in reader.pages:
+        resources = page.get("/Resources")
+        resources = resources.get_object() if resources is not None else {}
+        if resources.get("/Font"):
+            pages_with_text += 1
+        xobjects = resources.get("/XObject")
+        if not xobjects:
+            continue
+        for ref in xobjects.get_object().values():
+            xobject = ref.get_object()
+            if xobject.get("/Subtype") != "/Image":
+                continue
+            idnum = getattr(ref, "idnum", None)
+            if idnum is None:
+                inline_images += 1
+            else:
+                image_refs.add(idnum)
+
+    info["page_count"] = len(reader.pages)
+    info["pages_with_text"] = pages_with_text
+    info["has_text_layer"] = pages_with_text > 0
+    info["image_count"] = len(image_refs) + inline_images
+    return info
+
+
+def _inspect_image(stream) -> dict:
+    with Image.open(stream) as img:
+        return {
+            "format": img.format,
+            "width": img.width,
+            "height": img.height,
+            "mode": img.mode,
+            "animated": bool(getattr(img, "is_animated", False)),
+        }
+
+
+def inspect_file(file_path, deep: bool = True) -> dict:
+    """
+    Inspect one file's metadata without extracting content.
+
+    Args:
+        file_path: Path to an image or PDF, or an in-memory source (typed
+            by its leading bytes; see utils.inputs)
+        deep: Walk PDF page resources for the text-layer and image fields;
+            False reads only the page count from the page tree root
+
+    Returns:
+        dict containing:
+            - success (bool): Whether the metadata could be read
+            - file_path (str): Path to the file
+            - file_type (str): "image", "pdf" or "unsupported"
+            - size_bytes (int): File size
+            - error (str): Error message if inspection failed
+            plus the PDF or image fields described in the module docstring
+    """
+    file_type = detect_file_type(file_path)
+    result = {
+        "success": False,
+        "file_path": describe_source(file_path),
+        "file_type": file_type,
+        "size_bytes": None,
+        "error": None,
+    }
+
+    try:
+        result["size_bytes"] = source_size(file_path)
+        if result["size_bytes"] is None:
+            raise FileNotFoundError(f"File not found: {file_path}")
+        if file_type not in ("image", "pdf"):
+            raise ValueError(f"Unsupported file type: {describe_source(file_path)}")
+        with open_source(file_path) as stream:
+            if file_type == "pdf":
+                result.update(_inspect_pdf(stream, deep))
+            else:
+                result.update(_inspect_image(stream))
+        result["success"] = True
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        logger.debug("Inspection failed for %s: %s", file_path, result["error"])
+
+    return result
+
+
+def inspect_files(file_paths: List, max_workers: int = 1, deep: bool = True) -> List[dict]:
+    """
+    Inspect many files, optionally across worker processes.
+
+    Args:
+        file_paths: Paths to inspect
+        max_workers: Worker processes (inspection is CPU-bound)
+        deep: See inspect_file()
+
+    Returns:
+        List of inspect_file() results, in input order
+    """
+    file_paths = [p if not is_path(p) else str(p) for p in file_paths]
+    inspect = functools.partial(inspect_file, deep=deep)
+    if max_workers > 1 and len(file_paths) > 1 and all(map(is_path, file_paths)):
+        chunksize = max(1, len(file_paths) // (max_workers * 8))
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(inspect, file_paths, chunksize=chunksize))
+    return [inspect(p) for p in file_paths]
+
+
+def expand_paths(paths: List) -> List[str]:
+    """Expand directories into the supported files they contain (recursively)."""
+    expanded = []
+    extensions = supported_extensions()
+    for path in paths:
+        if not is_path(path):
+            # In-memory sources pass through unchanged
+            expanded.append(path)
+            continue
+        path = Path(path)
+        if path.is_dir():
+            expanded.extend(
+                str(p) for p in sorted(path.rglob("*"))
+                if p.is_file() and p.suffix.lower() in extensions
+            )
+        else:
+            expanded.append(str(path))
+    return expanded
+
+
+def summarize(results: List[dict], elapsed: float) -> dict:
+    """Totals for a list of inspection results."""
+    pdfs = [r for r in results if r["file_type"] == "pdf" and r["success"]]
+    return {
+        "files": len(results),
+        "failed": sum(1 for r in results if not r["success"]),
+        "images": sum(1 for r in results if r["file_type"] == "image" and r["success"]),
+        "pdfs": len(pdfs),
+        "pdf_pages": sum(r["page_count"] or 0 for r in pdfs),
+        "encrypted_pdfs": sum(1 for r in pdfs if r["encrypted"]),
+        "pdfs_without_text_layer": sum(1 for r in pdfs if r["has_text_layer"] is False),
+        "elapsed_seconds": round(elapsed, 4),
+        "files_per_sec": round(len(results) / elapsed, 1) if elapsed else None,
+    }
+
+
+def format_result(result: dict) -> str:
+    """One human-readable line per file."""
+    name = result["file_path"]
+    if not result["success"]:
+        return f"[X] {name}: {result['error']}"
+    if result["file_type"] == "image":
+        animated = ", animated" if result["animated"] else ""
+        return (f"[OK] {name}: {result['format']} {result['width']}x{result['height']} "
+                f"{result['mode']}{animated}")
+    text = {True: "text layer", False: "no text layer", None: "text layer unknown"}
+    encrypted = ", encrypted" if result["encrypted"] else ""
+    images = "" if result["image_count"] is None else f", {result['image_count']} images"
+    return (f"[OK] {name}: PDF {result['pdf_version']}, {result['page_count']} pages, "
+            f"{text[result['has_text_layer']]}{images}{encrypted}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Inspect files without extracting content")
+    parser.add_argument("paths", nargs="+", help="Files or directories")
+    parser.add_argument("--json", action="store_true", help="Write JSON lines")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+    parser.add_argument("--quick", action="store_true",
+                        help="PDF page counts only (skip the text layer and image scan)")
+    args = parser.parse_args(argv)
+
+    files = expand_paths(args.paths)
+    start = time.perf_counter()
+    results = inspect_files(files, max_workers=args.workers, deep=not args.quick)
+    summary = summarize(results, time.perf_counter() - start)
+
+    for result in results:
+        print(json.dumps(result) if args.json else format_result(result))
+    if args.json:
+        print(json.dumps({"summary": summary}))
+    else:
+        print(f"\n{summary['files']} files ({summary['failed']} failed), "
+              f"{summary['pdf_pages']} PDF pages, {summary['files_per_sec']} files/sec")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Fast local image descriptions, without a model call.
+
+local_preview() reads an image's header and a small thumbnail (JPEGs
+decode straight to a reduced scale) and reports its dimensions, dominant
+colours and the regions dense with high-contrast edges, which is where
+text usually is. It takes milliseconds and serves as provisional alt text
+until the model's description is ready.
+"""
+from PIL import Image, ImageFilter
+
+from utils.inputs import BufferReader, is_path, read_all
+from utils.tiling import region_name
+
+# Side of the thumbnail the colours and edges are measured on
+PREVIEW_SIDE = 96
+
+# Colours covering less than this share of the image are not named
+MIN_COLOR_SHARE = 0.1
+
+# A grid cell with at least this share of strong edges (level 64 of 255)
+# counts as a text region
+EDGE_LEVEL = 64
+MIN_EDGE_SHARE = 0.12
+GRID = 3
+
+COLOR_NAMES = {
+    "black": (0, 0, 0),
+    "white": (255, 255, 255),
+    "gray": (128, 128, 128),
+    "light gray": (200, 200, 200),
+    "dark gray": (64, 64, 64),
+    "red": (200, 30, 30),
+    "orange": (240, 140, 20),
+    "yellow": (240, 220, 40),
+    "green": (40, 160, 60),
+    "dark green": (20, 80, 30),
+    "blue": (40, 90, 210),
+    "dark blue": (20, 30, 100),
+    "light blue": (150, 200, 240),
+    "purple": (120, 50, 160),
+    "pink": (240, 150, 190),
+    "brown": (120, 70, 30),
+    "beige": (230, 215, 180),
+}
+
+
+def color_name(rgb) -> str:
+    """Nearest entry of COLOR_NAMES for an (r, g, b) colour."""
+    return min(COLOR_NAMES, key=lambda name: sum(
+        (a - b) ** 2 for a, b in zip(COLOR_NAMES[name], rgb)))
+
+
+def dominant_colors(img, count: int = 4) -> list:
+    """Names of the colours covering at least MIN_COLOR_SHARE, most common first."""
+    quantized = img.convert("RGB").quantize(colors=count)
+    palette = quantized.getpalette()
+    total = img.width * img.height
+    names = []
+    for pixels, index in sorted(quantized.getcolors(), reverse=True):
+        name = color_name(palette[3 * index:3 * index + 3])
+        if pixels / total >= MIN_COLOR_SHARE and name not in names:
+            names.append(name)
+    return names
+
+
+def text_regions(img, grid: int = GRID) -> list:
+    """Regions (see tiling.region_name) dense with strong edges, in reading order."""
+    edges = img.convert("L").filter(ImageFilter.FIND_EDGES)
+    # FIND_EDGES leaves a one-pixel border; ignore it
+    edges = edges.crop((1, 1, edges.width - 1, edges.height - 1))
+    regions = []
+    for row in range(grid):
+        for col in range(grid):
+            cell = edges.crop((col * edges.width // grid, row * edges.height // grid,
+                               (col + 1) * edges.width // grid, (row + 1) * edges.height // grid))
+            histogram = cell.histogram()
+            strong = sum(histogram[EDGE_LEVEL:]) / max(1, sum(histogram))
+            if strong >= MIN_EDGE_SHARE:
+                regions.append(region_name(row, col, grid, grid))
+    return regions
+
+
+def local_preview(source) -> dict:
+    """
+    Describe an image from its pixels alone.
+
+    Args:
+        source: Path to the image, or an in-memory source (see utils.inputs)
+
+    Returns:
+        dict containing:
+            - width, height (int): Image size in pixels
+            - format (str): Image format (e.g. "PNG")
+            - colors (list): Dominant colour names
+            - text_regions (list): Regions that probably hold text
+            - alt_text (str): One-sentence description built from the above
+    """
+    with Image.open(source if is_path(source) else BufferReader(read_all(source))) as img:
+        width, height, image_format = img.width, img.height, img.format
+        img.draft("RGB", (PREVIEW_SIDE, PREVIEW_SIDE))
+        img.thumbnail((PREVIEW_SIDE, PREVIEW_SIDE))
+        colors = dominant_colors(img)
+        regions = text_regions(img)
+
+    orientation = ("square" if width == height
+                   else "landscape" if width > height else "portrait")
+    alt_text = f"{orientation.capitalize()} image, {width}x{height} pixels"
+    if colors:
+        named = colors[:3]
+        alt_text += ", mostly " + (" and ".join(named) if len(named) < 3
+                                   else f"{named[0]}, {named[1]} and {named[2]}")
+    if regions:
+        alt_text += "; text likely in the " + ", ".join(regions)
+    return {
+        "width": width,
+        "height": height,
+        "format": image_format,
+        "colors": colors,
+        "text_regions": regions,
+        "alt_text": alt_text + ".",
+    }
@@ -0,0 +1,390 @@
+"""
+Profiling mode for diagnosing slow or memory-hungry batches.
+
+A Profiler attributes CPU time to the file being processed and to the
+pipeline stage (the time_stage() blocks), and records the tracemalloc
+allocation peak of every file. Two CPU modes are available:
+    - cprofile: deterministic cProfile, one profile per (file, stage),
+      written as .prof files (pstats, snakeviz, flameprof). Needs one
+      profiler per thread, which Python 3.12+ does not allow (cProfile
+      is process-wide there), so on 3.12+ this mode falls back to sampling
+    - sampling: a background thread samples each busy worker's stack at a
+      fixed interval, written as folded stacks (flamegraph.pl, speedscope)
+      with the stage as the root frame
+
+Only function names, source locations and file paths are recorded, never
+file contents, so the output can be shared when the corpus cannot.
+"""
+import cProfile
+import functools
+import json
+import logging
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+from utils.inputs import describe_source
+from utils.memory import MemoryMeter
+from utils.metrics import add_stage_hook, remove_stage_hook
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("cprofile", "sampling")
+
+# Stage label for work inside a file but outside any time_stage() block
+NO_STAGE = "other"
+
+# Deepest stack kept per sample
+MAX_STACK_DEPTH = 128
+
+# Before 3.12 every thread can enable its own cProfile.Profile; from 3.12
+# cProfile is built on sys.monitoring and a second enable() raises
+# "Another profiling tool is already active"
+PER_THREAD_CPROFILE = sys.version_info < (3, 12)
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+def _stack(frame) -> tuple:
+    """Root-to-leaf labels for a frame's call stack."""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return tuple(reversed(labels))
+
+
+def _safe_name(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", text)[:80]
+
+
+class Profiler:
+    """
+    Collect CPU profiles per stage and per file, plus per-file memory peaks.
+
+    Use as a context manager around the work (sessions nest), and wrap the
+    per-file function with wrap() or profile_file(). With several workers,
+    a file's memory peak also includes allocations of files processed at
+    the same time; use max_workers=1 for exact per-file figures.
+
+    Args:
+        mode: "cprofile" or "sampling" ("cprofile" becomes "sampling" on
+            Python 3.12+, where worker threads cannot be profiled separately)
+        interval: Seconds between stack samples (sampling mode)
+    """
+
+    def __init__(self, mode: str = "cprofile", interval: float = 0.005):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}. Available: {', '.join(PROFILE_MODES)}")
+        if mode == "cprofile" and not PER_THREAD_CPROFILE:
+            logger.warning("cProfile cannot profile worker threads separately on Python %d.%d; "
+                           "using the sampling profiler", *sys.version_info[:2])
+            mode = "sampling"
+        self.mode = mode
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._sessions = 0
+        self._started_tracemalloc = False
+        self._sampler = None
+        self._stop_sampling = threading.Event()
+        # thread ident -> (file, stage) for threads inside a file or stage
+        self._activity = {}
+        # cprofile mode: (file, stage) -> profiles (one per entry)
+        self._profiles = defaultdict(list)
+        # sampling mode: (file, stage, stack) -> sample count
+        self._samples = Counter()
+        # file -> {"runs", "seconds", "peak_bytes"}
+        self.files = {}
+
+    # ------------------------------------------------------------------
+    # Session and attribution
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start profiling (nested calls are counted)."""
+        with self._lock:
+            self._sessions += 1
+            if self._sessions > 1:
+                return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        add_stage_hook(self._stage_hook)
+        if self.mode == "sampling":
+            self._stop_sampling.clear()
+            self._sampler = threading.Thread(
+                target=self._sample_loop, name="profiler-sampler", daemon=True
+            )
+            self._sampler.start()
+        logger.info("Profiling started (mode=%s)", self.mode)
+
+    def stop(self):
+        """Stop profiling once the outermost session ends."""
+        with self._lock:
+            self._sessions -= 1
+            if self._sessions > 0:
+                return
+        remove_stage_hook(self._stage_hook)
+        if self._sampler is not None:
+            self._stop_sampling.set()
+            self._sampler.join()
+            self._sampler = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        logger.info("Profiling stopped (%d files)", len(self.files))
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    @contextmanager
+    def profile_file(self, file_path):
+        """Attribute the enclosed work (and its memory peak) to one file."""
+        file_path = describe_source(file_path)
+        ident = threading.get_ident()
+        with self._lock:
+            previous = self._activity.get(ident)
+            self._activity[ident] = (file_path, NO_STAGE)
+        meter = MemoryMeter()
+        start = time.perf_counter()
+        self._push(file_path, NO_STAGE)
+        try:
+            with meter:
+                yield
+        finally:
+            self._pop()
+            elapsed = time.perf_counter() - start
+            peak = meter.measured_bytes if meter.method == "tracemalloc" else 0
+            with self._lock:
+                self._restore_activity(ident, previous)
+                entry = self.files.setdefault(
+                    file_path, {"runs": 0, "seconds": 0.0, "peak_bytes": 0}
+                )
+                entry["runs"] += 1
+                entry["seconds"] += elapsed
+                entry["peak_bytes"] = max(entry["peak_bytes"], peak)
+
+    def wrap(self, fn):
+        """Wrap fn(file_path, ...) so each call runs under profile_file()."""
+        @functools.wraps(fn)
+        def profiled(file_path, *args, **kwargs):
+            with self.profile_file(file_path):
+                return fn(file_path, *args, **kwargs)
+        return profiled
+
+    @contextmanager
+    def _stage_hook(self, component: str, stage: str):
+        stage_name = f"{component}.{stage}"
+        ident = threading.get_ident()
+        with self._lock:
+            previous = self._activity.get(ident)
+            file_path = previous[0] if previous else None
+            self._activity[ident] = (file_path, stage_name)
+        self._push(file_path, stage_name)
+        try:
+            yield
+        finally:
+            self._pop()
+            with self._lock:
+                self._restore_activity(ident, previous)
+
+    def _restore_activity(self, ident: int, previous):
+        if previous is None:
+            self._activity.pop(ident, None)
+        else:
+            self._activity[ident] = previous
+
+    def _push(self, file_path, stage: str):
+        """Switch this thread to a fresh cProfile for (file, stage)."""
+        if self.mode != "cprofile":
+            return
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        if stack:
+            stack[-1].disable()
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles[(file_path, stage)].append(profile)
+        stack.append(profile)
+        profile.enable()
+
+    def _pop(self):
+        """Stop the current (file, stage) profile and resume the outer one."""
+        if self.mode != "cprofile":
+            return
+        stack = self._local.stack
+        stack.pop().disable()
+        if stack:
+            stack[-1].enable()
+
+    def _sample_loop(self):
+        while not self._stop_sampling.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                active = list(self._activity.items())
+            for ident, (file_path, stage) in active:
+                frame = frames.get(ident)
+                if frame is not None:
+                    self._samples[(file_path, stage, _stack(frame))] += 1
+
+    # ------------------------------------------------------------------
+    # Results
+    # ------------------------------------------------------------------
+
+    def _merged_stats(self, keep=lambda file_path, stage: True):
+        """pstats.Stats over the selected (file, stage) profiles, or None."""
+        merged = None
+        with self._lock:
+            selected = [p for (f, s), profiles in self._profiles.items()
+                        if keep(f, s) for p in profiles]
+        for profile in selected:
+            profile.create_stats()
+            if not profile.stats:
+                continue
+            if merged is None:
+                merged = pstats.Stats(profile)
+            else:
+                merged.add(profile)
+        return merged
+
+    def stage_seconds(self) -> dict:
+        """CPU seconds (cprofile) or sampled seconds per stage."""
+        totals = defaultdict(float)
+        if self.mode == "cprofile":
+            with self._lock:
+                stages = {stage for _, stage in self._profiles}
+            for stage in stages:
+                stats = self._merged_stats(lambda f, s, stage=stage: s == stage)
+                if stats is not None:
+                    totals[stage] = stats.total_tt
+        else:
+            for (_, stage, _), count in self._samples.items():
+                totals[stage] += count * self.interval
+        return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+    def hot_functions(self, top_n: int = 10) -> list:
+        """Functions with the most self time, hottest first."""
+        self_seconds = Counter()
+        if self.mode == "cprofile":
+            stats = self._merged_stats()
+            if stats is not None:
+                for (filename, lineno, name), (_, _, tottime, _, _) in stats.stats.items():
+                    if name.startswith("<method 'enable'") or name.startswith("<method 'disable'"):
+                        continue
+                    label = name if filename == "~" else f"{name} ({Path(filename).name}:{lineno})"
+                    self_seconds[label] += tottime
+        else:
+            for (_, _, stack), count in self._samples.items():
+                if stack:
+                    self_seconds[stack[-1]] += count * self.interval
+        return [{"function": label, "self_seconds": round(seconds, 6)}
+                for label, seconds in self_seconds.most_common(top_n)]
+
+    def memory_heavy_files(self, top_n: int = 10) -> list:
+        """Files with the largest tracemalloc peak, heaviest first."""
+        with self._lock:
+            files = sorted(self.files.items(), key=lambda item: -item[1]["peak_bytes"])
+        return [{"file": path, **entry} for path, entry in files[:top_n]]
+
+    def summary(self, top_n: int = 10) -> dict:
+        """Hot functions, memory-heavy files and per-stage time."""
+        return {
+            "mode": self.mode,
+            "files_profiled": len(self.files),
+            "stage_seconds": {k: round(v, 6) for k, v in self.stage_seconds().items()},
+            "hot_functions": self.hot_functions(top_n),
+            "memory_heavy_files": self.memory_heavy_files(top_n),
+        }
+
+    def format_summary(self, top_n: int = 10) -> str:
+        """Human-readable version of summary()."""
+        summary = self.summary(top_n)
+        unit = "CPU" if self.mode == "cprofile" else "sampled"
+        lines = [f"\nPROFILE SUMMARY ({summary['mode']}, {summary['files_profiled']} files)"]
+        lines.append(f"\nTime per stage ({unit} seconds):")
+        for stage, seconds in summary["stage_seconds"].items():
+            lines.append(f"  {seconds:10.4f}  {stage}")
+        lines.append(f"\nTop {top_n} hot functions (self time):")
+        for entry in summary["hot_functions"]:
+            lines.append(f"  {entry['self_seconds']:10.4f}  {entry['function']}")
+        lines.append(f"\nTop {top_n} memory-heavy files (tracemalloc peak):")
+        for entry in summary["memory_heavy_files"]:
+            lines.append(f"  {entry['peak_bytes'] / 1024:10.1f} KB  {entry['file']}")
+        return "\n".join(lines)
+
+    def write(self, output_dir, top_n: int = 10) -> Path:
+        """
+        Write profiles, a per-file index and the summary to a directory.
+
+        cprofile mode writes profile.prof plus stages/*.prof and
+        files/*.prof; sampling mode writes the same layout as .folded
+        stack files.
+
+        Args:
+            output_dir: Destination directory (created if missing)
+            top_n: Entries listed in summary.txt
+
+        Returns:
+            Path to the output directory
+        """
+        output_dir = Path(output_dir)
+        (output_dir / "stages").mkdir(parents=True, exist_ok=True)
+        (output_dir / "files").mkdir(exist_ok=True)
+
+        with self._lock:
+            stages = sorted({s for _, s in self._profiles} | {s for _, s, _ in self._samples})
+        file_names = {path: f"{i:04d}-{_safe_name(Path(path).name)}"
+                      for i, path in enumerate(sorted(self.files), 1)}
+
+        if self.mode == "cprofile":
+            self._write_prof(output_dir / "profile.prof", lambda f, s: True)
+            for stage in stages:
+                self._write_prof(output_dir / "stages" / f"{_safe_name(stage)}.prof",
+                                 lambda f, s, stage=stage: s == stage)
+            for path, name in file_names.items():
+                self._write_prof(output_dir / "files" / f"{name}.prof",
+                                 lambda f, s, path=path: f == path)
+        else:
+            self._write_folded(output_dir / "profile.folded", lambda f, s: True)
+            for stage in stages:
+                self._write_folded(output_dir / "stages" / f"{_safe_name(stage)}.folded",
+                                   lambda f, s, stage=stage: s == stage)
+            for path, name in file_names.items():
+                self._write_folded(output_dir / "files" / f"{name}.folded",
+                                   lambda f, s, path=path: f == path)
+
+        extension = "prof" if self.mode == "cprofile" else "folded"
+        index = [{"file": path, **self.files[path], "profile": f"files/{name}.{extension}"}
+                 for path, name in file_names.items()]
+        (output_dir / "files.json").write_text(json.dumps(index, indent=2) + "\n")
+        (output_dir / "summary.json").write_text(json.dumps(self.summary(top_n), indent=2) + "\n")
+        (output_dir / "summary.txt").write_text(self.format_summary(top_n) + "\n")
+        logger.info("Profile written to %s", output_dir)
+        return output_dir
+
+    def _write_prof(self, path: Path, keep):
+        stats = self._merged_stats(keep)
+        if stats is not None:
+            stats.dump_stats(path)
+
+    def _write_folded(self, path: Path, keep):
+        folded = Counter()
+        for (file_path, stage, stack), count in self._samples.items():
+            if keep(file_path, stage):
+                folded[";".join((stage,) + stack)] += count
+        path.write_text("".join(f"{line} {count}\n" for line, count in sorted(folded.items())))
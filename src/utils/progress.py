@@ -0,0 +1,385 @@
+"""
+Live batch progress: events, throughput and ETA.
+
+A ProgressTracker follows one batch and sends an event dict to every
+subscribed callback when the batch starts, each file starts, completes or
+fails, each PDF page is extracted, and the batch ends, plus a periodic
+heartbeat so a stalled batch keeps reporting. Every event carries
+a progress snapshot: files and pages per second, API latency percentiles,
+an ETA, and how long ago anything last finished, which is what separates
+a slow batch from a stuck one.
+
+Page and API timings come from the stage hooks in utils.metrics, filtered
+to the files of this batch, so agents need no extra wiring. Callbacks run
+on the worker threads; AsyncProgressStream hands events to an asyncio
+loop instead, and TerminalRenderer draws a status line for the CLI.
+"""
+import asyncio
+import logging
+import math
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Optional
+
+from utils.inputs import describe_source
+from utils.log_context import current_file
+from utils.metrics import add_stage_hook, remove_stage_hook
+
+logger = logging.getLogger(__name__)
+
+BATCH_STARTED = "batch_started"
+FILE_STARTED = "started"
+FILE_COMPLETED = "completed"
+FILE_FAILED = "failed"
+PAGE_COMPLETED = "page"
+HEARTBEAT = "heartbeat"
+BATCH_COMPLETED = "batch_completed"
+EVENT_TYPES = (BATCH_STARTED, FILE_STARTED, FILE_COMPLETED, FILE_FAILED, PAGE_COMPLETED,
+               HEARTBEAT, BATCH_COMPLETED)
+
+# Seconds between heartbeat events while a batch runs
+DEFAULT_HEARTBEAT_SECONDS = 1.0
+
+# API latency percentiles cover the most recent calls only, so a snapshot
+# (taken for every event) costs the same however long the batch runs
+LATENCY_WINDOW = 1000
+
+
+def percentile(values, q: float, ordered: bool = False) -> Optional[float]:
+    """Nearest-rank percentile (q in 0-100) of a list, or None if empty."""
+    if not values:
+        return None
+    if not ordered:
+        values = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(values)))
+    return values[rank - 1]
+
+
+class ProgressTracker:
+    """
+    Progress of one batch, reported to callbacks as event dicts.
+
+    Each event has "event" (one of EVENT_TYPES), "file_path" (None for
+    batch events), "success" and "error" for finished files, "pages_done"
+    for page events, and "progress" (see snapshot()).
+
+    Args:
+        total_files: Files in the batch
+        callbacks: Callables taking one event dict
+        costs: Optional estimated seconds per file path; the ETA is then
+            weighted by cost instead of counting files
+        heartbeat_seconds: Interval of heartbeat events (None: no heartbeat)
+        clock: Time source (injectable for tests)
+    """
+
+    def __init__(self, total_files: int, callbacks: Iterable[Callable] = (),
+                 costs: Optional[Dict[str, float]] = None,
+                 heartbeat_seconds: Optional[float] = None, clock=time.monotonic):
+        self.total_files = total_files
+        self.callbacks = list(callbacks)
+        self.costs = costs or {}
+        self.heartbeat_seconds = heartbeat_seconds
+        self._clock = clock
+        self._stopped = threading.Event()
+        self._heartbeat = None
+        self._lock = threading.Lock()
+        self._started_at = None
+        self._last_progress = None
+        self._in_flight = set()
+        self._pages_by_file = {}
+        self._api_latencies = deque(maxlen=LATENCY_WINDOW)
+        self._api_calls = 0
+        self.started = self.completed = self.failed = self.pages = 0
+        self._done_cost = 0.0
+
+    def subscribe(self, callback: Callable):
+        """Add a callback receiving every later event."""
+        self.callbacks.append(callback)
+
+    # -- batch lifecycle -------------------------------------------------
+
+    def __enter__(self):
+        now = self._clock()
+        self._started_at = self._last_progress = now
+        add_stage_hook(self._stage_hook)
+        self._emit(BATCH_STARTED)
+        if self.heartbeat_seconds:
+            self._heartbeat = threading.Thread(target=self._beat, name="progress-heartbeat",
+                                               daemon=True)
+            self._heartbeat.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stopped.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+        remove_stage_hook(self._stage_hook)
+        self._emit(BATCH_COMPLETED)
+        return False
+
+    def _beat(self):
+        while not self._stopped.wait(self.heartbeat_seconds):
+            self._emit(HEARTBEAT)
+
+    def wrap(self, fn):
+        """Wrap process_file(file_path, ...) to report start and finish."""
+        def tracked(file_path, *args, **kwargs):
+            self.file_started(file_path)
+            result = None
+            try:
+                result = fn(file_path, *args, **kwargs)
+                return result
+            finally:
+                self.file_finished(file_path, result)
+        return tracked
+
+    def file_started(self, file_path):
+        file_path = describe_source(file_path)
+        with self._lock:
+            self.started += 1
+            self._in_flight.add(file_path)
+        self._emit(FILE_STARTED, file_path=file_path)
+
+    def file_finished(self, file_path, result: Optional[dict]):
+        """Record a finished file; a missing result counts as a failure."""
+        success = bool(result and result.get("success"))
+        file_path = describe_source(file_path)
+        with self._lock:
+            self._in_flight.discard(file_path)
+            if success:
+                self.completed += 1
+            else:
+                self.failed += 1
+            self._done_cost += self.costs.get(file_path, 0.0)
+            self._last_progress = self._clock()
+        self._emit(FILE_COMPLETED if success else FILE_FAILED, file_path=file_path,
+                   success=success, error=result.get("error") if result else "no result")
+
+    def page_completed(self, file_path):
+        file_path = describe_source(file_path)
+        with self._lock:
+            self.pages += 1
+            pages_done = self._pages_by_file.get(file_path, 0) + 1
+            self._pages_by_file[file_path] = pages_done
+            self._last_progress = self._clock()
+        self._emit(PAGE_COMPLETED, file_path=file_path, pages_done=pages_done)
+
+    def api_call_finished(self, seconds: float):
+        with self._lock:
+            self._api_latencies.append(seconds)
+            self._api_calls += 1
+
+    @contextmanager
+    def _stage_hook(self, component: str, stage: str):
+        file_path = current_file.get()
+        if file_path not in self._in_flight:
+            # Another batch, or work outside any batch
+            yield
+            return
+        if (component, stage) == ("image", "api_call"):
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                self.api_call_finished(time.perf_counter() - start)
+        elif (component, stage) == ("pdf", "page_extraction"):
+            yield
+            self.page_completed(file_path)
+        else:
+            yield
+
+    # -- reporting -------------------------------------------------------
+
+    def snapshot(self) -> dict:
+        """
+        Current progress.
+
+        Returns:
+            dict with total_files, started, completed, failed, in_flight,
+            pages, elapsed_seconds, files_per_sec, pages_per_sec,
+            api_latency (count of calls; p50, p90, p99 seconds over the last
+            LATENCY_WINDOW calls), eta_seconds and seconds_since_progress
+        """
+        with self._lock:
+            now = self._clock()
+            elapsed = now - self._started_at if self._started_at is not None else 0.0
+            finished = self.completed + self.failed
+            remaining = self.total_files - finished
+            total_cost = sum(self.costs.values())
+
+            if remaining == 0:
+                eta = 0.0
+            elif self._done_cost > 0 and total_cost > self._done_cost:
+                eta = elapsed * (total_cost - self._done_cost) / self._done_cost
+            elif finished:
+                eta = elapsed * remaining / finished
+            else:
+                eta = None
+
+            latencies = list(self._api_latencies)
+            api_calls = self._api_calls
+            snapshot = {
+                "total_files": self.total_files,
+                "started": self.started,
+                "completed": self.completed,
+                "failed": self.failed,
+                "in_flight": len(self._in_flight),
+                "pages": self.pages,
+                "elapsed_seconds": round(elapsed, 3),
+                "files_per_sec": round(finished / elapsed, 3) if elapsed else 0.0,
+                "pages_per_sec": round(self.pages / elapsed, 3) if elapsed else 0.0,
+                "eta_seconds": None if eta is None else round(eta, 1),
+                "seconds_since_progress": (
+                    round(now - self._last_progress, 3) if self._last_progress is not None else 0.0
+                ),
+            }
+
+        # Sorted once, outside the lock the workers' hooks take
+        latencies.sort()
+        snapshot["api_latency"] = {
+            "count": api_calls,
+            "p50": percentile(latencies, 50, ordered=True),
+            "p90": percentile(latencies, 90, ordered=True),
+            "p99": percentile(latencies, 99, ordered=True),
+        }
+        return snapshot
+
+    def _emit(self, kind: str, file_path=None, **fields):
+        if not self.callbacks:
+            return
+        event = {"event": kind, "file_path": file_path, **fields, "progress": self.snapshot()}
+        for callback in list(self.callbacks):
+            try:
+                callback(event)
+            except Exception as e:
+                # A broken renderer must not fail the batch
+                logger.warning("Progress callback %r failed: %s", callback, e)
+
+
+class AsyncProgressStream:
+    """
+    Async iterator over progress events.
+
+    Create it inside the event loop, pass it as the progress callback of a
+    batch running in a thread, and iterate; iteration ends after the
+    batch_completed event:
+
+        stream = AsyncProgressStream()
+        batch = asyncio.create_task(asyncio.to_thread(
+            coordinator.process_batch, files, progress=stream))
+        async for event in stream:
+            ...
+    """
+
+    def __init__(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._done = False
+
+    def __call__(self, event: dict):
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict:
+        if self._done:
+            raise StopAsyncIteration
+        event = await self._queue.get()
+        if event["event"] == BATCH_COMPLETED:
+            self._done = True
+        return event
+
+
+def _format_seconds(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "--:--"
+    minutes, secs = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+def format_progress(progress: dict, width: int = 20) -> str:
+    """One-line status: bar, counts, rates, API latency and ETA."""
+    total = progress["total_files"] or 1
+    finished = progress["completed"] + progress["failed"]
+    filled = int(width * finished / total)
+    parts = [
+        f"[{'#' * filled}{'.' * (width - filled)}] {finished}/{progress['total_files']} files",
+    ]
+    if progress["failed"]:
+        parts[0] += f" ({progress['failed']} failed)"
+    parts.append(f"{progress['files_per_sec']:.2f} files/s")
+    if progress["pages"]:
+        parts.append(f"{progress['pages_per_sec']:.1f} pages/s")
+    latency = progress["api_latency"]
+    if latency["count"]:
+        parts.append(f"API p50 {latency['p50']:.2f}s p90 {latency['p90']:.2f}s")
+    parts.append(f"ETA {_format_seconds(progress['eta_seconds'])}")
+    return " | ".join(parts)
+
+
+class TerminalRenderer:
+    """
+    Progress callback drawing a status line.
+
+    On a terminal the line is redrawn in place (at most every
+    min_interval seconds); otherwise one line is written per finished
+    file, plus a line per stall_seconds while the batch is stalled. A
+    "no progress for Ns" marker appears once nothing has finished for
+    stall_seconds.
+
+    Args:
+        stream: Output stream (default: stderr)
+        min_interval: Minimum seconds between redraws
+        stall_seconds: Quiet period after which the batch is flagged
+    """
+
+    def __init__(self, stream=None, min_interval: float = 0.2, stall_seconds: float = 30.0):
+        self.stream = stream or sys.stderr
+        self.min_interval = min_interval
+        self.stall_seconds = stall_seconds
+        self.interactive = hasattr(self.stream, "isatty") and self.stream.isatty()
+        self._lock = threading.Lock()
+        self._last_draw = 0.0
+        self._width = 0
+
+    def _stalled(self, progress: dict) -> bool:
+        return bool(progress["in_flight"]) and \
+            progress["seconds_since_progress"] >= self.stall_seconds
+
+    def render(self, event: dict) -> str:
+        progress = event["progress"]
+        line = format_progress(progress)
+        if self._stalled(progress):
+            line += f" | no progress for {progress['seconds_since_progress']:.0f}s"
+        return line
+
+    def __call__(self, event: dict):
+        kind = event["event"]
+        with self._lock:
+            if self.interactive:
+                now = time.monotonic()
+                final = kind == BATCH_COMPLETED
+                if not final and now - self._last_draw < self.min_interval:
+                    return
+                self._last_draw = now
+                line = self.render(event)
+                self.stream.write("\r" + line.ljust(self._width) + ("\n" if final else ""))
+                self._width = len(line)
+            elif kind in (FILE_COMPLETED, FILE_FAILED, BATCH_COMPLETED, HEARTBEAT):
+                now = time.monotonic()
+                if kind == HEARTBEAT and not (self._stalled(event["progress"]) and
+                                              now - self._last_draw >= self.stall_seconds):
+                    return
+                self._last_draw = now
+                status = {FILE_COMPLETED: "[OK]", FILE_FAILED: "[X]",
+                          HEARTBEAT: "[..]"}.get(kind, "[DONE]")
+                name = f" {event['file_path']}" if event["file_path"] else ""
+                self.stream.write(f"{status}{name} | {self.render(event)}\n")
+            else:
+                return
+            self.stream.flush()
@@ -0,0 +1,52 @@
+"""
+Token-bucket rate limiter for model API calls.
+"""
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Limit calls per minute across threads.
+
+    Tokens refill continuously; acquire() blocks until one is available.
+
+    Args:
+        calls_per_minute: Sustained call rate
+        burst: Calls allowed back-to-back after an idle period
+        clock: Time source (injectable for tests)
+        sleep: Sleep function (injectable for tests)
+    """
+
+    def __init__(self, calls_per_minute: float, burst: int = 1,
+                 clock=time.monotonic, sleep=time.sleep):
+        if calls_per_minute <= 0:
+            raise ValueError("calls_per_minute must be positive")
+        self.calls_per_minute = calls_per_minute
+        self.burst = max(1, burst)
+        self._rate = calls_per_minute / 60.0
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Take one call slot, waiting if necessary.
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self._rate
+            self._sleep(delay)
+            waited += delay
@@ -0,0 +1,131 @@
+"""
+Persistent per-file result cache.
+
+Results are keyed by file path plus the request options that shape them
+(model, detail level). Each entry remembers the file's fingerprint (size
+and modification time), so a changed file is detected from a stat() call
+without reading it; this keeps cache lookups cheap enough for planning.
+In-memory inputs are keyed by a hash of their content instead; unseekable
+streams are not cached.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from utils.inputs import content_digest, is_path, source_size
+from utils.metrics import CACHE_HITS, CACHE_MISSES
+
+logger = logging.getLogger(__name__)
+
+HIT = "hit"
+STALE = "stale"
+MISS = "miss"
+
+
+def file_fingerprint(file_path):
+    """[size, mtime_ns] of a file, or None if it cannot be stat'ed."""
+    if not is_path(file_path):
+        # Content-keyed: only the size is worth checking
+        return [source_size(file_path), None]
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class ResultCache:
+    """
+    Cache of per-file results with optional JSON-lines persistence.
+
+    Args:
+        path: File the entries are appended to and loaded from
+            (None keeps the cache in memory only)
+        ttl_seconds: Age after which an entry is stale (None: never)
+        name: Cache name used in the cache hit/miss metrics
+    """
+
+    def __init__(self, path=None, ttl_seconds: float = None, name: str = "result"):
+        self.path = Path(path) if path else None
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self._entries = {}
+        self._lock = threading.Lock()
+        if self.path and self.path.exists():
+            self._load()
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["key"]] = entry
+        logger.info("Loaded %d cached results from %s", len(self._entries), self.path)
+
+    @staticmethod
+    def key(file_path, **options):
+        """Cache key for a file and the options that shape its result (None: uncacheable)."""
+        if is_path(file_path):
+            identity = {"path": str(Path(file_path).resolve())}
+        else:
+            digest = content_digest(file_path)
+            if digest is None:
+                return None
+            identity = {"sha256": digest}
+        return json.dumps({**identity, "options": options}, sort_keys=True)
+
+    def lookup(self, file_path, **options):
+        """
+        Find the entry for a file without counting metrics.
+
+        Returns:
+            (entry or None, status) where status is "hit", "stale" or "miss"
+        """
+        key = self.key(file_path, **options)
+        with self._lock:
+            entry = self._entries.get(key) if key is not None else None
+        if entry is None:
+            return None, MISS
+        expired = (self.ttl_seconds is not None
+                   and time.time() - entry["stored_at"] > self.ttl_seconds)
+        if expired or entry["fingerprint"] != file_fingerprint(file_path):
+            return entry, STALE
+        return entry, HIT
+
+    def status(self, file_path, **options) -> str:
+        """"hit", "stale" or "miss" for a file (used by the planner)."""
+        return self.lookup(file_path, **options)[1]
+
+    def get(self, file_path, **options):
+        """Fresh cached result for a file, or None."""
+        entry, status = self.lookup(file_path, **options)
+        if status == HIT:
+            CACHE_HITS.inc(cache=self.name)
+            return entry["result"]
+        CACHE_MISSES.inc(cache=self.name)
+        return None
+
+    def put(self, file_path, result: dict, **options):
+        """Store a result together with the file's current fingerprint."""
+        key = self.key(file_path, **options)
+        if key is None:
+            return
+        entry = {
+            "key": key,
+            "fingerprint": file_fingerprint(file_path),
+            "stored_at": time.time(),
+            "result": result,
+        }
+        with self._lock:
+            self._entries[entry["key"]] = entry
+            if self.path:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
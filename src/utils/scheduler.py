@@ -0,0 +1,178 @@
+"""
+Priority and shortest-job-first scheduling for batch work.
+
+Files are ordered by (priority, estimated cost): interactive requests run
+before normal ones, normal before bulk, and within a priority the cheapest
+files go first so small images are not stuck behind a 100-page PDF.
+
+The Scheduler is a worker pool with a shared priority queue. Bulk and
+normal jobs use at most max_workers threads; interactive jobs may also use
+interactive_slots extra threads, so they start immediately even while
+every regular worker is busy with long bulk jobs. Running jobs are never
+interrupted.
+"""
+import heapq
+import itertools
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+from utils.planner import (
+    DEFAULT_API_LATENCY_SECONDS, DEFAULT_PDF_SECONDS_PER_PAGE, file_requests,
+    needs_pdf_details, observed_mean
+)
+from utils.preflight import inspect_files
+from utils.result_cache import HIT
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+NORMAL = 1
+BULK = 2
+PRIORITIES = {"interactive": INTERACTIVE, "normal": NORMAL, "bulk": BULK}
+
+# Cost of serving a cached image (seconds)
+CACHE_HIT_COST = 0.001
+
+
+def priority_value(priority) -> int:
+    """Numeric priority (lower runs first) from a name or an int."""
+    if isinstance(priority, str):
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}. Use one of {', '.join(PRIORITIES)}")
+        return PRIORITIES[priority]
+    return int(priority)
+
+
+def estimate_costs(file_paths: List[str], cache_status: Optional[Callable] = None,
+                   features: Optional[dict] = None) -> Dict[str, float]:
+    """
+    Estimated processing seconds per file, from metadata only.
+
+    Files cost their API calls unless cached, counting calls made
+    concurrently within a file once (see planner.file_requests()); PDFs
+    also cost their page count times the per-page extraction time.
+    Unreadable files cost nothing (they fail fast). File size breaks ties.
+
+    Args:
+        file_paths: Files to estimate
+        cache_status: Callable(file_path) -> "hit" | "stale" | "miss"
+        features: Optional pipeline features adding calls (see
+            planner.file_requests())
+
+    Returns:
+        dict mapping file path to estimated seconds
+    """
+    api_seconds = observed_mean("image", "api_call", DEFAULT_API_LATENCY_SECONDS)
+    page_seconds = observed_mean("pdf", "page_extraction", DEFAULT_PDF_SECONDS_PER_PAGE)
+
+    costs = {}
+    for inspection in inspect_files(file_paths, deep=needs_pdf_details(features)):
+        path = inspection["file_path"]
+        size_tiebreak = (inspection["size_bytes"] or 0) * 1e-12
+        if not inspection["success"]:
+            cost = 0.0
+        elif inspection["file_type"] == "pdf":
+            work = file_requests(inspection, 0, features=features)
+            cost = inspection["page_count"] * page_seconds + work["api_rounds"] * api_seconds
+        elif cache_status is not None and cache_status(path) == HIT:
+            cost = CACHE_HIT_COST
+        else:
+            cost = file_requests(inspection, 0, features=features)["api_rounds"] * api_seconds
+        costs[path] = cost + size_tiebreak
+    return costs
+
+
+class Scheduler:
+    """
+    Worker pool dispatching jobs by (priority, cost, submission order).
+
+    Args:
+        max_workers: Threads available to normal and bulk jobs
+        interactive_slots: Extra threads reserved for interactive jobs
+    """
+
+    def __init__(self, max_workers: int = 4, interactive_slots: int = 1):
+        self.max_workers = max(1, max_workers)
+        self.interactive_slots = max(0, interactive_slots)
+        self._queue = []
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._running = 0
+        self._shutdown = False
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"scheduler-{i}", daemon=True)
+            for i in range(self.max_workers + self.interactive_slots)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn, *args, priority=NORMAL, cost: float = 0.0, **kwargs) -> Future:
+        """
+        Queue fn(*args, **kwargs).
+
+        Args:
+            priority: "interactive", "normal", "bulk" or an int (lower first)
+            cost: Estimated seconds; cheaper jobs of equal priority run first
+
+        Returns:
+            concurrent.futures.Future for the result
+        """
+        future = Future()
+        entry = (priority_value(priority), cost, next(self._order), future, fn, args, kwargs)
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("Scheduler has been shut down")
+            heapq.heappush(self._queue, entry)
+            self._condition.notify_all()
+        return future
+
+    def pending(self) -> int:
+        """Jobs waiting to start."""
+        with self._condition:
+            return len(self._queue)
+
+    def _runnable(self) -> bool:
+        if not self._queue:
+            return False
+        limit = self.max_workers
+        if self._queue[0][0] <= INTERACTIVE:
+            limit += self.interactive_slots
+        return self._running < limit
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._runnable() or
+                                         (self._shutdown and not self._queue))
+                if not self._queue:
+                    return
+                _, _, _, future, fn, args, kwargs = heapq.heappop(self._queue)
+                self._running += 1
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args, **kwargs))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                with self._condition:
+                    self._running -= 1
+                    self._condition.notify_all()
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting jobs; queued jobs still run."""
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+        return False
@@ -0,0 +1,103 @@
+"""
+Text streams that end with a result dict.
+
+A producer is a generator that yields text chunks as a model produces
+them and returns a result dict shaped like the agent's non-streaming
+result. TextStream consumes it once: as a plain iterator, or from asyncio
+code as an async iterator that runs the producer in a worker thread (with
+the caller's log and trace context). Once the stream ends, result holds
+the returned dict and text everything that was streamed.
+"""
+import asyncio
+import contextvars
+import threading
+from typing import Generator, Optional
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def drain(producer: Generator):
+    """Run a producer to its end, discarding any chunks; returns its result."""
+    while True:
+        try:
+            next(producer)
+        except StopIteration as stop:
+            return stop.value
+
+
+class TextStream:
+    """
+    One-shot stream of text chunks with a final result.
+
+    Args:
+        producer: Generator yielding str chunks and returning a result dict
+    """
+
+    def __init__(self, producer: Generator):
+        self._producer = producer
+        self._chunks = []
+        self._started = False
+        self.result: Optional[dict] = None
+
+    @property
+    def text(self) -> str:
+        """Text streamed so far."""
+        return "".join(self._chunks)
+
+    def __iter__(self):
+        if self._started:
+            raise RuntimeError("A TextStream can only be consumed once")
+        self._started = True
+        try:
+            while True:
+                try:
+                    chunk = next(self._producer)
+                except StopIteration as stop:
+                    self.result = stop.value
+                    return
+                self._chunks.append(chunk)
+                yield chunk
+        finally:
+            # Stops the model call if the consumer gives up early
+            self._producer.close()
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        stopped = threading.Event()
+
+        def put(item):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                # The event loop has closed; nobody is listening any more
+                stopped.set()
+
+        def pump():
+            try:
+                for chunk in self:
+                    put(chunk)
+                    if stopped.is_set():
+                        break
+            except BaseException as e:
+                put(_Failure(e))
+            finally:
+                put(_DONE)
+
+        threading.Thread(target=contextvars.copy_context().run, args=(pump,),
+                         name="text-stream", daemon=True).start()
+        try:
+            while True:
+                item = await queue.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            stopped.set()
@@ -0,0 +1,78 @@
+"""
+Text-layer quality checks for PDF pages.
+
+A scanned page has no text layer, or one that OCR or a broken font map
+filled with noise: extract_text() then returns an empty or near-empty
+string, control and private-use characters, or unmapped glyphs. assess_text()
+scores a page's extracted text on three signals so that only failing
+pages are sent for vision transcription:
+
+    - density: visible characters per 1000 square points of page area
+    - printable ratio: share of characters a reader can actually voice
+    - glyph failures: U+FFFD replacement characters, "(cid:N)" glyph codes
+      and private-use code points, which mean the font had no Unicode map
+"""
+import re
+import unicodedata
+from typing import Optional
+
+# A US Letter page (612 x 792 pt) needs about 25 visible characters
+MIN_CHAR_DENSITY = 0.05
+
+# Below this share of printable characters the text is mostly noise
+MIN_PRINTABLE_RATIO = 0.9
+
+# Above this share of unmapped glyphs the text cannot be trusted
+MAX_GLYPH_FAILURE_RATIO = 0.05
+
+_CID_PATTERN = re.compile(r"\(cid:\d+\)")
+
+
+def _is_printable(char: str) -> bool:
+    # Cc control, Co private use, Cs surrogate, Cn unassigned
+    return char.isspace() or unicodedata.category(char) not in ("Cc", "Co", "Cs", "Cn")
+
+
+def assess_text(text: Optional[str], page_area: Optional[float] = None) -> dict:
+    """
+    Score the text extracted from one page.
+
+    Args:
+        text: Output of page.extract_text()
+        page_area: Page area in square points (None: density not checked)
+
+    Returns:
+        dict with ok (bool), reason (str or None), chars (visible
+        characters), density, printable_ratio and glyph_failure_ratio
+    """
+    text = text or ""
+    cid_codes = len(_CID_PATTERN.findall(text))
+    text_without_cids = _CID_PATTERN.sub("", text)
+    visible = [c for c in text_without_cids if not c.isspace()]
+    chars = len(visible) + cid_codes
+
+    printable = sum(_is_printable(c) for c in visible)
+    replacements = sum(c == "\ufffd" or unicodedata.category(c) == "Co" for c in visible)
+    printable_ratio = printable / len(visible) if visible else 0.0
+    glyph_failure_ratio = (replacements + cid_codes) / chars if chars else 0.0
+    density = chars / (page_area / 1000) if page_area else None
+
+    if chars == 0:
+        reason = "no text layer"
+    elif density is not None and density < MIN_CHAR_DENSITY:
+        reason = f"{chars} characters on the page"
+    elif glyph_failure_ratio > MAX_GLYPH_FAILURE_RATIO:
+        reason = f"{glyph_failure_ratio:.0%} unmapped glyphs"
+    elif printable_ratio < MIN_PRINTABLE_RATIO:
+        reason = f"{printable_ratio:.0%} printable characters"
+    else:
+        reason = None
+
+    return {
+        "ok": reason is None,
+        "reason": reason,
+        "chars": chars,
+        "density": round(density, 4) if density is not None else None,
+        "printable_ratio": round(printable_ratio, 4),
+        "glyph_failure_ratio": round(glyph_failure_ratio, 4),
+    }
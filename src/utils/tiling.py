@@ -0,0 +1,128 @@
+"""
+Tile layout and merging for very large images.
+
+Models downsample big images before they look at them (Gemini to at most
+3072 px on the long side), so the fine print on posters, maps and
+infographics is lost. plan_tiles() covers an image with overlapping tiles
+near the model's native resolution. Text that crosses a tile edge is then
+whole in at least one tile, and merge_tiles() drops the lines that
+neighbouring tiles repeat.
+"""
+import math
+from typing import List, Optional
+
+# Tile side in pixels, and the minimum share of it shared with neighbours
+TILE_SIZE = 1536
+TILE_OVERLAP = 0.1
+
+# Larger images get bigger tiles rather than more of them
+MAX_TILES = 9
+
+# Longest side of the whole-image overview sent alongside the tiles
+OVERVIEW_DIMENSION = 1024
+
+# Reply a tile prompt asks for when a tile holds only background
+EMPTY_TILE = "EMPTY"
+
+_ROW_NAMES = ("top", "middle", "bottom")
+_COL_NAMES = ("left", "center", "right")
+
+
+def _starts(length: int, tile: int, count: int) -> List[int]:
+    """Evenly spread tile offsets covering [0, length)."""
+    if count == 1:
+        return [0]
+    return [round(i * (length - tile) / (count - 1)) for i in range(count)]
+
+
+def _count(length: int, tile: int, overlap: float) -> int:
+    if length <= tile:
+        return 1
+    step = tile * (1 - overlap)
+    return math.ceil((length - tile) / step) + 1
+
+
+def region_name(row: int, col: int, rows: int, cols: int) -> str:
+    """Human name for a tile's position, e.g. "top left" or "center"."""
+    vertical = _ROW_NAMES[min(2, row * 3 // rows)] if rows > 1 else ""
+    horizontal = _COL_NAMES[min(2, col * 3 // cols)] if cols > 1 else ""
+    if vertical == "middle" and horizontal == "center":
+        return "center"
+    return " ".join(p for p in (vertical, horizontal) if p) or "whole"
+
+
+def plan_tiles(width: int, height: int, tile_size: int = TILE_SIZE,
+               overlap: float = TILE_OVERLAP, max_tiles: int = MAX_TILES) -> List[dict]:
+    """
+    Cover an image with overlapping tiles.
+
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+        tile_size: Tile side in pixels (grown if more than max_tiles are needed)
+        overlap: Minimum share of a tile overlapping each neighbour
+        max_tiles: Upper bound on the number of tiles
+
+    Returns:
+        List of dicts with row, col, rows, cols, region and box
+        ((left, top, right, bottom) in pixels), row by row
+    """
+    while True:
+        cols = _count(width, tile_size, overlap)
+        rows = _count(height, tile_size, overlap)
+        if rows * cols <= max_tiles:
+            break
+        tile_size = math.ceil(tile_size * 1.25)
+
+    tiles = []
+    for row, top in enumerate(_starts(height, min(tile_size, height), rows)):
+        for col, left in enumerate(_starts(width, min(tile_size, width), cols)):
+            tiles.append({
+                "row": row, "col": col, "rows": rows, "cols": cols,
+                "region": region_name(row, col, rows, cols),
+                "box": (left, top, min(width, left + tile_size), min(height, top + tile_size)),
+            })
+    return tiles
+
+
+def merge_tiles(overview: str, tiles: List[dict]) -> str:
+    """
+    One description from the overview and the tile texts.
+
+    Tiles are taken in reading order. A line an earlier neighbouring tile
+    (one sharing an edge or corner, i.e. an overlap) already gave is left
+    out, as are empty tiles; text repeated elsewhere in the image (table
+    cells, labels on a map) is kept.
+
+    Args:
+        overview: Description of the whole image
+        tiles: Tile dicts (see plan_tiles) with a text entry (None if the
+            tile failed)
+
+    Returns:
+        Overview followed by one section per region
+    """
+    sections = [overview.strip()]
+    # (row, col) -> normalized lines of the tiles merged so far
+    seen = {}
+    for tile in tiles:
+        text: Optional[str] = tile.get("text")
+        if not text or text.strip().upper() == EMPTY_TILE:
+            continue
+        overlapping = set()
+        for (row, col), lines_seen in seen.items():
+            if abs(row - tile["row"]) <= 1 and abs(col - tile["col"]) <= 1:
+                overlapping |= lines_seen
+        lines = []
+        normalized_lines = set()
+        for line in text.strip().splitlines():
+            normalized = " ".join(line.split()).lower()
+            normalized_lines.add(normalized)
+            if normalized and normalized in overlapping:
+                continue
+            lines.append(line)
+        seen[(tile["row"], tile["col"])] = normalized_lines
+        body = "\n".join(lines).strip()
+        if body:
+            sections.append(f"{tile['region'].capitalize()}:\n{body}")
+    return "\n\n".join(sections)
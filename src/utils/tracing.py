@@ -0,0 +1,259 @@
+"""
+Tracing for AccessibleAI, built on the OpenTelemetry API.
+
+Spans are created per batch, per file, per PDF page and per model API
+attempt. configure_tracing() installs an SDK provider that writes finished
+spans as JSON lines to a local file; any other OpenTelemetry exporter can be
+passed instead. Without configuration (or without the opentelemetry
+packages) spans are no-ops.
+
+Trace context follows work into pool workers:
+    - threads: wrap the callable with bind_context() before submitting it
+    - processes: send inject_context() to the worker and enter
+      attach_context(carrier) there; spawned workers start without a
+      provider, so also send worker_tracing() and pass it to
+      configure_worker_tracing() first
+"""
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+try:
+    from opentelemetry import context as otel_context
+    from opentelemetry import propagate, trace
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        SpanExporter,
+        SpanExportResult,
+    )
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+TRACER_NAME = "accessible_ai"
+
+_provider = None
+_worker_config = None
+# OpenTelemetry accepts the global provider once per process; spans here
+# use _provider directly, so a later configure_tracing() still takes effect
+_global_provider_set = False
+
+
+class _NoopSpan:
+    """Stand-in span used when opentelemetry is not installed."""
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, attributes):
+        pass
+
+    def add_event(self, name, attributes=None):
+        pass
+
+    def record_exception(self, exception):
+        pass
+
+
+if OTEL_AVAILABLE:
+    class JsonFileSpanExporter(SpanExporter):
+        """
+        Export finished spans as one OpenTelemetry JSON object per line.
+
+        The file is opened in append mode, so worker processes can export
+        to the same file.
+        """
+
+        def __init__(self, path):
+            self.path = Path(path)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._lock = threading.Lock()
+
+        def export(self, spans) -> "SpanExportResult":
+            lines = "".join(finished.to_json(indent=None) + "\n" for finished in spans)
+            try:
+                with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                    f.write(lines)
+            except OSError as e:
+                logger.warning("Could not write spans to %s: %s", self.path, e)
+                return SpanExportResult.FAILURE
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self):
+            pass
+
+
+def configure_tracing(json_path=None, exporter=None, service_name: str = "accessible-ai"):
+    """
+    Install a tracer provider that exports spans.
+
+    Args:
+        json_path: File to append JSON-lines spans to
+        exporter: Any OpenTelemetry SpanExporter (used instead of json_path)
+        service_name: service.name resource attribute
+
+    Returns:
+        The installed TracerProvider, or None if opentelemetry is missing
+    """
+    if not OTEL_AVAILABLE:
+        logger.warning("opentelemetry not installed; tracing disabled")
+        return None
+
+    from opentelemetry.sdk.resources import Resource
+
+    worker_config = None
+    if exporter is None:
+        if json_path is None:
+            raise ValueError("configure_tracing needs json_path or exporter")
+        exporter = JsonFileSpanExporter(json_path)
+        # Worker processes can append to the same file (other exporters
+        # cannot be recreated there)
+        worker_config = {"json_path": str(json_path), "service_name": service_name}
+
+    global _provider, _worker_config, _global_provider_set
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    if not _global_provider_set:
+        # For third-party instrumentation; later providers are not installed
+        trace.set_tracer_provider(provider)
+        _global_provider_set = True
+    _provider = provider
+    _worker_config = worker_config
+    logger.info("Tracing enabled (%s)", json_path or type(exporter).__name__)
+    return provider
+
+
+def worker_tracing() -> Optional[dict]:
+    """
+    Settings a spawned worker process needs to export spans like this one.
+
+    Returns:
+        Picklable dict for configure_worker_tracing(), or None when tracing
+        was not configured with a json_path
+    """
+    return _worker_config
+
+
+def configure_worker_tracing(config: Optional[dict]):
+    """
+    Install the provider described by worker_tracing() in a worker process.
+
+    Does nothing if the process already has one (e.g. a forked worker).
+
+    Args:
+        config: Dict from worker_tracing() in the parent process, or None
+    """
+    if config and _provider is None:
+        configure_tracing(**config)
+
+
+def flush_spans():
+    """Export buffered spans now (worker processes exit without flushing)."""
+    if OTEL_AVAILABLE:
+        provider = _provider or trace.get_tracer_provider()
+        if hasattr(provider, "force_flush"):
+            provider.force_flush()
+
+
+def shutdown_tracing():
+    """Flush pending spans and stop the provider from configure_tracing()."""
+    global _provider, _worker_config
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
+    _worker_config = None
+
+
+@contextmanager
+def span(name: str, attributes: Optional[dict] = None):
+    """
+    Start a span as a child of the current span.
+
+    Args:
+        name: Span name
+        attributes: Span attributes (None values are skipped)
+
+    Yields:
+        The span, for adding attributes and events
+    """
+    if not OTEL_AVAILABLE:
+        yield _NoopSpan()
+        return
+
+    attributes = {k: v for k, v in (attributes or {}).items() if v is not None}
+    # The configured provider, even if it is not the global one (see above)
+    tracer = (_provider or trace.get_tracer_provider()).get_tracer(TRACER_NAME)
+    with tracer.start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+
+def bind_context(fn: Callable) -> Callable:
+    """
+    Capture the current trace context for a callable run in a thread pool.
+
+    Args:
+        fn: Callable to run in a worker thread
+
+    Returns:
+        Wrapper that runs fn with the submitting thread's context attached
+    """
+    if not OTEL_AVAILABLE:
+        return fn
+
+    parent = otel_context.get_current()
+
+    def run_in_context(*args, **kwargs):
+        token = otel_context.attach(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            otel_context.detach(token)
+
+    return run_in_context
+
+
+def inject_context() -> Dict[str, str]:
+    """
+    Serialize the current trace context (W3C traceparent) for another process.
+
+    Returns:
+        Picklable carrier dict to pass to the worker
+    """
+    carrier = {}
+    if OTEL_AVAILABLE:
+        propagate.inject(carrier)
+    return carrier
+
+
+@contextmanager
+def attach_context(carrier: Optional[Dict[str, str]]):
+    """
+    Make a carrier from inject_context() the current context in a worker.
+
+    Args:
+        carrier: Dict produced by inject_context() in the parent process
+    """
+    if not OTEL_AVAILABLE or not carrier:
+        yield
+        return
+
+    token = otel_context.attach(propagate.extract(carrier))
+    try:
+        yield
+    finally:
+        otel_context.detach(token)
+
+
+def current_trace_id() -> Optional[str]:
+    """Hex trace id of the current span, or None outside a trace."""
+    if not OTEL_AVAILABLE:
+        return None
+    span_context = trace.get_current_span().get_span_context()
+    if not span_context.is_valid:
+        return None
+    return format(span_context.trace_id, "032x")
@@ -0,0 +1,162 @@
+"""
+Upload-once file references for large and reused payloads.
+
+Inline parts carry their bytes in every request, so an image described
+concisely and then in detail, a retry, or a fallback-model attempt sends
+the same megabytes again. UploadCache uploads payloads of min_bytes or
+more once through the backend's file API and keeps content hash -> remote
+URI for ttl_seconds, so later requests carry a reference instead.
+
+Entries expire before the provider deletes the file (Gemini keeps uploads
+for 48 hours). Concurrent requests for the same content wait for one
+upload. If an upload fails the payload is sent inline, so uploads never
+make a request fail.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from backends import blob_part, file_part
+from utils.metrics import BYTES_UPLOADED, CACHE_HITS, CACHE_MISSES, record_error
+
+logger = logging.getLogger(__name__)
+
+# Smaller payloads are cheaper inline than as an extra upload request
+DEFAULT_MIN_BYTES = 1024 * 1024
+
+# Gemini deletes uploads after 48 hours
+DEFAULT_TTL_SECONDS = 46 * 3600
+
+# Entries are dropped this long before the provider's own expiry
+EXPIRY_MARGIN_SECONDS = 300
+
+DEFAULT_MAX_ENTRIES = 4096
+
+
+def content_part(uploads: Optional["UploadCache"], mime_type: str, data) -> dict:
+    """
+    Content part for a payload, through an UploadCache if one is given.
+
+    Uploads count towards the bytes-uploaded metric here; inline bytes
+    count when a request carrying them is sent (once per attempt, see
+    ModelFallbackChain), and reused references add nothing.
+    """
+    if uploads is not None:
+        return uploads.part(mime_type, data)
+    return blob_part(mime_type, data)
+
+
+class UploadCache:
+    """
+    Content hash -> uploaded file reference, with a TTL.
+
+    Args:
+        backend: ModelBackend that stores the uploads (supports_upload)
+        min_bytes: Payloads below this size are always sent inline
+        ttl_seconds: How long a reference is reused
+        max_entries: Oldest references are forgotten beyond this many
+        clock: Time source (epoch seconds), for tests
+    """
+
+    name = "uploads"
+
+    def __init__(self, backend, min_bytes: int = DEFAULT_MIN_BYTES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, clock: Callable[[], float] = time.time):
+        self.backend = backend
+        self.min_bytes = min_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._uploading = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _valid(self, key) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry["expires_at"] <= self._clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def part(self, mime_type: str, data) -> dict:
+        """
+        Content part for a payload: a file reference, or inline bytes.
+
+        Args:
+            mime_type: MIME type of the payload
+            data: Payload bytes (or a buffer)
+
+        Returns:
+            A file_part for payloads of min_bytes or more when the backend
+            supports uploads, otherwise a blob_part
+        """
+        if len(data) < self.min_bytes or not self.backend.supports_upload:
+            return blob_part(mime_type, data)
+
+        digest = hashlib.sha256(data).hexdigest()
+        key = (digest, mime_type)
+        with self._lock:
+            entry = self._valid(key)
+            if entry is None:
+                upload_lock = self._uploading.setdefault(key, threading.Lock())
+        if entry is not None:
+            CACHE_HITS.inc(cache=self.name)
+            return file_part(mime_type, entry["uri"], digest, len(data))
+
+        # One upload per content; concurrent callers wait and reuse it
+        with upload_lock:
+            with self._lock:
+                entry = self._valid(key)
+            if entry is None:
+                entry = self._upload(key, mime_type, data)
+            else:
+                CACHE_HITS.inc(cache=self.name)
+        with self._lock:
+            self._uploading.pop(key, None)
+        if entry is None:
+            return blob_part(mime_type, data)
+        return file_part(mime_type, entry["uri"], digest, len(data))
+
+    def _upload(self, key, mime_type: str, data) -> Optional[dict]:
+        CACHE_MISSES.inc(cache=self.name)
+        started = self._clock()
+        try:
+            uploaded = self.backend.upload(bytes(data), mime_type)
+        except Exception as e:
+            record_error(e)
+            logger.warning("Upload of %d-byte %s failed, sending inline: %s",
+                           len(data), mime_type, e)
+            return None
+        BYTES_UPLOADED.inc(len(data))
+
+        expires_at = started + self.ttl_seconds
+        if uploaded.get("expires_at"):
+            expires_at = min(expires_at, uploaded["expires_at"] - EXPIRY_MARGIN_SECONDS)
+        entry = {"uri": uploaded["uri"], "expires_at": expires_at}
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        logger.debug("Uploaded %d-byte %s as %s", len(data), mime_type, entry["uri"])
+        return entry
+
+    def invalidate(self, data=None):
+        """Forget the reference for a payload (e.g. deleted remotely), or all of them."""
+        with self._lock:
+            if data is None:
+                self._entries.clear()
+                return
+            digest = hashlib.sha256(data).hexdigest()
+            for key in [k for k in self._entries if k[0] == digest]:
+                del self._entries[key]
@@ -0,0 +1,19 @@
+"""
+Shared pytest fixtures.
+"""
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+from utils.circuit_breaker import reset_breakers
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers():
+    """Breakers are process-wide; isolate each test."""
+    reset_breakers()
+    yield
+    reset_breakers()
@@ -0,0 +1,109 @@
+"""
+Tests for stale-while-revalidate alt-text serving (agents.alt_text_service).
+"""
+import io
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+from PIL import Image, ImageDraw
+from agents.coordinator import CoordinatorAgent
+from backends import StubBackend
+from utils.preview import local_preview
+from utils.result_cache import ResultCache
+
+
+@pytest.fixture
+def sign(tmp_path):
+    """White lines of text on the top third of a dark blue image."""
+    img = Image.new("RGB", (1200, 800), (20, 30, 100))
+    draw = ImageDraw.Draw(img)
+    for y in range(30, 250, 14):
+        draw.text((20, y), "EXIT 12  NORTH  " * 14, fill="white")
+    path = tmp_path / "sign.png"
+    img.save(path)
+    return path
+
+
+def test_local_preview_reports_size_colors_and_text(sign):
+    """Test the preview finds the dominant colour and the text band."""
+    preview = local_preview(str(sign))
+    assert (preview["width"], preview["height"], preview["format"]) == (1200, 800, "PNG")
+    assert preview["colors"][0] == "dark blue"
+    assert set(preview["text_regions"]) == {"top left", "top center", "top right"}
+    assert preview["alt_text"].startswith("Landscape image, 1200x800 pixels, mostly dark blue")
+
+
+def test_miss_returns_preview_then_upgrades(sign):
+    """Test a first request answers locally and the model result arrives by callback."""
+    backend = StubBackend(latency=0.3)
+    delivered = threading.Event()
+    upgraded = []
+
+    with CoordinatorAgent(backend=backend).alt_text_service() as service:
+        started = time.perf_counter()
+        first = service.describe(str(sign), callback=lambda r: upgraded.append(r) or delivered.set())
+        assert time.perf_counter() - started < backend.latency
+        assert first["source"] == "preview" and first["provisional"]
+        assert service.lookup(str(sign)) is None
+
+        assert delivered.wait(5)
+        assert upgraded[0]["success"]
+        assert service.lookup(str(sign))["alt_text"] == upgraded[0]["alt_text"]
+
+        second = service.describe(str(sign))
+        assert second["source"] == "cache" and second["pending"] is None
+        assert second["alt_text"] == upgraded[0]["alt_text"]
+    assert backend.calls == 1
+
+
+def test_stale_entry_is_served_while_refreshing(sign):
+    """Test a changed file gets its old description now and a new one later."""
+    backend = StubBackend()
+    cache = ResultCache()
+    with CoordinatorAgent(backend=backend, cache=cache).alt_text_service() as service:
+        service.describe(str(sign))["pending"].result(5)
+        old = service.lookup(str(sign))["alt_text"]
+
+        Image.new("RGB", (640, 480), "white").save(sign)
+        stale = service.describe(str(sign))
+        assert stale["source"] == "stale" and stale["alt_text"] == old
+        fresh = stale["pending"].result(5)
+        assert fresh["alt_text"] != old
+        assert service.describe(str(sign))["source"] == "cache"
+    assert backend.calls == 2
+
+
+def test_concurrent_requests_share_one_background_call():
+    """Test repeated requests for in-memory content schedule one description."""
+    buffer = io.BytesIO()
+    Image.new("RGB", (300, 200), "orange").save(buffer, "JPEG")
+    data = buffer.getvalue()
+    backend = StubBackend(latency=0.2)
+
+    with CoordinatorAgent(backend=backend).alt_text_service() as service:
+        results = [service.describe(data) for _ in range(5)]
+        assert len({id(r["pending"]) for r in results}) == 1
+        assert results[0]["preview"]["colors"] == ["orange"]
+        results[0]["pending"].result(5)
+        assert service.describe(data)["source"] == "cache"
+    assert backend.calls == 1
+
+
+def test_unreadable_image_fails_fast(tmp_path):
+    """Test content that is not an image gets an error, not an exception."""
+    path = tmp_path / "broken.png"
+    path.write_bytes(b"\x89PNG\r\n\x1a\n" + b"\x00" * 32)
+    with CoordinatorAgent(backend=StubBackend()).alt_text_service() as service:
+        result = service.describe(str(path))
+        assert not result["success"] and "Error previewing image" in result["error"]
+        assert not result["pending"].result(5)["success"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,144 @@
+"""
+Tests for keyframe sampling of animated images (utils.animation).
+"""
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+from PIL import Image, ImageDraw
+from agents.coordinator import CoordinatorAgent
+from agents.image_agent import CONCISE_PROMPT
+from backends import StubBackend
+from utils import animation
+from utils.animation import sample_keyframes, select_keyframes
+from utils.result_cache import ResultCache
+
+
+class RecordingBackend(StubBackend):
+    """Keeps the contents of every request."""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    def generate(self, model_name, contents, **options):
+        self.requests.append(contents)
+        return super().generate(model_name, contents, **options)
+
+
+# Keyframes both scoring paths pick from the bouncing fixture (frames where
+# the ball does not overlap earlier picks tie; the first of them wins)
+EXPECTED_KEYFRAMES = [0, 14, 16, 18]
+
+
+def ball_frame(x: int, nudge: int = 0) -> Image.Image:
+    """A red ball at x on a white background; nudge changes one pixel."""
+    frame = Image.new("RGB", (160, 120), "white")
+    ImageDraw.Draw(frame).ellipse((x, 40, x + 40, 80), fill="red")
+    frame.putpixel((0, 0), (nudge, nudge, nudge))
+    return frame
+
+
+def save_gif(path: Path, frames, duration: int = 100) -> str:
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=duration, loop=0)
+    return str(path)
+
+
+@pytest.fixture
+def bouncing(tmp_path):
+    """Ball resting left, moving across, resting right: 30 frames."""
+    positions = [0] * 10 + list(range(0, 120, 12)) + [120] * 10
+    frames = [ball_frame(x, nudge=i) for i, x in enumerate(positions)]
+    return save_gif(tmp_path / "bouncing.gif", frames)
+
+
+@pytest.fixture
+def static(tmp_path):
+    """Frames that differ in a single pixel only."""
+    return save_gif(tmp_path / "static.gif", [ball_frame(60, nudge=i) for i in range(8)])
+
+
+@pytest.fixture(params=["numpy", "pil"])
+def scoring(request, monkeypatch):
+    """Run a test with each frame-difference implementation."""
+    if request.param == "numpy" and not animation.NUMPY_AVAILABLE:
+        pytest.skip("numpy not installed")
+    monkeypatch.setattr(animation, "NUMPY_AVAILABLE", request.param == "numpy")
+    return request.param
+
+
+def test_keyframes_are_distinct_and_ordered(scoring):
+    """Test the greedy pick covers each distinct look once."""
+    looks = [Image.new("L", (8, 8), value) for value in (0, 0, 0, 200, 200, 90, 90, 90)]
+    assert select_keyframes(looks, max_frames=4) == [0, 3, 5]
+    assert select_keyframes(looks, max_frames=2) == [0, 3]
+    assert select_keyframes([looks[0]] * 5) == [0]
+
+
+def test_sample_keyframes(bouncing, tmp_path, scoring):
+    """Test an animation yields few keyframes with their timing, stills yield None."""
+    sampled = sample_keyframes(bouncing)
+    indices = [frame["index"] for frame in sampled["frames"]]
+
+    assert sampled["frame_count"] == 30 and sampled["duration_ms"] == 3000
+    assert not sampled["static"] and 2 <= len(indices) <= animation.MAX_KEYFRAMES
+    assert indices == EXPECTED_KEYFRAMES
+    assert indices[0] == 0 and indices == sorted(indices)
+    assert [frame["time_ms"] for frame in sampled["frames"]] == [i * 100 for i in indices]
+    assert sampled["frames"][1]["image"].mode == "RGB"
+
+    still = tmp_path / "still.gif"
+    ball_frame(0).save(still)
+    assert sample_keyframes(str(still)) is None
+
+
+def test_animation_is_described_from_keyframes_in_one_request(bouncing):
+    """Test the keyframes and the motion prompt go out in a single request."""
+    backend = RecordingBackend()
+    result = CoordinatorAgent(backend=backend).process_file(bouncing)["result"]
+
+    assert result["success"] and result["animated"]
+    assert len(backend.requests) == 1
+    prompt, *images = backend.requests[0]
+    assert len(images) == len(result["keyframes"]) > 1
+    assert "keyframes" in prompt and "(30 frames, 3.0 seconds per loop)" in prompt
+    assert CONCISE_PROMPT in prompt
+
+
+def test_static_animation_takes_the_single_frame_path(static):
+    """Test near-identical frames are sent as one still frame with the plain prompt."""
+    backend = RecordingBackend()
+    coordinator = CoordinatorAgent(backend=backend, cache=ResultCache())
+    result = coordinator.process_file(static)["result"]
+
+    assert result["keyframes"] == [0]
+    assert backend.requests[0][0] == CONCISE_PROMPT and len(backend.requests[0]) == 2
+    cached = coordinator.process_file(static)["result"]
+    assert cached["cached"] and cached["keyframes"] == [0]
+
+
+def test_still_images_are_unchanged(tmp_path):
+    """Test single-frame GIFs are still sent as their original bytes."""
+    path = tmp_path / "still.gif"
+    ball_frame(0).save(path)
+    backend = RecordingBackend()
+    result = CoordinatorAgent(backend=backend).process_file(str(path))["result"]
+
+    assert "animated" not in result
+    assert bytes(backend.requests[0][1]["data"]) == path.read_bytes()
+
+
+@pytest.mark.skipif(not animation.NUMPY_AVAILABLE, reason="numpy not installed")
+def test_numpy_and_pil_scoring_agree(bouncing, monkeypatch):
+    """Test both scoring paths pick the same keyframes."""
+    with_numpy = [frame["index"] for frame in sample_keyframes(bouncing)["frames"]]
+    monkeypatch.setattr(animation, "NUMPY_AVAILABLE", False)
+    with_pil = [frame["index"] for frame in sample_keyframes(bouncing)["frames"]]
+    assert with_numpy == with_pil
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
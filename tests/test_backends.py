@@ -0,0 +1,108 @@
+"""
+Tests for model backends and record/replay cassettes.
+"""
+import json
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+from PIL import Image
+from agents.coordinator import CoordinatorAgent
+from backends import (
+    CassetteBackend, CassetteMissError, GenerationResponse, ModelBackend,
+    RecordedAPIError, StubBackend, blob_part, create_backend,
+)
+
+
+class _ScriptedBackend(ModelBackend):
+    """Backend returning queued outcomes (text or exception) in order."""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def generate(self, model_name, contents, **options):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return GenerationResponse(outcome, model_name)
+
+
+class _ServerError(Exception):
+    code = 503
+
+
+def test_stub_backend_is_deterministic():
+    """Test the stub answers identical requests identically."""
+    backend = StubBackend()
+    contents = ["Describe this", blob_part("image/png", b"\x89PNG fake")]
+
+    first = backend.generate("model-a", contents).text
+    second = backend.bind("model-a").generate_content(contents).text
+    other = backend.generate("model-a", ["Describe this", blob_part("image/png", b"other")]).text
+
+    assert first == second
+    assert first != other
+
+
+def test_cassette_round_trip(tmp_path):
+    """Test recorded responses and errors replay without the inner backend."""
+    cassette = tmp_path / "cassette.jsonl"
+    contents = ["Describe this", blob_part("image/jpeg", b"\xff\xd8 jpeg bytes")]
+    inner = _ScriptedBackend([_ServerError("503 overloaded"), "A dog on a beach."])
+
+    recorder = CassetteBackend(cassette, mode="record", inner=inner)
+    with pytest.raises(_ServerError):
+        recorder.generate("model-a", contents)
+    assert recorder.generate("model-a", contents).text == "A dog on a beach."
+
+    # Payload bytes are never written, only their digest
+    entries = [json.loads(line) for line in cassette.read_text().splitlines()]
+    assert len(entries) == 2
+    assert "jpeg bytes" not in cassette.read_text()
+    assert entries[0]["code"] == 503
+
+    player = CassetteBackend(cassette, mode="replay")
+    with pytest.raises(RecordedAPIError) as error:
+        player.generate("model-a", contents)
+    assert error.value.code == 503
+    assert player.generate("model-a", contents).text == "A dog on a beach."
+    # The last interaction repeats once the sequence is exhausted
+    assert player.generate("model-a", contents).text == "A dog on a beach."
+    assert inner.calls == 2
+
+
+def test_cassette_replay_miss(tmp_path):
+    """Test an unrecorded request fails loudly in replay mode."""
+    cassette = tmp_path / "cassette.jsonl"
+    cassette.write_text("")
+    player = create_backend("stub", cassette_path=cassette, cassette_mode="replay")
+
+    with pytest.raises(CassetteMissError):
+        player.generate("model-a", ["never recorded"])
+
+
+def test_coordinator_runs_on_replayed_traffic(tmp_path):
+    """Test a batch recorded once replays through the agents offline."""
+    image_path = tmp_path / "square.png"
+    Image.new("RGB", (16, 16), "blue").save(image_path)
+    cassette = tmp_path / "cassette.jsonl"
+
+    recorder = create_backend("stub", cassette_path=cassette, cassette_mode="record")
+    recorded = CoordinatorAgent(backend=recorder).process_file(str(image_path))
+
+    player = create_backend("gemini", cassette_path=cassette, cassette_mode="replay")
+    replayed = CoordinatorAgent(backend=player).process_file(str(image_path))
+
+    assert recorded["success"] is True
+    assert replayed["success"] is True
+    assert replayed["result"]["alt_text"] == recorded["result"]["alt_text"]
+
+
+if __name__ == "__main__":
+    # Run tests
+    pytest.main([__file__, "-v", "-s"])
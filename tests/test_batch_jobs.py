@@ -0,0 +1,277 @@
+"""
+Tests for offline batch-prediction jobs (utils.batch_jobs and process_offline).
+"""
+import json
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+from PIL import Image
+from agents import coordinator as coordinator_module
+from agents.coordinator import CoordinatorAgent
+from backends import StubBackend
+from utils.batch_jobs import (
+    FAILED, PENDING, RUNNING, SUCCEEDED, GeminiBatchClient, JobWriter, LocalBatchClient,
+    parse_output, parse_request, read_manifest, response_line
+)
+from utils.cancellation import CancellationToken
+from utils.result_cache import ResultCache
+
+SAMPLE_PDF = Path(__file__).parent.parent / "examples" / "sample_pdfs" / "test_doc_1.pdf"
+
+
+class HeldJobClient(LocalBatchClient):
+    """Jobs wait until release() is called."""
+
+    def __init__(self, backend):
+        super().__init__(backend)
+        self.released = threading.Event()
+
+    def _run(self, job_file, model_name):
+        self.released.wait()
+        return super()._run(job_file, model_name)
+
+
+class FailingJobClient(LocalBatchClient):
+    """Every job fails as a whole."""
+
+    def _run(self, job_file, model_name):
+        raise RuntimeError("job expired")
+
+
+@pytest.fixture
+def images(tmp_path):
+    """Three distinct images, a copy of the first and a PDF."""
+    paths = []
+    for name, color in (("red", "red"), ("green", "green"), ("blue", "blue")):
+        path = tmp_path / f"{name}.png"
+        Image.new("RGB", (48, 32), color).save(path)
+        paths.append(str(path))
+    copy = tmp_path / "red-copy.png"
+    copy.write_bytes(Path(paths[0]).read_bytes())
+    return paths + [str(copy), str(SAMPLE_PDF)]
+
+
+def test_job_files_round_trip(tmp_path):
+    """Test requests are sharded into job files readable by the batch format."""
+    written = []
+    writer = JobWriter(tmp_path, max_requests=2,
+                       on_file=lambda path, keys: written.append((path, keys)))
+    for n in range(5):
+        writer.add(f"key-{n}", "Describe", "image/png", bytes([n]) * 10)
+    files = writer.close()
+
+    assert [path for path, _ in written] == files and len(files) == 3
+    assert [keys for _, keys in written] == [["key-0", "key-1"], ["key-2", "key-3"], ["key-4"]]
+    lines = files[0].read_text().splitlines()
+    key, contents = parse_request(lines[1])
+    assert key == "key-1" and contents[0] == "Describe"
+    assert contents[1]["mime_type"] == "image/png" and bytes(contents[1]["data"]) == b"\x01" * 10
+    assert parse_output(json.dumps({"key": "k", "error": {"message": "quota"}})) == (
+        "k", None, "quota")
+
+
+def test_offline_results_land_in_the_cache(tmp_path, images):
+    """Test unique images are sent once and every path gets its description."""
+    backend = StubBackend()
+    coordinator = CoordinatorAgent(backend=backend, cache=ResultCache())
+    summary = coordinator.process_offline(images, job_dir=tmp_path / "jobs", poll_interval=0.01)
+
+    assert summary["success"] and summary["submitted"] == 3 and summary["duplicates"] == 1
+    assert summary["described"] == 4 and summary["skipped"] == [str(SAMPLE_PDF)]
+    assert [job["state"] for job in summary["jobs"]] == [SUCCEEDED]
+    assert backend.calls == 3
+
+    result = coordinator.process_file(images[3])["result"]
+    assert result["cached"] and result["alt_text"].startswith("Stub description")
+    assert backend.calls == 3
+
+
+def test_cached_images_are_not_resubmitted(tmp_path, images):
+    """Test a repeated run skips what the first run described."""
+    backend = StubBackend()
+    coordinator = CoordinatorAgent(backend=backend, cache=ResultCache())
+    coordinator.process_file(images[1])
+    summary = coordinator.process_offline(images[:3], job_dir=tmp_path / "jobs",
+                                          max_requests_per_job=1, poll_interval=0.01)
+    assert summary["cached"] == 1 and summary["submitted"] == 2 and len(summary["jobs"]) == 2
+
+    again = coordinator.process_offline(images[:3], job_dir=tmp_path / "jobs",
+                                        poll_interval=0.01)
+    assert again["cached"] == 3 and again["submitted"] == 0 and again["success"]
+    assert backend.calls == 3
+
+
+def test_failed_jobs_are_reported(tmp_path, images):
+    """Test every image of a failed job gets the error and stays uncached."""
+    coordinator = CoordinatorAgent(backend=StubBackend(), cache=ResultCache())
+    summary = coordinator.process_offline(images[:4] + ["missing.png"],
+                                          client=FailingJobClient(StubBackend()),
+                                          job_dir=tmp_path / "jobs", poll_interval=0.01)
+
+    assert not summary["success"] and summary["jobs"][0]["state"] == FAILED
+    assert set(summary["errors"]) == set(images[:4]) | {"missing.png"}
+    assert all("job expired" in summary["errors"][path] for path in images[:4])
+    assert "not found" in summary["errors"]["missing.png"]
+    assert coordinator.image_agent.cache.get(images[0], model=coordinator.model_name,
+                                             detailed=False) is None
+
+
+def test_waiting_stops_at_timeout_and_cancellation(tmp_path, images):
+    """Test polling gives up on the deadline or token while jobs keep running."""
+    client = HeldJobClient(StubBackend())
+    coordinator = CoordinatorAgent(backend=StubBackend(), cache=ResultCache())
+    try:
+        summary = coordinator.process_offline(images[:1], client=client, timeout=0.05,
+                                              job_dir=tmp_path / "jobs", poll_interval=0.01)
+        assert summary["timed_out"] and not summary["success"]
+        assert "still" in summary["errors"][images[0]]
+
+        token = CancellationToken()
+        token.cancel("shutting down")
+        summary = coordinator.process_offline(images[1:2], client=client, cancel_token=token,
+                                              job_dir=tmp_path / "jobs-2", poll_interval=0.01)
+        assert summary["cancelled"] and not summary["success"]
+        assert list(summary["errors"]) == [images[1]]
+    finally:
+        client.released.set()
+        client.shutdown()
+
+
+def test_repeated_call_collects_jobs_instead_of_resubmitting(tmp_path, images):
+    """Test jobs left running are recorded in the manifest and collected by the next call."""
+    backend = StubBackend()
+    client = HeldJobClient(backend)
+    coordinator = CoordinatorAgent(backend=StubBackend(), cache=ResultCache())
+    job_dir = tmp_path / "jobs"
+    try:
+        first = coordinator.process_offline(images[:1], client=client, timeout=0.05,
+                                            job_dir=job_dir, poll_interval=0.01)
+        assert first["timed_out"] and "repeat the call" in first["errors"][images[0]]
+        manifest = read_manifest(job_dir)
+        assert [entry["name"] for entry in manifest] == [first["jobs"][0]["name"]]
+
+        # Still running: the copy joins the job instead of a new request
+        second = coordinator.process_offline([images[0], images[3]], client=client,
+                                             timeout=0.05, job_dir=job_dir, poll_interval=0.01)
+        assert second["resumed"] == 2 and second["submitted"] == 0
+        assert second["jobs"][0]["resumed"] and len(second["jobs"]) == 1
+
+        client.released.set()
+        third = coordinator.process_offline(images[:2], client=client, job_dir=job_dir,
+                                            poll_interval=0.01)
+    finally:
+        client.released.set()
+        client.shutdown()
+
+    assert third["success"] and third["submitted"] == 1 and third["described"] == 3
+    assert backend.calls == 2
+    assert read_manifest(job_dir) == []
+    assert coordinator.process_file(images[3])["result"]["cached"]
+
+
+def test_jobs_of_a_lost_client_are_resubmitted(tmp_path, images):
+    """Test local jobs that ended with their client are submitted again."""
+    held = HeldJobClient(StubBackend())
+    coordinator = CoordinatorAgent(backend=StubBackend(), cache=ResultCache())
+    try:
+        coordinator.process_offline(images[:1], client=held, timeout=0.05,
+                                    job_dir=tmp_path / "jobs", poll_interval=0.01)
+    finally:
+        held.released.set()
+        held.shutdown()
+
+    client = LocalBatchClient(StubBackend())
+    summary = coordinator.process_offline(images[:1], client=client, job_dir=tmp_path / "jobs",
+                                          poll_interval=0.01)
+    client.shutdown()
+    assert summary["success"] and summary["submitted"] == 1
+    assert summary["jobs"][0]["state"] == FAILED and summary["jobs"][0]["resumed"]
+
+
+def test_own_local_client_is_shut_down(tmp_path, images, monkeypatch):
+    """Test the LocalBatchClient process_offline creates does not outlive the call."""
+    created = []
+
+    class RecordingClient(LocalBatchClient):
+        def __init__(self, backend):
+            super().__init__(backend)
+            self.stopped = False
+            created.append(self)
+
+        def shutdown(self, wait=True):
+            self.stopped = True
+            super().shutdown(wait)
+
+    monkeypatch.setattr(coordinator_module, "LocalBatchClient", RecordingClient)
+    coordinator = CoordinatorAgent(backend=StubBackend(), cache=ResultCache())
+    coordinator.process_offline(images[:1], job_dir=tmp_path / "jobs", poll_interval=0.01)
+    assert len(created) == 1 and created[0].stopped
+
+
+def test_local_results_wait_outside_the_lock(tmp_path):
+    """Test waiting for a job's output does not block status checks of other jobs."""
+    client = HeldJobClient(StubBackend())
+    writer = JobWriter(tmp_path)
+    writer.add("key", "Describe", "image/png", b"\x00")
+    name = client.submit(writer.close()[0], "stub-model")
+    reader = threading.Thread(target=lambda: list(client.results(name)), daemon=True)
+    reader.start()
+    reader.join(0.1)
+
+    checked = []
+    checker = threading.Thread(target=lambda: checked.append(client.status(name)), daemon=True)
+    checker.start()
+    checker.join(1)
+    client.released.set()
+    client.shutdown()
+    assert checked == [(RUNNING, None)]
+
+
+class FakeBatches:
+    """Stands in for the SDK's client.batches and client.files."""
+
+    def __init__(self, state):
+        self.state = state
+
+    def get(self, name):
+        return SimpleNamespace(state=SimpleNamespace(name=self.state), error=None,
+                               dest=SimpleNamespace(file_name="files/out"))
+
+    def download(self, file):
+        return (response_line("a", "A red square") + response_line("b", error="blocked")).encode()
+
+
+@pytest.mark.parametrize("job_state, state", [
+    ("JOB_STATE_QUEUED", PENDING),
+    ("JOB_STATE_PAUSED", PENDING),
+    ("JOB_STATE_UPDATING", RUNNING),
+    ("JOB_STATE_CANCELLING", RUNNING),
+    ("JOB_STATE_PARTIALLY_SUCCEEDED", SUCCEEDED),
+    ("JOB_STATE_EXPIRED", FAILED),
+    ("JOB_STATE_SOMETHING_NEW", PENDING),
+])
+def test_gemini_job_states(job_state, state):
+    """Test in-progress states keep the job pending and partial successes are read."""
+    client = object.__new__(GeminiBatchClient)
+    fake = FakeBatches(job_state)
+    client.client = SimpleNamespace(batches=fake, files=fake)
+    assert client.status("batches/1")[0] == state
+    if state == SUCCEEDED:
+        assert list(client.results("batches/1")) == [
+            ("a", "A red square", None), ("b", None, "blocked")]
+
+
+def test_offline_mode_needs_a_result_cache(images):
+    """Test results have nowhere to go without a cache."""
+    with pytest.raises(ValueError, match="ResultCache"):
+        CoordinatorAgent(backend=StubBackend()).process_offline(images)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
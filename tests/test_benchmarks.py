@@ -0,0 +1,80 @@
+"""
+Tests for the benchmark suite and its fake Gemini backend.
+"""
+import sys
+from pathlib import Path
+
+# Add src and benchmarks to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+
+import pytest
+from google.api_core import exceptions as api_exceptions
+
+from fake_gemini import FakeGemini
+from run_benchmarks import bench_batch, compare_reports, percentile
+
+
+def _outcomes(fake, calls=50):
+    model = fake.bind("fake-model")
+    outcomes = []
+    for _ in range(calls):
+        try:
+            model.generate_content(["prompt"])
+            outcomes.append("ok")
+        except api_exceptions.ResourceExhausted:
+            outcomes.append("429")
+        except api_exceptions.ServiceUnavailable:
+            outcomes.append("503")
+    return outcomes
+
+
+def test_fake_backend_is_deterministic():
+    """Test the same seed yields the same fault sequence."""
+    settings = dict(error_rate=0.2, rate_limit_rate=0.2, seed=7, time_scale=0)
+
+    first = _outcomes(FakeGemini(**settings))
+    second = _outcomes(FakeGemini(**settings))
+
+    assert first == second
+    assert {"ok", "429", "503"} <= set(first)
+
+
+def test_bench_batch_reports_percentiles():
+    """Test a batch benchmark against the fake backend."""
+    image = Path(__file__).parent.parent / "examples/sample_images/test_image_1.jpg"
+    if not image.exists():
+        pytest.skip("Sample image not available")
+
+    fake = FakeGemini(latency="fixed", latency_median=0.01, time_scale=1.0)
+    result = bench_batch([str(image)] * 4, workers=2, fake=fake)
+
+    assert result["success_rate"] == 1.0
+    assert result["fake_backend"]["calls"] == 4
+    assert result["latency"]["p50_ms"] >= 10
+    assert result["throughput_files_per_sec"] > 0
+
+
+def test_compare_reports_flags_regressions():
+    """Test regressions are detected in the right direction per metric."""
+    baseline = {"batch": {"w": {"throughput_files_per_sec": 10.0, "latency": {"p50_ms": 100.0}}},
+                "pdf": {}, "image_preprocess": {}, "memory": {"peak_bytes": 1000}}
+    current = {"batch": {"w": {"throughput_files_per_sec": 5.0, "latency": {"p50_ms": 90.0}}},
+               "pdf": {}, "image_preprocess": {}, "memory": {"peak_bytes": 1050}}
+
+    regressions = compare_reports(current, baseline, tolerance=0.1)
+
+    assert [r["metric"] for r in regressions] == ["batch.w.throughput_files_per_sec"]
+
+
+def test_percentile_nearest_rank():
+    """Test the percentile helper."""
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) == 0.0
+
+
+if __name__ == "__main__":
+    # Run tests
+    pytest.main([__file__, "-v", "-s"])
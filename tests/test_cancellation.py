@@ -0,0 +1,175 @@
+"""
+Tests for deadlines, cancellation and the killable PDF page worker.
+"""
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+import PyPDF2
+from PIL import Image
+from agents.coordinator import CoordinatorAgent
+from agents.pdf_agent import PDFProcessingAgent
+from backends import StubBackend
+from utils.cancellation import CancellationToken, Deadline, DeadlineExceeded
+from utils.circuit_breaker import ModelFallbackChain
+from utils import pdf_worker
+from utils.pdf_worker import PAGE_OK, extract_pages
+
+SAMPLE_PDF = Path(__file__).parent.parent / "examples" / "sample_pdfs" / "test_doc_1.pdf"
+
+
+@pytest.fixture
+def images(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"img{i}.png"
+        Image.new("RGB", (32, 32), (i * 80, 0, 0)).save(path)
+        paths.append(str(path))
+    return paths
+
+
+def test_deadline_remaining_and_earliest():
+    """Test deadlines count down and the tightest one wins."""
+    now = [100.0]
+    clock = lambda: now[0]
+    loose, tight = Deadline(10, clock=clock), Deadline(2, clock=clock)
+
+    assert Deadline.earliest(loose, None, tight, Deadline(None)) is tight
+    assert Deadline.earliest(None).remaining() is None
+    now[0] += 3
+    assert tight.expired and tight.remaining() == 0.0
+    assert loose.remaining() == 7.0
+    with pytest.raises(DeadlineExceeded):
+        tight.raise_if_expired()
+
+
+def test_chain_passes_remaining_time_as_request_timeout():
+    """Test a slow model call is cut off at the deadline."""
+    chain = ModelFallbackChain(["slow"], model_factory=StubBackend(latency=5).bind)
+
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        chain.generate_content(["hi"], deadline=Deadline(0.2))
+    assert time.perf_counter() - start < 2
+
+
+def test_slow_image_times_out(images):
+    """Test a hung API call yields a timed_out result."""
+    coordinator = CoordinatorAgent(backend=StubBackend(latency=5))
+
+    start = time.perf_counter()
+    result = coordinator.process_file(images[0], timeout=0.2)
+
+    assert time.perf_counter() - start < 2
+    assert not result["success"]
+    assert result["timed_out"] and not result["cancelled"]
+    assert result["result"]["timed_out"]
+
+
+def test_cancelled_batch_skips_every_file(images):
+    """Test a pre-cancelled token returns clean cancelled results."""
+    backend = StubBackend()
+    coordinator = CoordinatorAgent(backend=backend)
+    token = CancellationToken()
+    token.cancel("user stopped")
+
+    batch = coordinator.process_batch(images, max_workers=2, cancel_token=token)
+
+    assert batch["cancelled"] == 3 and batch["successful"] == 0
+    assert all(r["error"] == "Cancelled: user stopped" for r in batch["results"])
+    assert backend.calls == 0
+
+
+def test_batch_timeout_marks_unstarted_files(images):
+    """Test files not started before the batch deadline time out quickly."""
+    coordinator = CoordinatorAgent(backend=StubBackend(latency=0.3))
+
+    start = time.perf_counter()
+    batch = coordinator.process_batch(images, schedule="fifo", batch_timeout=0.1)
+
+    assert time.perf_counter() - start < 2
+    assert batch["timed_out"] == 3
+    assert batch["total_files"] == 3 and batch["successful"] == 0
+
+
+def test_page_worker_extracts_in_order():
+    """Test the worker process returns every page's text."""
+    pages = list(extract_pages(str(SAMPLE_PDF), range(3), page_timeout=10))
+    assert [(n, status) for n, status, _ in pages] == [(0, PAGE_OK), (1, PAGE_OK), (2, PAGE_OK)]
+    reader = PyPDF2.PdfReader(str(SAMPLE_PDF))
+    assert pages[1][2] == reader.pages[1].extract_text()
+
+
+def test_page_worker_is_killed_on_overrun(monkeypatch):
+    """Test a page over its budget is skipped and the next page still runs."""
+    original = PyPDF2.PageObject.extract_text
+    second_page = PyPDF2.PdfReader(str(SAMPLE_PDF)).pages[1].extract_text()
+
+    def hang_on_second_page(page, *args, **kwargs):
+        text = original(page, *args, **kwargs)
+        if text == second_page:
+            time.sleep(30)
+        return text
+
+    # Only a forked worker inherits the patch
+    monkeypatch.setattr(pdf_worker, "_start_method", lambda: "fork")
+    monkeypatch.setattr(PyPDF2.PageObject, "extract_text", hang_on_second_page)
+    agent = PDFProcessingAgent(page_timeout=0.3)
+
+    start = time.perf_counter()
+    result = agent.extract_text(str(SAMPLE_PDF), max_pages=3)
+
+    assert time.perf_counter() - start < 10
+    assert result["success"]
+    assert result["pages_timed_out"] == 1
+    assert "--- Page 2 (timed out) ---" in result["text"]
+    assert "--- Page 3 ---" in result["text"]
+
+
+def test_page_worker_stops_when_a_page_fails(monkeypatch):
+    """Test the worker process is stopped before an unexpected error is handled."""
+    import agents.pdf_agent as pdf_agent_module
+
+    children = []
+
+    def fail(page, text):
+        raise RuntimeError("assessment failed")
+
+    def record(error):
+        children.append(multiprocessing.active_children())
+
+    agent = PDFProcessingAgent(page_timeout=10)
+    monkeypatch.setattr(agent, "_needs_vision", fail)
+    monkeypatch.setattr(pdf_agent_module, "record_error", record)
+    result = agent.extract_text(str(SAMPLE_PDF), max_pages=3)
+
+    assert not result["success"] and "assessment failed" in result["error"]
+    assert children == [[]]
+
+
+def test_pdf_cancel_returns_partial_text():
+    """Test cancellation between pages keeps the pages already extracted."""
+    token = CancellationToken()
+    agent = PDFProcessingAgent()
+    pages = agent._extract_in_process
+
+    def cancel_after_first(reader, page_numbers, deadline=None, cancel_token=None):
+        for item in pages(reader, page_numbers, deadline, cancel_token):
+            yield item
+            token.cancel()
+
+    agent._extract_in_process = cancel_after_first
+    result = agent.extract_text(str(SAMPLE_PDF), cancel_token=token)
+
+    assert not result["success"] and result["cancelled"]
+    assert result["page_count"] == 1
+    assert "--- Page 1 ---" in result["text"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,123 @@
+"""
+Tests for the circuit breaker and model fallback chain.
+"""
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+from utils.circuit_breaker import (
+    CircuitBreaker,
+    ModelFallbackChain,
+    AllModelsFailedError,
+    CLOSED,
+    OPEN,
+    HALF_OPEN,
+)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """Model stand-in that fails while `healthy` is False."""
+
+    def __init__(self, name, healthy=True):
+        self.name = name
+        self.healthy = healthy
+        self.calls = 0
+
+    def generate_content(self, contents, **kwargs):
+        self.calls += 1
+        if not self.healthy:
+            raise RuntimeError(f"503 {self.name} unavailable")
+        return FakeResponse(f"described by {self.name}")
+
+
+def test_breaker_opens_after_threshold():
+    """Test that consecutive failures open the circuit."""
+    breaker = CircuitBreaker("m", failure_threshold=2, clock=FakeClock())
+
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.allow_request() is False
+
+
+def test_breaker_half_open_allows_single_probe():
+    """Test the open -> half-open -> closed recovery path."""
+    clock = FakeClock()
+    breaker = CircuitBreaker("m", failure_threshold=1, recovery_timeout=10, clock=clock)
+    breaker.record_failure()
+
+    clock.now = 10
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request() is True
+    assert breaker.allow_request() is False  # only one probe at a time
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_breaker_reopens_when_probe_fails():
+    """Test that a failed half-open probe re-opens the circuit."""
+    clock = FakeClock()
+    breaker = CircuitBreaker("m", failure_threshold=3, recovery_timeout=5, clock=clock)
+    for _ in range(3):
+        breaker.record_failure()
+
+    clock.now = 5
+    assert breaker.allow_request() is True
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_chain_fails_over_and_skips_open_primary():
+    """Test that a tripped primary is skipped without being called."""
+    models = {"primary": FakeModel("primary", healthy=False), "backup": FakeModel("backup")}
+    chain = ModelFallbackChain(
+        ["primary", "backup"], model_factory=models.get, failure_threshold=2
+    )
+
+    for _ in range(2):
+        response, model_used = chain.generate_content(["prompt"])
+        assert model_used == "backup"
+    assert models["primary"].calls == 2
+
+    # Circuit is open now: the primary is not called again
+    response, model_used = chain.generate_content(["prompt"])
+    assert model_used == "backup"
+    assert response.text == "described by backup"
+    assert models["primary"].calls == 2
+
+
+def test_chain_raises_when_all_models_fail():
+    """Test that an exhausted chain reports every model's error."""
+    models = {"a": FakeModel("a", healthy=False), "b": FakeModel("b", healthy=False)}
+    chain = ModelFallbackChain(["a", "b", "a"], model_factory=models.get)
+
+    with pytest.raises(AllModelsFailedError) as excinfo:
+        chain.generate_content(["prompt"])
+
+    assert set(excinfo.value.errors) == {"a", "b"}
+    assert models["a"].calls == 1
+
+
+if __name__ == "__main__":
+    # Run tests
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,114 @@
+"""
+Tests for magic-byte detection and the coordinator's handler registry.
+"""
+import os
+import shutil
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+from PIL import Image
+import utils.file_types as file_types
+from agents.coordinator import CoordinatorAgent
+from backends import StubBackend
+from utils.file_types import detect, register_file_type, sniff, unregister_file_type
+from utils.preflight import expand_paths
+
+SAMPLE_PDF = Path(__file__).parent.parent / "examples" / "sample_pdfs" / "test_doc_1.pdf"
+
+
+@pytest.fixture(autouse=True)
+def fresh_detection_cache():
+    file_types.clear_detection_cache()
+    yield
+
+
+@pytest.mark.parametrize("fmt", ["PNG", "JPEG", "GIF", "WEBP", "BMP"])
+def test_image_signatures(tmp_path, fmt):
+    """Test every supported image format is recognised from its bytes."""
+    path = tmp_path / "image.bin"
+    Image.new("RGB", (8, 8), "red").save(path, format=fmt)
+    detected = detect(path)
+    assert detected["file_type"] == "image" and detected["format"] == fmt
+    assert detected["mime_type"] == f"image/{fmt.lower()}"
+
+
+def test_pdf_header_after_junk_and_non_matches():
+    """Test a PDF header may follow leading junk; text never matches BMP."""
+    assert sniff(b"\n\n%PDF-1.7\n")["format"] == "PDF"
+    assert sniff(b"BMW owners manual") is None
+    assert sniff(b"") is None
+
+
+def test_misnamed_pdf_routes_to_pdf_agent(tmp_path):
+    """Test routing follows content, not the extension."""
+    disguised = tmp_path / "scan.jpg"
+    shutil.copy(SAMPLE_PDF, disguised)
+    backend = StubBackend()
+
+    result = CoordinatorAgent(backend=backend).process_file(str(disguised))
+
+    assert result["success"] and result["file_type"] == "pdf"
+    assert backend.calls == 0
+
+
+def test_renamed_text_is_rejected_before_any_agent(tmp_path):
+    """Test an unrecognised file never reaches an agent or the API."""
+    fake = tmp_path / "photo.png"
+    fake.write_text("<html>not an image</html>")
+    backend = StubBackend()
+
+    result = CoordinatorAgent(backend=backend).process_file(str(fake))
+
+    assert result["file_type"] == "unsupported"
+    assert "unrecognised content" in result["error"]
+    assert backend.calls == 0
+
+
+def test_detection_is_cached_until_the_file_changes(tmp_path, monkeypatch):
+    """Test the leading bytes are read once per file version."""
+    reads = []
+    real_read_head = file_types.read_head
+    monkeypatch.setattr(file_types, "read_head",
+                        lambda source, size: reads.append(source) or real_read_head(source, size))
+    path = tmp_path / "doc"
+    shutil.copy(SAMPLE_PDF, path)
+
+    assert detect(path)["format"] == "PDF"
+    assert detect(str(path))["format"] == "PDF"
+    assert len(reads) == 1
+
+    Image.new("RGB", (8, 8)).save(path, format="PNG")
+    os.utime(path, ns=(0, 1))
+    assert detect(path)["format"] == "PNG"
+    assert len(reads) == 2
+
+
+def test_new_content_type_plugs_in(tmp_path):
+    """Test a registered signature and handler route without coordinator changes."""
+    register_file_type("text", "ALTTEXT", "text/plain", b"ALT:", extensions=(".alt",))
+    try:
+        note = tmp_path / "caption.alt"
+        note.write_text("ALT: a red bicycle")
+        coordinator = CoordinatorAgent(backend=StubBackend())
+        coordinator.register_handler(
+            "text", lambda source, detailed, **limits: {
+                "success": True, "alt_text": Path(source).read_text()[4:].strip(), "error": None}
+        )
+
+        result = coordinator.process_file(str(note))
+
+        assert result["file_type"] == "text"
+        assert result["result"]["alt_text"] == "a red bicycle"
+        assert str(note) in expand_paths([tmp_path])
+    finally:
+        unregister_file_type("ALTTEXT")
+
+    assert detect(note) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -10,7 +10,8 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 import pytest
 import google.generativeai as genai
 from config import Config
-from agents.image_agent import ImageDescriptionAgent
+from agents.image_agent import ImageDescriptionAgent, encode_image
+from backends import ModelBackend, GenerationResponse, StubBackend
 
 
 @pytest.fixture(scope="module")
@@ -29,6 +30,97 @@ def image_agent(setup_api):
     return ImageDescriptionAgent()
 
 
+class _FlakyBackend(ModelBackend):
+    """Backend whose "broken-model" always fails and others echo a description."""
+
+    def generate(self, model_name, contents, **options):
+        if model_name == "broken-model":
+            raise RuntimeError("503 model overloaded")
+        return GenerationResponse("  A red square.  ", model_name)
+
+
+def test_fallback_model_records_model_used(tmp_path):
+    """Test that a failing primary fails over and the result names the fallback."""
+    from PIL import Image
+
+    image_path = tmp_path / "square.png"
+    Image.new("RGB", (8, 8), "red").save(image_path)
+
+    agent = ImageDescriptionAgent(
+        "broken-model", fallback_models=["backup-model"], backend=_FlakyBackend()
+    )
+    result = agent.generate_alt_text(str(image_path))
+
+    assert result["success"] is True
+    assert result["alt_text"] == "A red square."
+    assert result["model_used"] == "backup-model"
+
+
+@pytest.fixture
+def no_pixel_decode(monkeypatch):
+    """Fail the test if any image's pixels are decoded."""
+    from PIL import ImageFile
+
+    def refuse_load(self):
+        raise AssertionError("pixels were decoded")
+
+    monkeypatch.setattr(ImageFile.ImageFile, "load", refuse_load)
+
+
+def _encoded(fmt, size=(64, 48)):
+    import io
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "blue").save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def test_compliant_image_is_sent_as_original_bytes(tmp_path, no_pixel_decode):
+    """Test a supported image within the limits skips the decode entirely."""
+    png = _encoded("PNG")
+    misnamed = tmp_path / "photo.jpg"
+    misnamed.write_bytes(png)
+
+    for source in (str(misnamed), png, memoryview(png)):
+        mime_type, data, passthrough = encode_image(source)
+        assert passthrough and mime_type == "image/png"
+        assert bytes(data) == png
+
+
+def test_oversized_images_are_scaled_and_reencoded():
+    """Test images over the dimension or byte limit are re-encoded to fit."""
+    import io
+    from PIL import Image
+
+    mime_type, data, passthrough = encode_image(_encoded("JPEG", (400, 100)), max_dimension=200)
+    assert not passthrough and mime_type == "image/jpeg"
+    assert Image.open(io.BytesIO(data)).size == (200, 50)
+
+    mime_type, _, passthrough = encode_image(_encoded("PNG"), max_bytes=10)
+    assert not passthrough and mime_type == "image/webp"
+
+    # Formats Gemini does not accept are always converted
+    mime_type, _, passthrough = encode_image(_encoded("BMP"))
+    assert not passthrough and mime_type == "image/webp"
+
+
+def test_agent_uploads_original_bytes(tmp_path, no_pixel_decode):
+    """Test the agent sends the file bytes it was given, with their MIME type."""
+    from utils.metrics import IMAGES_ENCODED
+
+    jpeg = _encoded("JPEG")
+    image_path = tmp_path / "photo.jpg"
+    image_path.write_bytes(jpeg)
+    before = IMAGES_ENCODED.value(mode="passthrough")
+
+    result = ImageDescriptionAgent(backend=StubBackend()).generate_alt_text(str(image_path))
+
+    assert result["success"], result["error"]
+    assert f"{len(jpeg)}-byte image/jpeg" in result["alt_text"]
+    assert IMAGES_ENCODED.value(mode="passthrough") == before + 1
+
+
 def test_agent_initialization(image_agent):
     """Test that the agent initializes correctly."""
     assert image_agent is not None
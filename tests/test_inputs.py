@@ -0,0 +1,141 @@
+"""
+Tests for in-memory inputs (bytes, memoryview and file-like objects).
+"""
+import io
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+from PIL import Image
+from agents.coordinator import CoordinatorAgent
+from backends import StubBackend
+from utils.file_types import detect_file_type
+from utils.inputs import BufferReader, describe_source, read_head, rereadable
+from utils.result_cache import ResultCache
+
+SAMPLE_PDF = Path(__file__).parent.parent / "examples" / "sample_pdfs" / "test_doc_1.pdf"
+
+
+class UploadStream(io.RawIOBase):
+    """Unseekable stream, like a request body read from a socket."""
+
+    def __init__(self, data: bytes):
+        self._data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        return self._data.readinto(target)
+
+
+@pytest.fixture
+def jpeg_bytes():
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), "green").save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def forbid_disk(monkeypatch):
+    """Fail the test if an in-memory input goes through a file (temp files included)."""
+    import builtins
+    real_open = builtins.open
+
+    def guarded_open(file, mode="r", *args, **kwargs):
+        if str(file) != str(SAMPLE_PDF) and not str(file).startswith("/proc/"):
+            raise AssertionError(f"unexpected file access: {file} ({mode})")
+        return real_open(file, mode, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", guarded_open)
+
+
+def test_buffer_reader_reads_without_copying_the_source(jpeg_bytes):
+    """Test the reader slices the caller's buffer in place."""
+    data = bytearray(jpeg_bytes)
+    reader = BufferReader(memoryview(data))
+    assert reader.getbuffer().obj is data
+    assert reader.read(3) == b"\xff\xd8\xff"
+    reader.seek(-2, io.SEEK_END)
+    assert reader.read() == jpeg_bytes[-2:]
+    assert reader.tell() == len(jpeg_bytes)
+
+
+def test_sniffing_and_descriptions(jpeg_bytes):
+    """Test content types come from leading bytes, not names."""
+    assert detect_file_type(jpeg_bytes) == "image"
+    assert detect_file_type(SAMPLE_PDF.read_bytes()) == "pdf"
+    assert detect_file_type(b"plain text") == "unsupported"
+    assert describe_source(str(SAMPLE_PDF)) == str(SAMPLE_PDF)
+    assert describe_source(jpeg_bytes).startswith(f"<bytes {len(jpeg_bytes)} bytes")
+
+    stream = UploadStream(jpeg_bytes)
+    assert read_head(stream) == b""          # never consumes an unseekable stream
+    assert rereadable(stream) == jpeg_bytes
+
+
+@pytest.mark.parametrize("wrap", [bytes, bytearray, memoryview, io.BytesIO, UploadStream])
+def test_image_inputs_are_sent_as_original_bytes(jpeg_bytes, wrap, forbid_disk):
+    """Test every in-memory form is described without touching disk."""
+    backend = StubBackend()
+    coordinator = CoordinatorAgent(backend=backend)
+
+    result = coordinator.process_file(wrap(jpeg_bytes))
+
+    assert result["success"], result["error"]
+    assert result["file_type"] == "image"
+    assert f"{len(jpeg_bytes)}-byte image/jpeg" in result["result"]["alt_text"]
+
+
+def test_pdf_bytes_match_path_extraction(forbid_disk):
+    """Test a PDF buffer extracts the same text as the file."""
+    coordinator = CoordinatorAgent(backend=StubBackend())
+    from_path = coordinator.process_file(str(SAMPLE_PDF))
+    from_bytes = coordinator.process_file(memoryview(SAMPLE_PDF.read_bytes()))
+
+    assert from_bytes["success"] and from_bytes["file_type"] == "pdf"
+    assert from_bytes["result"]["text"] == from_path["result"]["text"]
+
+
+def test_pdf_buffer_in_page_worker():
+    """Test the killable page worker accepts in-memory PDFs."""
+    coordinator = CoordinatorAgent(backend=StubBackend(), pdf_page_timeout=10)
+    result = coordinator.process_file(io.BytesIO(SAMPLE_PDF.read_bytes()))
+    assert result["success"] and result["result"]["page_count"] > 0
+
+
+def test_unknown_content_is_rejected_before_any_agent():
+    """Test bytes that are neither image nor PDF fail as unsupported."""
+    backend = StubBackend()
+    result = CoordinatorAgent(backend=backend).process_file(b"just some text")
+    assert result["file_type"] == "unsupported"
+    assert backend.calls == 0
+
+
+def test_cache_keys_in_memory_content_by_hash(jpeg_bytes):
+    """Test identical uploads hit the cache whatever object carries them."""
+    backend = StubBackend()
+    coordinator = CoordinatorAgent(backend=backend, cache=ResultCache())
+
+    first = coordinator.process_file(jpeg_bytes)
+    second = coordinator.process_file(io.BytesIO(jpeg_bytes))
+
+    assert first["success"] and second["result"]["cached"]
+    assert backend.calls == 1
+
+
+def test_batch_mixes_paths_and_buffers(jpeg_bytes):
+    """Test a batch accepts paths and in-memory inputs together."""
+    coordinator = CoordinatorAgent(backend=StubBackend())
+    batch = coordinator.process_batch([str(SAMPLE_PDF), jpeg_bytes, UploadStream(jpeg_bytes)])
+
+    assert batch["successful"] == 3
+    assert batch["results"][0]["file_path"] == str(SAMPLE_PDF)
+    assert batch["results"][1]["file_path"].startswith("<bytes")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
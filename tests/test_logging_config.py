@@ -0,0 +1,108 @@
+"""
+Tests for logging configuration (structured, async and sampled modes).
+"""
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+from utils.log_context import log_context
+
+
+@pytest.fixture
+def logging_config(tmp_path, monkeypatch):
+    """Import logging_config with logs/ redirected to a temp directory."""
+    monkeypatch.chdir(tmp_path)
+    root = logging.getLogger()
+    level = root.level
+    from utils import logging_config as module
+    yield module
+    # Detach our handlers so other tests keep pytest's logging setup
+    module._stop_listener()
+    root.setLevel(level)
+    for handler in module._installed_handlers:
+        root.removeHandler(handler)
+        handler.close()
+    module._installed_handlers.clear()
+
+
+class _CountingArg:
+    """Log argument that counts how often it is rendered."""
+
+    def __init__(self):
+        self.renders = 0
+
+    def __str__(self):
+        self.renders += 1
+        return "counted"
+
+
+def _read_log(tmp_path):
+    return (tmp_path / "logs" / "accessible_ai.log").read_text().splitlines()
+
+
+def test_structured_async_logging(logging_config, tmp_path):
+    """Test JSON records are written by the queue listener with file context."""
+    logging_config.setup_logging("INFO", structured=True, async_mode=True)
+    logger = logging.getLogger("test.async")
+
+    with log_context("docs/report.pdf"):
+        logger.info("Extracted %d pages", 3)
+    logging_config._stop_listener()
+
+    record = json.loads(_read_log(tmp_path)[-1])
+    assert record["message"] == "Extracted 3 pages"
+    assert record["file"] == "docs/report.pdf"
+    assert record["level"] == "INFO"
+
+
+def test_disabled_level_is_not_formatted(logging_config):
+    """Test lazy %-style arguments are never rendered below the level."""
+    logging_config.setup_logging("WARNING", async_mode=True)
+    arg = _CountingArg()
+
+    logging.getLogger("test.lazy").info("value: %s", arg)
+    logging_config._stop_listener()
+
+    assert arg.renders == 0
+
+
+def test_sampling_keeps_whole_files_and_warnings(logging_config, tmp_path):
+    """Test per-file sampling drops INFO lines of unsampled files only."""
+    logging_config.setup_logging("INFO", sample_rate=0.0)
+    logger = logging.getLogger("test.sampling")
+
+    with log_context("a.jpg"):
+        logger.info("info for a")
+        logger.warning("warning for a")
+    logger.info("outside any file")
+
+    lines = "\n".join(_read_log(tmp_path))
+    assert "info for a" not in lines
+    assert "warning for a" in lines
+    assert "outside any file" in lines
+
+
+def test_sampling_is_deterministic_per_file():
+    """Test the same file is always either kept or dropped."""
+    from utils.logging_config import FileContextFilter
+
+    sampler = FileContextFilter(sample_rate=0.5)
+    decisions = {}
+    for name in [f"file_{i}.png" for i in range(200)] * 2:
+        record = logging.LogRecord("t", logging.INFO, __file__, 1, "msg", None, None)
+        with log_context(name):
+            decisions.setdefault(name, set()).add(sampler.filter(record))
+
+    assert all(len(kept) == 1 for kept in decisions.values())
+    kept_ratio = sum(True in kept for kept in decisions.values()) / len(decisions)
+    assert 0.3 < kept_ratio < 0.7
+
+
+if __name__ == "__main__":
+    # Run tests
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,145 @@
+"""
+Tests for per-file memory accounting and admission control.
+"""
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+from PIL import Image
+from agents.coordinator import CoordinatorAgent
+from backends import StubBackend
+from utils.cancellation import CancellationToken, Deadline, DeadlineExceeded, OperationCancelled
+from utils.memory import MemoryBudget, MemoryMeter, estimate_file_memory
+
+
+def test_estimate_uses_image_header(tmp_path):
+    """Test re-encoded formats are estimated from their decoded raster size."""
+    png = tmp_path / "a.png"
+    bmp = tmp_path / "a.bmp"
+    Image.new("RGB", (500, 400), "white").save(png)
+    Image.new("RGB", (500, 400), "white").save(bmp)
+
+    raster = 500 * 400 * 3
+    assert estimate_file_memory(png) < raster
+    assert estimate_file_memory(bmp) >= 2 * raster
+    assert estimate_file_memory(tmp_path / "missing.pdf") == 0
+
+
+def test_budget_blocks_until_memory_is_released():
+    """Test a file waits while the budget is taken and starts once it frees up."""
+    budget = MemoryBudget(100)
+    budget.acquire(60)
+    admitted = threading.Event()
+
+    def second_file():
+        budget.acquire(60)
+        admitted.set()
+
+    worker = threading.Thread(target=second_file)
+    worker.start()
+    time.sleep(0.05)
+    assert not admitted.is_set()
+
+    budget.release(60)
+    worker.join(timeout=1)
+    assert admitted.is_set()
+    assert budget.peak_in_use == 60
+    assert budget.waits == 1
+
+
+def test_oversized_file_runs_alone():
+    """Test a file larger than the budget is admitted only when nothing runs."""
+    budget = MemoryBudget(100)
+    assert budget.acquire(500) == pytest.approx(0, abs=0.05)
+    assert budget.running == 1
+    budget.release(500)
+    assert budget.stats()["in_use_bytes"] == 0
+
+
+def test_waiting_for_memory_stops_at_deadline_and_cancellation():
+    """Test a file waiting for admission gives up without reserving anything."""
+    budget = MemoryBudget(100)
+    budget.acquire(60)
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded, match="memory admission"):
+        budget.acquire(60, deadline=Deadline(0.15))
+    assert time.monotonic() - start < 1
+
+    token = CancellationToken()
+    threading.Timer(0.05, token.cancel, args=("shutting down",)).start()
+    with pytest.raises(OperationCancelled, match="shutting down"):
+        budget.acquire(60, cancel_token=token)
+    assert budget.stats()["in_use_bytes"] == 60 and budget.running == 1
+
+
+def test_file_times_out_while_waiting_for_memory(tmp_path):
+    """Test the coordinator reports a file whose deadline passed during admission."""
+    path = tmp_path / "image.bmp"
+    Image.new("RGB", (200, 200), "red").save(path)
+    backend = StubBackend()
+    coordinator = CoordinatorAgent(backend=backend, memory_budget_mb=1)
+    coordinator.memory_budget.acquire(1024 * 1024)
+
+    result = coordinator.process_file(str(path), timeout=0.15)
+    assert result["timed_out"] and not result["success"]
+    assert "memory admission" in result["error"]
+    assert backend.calls == 0
+
+
+def test_coordinator_respects_budget(tmp_path):
+    """Test concurrent workers never exceed the memory budget."""
+    files = []
+    for i in range(6):
+        path = tmp_path / f"image_{i}.bmp"
+        Image.new("RGB", (200, 200), "red").save(path)
+        files.append(str(path))
+    estimate = estimate_file_memory(files[0])
+
+    # Room for two files at a time
+    coordinator = CoordinatorAgent(
+        backend=StubBackend(latency=0.02),
+        memory_budget_mb=2.5 * estimate / (1024 * 1024)
+    )
+    batch = coordinator.process_batch(files, max_workers=6)
+
+    assert batch["successful"] == 6
+    assert coordinator.memory_budget.peak_in_use <= coordinator.memory_budget.limit_bytes
+    assert coordinator.memory_budget.peak_in_use == 2 * estimate
+    memory = batch["results"][0]["memory"]
+    assert memory["estimated_bytes"] == estimate
+    assert memory["method"] in ("rss", "tracemalloc")
+
+
+def test_meter_ignores_peaks_from_before_it_started():
+    """Test an earlier allocation peak is not charged to the next block."""
+    tracemalloc.start()
+    try:
+        big = bytearray(20 * 1024 * 1024)
+        del big
+        with MemoryMeter() as meter:
+            small = bytearray(1024 * 1024)
+        with MemoryMeter() as outer:
+            with MemoryMeter() as inner:
+                del small
+            large = bytearray(4 * 1024 * 1024)
+    finally:
+        tracemalloc.stop()
+
+    assert meter.method == "tracemalloc"
+    assert 512 * 1024 < meter.measured_bytes < 2 * 1024 * 1024
+    # Overlapping meters share the peak; a nested one does not reset it
+    assert inner.measured_bytes < 64 * 1024
+    assert outer.measured_bytes >= 3 * 1024 * 1024
+    del large
+
+
+if __name__ == "__main__":
+    # Run tests
+    pytest.main([__file__, "-v", "-s"])
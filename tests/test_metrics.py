@@ -0,0 +1,88 @@
+"""
+Tests for metrics collection and Prometheus export.
+"""
+import sys
+import urllib.request
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+from utils.metrics import (
+    Histogram,
+    Counter,
+    STAGE_SECONDS,
+    PAGES_PROCESSED,
+    time_stage,
+    dump_metrics,
+    start_metrics_server,
+)
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Test Prometheus histogram exposition."""
+    histogram = Histogram("test_seconds", "Test histogram", buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="a")
+    histogram.observe(0.5, stage="a")
+    histogram.observe(5.0, stage="a")
+
+    text = "\n".join(histogram.render())
+
+    assert 'test_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{stage="a",le="1"} 2' in text
+    assert 'test_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 'test_seconds_count{stage="a"} 3' in text
+
+
+def test_counter_labels():
+    """Test counters keep label sets apart."""
+    counter = Counter("test_total", "Test counter")
+    counter.inc(error_class="ValueError")
+    counter.inc(2, error_class="OSError")
+
+    assert counter.value(error_class="ValueError") == 1
+    assert counter.value(error_class="OSError") == 2
+
+
+def test_time_stage_observes():
+    """Test the stage timer records into the global histogram."""
+    before = STAGE_SECONDS.count(component="test", stage="sleep")
+    with time_stage("test", "sleep"):
+        pass
+    assert STAGE_SECONDS.count(component="test", stage="sleep") == before + 1
+
+
+def test_pdf_extraction_is_instrumented():
+    """Test that PDF extraction reports page and stage metrics."""
+    from agents.pdf_agent import PDFProcessingAgent
+
+    test_pdf = Path(__file__).parent.parent / "examples/sample_pdfs/test_doc_1.pdf"
+    if not test_pdf.exists():
+        pytest.skip("Sample PDF not available")
+
+    pages_before = PAGES_PROCESSED.value()
+    result = PDFProcessingAgent().extract_text(str(test_pdf))
+
+    assert PAGES_PROCESSED.value() == pages_before + result["page_count"]
+    assert STAGE_SECONDS.count(component="pdf", stage="page_extraction") > 0
+
+
+def test_dump_and_serve_metrics(tmp_path):
+    """Test file dump and the HTTP endpoint expose the same format."""
+    path = dump_metrics(tmp_path / "metrics.prom")
+    assert "# TYPE accessible_ai_stage_seconds histogram" in path.read_text()
+
+    server = start_metrics_server(port=0, host="127.0.0.1")
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        body = urllib.request.urlopen(url, timeout=5).read().decode("utf-8")
+    finally:
+        server.shutdown()
+
+    assert "accessible_ai_errors_total" in body
+
+
+if __name__ == "__main__":
+    # Run tests
+    pytest.main([__file__, "-v", "-s"])
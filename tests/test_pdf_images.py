@@ -0,0 +1,116 @@
+"""
+Tests for embedded PDF image extraction and description.
+"""
+import io
+import sys
+import threading
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+import PyPDF2
+from PIL import Image
+from agents.coordinator import CoordinatorAgent
+from backends import StubBackend
+from utils.pdf_images import extract_images
+
+
+def _image_pdf(*images) -> PyPDF2.PdfReader:
+    """One page per image, via Pillow's PDF writer."""
+    buffer = io.BytesIO()
+    images[0].save(buffer, "PDF", save_all=True, append_images=list(images[1:]))
+    return PyPDF2.PdfReader(io.BytesIO(buffer.getvalue()))
+
+
+@pytest.fixture
+def logo_pdf(tmp_path):
+    """
+    Four pages: a logo shared by reference on pages 1-2, an identical copy
+    stored as its own object on page 3, and a chart on page 4.
+    """
+    logo = Image.new("RGB", (64, 64), "red")
+    shared = _image_pdf(logo)
+    copies = _image_pdf(logo.copy(), Image.new("RGB", (96, 48), "blue"),
+                        Image.new("RGB", (4, 4), "black"))
+    writer = PyPDF2.PdfWriter()
+    writer.add_page(shared.pages[0])
+    writer.add_page(shared.pages[0])
+    for page in copies.pages:
+        writer.add_page(page)
+    path = tmp_path / "report.pdf"
+    with open(path, "wb") as f:
+        writer.write(f)
+    return path
+
+
+def test_images_deduplicated_by_reference_and_content(logo_pdf):
+    """Test each unique image is decoded once and lists every page it is on."""
+    reader = PyPDF2.PdfReader(str(logo_pdf))
+    images = extract_images(reader, range(len(reader.pages)))
+
+    assert [image["pages"] for image in images] == [[1, 2, 3], [4]]
+    assert [image["placements"] for image in images] == [3, 1]
+    assert (images[1]["width"], images[1]["height"]) == (96, 48)
+    assert images[0]["data"][:3] == b"\xff\xd8\xff"   # JPEG streams are kept as-is
+
+
+def test_descriptions_scale_with_unique_images(logo_pdf):
+    """Test one API call per unique image, attached to every page."""
+    backend = StubBackend()
+    coordinator = CoordinatorAgent(backend=backend, describe_pdf_images=True)
+
+    result = coordinator.process_file(str(logo_pdf))["result"]
+
+    assert result["success"], result["error"]
+    assert backend.calls == 2
+    assert result["image_placements"] == 4
+    assert result["page_images"] == {1: [0], 2: [0], 3: [0], 4: [1]}
+    assert all(image["alt_text"] for image in result["images"])
+    assert "data" not in result["images"][0]
+
+
+def test_image_descriptions_are_bounded(tmp_path):
+    """Test no more than pdf_image_workers descriptions run at once."""
+    reader = _image_pdf(*[Image.new("RGB", (32, 32), (i * 40, 0, 0)) for i in range(6)])
+    writer = PyPDF2.PdfWriter()
+    for page in reader.pages:
+        writer.add_page(page)
+    path = tmp_path / "gallery.pdf"
+    with open(path, "wb") as f:
+        writer.write(f)
+
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    class CountingBackend(StubBackend):
+        def generate(self, model_name, contents, **options):
+            with lock:
+                in_flight.append(1)
+                peak.append(len(in_flight))
+            try:
+                return super().generate(model_name, contents, **options)
+            finally:
+                with lock:
+                    in_flight.pop()
+
+    coordinator = CoordinatorAgent(backend=CountingBackend(latency=0.05),
+                                   describe_pdf_images=True, pdf_image_workers=2)
+    result = coordinator.process_file(str(path))["result"]
+
+    assert len(result["images"]) == 6 and result["images_failed"] == 0
+    assert max(peak) == 2
+
+
+def test_images_off_by_default(logo_pdf):
+    """Test plain text extraction makes no API calls."""
+    backend = StubBackend()
+    result = CoordinatorAgent(backend=backend).process_file(str(logo_pdf))["result"]
+    assert "images" not in result
+    assert backend.calls == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,157 @@
+"""
+Tests for the dry-run planner, result cache and rate limiter.
+"""
+import os
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+from PIL import Image
+from agents.coordinator import CoordinatorAgent
+from backends import StubBackend
+from utils.animation import MAX_KEYFRAMES
+from utils.planner import image_tokens
+from utils.rate_limit import RateLimiter
+from utils.result_cache import ResultCache
+from utils.tiling import plan_tiles
+
+SAMPLE_PDFS = Path(__file__).parent.parent / "examples" / "sample_pdfs"
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """Directory with two images and one unsupported file."""
+    Image.new("RGB", (200, 100), "red").save(tmp_path / "small.png")
+    Image.new("RGB", (1600, 900), "blue").save(tmp_path / "large.jpg")
+    (tmp_path / "notes.txt").write_text("not supported")
+    return tmp_path
+
+
+def test_image_tokens_follow_tiling():
+    """Test small images cost one tile and large ones are tiled at 768px."""
+    assert image_tokens(384, 384) == 258
+    assert image_tokens(1600, 900) == 3 * 2 * 258
+
+
+def test_plan_counts_calls_tokens_and_bytes(corpus):
+    """Test a directory is planned from metadata without calling the model."""
+    backend = StubBackend()
+    coordinator = CoordinatorAgent(backend=backend)
+
+    plan = coordinator.plan_batch(
+        [str(corpus), str(SAMPLE_PDFS / "test_doc_1.pdf")],
+        max_workers=2, api_latency_seconds=2.0
+    )
+
+    assert backend.calls == 0
+    assert plan["images"] == 2
+    assert plan["pdfs"] == 1
+    assert plan["pdf_pages"] == 6
+    assert plan["api_calls"] == 2
+    assert plan["output_tokens"] == 200
+    prompt_tokens = plan["assumptions"]["prompt_tokens"]
+    assert plan["input_tokens"] == 2 * prompt_tokens + 258 + 6 * 258
+    expected_bytes = sum(os.path.getsize(corpus / n) for n in ("small.png", "large.jpg"))
+    assert plan["upload_bytes"] == expected_bytes
+    # Two calls of 2s on two workers
+    assert plan["estimated_wall_seconds"] >= 2.0
+
+
+def test_rate_limit_bounds_wall_time(corpus):
+    """Test the rate limit dominates when it is slower than the workers."""
+    coordinator = CoordinatorAgent(backend=StubBackend(), rate_limit_rpm=6)
+    plan = coordinator.process_batch([str(corpus)], max_workers=8, dry_run=True)
+
+    # Two calls at 6 per minute
+    assert plan["estimated_wall_seconds"] == pytest.approx(20.0)
+
+
+def test_cached_images_are_planned_as_hits(corpus, tmp_path):
+    """Test processed images are served from the cache and planned as hits."""
+    backend = StubBackend()
+    cache = ResultCache(tmp_path / "cache.jsonl")
+    coordinator = CoordinatorAgent(backend=backend, cache=cache)
+    images = [str(corpus / "small.png"), str(corpus / "large.jpg")]
+
+    first = coordinator.process_batch(images)
+    second = coordinator.process_batch(images)
+    assert backend.calls == 2
+    assert [r["result"]["cached"] for r in second["results"]] == [True, True]
+    assert second["results"][0]["result"]["alt_text"] == first["results"][0]["result"]["alt_text"]
+
+    # A modified file is stale; a reloaded cache keeps the rest
+    Image.new("RGB", (200, 100), "green").save(corpus / "small.png")
+    os.utime(corpus / "small.png", ns=(1, 1))
+    reloaded = CoordinatorAgent(backend=backend, cache=ResultCache(tmp_path / "cache.jsonl"))
+    plan = reloaded.plan_batch(images)
+    assert plan["cache"] == {"hit": 1, "stale": 1, "miss": 0}
+    assert plan["api_calls"] == 1
+
+
+def test_plan_counts_calls_of_optional_features(corpus, tmp_path):
+    """Test tiles, PDF images, scanned pages and keyframes add to the plan."""
+    scans = [Image.new("L", (200, 260), 255 - i) for i in range(5)]
+    scans[0].save(tmp_path / "scanned.pdf", "PDF", save_all=True, append_images=scans[1:])
+    frames = [Image.new("RGB", (160, 120), color) for color in ("red", "green", "blue")]
+    frames[0].save(tmp_path / "moving.gif", save_all=True, append_images=frames[1:])
+    files = [str(corpus / "large.jpg"), str(SAMPLE_PDFS / "test_doc_1.pdf"),
+             str(tmp_path / "scanned.pdf"), str(tmp_path / "moving.gif")]
+
+    plain = CoordinatorAgent(backend=StubBackend()).plan_batch(files, include_files=True)
+    assert [entry.get("api_calls", 0) for entry in plain["file_plans"]] == [1, 0, 0, 1]
+
+    coordinator = CoordinatorAgent(backend=StubBackend(), max_image_dimension=1000,
+                                   tile_large_images=True, describe_pdf_images=True,
+                                   scanned_page_fallback=True)
+    plan = coordinator.plan_batch(files, include_files=True, api_latency_seconds=1.0)
+    tiled, pdf, scanned, animated = plan["file_plans"]
+
+    assert tiled["api_calls"] == len(plan_tiles(1600, 900)) + 1
+    # One call per embedded image; five scanned pages go out four per
+    # request, and their page images are described too
+    assert pdf["api_calls"] == 12 and scanned["api_calls"] == 2 + 5
+    # Animations always go out as keyframes in a single call
+    assert animated["api_calls"] == 1 and animated == plain["file_plans"][3]
+    assert animated["input_tokens"] > (plan["assumptions"]["prompt_tokens"]
+                                       + MAX_KEYFRAMES * image_tokens(160, 120))
+    assert plan["api_calls"] == sum(entry["api_calls"] for entry in plan["file_plans"])
+    assert plan["upload_bytes"] > plain["upload_bytes"]
+    assert plan["estimated_wall_seconds"] > plain["estimated_wall_seconds"]
+
+
+def test_feature_calls_change_the_sjf_order(corpus):
+    """Test a tiled image costs more than a small one once tiling is on."""
+    images = [str(corpus / "large.jpg"), str(corpus / "small.png")]
+    plain = CoordinatorAgent(backend=StubBackend())._estimate_costs(images, False)
+    assert plain[images[0]] == pytest.approx(plain[images[1]])
+
+    tiling = CoordinatorAgent(backend=StubBackend(), max_image_dimension=1000,
+                              tile_large_images=True, tile_workers=1)
+    costs = tiling._estimate_costs(images, False)
+    calls = len(plan_tiles(1600, 900)) + 1
+    assert costs[images[0]] == pytest.approx(calls * costs[images[1]])
+
+
+def test_rate_limiter_spaces_calls():
+    """Test the token bucket waits for refills once the burst is used."""
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    limiter = RateLimiter(60, burst=2, clock=lambda: now[0], sleep=sleep)
+    waits = [limiter.acquire() for _ in range(4)]
+
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(1.0)
+    assert waits[3] == pytest.approx(1.0)
+
+
+if __name__ == "__main__":
+    # Run tests
+    pytest.main([__file__, "-v", "-s"])
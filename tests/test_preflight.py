@@ -0,0 +1,89 @@
+"""
+Tests for pre-flight inspection.
+"""
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+import PyPDF2
+from PIL import Image
+from utils.preflight import expand_paths, inspect_file, inspect_files, summarize
+
+SAMPLE_PDF = Path(__file__).parent.parent / "examples" / "sample_pdfs" / "test_doc_1.pdf"
+
+
+def _forbid_content_reads(monkeypatch):
+    """Fail the test if page content or pixel data is touched."""
+    def forbidden(*args, **kwargs):
+        raise AssertionError("inspection read page content or pixels")
+
+    monkeypatch.setattr(PyPDF2.PageObject, "extract_text", forbidden)
+    monkeypatch.setattr(PyPDF2.PageObject, "get_contents", forbidden)
+    monkeypatch.setattr(Image.Image, "load", forbidden)
+
+
+@pytest.fixture
+def no_content_reads(monkeypatch):
+    _forbid_content_reads(monkeypatch)
+
+
+def test_inspect_pdf_metadata(no_content_reads):
+    """Test page count, text layer and image count come from the page tree."""
+    result = inspect_file(SAMPLE_PDF)
+
+    assert result["success"] is True
+    assert result["file_type"] == "pdf"
+    assert result["page_count"] == 6
+    assert result["encrypted"] is False
+    assert result["has_text_layer"] is True
+    assert result["image_count"] == 12
+
+
+def test_quick_mode_reads_page_count_only(no_content_reads):
+    """Test quick mode skips the per-page scan."""
+    result = inspect_file(SAMPLE_PDF, deep=False)
+
+    assert result["page_count"] == 6
+    assert result["has_text_layer"] is None
+    assert result["image_count"] is None
+
+
+def test_encrypted_pdf_reports_page_count(tmp_path):
+    """Test a password-protected PDF is flagged without decrypting it."""
+    writer = PyPDF2.PdfWriter()
+    for _ in range(3):
+        writer.add_blank_page(width=200, height=200)
+    writer.encrypt("secret")
+    encrypted = tmp_path / "locked.pdf"
+    with open(encrypted, "wb") as f:
+        writer.write(f)
+
+    result = inspect_file(encrypted)
+
+    assert result["success"] is True
+    assert result["encrypted"] is True
+    assert result["page_count"] == 3
+    assert result["has_text_layer"] is None
+
+
+def test_inspect_images_and_directories(tmp_path, monkeypatch):
+    """Test image headers, unsupported files and directory expansion."""
+    Image.new("RGB", (320, 200), "blue").save(tmp_path / "banner.png")
+    (tmp_path / "notes.txt").write_text("hello")
+    _forbid_content_reads(monkeypatch)
+
+    files = expand_paths([tmp_path]) + [str(tmp_path / "notes.txt")]
+    results = inspect_files(files)
+
+    assert results[0]["format"] == "PNG"
+    assert (results[0]["width"], results[0]["height"]) == (320, 200)
+    assert results[1]["success"] is False
+    assert summarize(results, 1.0)["failed"] == 1
+
+
+if __name__ == "__main__":
+    # Run tests
+    pytest.main([__file__, "-v", "-s"])
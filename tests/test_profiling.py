@@ -0,0 +1,103 @@
+"""
+Tests for the profiling mode.
+"""
+import json
+import os
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+from PIL import Image
+from agents.coordinator import CoordinatorAgent
+from backends import StubBackend
+from utils.metrics import _stage_hooks
+from utils import profiling
+from utils.profiling import Profiler
+
+
+@pytest.fixture
+def images(tmp_path):
+    """A tiny image and a large incompressible one."""
+    small, large = tmp_path / "small.png", tmp_path / "large.png"
+    Image.new("RGB", (16, 16), "green").save(small)
+    Image.frombytes("RGB", (800, 600), os.urandom(800 * 600 * 3)).save(large)
+    return [str(small), str(large)]
+
+
+@pytest.fixture
+def coordinator():
+    return CoordinatorAgent(backend=StubBackend(latency=0.05))
+
+
+def test_cprofile_attributes_stages_and_files(coordinator, images, tmp_path):
+    """Test cProfile mode writes per-stage and per-file profiles."""
+    profiler = Profiler("cprofile")
+    batch = coordinator.process_batch(images, profiler=profiler)
+    assert batch["successful"] == 2
+    assert profiler._stage_hook not in _stage_hooks
+
+    summary = profiler.summary(top_n=5)
+    assert "image.api_call" in summary["stage_seconds"]
+    assert summary["files_profiled"] == 2
+    assert len(summary["hot_functions"]) == 5
+    heaviest = summary["memory_heavy_files"][0]
+    assert heaviest["file"].endswith("large.png")
+    assert heaviest["peak_bytes"] > 0
+
+    output = profiler.write(tmp_path / "profile")
+    assert (output / "profile.prof").exists()
+    assert (output / "stages" / "image.api_call.prof").exists()
+    index = json.loads((output / "files.json").read_text())
+    assert all((output / entry["profile"]).exists() for entry in index)
+
+
+def test_sampling_writes_folded_stacks(coordinator, images, tmp_path):
+    """Test sampling mode writes flamegraph folded stacks rooted at the stage."""
+    profiler = Profiler("sampling", interval=0.002)
+    coordinator.process_batch(images, max_workers=2, profiler=profiler)
+
+    output = profiler.write(tmp_path / "profile")
+    lines = (output / "profile.folded").read_text().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any(line.startswith("image.api_call;") for line in lines)
+    assert "Top 10 hot functions" in (output / "summary.txt").read_text()
+
+
+def test_cprofile_with_concurrent_workers(coordinator, images, tmp_path):
+    """Test cProfile mode survives files and stages running on several threads."""
+    profiler = Profiler("cprofile")
+    batch = coordinator.process_batch(images * 2, max_workers=4, profiler=profiler)
+    assert batch["successful"] == 4
+
+    output = profiler.write(tmp_path / "profile")
+    extension = "prof" if profiling.PER_THREAD_CPROFILE else "folded"
+    assert (output / f"profile.{extension}").exists()
+    assert "image.api_call" in profiler.summary()["stage_seconds"]
+
+
+def test_cprofile_falls_back_to_sampling_without_per_thread_profiles(
+        coordinator, images, tmp_path, monkeypatch):
+    """Test Python 3.12+ (one cProfile per process) uses the sampling profiler."""
+    monkeypatch.setattr(profiling, "PER_THREAD_CPROFILE", False)
+    profiler = Profiler("cprofile", interval=0.002)
+    assert profiler.mode == "sampling"
+
+    coordinator.process_batch(images, max_workers=2, profiler=profiler)
+    output = profiler.write(tmp_path / "profile")
+    assert (output / "profile.folded").read_text()
+
+
+def test_unknown_mode_rejected():
+    """Test an unsupported profiler mode raises ValueError."""
+    with pytest.raises(ValueError):
+        Profiler("perf")
+
+
+if __name__ == "__main__":
+    # Run tests
+    pytest.main([__file__, "-v", "-s"])
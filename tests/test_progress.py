@@ -0,0 +1,136 @@
+"""
+Tests for batch progress events, ETA and rendering.
+"""
+import asyncio
+import io
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+from PIL import Image
+from agents.coordinator import CoordinatorAgent
+from backends import StubBackend
+from utils import progress
+from utils.progress import (
+    AsyncProgressStream, ProgressTracker, TerminalRenderer, percentile,
+    BATCH_COMPLETED, BATCH_STARTED, FILE_COMPLETED, FILE_FAILED, FILE_STARTED, PAGE_COMPLETED
+)
+
+SAMPLE_PDF = Path(__file__).parent.parent / "examples" / "sample_pdfs" / "test_doc_1.pdf"
+
+
+@pytest.fixture
+def batch_files(tmp_path):
+    image = tmp_path / "photo.png"
+    Image.new("RGB", (32, 32), "blue").save(image)
+    return [str(image), str(SAMPLE_PDF), str(tmp_path / "missing.png")]
+
+
+def test_percentile_nearest_rank():
+    """Test percentiles over a small sample."""
+    values = [0.5, 0.1, 0.4, 0.2, 0.3]
+    assert percentile(values, 50) == 0.3
+    assert percentile(values, 90) == 0.5
+    assert percentile([], 50) is None
+
+
+def test_latency_percentiles_cover_a_bounded_window(monkeypatch):
+    """Test snapshots count every call but rank only the most recent ones."""
+    monkeypatch.setattr(progress, "LATENCY_WINDOW", 10)
+    tracker = ProgressTracker(1)
+    for seconds in [5.0] * 20 + [0.1] * 10:
+        tracker.api_call_finished(seconds)
+
+    latency = tracker.snapshot()["api_latency"]
+    assert latency["count"] == 30
+    assert latency["p50"] == latency["p99"] == 0.1
+
+
+def test_eta_from_costs_and_counts():
+    """Test the ETA is cost-weighted when costs are known."""
+    now = [0.0]
+    tracker = ProgressTracker(3, costs={"a": 1.0, "b": 1.0, "c": 2.0}, clock=lambda: now[0])
+    with tracker:
+        tracker.file_started("a")
+        now[0] = 2.0
+        tracker.file_finished("a", {"success": True})
+        snapshot = tracker.snapshot()
+        assert snapshot["eta_seconds"] == 6.0
+        assert snapshot["files_per_sec"] == 0.5
+
+        tracker.file_started("b")
+        now[0] = 12.0
+        stalled = tracker.snapshot()
+        assert stalled["in_flight"] == 1 and stalled["seconds_since_progress"] == 10.0
+
+    unweighted = ProgressTracker(4, clock=lambda: now[0])
+    with unweighted:
+        now[0] = 14.0
+        unweighted.file_finished("x", {"success": False, "error": "boom"})
+        assert unweighted.snapshot()["eta_seconds"] == 6.0
+
+
+def test_batch_emits_file_page_and_latency_events(batch_files):
+    """Test process_batch reports every file, PDF page and API call."""
+    events = []
+    coordinator = CoordinatorAgent(backend=StubBackend())
+
+    batch = coordinator.process_batch(batch_files, progress=events.append)
+
+    kinds = [e["event"] for e in events]
+    assert kinds[0] == BATCH_STARTED and kinds[-1] == BATCH_COMPLETED
+    assert kinds.count(FILE_STARTED) == 3
+    assert kinds.count(FILE_COMPLETED) == 2 and kinds.count(FILE_FAILED) == 1
+    pages = [e for e in events if e["event"] == PAGE_COMPLETED]
+    assert len(pages) == batch["results"][1]["result"]["page_count"]
+    assert pages[-1]["pages_done"] == len(pages)
+
+    final = events[-1]["progress"]
+    assert final["completed"] == 2 and final["failed"] == 1 and final["eta_seconds"] == 0.0
+    assert final["api_latency"]["count"] == 1 and final["api_latency"]["p50"] is not None
+
+
+def test_broken_callback_does_not_fail_batch(batch_files):
+    """Test an exception in a callback is logged, not raised."""
+    def broken(event):
+        raise RuntimeError("renderer crashed")
+
+    coordinator = CoordinatorAgent(backend=StubBackend())
+    batch = coordinator.process_batch(batch_files[:1], progress=broken)
+    assert batch["successful"] == 1
+
+
+def test_async_stream_yields_until_batch_completes(batch_files):
+    """Test the async iterator receives the events of a threaded batch."""
+    coordinator = CoordinatorAgent(backend=StubBackend())
+
+    async def run():
+        stream = AsyncProgressStream()
+        batch = asyncio.create_task(asyncio.to_thread(
+            coordinator.process_batch, batch_files[:2], progress=stream))
+        kinds = [event["event"] async for event in stream]
+        return kinds, await batch
+
+    kinds, batch = asyncio.run(run())
+    assert kinds[-1] == BATCH_COMPLETED
+    assert kinds.count(FILE_COMPLETED) == 2 and batch["successful"] == 2
+
+
+def test_terminal_renderer_line_per_file_when_not_a_tty(batch_files):
+    """Test the renderer writes one status line per finished file."""
+    out = io.StringIO()
+    coordinator = CoordinatorAgent(backend=StubBackend())
+    coordinator.process_batch(batch_files, progress=TerminalRenderer(out))
+
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 4
+    assert lines[-1].startswith("[DONE]")
+    assert "3/3 files (1 failed)" in lines[-1]
+    assert "pages/s" in lines[-1] and "API p50" in lines[-1]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,104 @@
+"""
+Tests for the typed result objects (agents.results).
+"""
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+from PIL import Image
+from agents.coordinator import CoordinatorAgent
+from agents.results import BatchResult, FileResult, ImageResult, PDFResult
+from backends import StubBackend
+
+SAMPLE_PDF = Path(__file__).parent.parent / "examples" / "sample_pdfs" / "test_doc_1.pdf"
+
+PDF_FIELDS = dict(success=True, total_pages=3, file_path="doc.pdf", pages_timed_out=1,
+                  scanned_pages=[], vision_pages=[], timed_out=False, cancelled=False,
+                  error=None)
+
+
+def test_results_read_like_the_dicts_they_replace(tmp_path):
+    """Test indexing, get, membership, unpacking and to_dict on real results."""
+    path = tmp_path / "photo.png"
+    Image.new("RGB", (64, 64), "red").save(path)
+    result = CoordinatorAgent(backend=StubBackend()).process_file(str(path))
+
+    assert isinstance(result, FileResult) and isinstance(result["result"], ImageResult)
+    assert result["result"]["alt_text"].startswith("Stub description")
+    assert result.get("memory")["estimated_bytes"] > 0
+    assert "tiles" not in result["result"] and result["result"].get("tiles") is None
+    assert {**result["result"]}["image_path"] == str(path)
+
+    plain = result.to_dict()
+    assert type(plain["result"]) is dict
+    assert json.loads(json.dumps(plain)) == plain
+    assert result == plain
+
+
+def test_results_are_slotted_and_typed():
+    """Test unknown fields are rejected rather than silently added."""
+    image = ImageResult.failure("photo.png", "boom")
+    assert not hasattr(image, "__dict__")
+    with pytest.raises(KeyError):
+        image["colour"] = "red"
+    with pytest.raises(AttributeError):
+        ImageResult(colour="red")
+    with pytest.raises(KeyError):
+        PDFResult.failure("doc.pdf", "boom")["text"] = "edited"
+
+
+def test_pdf_text_is_built_from_page_offsets():
+    """Test the lazily built text matches the eager format, page by page."""
+    pages = [(1, "Première page", None), (2, "", "timed out"), (3, "Third – last", None)]
+    result = PDFResult(pages, **PDF_FIELDS)
+
+    expected = "\n".join([
+        "\n\n--- Page 1 ---\n\nPremière page",
+        "\n\n--- Page 2 (timed out) ---\n\n",
+        "\n\n--- Page 3 ---\n\nThird – last",
+    ])
+    assert result["text"] == expected
+    assert result["char_count"] == len(expected) and result["page_count"] == 3
+    assert [(p.number, p.status, p.text) for p in result.pages] == [
+        (1, "ok", "Première page"), (2, "timed out", ""), (3, "ok", "Third – last")]
+    assert PDFResult.failure("doc.pdf", "missing")["text"] is None
+
+
+def test_pdf_results_keep_text_compactly():
+    """Test a held PDF result needs much less memory than the eager dict."""
+    pages = [(n, f"Accessible page {n} – " * 100, None) for n in range(1, 101)]
+
+    tracemalloc.start()
+    compact = PDFResult(pages, **PDF_FIELDS)
+    compact_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    eager = {**PDF_FIELDS, "text": "\n".join(
+        f"\n\n--- Page {n} ---\n\n" + text for n, text, _ in pages)}
+    eager_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert compact_bytes < 0.6 * eager_bytes
+    assert compact["text"] == eager["text"]
+
+
+def test_batch_result_converts_recursively():
+    """Test a batch of typed results serializes as plain data."""
+    coordinator = CoordinatorAgent(backend=StubBackend())
+    batch = coordinator.process_batch([str(SAMPLE_PDF), "missing.png"])
+
+    assert isinstance(batch, BatchResult) and batch["successful"] == 1
+    assert isinstance(batch["results"][0]["result"], PDFResult)
+    plain = json.loads(json.dumps(batch.to_dict()))
+    assert plain["results"][0]["result"]["text"] == batch["results"][0]["result"]["text"]
+    assert "Total Files: 2" in coordinator.generate_summary(batch)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
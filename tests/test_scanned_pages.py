@@ -0,0 +1,133 @@
+"""
+Tests for text-layer quality checks and the scanned-page vision fallback.
+"""
+import io
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+import PyPDF2
+from PIL import Image
+from agents.coordinator import CoordinatorAgent
+from backends import GenerationResponse, StubBackend
+from utils.text_quality import assess_text
+
+SAMPLE_PDF = Path(__file__).parent.parent / "examples" / "sample_pdfs" / "test_doc_1.pdf"
+LETTER_AREA = 612 * 792
+
+
+class TranscribingBackend(StubBackend):
+    """Answers a PDF part with one marked section per page."""
+
+    def __init__(self):
+        super().__init__()
+        self.pages_per_call = []
+
+    def generate(self, model_name, contents, **options):
+        self.calls += 1
+        pdf = next(part["data"] for part in contents if isinstance(part, dict))
+        count = len(PyPDF2.PdfReader(io.BytesIO(pdf)).pages)
+        self.pages_per_call.append(count)
+        return GenerationResponse(
+            "\n".join(f"=== PAGE {n} ===\nTranscribed scan {n} of {count}"
+                      for n in range(1, count + 1)),
+            model_name
+        )
+
+
+class FailingVisionBackend(StubBackend):
+    """Every transcription request fails."""
+
+    def generate(self, model_name, contents, **options):
+        self.calls += 1
+        raise RuntimeError("vision model unavailable")
+
+
+def _mixed_pdf(tmp_path, scans: int) -> Path:
+    """Two born-digital pages followed by image-only (scanned) pages."""
+    buffer = io.BytesIO()
+    images = [Image.new("L", (200, 260), 255 - i) for i in range(scans)]
+    images[0].save(buffer, "PDF", save_all=True, append_images=images[1:])
+    writer = PyPDF2.PdfWriter()
+    digital = PyPDF2.PdfReader(str(SAMPLE_PDF))
+    for page in digital.pages[:2]:
+        writer.add_page(page)
+    for page in PyPDF2.PdfReader(io.BytesIO(buffer.getvalue())).pages:
+        writer.add_page(page)
+    path = tmp_path / "mixed.pdf"
+    with open(path, "wb") as f:
+        writer.write(f)
+    return path
+
+
+def test_text_quality_signals():
+    """Test each signal flags a failing text layer and passes real text."""
+    prose = "Accessible documents need a real text layer for screen readers. " * 5
+    assert assess_text(prose, LETTER_AREA)["ok"]
+    assert assess_text("", LETTER_AREA)["reason"] == "no text layer"
+    assert not assess_text("Page 3", LETTER_AREA)["ok"]                  # density
+    assert "unmapped" in assess_text("(cid:12)(cid:40)" * 40 + prose)["reason"]
+    assert "unmapped" in assess_text("\ue001\ue002 " * 50 + prose)["reason"]
+    assert "printable" in assess_text("\x01\x02\x03" * 100 + prose)["reason"]
+
+
+def test_only_scanned_pages_go_to_vision_in_batches(tmp_path):
+    """Test born-digital pages stay local and scans are batched per request."""
+    backend = TranscribingBackend()
+    coordinator = CoordinatorAgent(backend=backend, scanned_page_fallback=True)
+
+    result = coordinator.process_file(str(_mixed_pdf(tmp_path, scans=5)))["result"]
+
+    assert result["success"], result["error"]
+    assert result["scanned_pages"] == [3, 4, 5, 6, 7]
+    assert result["vision_pages"] == [3, 4, 5, 6, 7]
+    assert backend.pages_per_call == [4, 1]
+    assert "--- Page 3 ---\n\nTranscribed scan 1 of 4" in result["text"]
+    assert "--- Page 7 ---\n\nTranscribed scan 1 of 1" in result["text"]
+    assert "Transcribed" not in result["text"].split("--- Page 3 ---")[0]
+
+
+def test_unsplittable_response_retries_one_page_per_request(tmp_path):
+    """Test a batch answer without page markers falls back to single pages."""
+    backend = StubBackend()
+    coordinator = CoordinatorAgent(backend=backend, scanned_page_fallback=True)
+
+    result = coordinator.process_file(str(_mixed_pdf(tmp_path, scans=2)))["result"]
+
+    assert result["vision_pages"] == [3, 4]
+    assert backend.calls == 3
+    assert "application/pdf" in result["text"]
+
+
+def test_scanned_pages_reported_without_fallback(tmp_path):
+    """Test scans are flagged but cost nothing when the fallback is off."""
+    backend = StubBackend()
+    result = CoordinatorAgent(backend=backend).process_file(
+        str(_mixed_pdf(tmp_path, scans=2)))["result"]
+
+    assert result["scanned_pages"] == [3, 4] and result["vision_pages"] == []
+    assert backend.calls == 0
+    assert [page.status for page in result.pages][2:] == ["no text layer"] * 2
+
+
+def test_failed_transcription_fails_the_page(tmp_path):
+    """Test a scan the vision model could not read keeps no text and is reported."""
+    coordinator = CoordinatorAgent(backend=FailingVisionBackend(), scanned_page_fallback=True)
+
+    result = coordinator.process_file(str(_mixed_pdf(tmp_path, scans=2)))["result"]
+
+    assert not result["success"] and result["error"] == (
+        "Vision transcription failed for pages [3, 4]")
+    assert result["vision_pages"] == []
+    pages = result.pages
+    assert pages[0].status == "ok" and pages[0].text
+    assert [(page.status, page.text) for page in pages[2:]] == [
+        ("vision transcription failed; no text layer", "")] * 2
+    assert "--- Page 3 (vision transcription failed; no text layer) ---" in result["text"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,113 @@
+"""
+Tests for priority and shortest-job-first scheduling.
+"""
+import sys
+import threading
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+from PIL import Image
+from agents.coordinator import CoordinatorAgent
+from backends import StubBackend
+from utils.scheduler import Scheduler
+
+SAMPLE_PDF = Path(__file__).parent.parent / "examples" / "sample_pdfs" / "test_doc_1.pdf"
+
+
+def _recording(coordinator):
+    """Record the order process_file is called in."""
+    order = []
+    process_file = coordinator.process_file
+
+    def recorded(file_path, detailed=False, **kwargs):
+        order.append(Path(file_path).name)
+        return process_file(file_path, detailed, **kwargs)
+
+    coordinator.process_file = recorded
+    return order
+
+
+def test_queue_orders_by_priority_then_cost():
+    """Test queued jobs start by priority, then cheapest first."""
+    gate = threading.Event()
+    started = []
+    with Scheduler(max_workers=1, interactive_slots=0) as scheduler:
+        scheduler.submit(gate.wait)
+        futures = [
+            scheduler.submit(started.append, "bulk", priority="bulk", cost=0.1),
+            scheduler.submit(started.append, "slow", priority="normal", cost=5.0),
+            scheduler.submit(started.append, "quick", priority="normal", cost=1.0),
+        ]
+        gate.set()
+        for future in futures:
+            future.result(timeout=2)
+
+    assert started == ["quick", "slow", "bulk"]
+
+
+def test_interactive_job_runs_while_bulk_workers_are_busy():
+    """Test an interactive job starts on the reserved slot."""
+    gate = threading.Event()
+    with Scheduler(max_workers=1, interactive_slots=1) as scheduler:
+        bulk = scheduler.submit(gate.wait, priority="bulk")
+        queued_bulk = scheduler.submit(lambda: "queued", priority="bulk")
+        interactive = scheduler.submit(lambda: "interactive", priority="interactive")
+
+        assert interactive.result(timeout=2) == "interactive"
+        assert not bulk.done()
+        assert not queued_bulk.done()
+        gate.set()
+        assert queued_bulk.result(timeout=2) == "queued"
+
+
+def test_batch_runs_cheapest_files_first(tmp_path):
+    """Test SJF moves a quick image ahead of a multi-page PDF."""
+    image = tmp_path / "icon.png"
+    Image.new("RGB", (32, 32), "white").save(image)
+    coordinator = CoordinatorAgent(backend=StubBackend())
+    order = _recording(coordinator)
+
+    batch = coordinator.process_batch([str(SAMPLE_PDF), str(image)])
+
+    assert order == ["icon.png", "test_doc_1.pdf"]
+    # Results stay in input order
+    assert batch["results"][0]["file_type"] == "pdf"
+
+    order.clear()
+    coordinator.process_batch([str(SAMPLE_PDF), str(image)], schedule="fifo")
+    assert order == ["test_doc_1.pdf", "icon.png"]
+
+
+def test_priority_list_must_match_the_files(tmp_path):
+    """Test a per-file priority list of the wrong length is rejected up front."""
+    image = tmp_path / "icon.png"
+    Image.new("RGB", (32, 32), "white").save(image)
+    backend = StubBackend()
+    coordinator = CoordinatorAgent(backend=backend)
+
+    for priority in (["bulk"], ["bulk", "normal", "interactive"]):
+        with pytest.raises(ValueError, match="3 entries for 2 files|1 entries for 2 files"):
+            coordinator.process_batch([str(image), str(image)], priority=priority)
+    assert backend.calls == 0
+
+
+def test_submit_file_on_shared_scheduler(tmp_path):
+    """Test interactive submissions go through the shared scheduler."""
+    image = tmp_path / "photo.png"
+    Image.new("RGB", (32, 32), "black").save(image)
+
+    with pytest.raises(RuntimeError):
+        CoordinatorAgent(backend=StubBackend()).submit_file(str(image))
+
+    with Scheduler(max_workers=1) as scheduler:
+        coordinator = CoordinatorAgent(backend=StubBackend(), scheduler=scheduler)
+        result = coordinator.submit_file(str(image)).result(timeout=5)
+    assert result["success"] is True
+
+
+if __name__ == "__main__":
+    # Run tests
+    pytest.main([__file__, "-v", "-s"])
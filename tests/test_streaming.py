@@ -0,0 +1,133 @@
+"""
+Tests for streamed alt-text (utils.streaming and stream_alt_text/stream_file).
+"""
+import asyncio
+import io
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+from PIL import Image
+from agents.coordinator import CoordinatorAgent
+from backends import CassetteBackend, StubBackend
+from utils.cancellation import CancellationToken
+from utils.result_cache import ResultCache
+
+SAMPLE_PDF = Path(__file__).parent.parent / "examples" / "sample_pdfs" / "test_doc_1.pdf"
+
+
+class FlakyPrimaryBackend(StubBackend):
+    """The primary model fails before sending any text."""
+
+    def generate_stream(self, model_name, contents, **options):
+        if model_name == "primary":
+            raise ConnectionError("503 Service unavailable")
+        yield from super().generate_stream(model_name, contents, **options)
+
+
+@pytest.fixture
+def photo():
+    buffer = io.BytesIO()
+    Image.new("RGB", (320, 240), "teal").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_first_chunk_arrives_before_generation_finishes(photo):
+    """Test chunks are delivered as produced and add up to the full text."""
+    backend = StubBackend(latency=0.05, chunk_delay=0.05)
+    stream = CoordinatorAgent(backend=backend).image_agent.stream_alt_text(photo)
+
+    started = time.perf_counter()
+    chunks = iter(stream)
+    next(chunks)
+    first_chunk = time.perf_counter() - started
+    rest = list(chunks)
+    total = time.perf_counter() - started
+
+    assert len(rest) >= 5 and first_chunk < total / 3
+    assert stream.result["success"] and stream.result["alt_text"] == stream.text
+    expected = CoordinatorAgent(backend=StubBackend()).image_agent.generate_alt_text(photo)
+    assert stream.text == expected["alt_text"]
+
+
+def test_async_iteration(photo):
+    """Test the same stream can be consumed with async for."""
+    stream = CoordinatorAgent(backend=StubBackend()).stream_file(photo)
+
+    async def consume():
+        return [chunk async for chunk in stream]
+
+    chunks = asyncio.run(consume())
+    assert len(chunks) > 1 and "".join(chunks) == stream.result["result"]["alt_text"]
+    assert stream.result["success"] and stream.result["file_type"] == "image"
+
+
+def test_failure_before_first_chunk_falls_back(photo):
+    """Test a model failing before any text is replaced by the fallback."""
+    coordinator = CoordinatorAgent(model_name="primary", fallback_models=["backup"],
+                                   backend=FlakyPrimaryBackend())
+    stream = coordinator.image_agent.stream_alt_text(photo)
+    assert "".join(stream).startswith("Stub description")
+    assert stream.result["model_used"] == "backup"
+
+
+def test_cancel_mid_stream(photo):
+    """Test cancellation between chunks ends the stream with a cancelled result."""
+    token = CancellationToken()
+    stream = CoordinatorAgent(backend=StubBackend()).image_agent.stream_alt_text(
+        photo, cancel_token=token)
+    received = []
+    for chunk in stream:
+        received.append(chunk)
+        token.cancel("user closed the page")
+
+    assert len(received) == 1
+    assert stream.result["cancelled"] and not stream.result["success"]
+
+
+def test_cached_and_non_image_results_stream_whole(photo):
+    """Test a cache hit and a PDF each arrive as one chunk."""
+    coordinator = CoordinatorAgent(backend=StubBackend(), cache=ResultCache())
+    first = coordinator.stream_file(photo)
+    assert len(list(first)) > 1
+    second = coordinator.stream_file(photo)
+    assert list(second) == [first.text] and second.result["result"]["cached"]
+
+    pdf = coordinator.stream_file(str(SAMPLE_PDF))
+    assert len(list(pdf)) == 1 and pdf.result["file_type"] == "pdf"
+    assert pdf.text == pdf.result["result"]["text"]
+
+
+def test_streams_are_admitted_and_measured_like_process_file(photo):
+    """Test a streamed image holds its memory budget share until the stream ends."""
+    coordinator = CoordinatorAgent(backend=StubBackend(), memory_budget_mb=64)
+    stream = coordinator.stream_file(photo)
+    chunks = iter(stream)
+    next(chunks)
+    assert coordinator.memory_budget.running == 1
+    rest = list(chunks)
+
+    assert rest and coordinator.memory_budget.running == 0
+    assert coordinator.memory_budget.in_use == 0
+    memory = stream.result["memory"]
+    assert memory["estimated_bytes"] > 0 and memory["method"]
+    assert memory["admission_wait_seconds"] == 0.0
+
+
+def test_cassette_records_streams_as_whole_text(tmp_path, photo):
+    """Test a recorded stream replays with the same text."""
+    path = tmp_path / "cassette.jsonl"
+    recorder = CassetteBackend(path, mode="record", inner=StubBackend())
+    recorded = CoordinatorAgent(backend=recorder).image_agent.stream_alt_text(photo)
+    list(recorded)
+
+    replayed = CoordinatorAgent(backend=CassetteBackend(path)).image_agent.stream_alt_text(photo)
+    assert list(replayed) == [recorded.text]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
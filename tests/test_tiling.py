@@ -0,0 +1,142 @@
+"""
+Tests for tiled description of large images (utils.tiling).
+"""
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+from PIL import Image
+from agents.coordinator import CoordinatorAgent
+from backends import StubBackend
+from utils.tiling import merge_tiles, plan_tiles
+
+
+class FailingTileBackend(StubBackend):
+    """Fails requests for the bottom-right tile."""
+
+    def generate(self, model_name, contents, **options):
+        if "bottom right" in contents[0]:
+            self.calls += 1
+            raise RuntimeError("500 Internal error")
+        return super().generate(model_name, contents, **options)
+
+
+class FailingOverviewBackend(StubBackend):
+    """Fails the whole-image request; tile requests succeed."""
+
+    def generate(self, model_name, contents, **options):
+        if "part (row" not in contents[0]:
+            self.calls += 1
+            raise RuntimeError("overview unavailable")
+        return super().generate(model_name, contents, **options)
+
+
+@pytest.fixture
+def poster(tmp_path):
+    """A 4000x3000 image, beyond the 3072 px sent as-is."""
+    path = tmp_path / "poster.png"
+    Image.new("RGB", (4000, 3000), (240, 230, 200)).save(path)
+    return path
+
+
+def test_tiles_cover_the_image_with_overlap():
+    """Test the plan covers every pixel and neighbours share at least the overlap."""
+    tiles = plan_tiles(4000, 3000, tile_size=1536, overlap=0.1)
+    assert len(tiles) == 9
+    assert {tile["region"] for tile in tiles} >= {"top left", "center", "bottom right"}
+
+    for axis, extent in ((0, 4000), (1, 3000)):
+        spans = sorted({(tile["box"][axis], tile["box"][axis + 2]) for tile in tiles})
+        assert spans[0][0] == 0 and spans[-1][1] == extent
+        for (_, end), (start, _) in zip(spans, spans[1:]):
+            assert end - start >= 0.1 * 1536
+
+    # Huge images get bigger tiles, not more of them
+    assert len(plan_tiles(20000, 20000, max_tiles=9)) <= 9
+    assert plan_tiles(800, 600) == [{"row": 0, "col": 0, "rows": 1, "cols": 1,
+                                     "region": "whole", "box": (0, 0, 800, 600)}]
+
+
+def test_merge_drops_empty_tiles_and_repeated_lines():
+    """Test text seen in an overlap appears once and background tiles are skipped."""
+    tiles = [
+        {"row": 0, "col": 0, "region": "top left", "text": "SUMMER FAIR\nJune 12"},
+        {"row": 0, "col": 1, "region": "top right", "text": "june  12\nMain Street"},
+        {"row": 1, "col": 0, "region": "bottom left", "text": "EMPTY"},
+        {"row": 1, "col": 1, "region": "bottom right", "text": None},
+    ]
+    merged = merge_tiles("A festival poster.", tiles)
+    assert merged == ("A festival poster.\n\nTop left:\nSUMMER FAIR\nJune 12"
+                      "\n\nTop right:\nMain Street")
+
+
+def test_merge_keeps_text_repeated_in_distant_tiles():
+    """Test only neighbouring tiles are deduplicated, and never a tile against itself."""
+    tiles = [
+        {"row": 0, "col": 0, "region": "top left", "text": "Exit\nExit"},
+        {"row": 0, "col": 1, "region": "top", "text": "Cafe"},
+        {"row": 0, "col": 2, "region": "top right", "text": "Exit"},
+    ]
+    merged = merge_tiles("A floor plan.", tiles)
+    assert merged == ("A floor plan.\n\nTop left:\nExit\nExit\n\nTop:\nCafe"
+                      "\n\nTop right:\nExit")
+
+
+def test_large_image_tiles_in_about_one_call(poster):
+    """Test the overview and tiles are described concurrently."""
+    backend = StubBackend(latency=0.5)
+    coordinator = CoordinatorAgent(backend=backend, tile_large_images=True)
+
+    started = time.perf_counter()
+    result = coordinator.process_file(str(poster))["result"]
+    elapsed = time.perf_counter() - started
+
+    assert result["success"] and result["tiled"]
+    assert backend.calls == 10 and len(result["tiles"]) == 9
+    # Sequential calls would take 10 x latency (decode and crops add a little)
+    assert elapsed < 3 * backend.latency
+    assert result["long_description"].startswith(result["alt_text"])
+    assert "Center:" in result["long_description"]
+
+
+def test_small_images_are_not_tiled(tmp_path):
+    """Test images within max_image_dimension take the single-call path."""
+    path = tmp_path / "photo.png"
+    Image.new("RGB", (640, 480), "white").save(path)
+    backend = StubBackend()
+    coordinator = CoordinatorAgent(backend=backend, tile_large_images=True)
+    result = coordinator.process_file(str(path))["result"]
+
+    assert result["success"] and not result["tiled"]
+    assert backend.calls == 1 and "tiles" not in result
+
+
+def test_failed_tile_keeps_the_description(poster):
+    """Test one failing tile is reported without failing the image."""
+    backend = FailingTileBackend()
+    coordinator = CoordinatorAgent(backend=backend, tile_large_images=True)
+    result = coordinator.process_file(str(poster))["result"]
+
+    assert result["success"] and result["tiles_failed"] == 1
+    failed = [tile for tile in result["tiles"] if tile["error"]]
+    assert [tile["region"] for tile in failed] == ["bottom right"]
+    assert "Bottom right:" not in result["long_description"]
+
+
+def test_failed_overview_skips_the_queued_tiles(poster):
+    """Test tile calls not yet started are dropped once the overview fails."""
+    backend = FailingOverviewBackend(latency=0.2)
+    coordinator = CoordinatorAgent(backend=backend, tile_large_images=True, tile_workers=2)
+    result = coordinator.process_file(str(poster))["result"]
+
+    assert not result["success"] and "overview unavailable" in result["error"]
+    # The overview and the tile running next to it, not all nine tiles
+    assert backend.calls <= 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,162 @@
+"""
+Tests for tracing spans and trace-context propagation.
+"""
+import io
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+
+pytest.importorskip("opentelemetry.sdk.trace")
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from utils import tracing
+from utils.pdf_worker import PAGE_OK, extract_pages
+from utils.tracing import (
+    JsonFileSpanExporter,
+    attach_context,
+    configure_tracing,
+    flush_spans,
+    current_trace_id,
+    inject_context,
+    shutdown_tracing,
+    span,
+)
+
+SAMPLE_PDF = Path(__file__).parent.parent / "examples" / "sample_pdfs" / "test_doc_1.pdf"
+
+_exporter = InMemorySpanExporter()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def tracer_provider(tmp_path_factory):
+    """Install an in-memory provider (the global provider can be set once)."""
+    # Worker processes have their own memory: they report through a file
+    span_file = tmp_path_factory.mktemp("spans") / "spans.jsonl"
+    provider = configure_tracing(json_path=span_file)
+    provider.add_span_processor(SimpleSpanProcessor(_exporter))
+    provider.span_file = span_file
+    yield provider
+
+
+@pytest.fixture
+def exporter():
+    _exporter.clear()
+    return _exporter
+
+
+def _trace_id_in_worker(carrier):
+    """Runs in a worker process."""
+    with attach_context(carrier):
+        return current_trace_id()
+
+
+def test_batch_spans_follow_thread_workers(exporter):
+    """Test file and page spans nest under the batch span across threads."""
+    from agents.coordinator import CoordinatorAgent
+
+    sample_dir = Path(__file__).parent.parent / "examples/sample_pdfs"
+    pdf_files = [str(f) for f in sorted(sample_dir.glob("*.pdf"))]
+    if not pdf_files:
+        pytest.skip("No sample PDFs available")
+
+    coordinator = CoordinatorAgent()
+    coordinator.process_batch(pdf_files, max_workers=2)
+
+    spans = exporter.get_finished_spans()
+    batch = [s for s in spans if s.name == "process_batch"]
+    files = [s for s in spans if s.name == "process_file"]
+    pages = [s for s in spans if s.name == "pdf.page"]
+
+    assert len(batch) == 1
+    assert len(files) == len(pdf_files)
+    assert all(s.parent.span_id == batch[0].context.span_id for s in files)
+    file_ids = {s.context.span_id for s in files}
+    assert pages and all(s.parent.span_id in file_ids for s in pages)
+    assert {s.context.trace_id for s in spans} == {batch[0].context.trace_id}
+
+
+def test_context_propagates_to_process_worker(exporter):
+    """Test the injected carrier continues the trace in another process."""
+    with span("parent"):
+        parent_trace_id = current_trace_id()
+        carrier = inject_context()
+
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        worker_trace_id = pool.submit(_trace_id_in_worker, carrier).result()
+
+    assert parent_trace_id is not None
+    assert worker_trace_id == parent_trace_id
+
+
+def test_pdf_page_worker_continues_the_trace(exporter, tracer_provider):
+    """Test the page-extraction child process reports spans in the parent's trace."""
+    with span("parent"):
+        parent_trace_id = current_trace_id()
+        pages = list(extract_pages(str(SAMPLE_PDF), [0], page_timeout=30))
+
+    assert pages[0][1] == PAGE_OK
+    records = [json.loads(line) for line in tracer_provider.span_file.read_text().splitlines()]
+    workers = [r for r in records if r["name"] == "pdf.page_worker"]
+    assert workers and workers[-1]["context"]["trace_id"] == f"0x{parent_trace_id}"
+    assert workers[-1]["parent_id"] is not None
+
+
+def test_streamed_files_get_a_file_span(exporter):
+    """Test stream_file() is traced like process_file()."""
+    from agents.coordinator import CoordinatorAgent
+    from backends import StubBackend
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), "teal").save(buffer, "PNG")
+    stream = CoordinatorAgent(backend=StubBackend()).stream_file(buffer.getvalue())
+    list(stream)
+
+    files = [s for s in exporter.get_finished_spans() if s.name == "process_file"]
+    assert len(files) == 1 and files[0].attributes["file.type"] == "image"
+    assert files[0].attributes["success"] and "memory.estimated_bytes" in files[0].attributes
+
+
+def test_tracing_can_be_configured_again(tmp_path, monkeypatch):
+    """Test spans follow a second configure_tracing(), also after a shutdown."""
+    # Restored afterwards: the module fixture's provider stays in place
+    monkeypatch.setattr(tracing, "_provider", tracing._provider)
+    monkeypatch.setattr(tracing, "_worker_config", tracing._worker_config)
+
+    for name in ("first", "second"):
+        configure_tracing(json_path=tmp_path / f"{name}.jsonl")
+        with span(name):
+            pass
+        flush_spans()
+        shutdown_tracing()
+
+    for name in ("first", "second"):
+        records = [json.loads(line) for line in (tmp_path / f"{name}.jsonl").read_text()
+                   .splitlines()]
+        assert [r["name"] for r in records] == [name]
+
+
+def test_json_file_exporter(exporter, tmp_path):
+    """Test spans are written as one JSON object per line."""
+    with span("outer", {"file.path": "a.pdf"}):
+        with span("inner"):
+            pass
+
+    path = tmp_path / "spans.jsonl"
+    JsonFileSpanExporter(path).export(exporter.get_finished_spans())
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r["name"] for r in records] == ["inner", "outer"]
+    assert records[1]["attributes"]["file.path"] == "a.pdf"
+
+
+if __name__ == "__main__":
+    # Run tests
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,158 @@
+"""
+Tests for upload-once file references (utils.uploads).
+"""
+import hashlib
+import sys
+import threading
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+from PIL import Image
+from agents.coordinator import CoordinatorAgent
+from backends import StubBackend, blob_part, file_part, request_key
+from utils.circuit_breaker import ModelFallbackChain
+from utils.metrics import BYTES_UPLOADED
+from utils.uploads import UploadCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def photo(tmp_path):
+    """A noisy PNG of a few hundred KB (sent as its original bytes)."""
+    path = tmp_path / "photo.png"
+    Image.frombytes("RGB", (320, 320), bytes(range(256)) * 1200).save(path)
+    return path
+
+
+def test_concise_then_detailed_uploads_once(photo):
+    """Test a second prompt on the same image references the first upload."""
+    backend = StubBackend()
+    coordinator = CoordinatorAgent(backend=backend, uploads=UploadCache(backend, min_bytes=1024))
+    sent_before = BYTES_UPLOADED.value()
+
+    concise = coordinator.process_file(str(photo))
+    detailed = coordinator.process_file(str(photo), detailed=True)
+
+    assert concise["success"] and detailed["success"]
+    assert backend.calls == 2 and backend.uploads == 1
+    assert BYTES_UPLOADED.value() - sent_before == photo.stat().st_size
+
+
+class UnavailableModel:
+    def generate_content(self, contents, **options):
+        raise RuntimeError("503 overloaded")
+
+
+def test_inline_bytes_count_once_per_attempt():
+    """Test a fallback attempt counts the inline payload again; references count nothing."""
+    backend = StubBackend()
+    models = {"primary": UnavailableModel(), "fallback": backend.bind("fallback")}
+    chain = ModelFallbackChain(["primary", "fallback"], model_factory=models.get)
+    data = b"x" * 1000
+    uri = backend.upload(data, "image/png")["uri"]
+    sent_before = BYTES_UPLOADED.value()
+
+    _, model_used = chain.generate_content(["Describe", blob_part("image/png", data)])
+    assert model_used == "fallback"
+    assert BYTES_UPLOADED.value() - sent_before == 2000
+
+    digest = hashlib.sha256(data).hexdigest()
+    chain.generate_content(["Describe", file_part("image/png", uri, digest, len(data))])
+    assert BYTES_UPLOADED.value() - sent_before == 2000
+
+
+def test_small_payloads_and_unsupported_backends_stay_inline():
+    """Test payloads below min_bytes, or without an upload API, are inline."""
+    backend = StubBackend()
+    uploads = UploadCache(backend, min_bytes=100)
+    assert "data" in uploads.part("image/png", b"x" * 99)
+    assert "file_uri" in uploads.part("image/png", b"x" * 100)
+
+    backend.supports_upload = False
+    assert "data" in UploadCache(backend, min_bytes=1).part("image/png", b"y" * 100)
+    assert backend.uploads == 1
+
+
+def test_references_expire_before_the_provider_deletes_them():
+    """Test the TTL, and a provider expiry shorter than the TTL."""
+    clock = FakeClock()
+    backend = StubBackend()
+    uploads = UploadCache(backend, min_bytes=1, ttl_seconds=3600, clock=clock)
+
+    first = uploads.part("image/png", b"payload")
+    clock.now += 3599
+    assert uploads.part("image/png", b"payload")["file_uri"] == first["file_uri"]
+    clock.now += 1
+    assert uploads.part("image/png", b"payload")["file_uri"] != first["file_uri"]
+
+    # The provider keeps this one for 15 minutes; it is reused for 10
+    short_lived = []
+    backend.upload = lambda data, mime_type: short_lived.append(1) or {
+        "uri": f"stub://short/{len(short_lived)}", "expires_at": clock.now + 900}
+    uploads.part("image/png", b"other")
+    clock.now += 599
+    assert uploads.part("image/png", b"other")["file_uri"] == "stub://short/1"
+    clock.now += 1
+    assert uploads.part("image/png", b"other")["file_uri"] == "stub://short/2"
+
+    uploads.invalidate(b"other")
+    assert len(uploads) == 1
+
+
+def test_concurrent_requests_share_one_upload():
+    """Test simultaneous requests for the same content wait for one upload."""
+    gate = threading.Event()
+    backend = StubBackend()
+    real_upload = backend.upload
+
+    def slow_upload(data, mime_type):
+        gate.wait(1)
+        return real_upload(data, mime_type)
+
+    backend.upload = slow_upload
+    uploads = UploadCache(backend, min_bytes=1)
+    parts = []
+    threads = [threading.Thread(target=lambda: parts.append(uploads.part("image/png", b"same")))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    gate.set()
+    for thread in threads:
+        thread.join()
+
+    assert backend.uploads == 1
+    assert {part["file_uri"] for part in parts} == {"stub://files/1"}
+
+
+def test_failed_upload_falls_back_to_inline():
+    """Test an upload error never fails the request."""
+    backend = StubBackend()
+
+    def broken(data, mime_type):
+        raise ConnectionError("upload endpoint unavailable")
+
+    backend.upload = broken
+    part = UploadCache(backend, min_bytes=1).part("application/pdf", b"%PDF-1.4")
+    assert part == blob_part("application/pdf", b"%PDF-1.4")
+
+
+def test_references_match_inline_requests_in_cassettes():
+    """Test recorded inline traffic replays for uploaded parts and vice versa."""
+    data = b"\x89PNG\r\n\x1a\n" + b"0" * 64
+    reference = UploadCache(StubBackend(), min_bytes=1).part("image/png", data)
+    assert request_key("m", ["describe", reference]) == request_key(
+        "m", ["describe", blob_part("image/png", data)])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])